@@ -1,12 +1,21 @@
 """Keras callback that cooperatively cancels training when requested.
 
-The DELETE endpoint only sets the job's status to CANCELLED in the DB; this
-callback is what actually stops the Keras loop. It checks the status at each
-epoch boundary and sets ``model.stop_training`` so ``fit`` exits cleanly.
+The DELETE endpoint sets the job's status to CANCELLED in the DB and signals
+its ``cancel_event`` (see ``services.cancellation``); this callback is what
+actually stops the Keras loop. It checks every ``check_every`` training and
+evaluation batches, and at each epoch boundary, so a cancelled job stops
+within a few batches instead of at the end of a long epoch. Reading the event
+is free; the DB status, the fallback for a job the signal cannot reach, is
+polled at most every ``poll_interval`` seconds. On cancellation it sets
+``model.stop_training`` (and ``stop_evaluating``) so Keras exits cleanly.
 """
 
+import threading
+import time
+
 import tensorflow as tf
 
+from app.config import get_settings
 from app.models.training_job import TrainingJob, TrainingStatus
 from app.shared.logging_config import get_logger
 
@@ -14,25 +23,67 @@ logger = get_logger(__name__)
 
 
 class CancellationCheckCallback(tf.keras.callbacks.Callback):
-    """Stop training when the job's DB status becomes CANCELLED.
+    """Stop training when the job is cancelled.
 
     Args:
         job_id: The training job to watch.
         session_factory: Zero-arg callable returning a fresh DB ``Session``.
+        cancel_event: Optional event set when the job is cancelled.
+        check_every: Batches between checks (``CANCEL_CHECK_BATCHES`` by default).
+        poll_interval: Minimum seconds between DB status polls
+            (``CANCEL_POLL_INTERVAL`` by default).
     """
 
-    def __init__(self, job_id, session_factory) -> None:
+    def __init__(
+        self,
+        job_id,
+        session_factory,
+        cancel_event: threading.Event | None = None,
+        check_every: int | None = None,
+        poll_interval: float | None = None,
+    ) -> None:
         super().__init__()
+        settings = get_settings()
         self.job_id = job_id
         self.session_factory = session_factory
+        self.cancel_event = cancel_event
+        self.check_every = max(1, check_every if check_every is not None else settings.cancel_check_batches)
+        self.poll_interval = poll_interval if poll_interval is not None else settings.cancel_poll_interval
+        self._last_poll: float | None = None
         # Side-effect flag so tests (and callers) can confirm a cancellation fired.
         self.cancelled = False
 
     def on_epoch_begin(self, epoch: int, logs: dict = None) -> None:
         """Set ``model.stop_training`` if the job has been cancelled."""
+        self._check(f"epoch {epoch}")
+
+    def on_train_batch_end(self, batch: int, logs: dict = None) -> None:
+        """Check for a cancellation every ``check_every`` batches."""
+        if (batch + 1) % self.check_every == 0:
+            self._check(f"batch {batch}")
+
+    def on_test_batch_end(self, batch: int, logs: dict = None) -> None:
+        """Also stop validation and evaluation passes early."""
+        if (batch + 1) % self.check_every == 0:
+            self._check(f"evaluation batch {batch}")
+        if self.cancelled:
+            self.model.stop_evaluating = True
+
+    def _check(self, where: str) -> bool:
+        if not self.cancelled and self._is_cancelled():
+            logger.info("Cancellation detected for job %s at %s", self.job_id, where)
+            self.cancelled = True
+        if self.cancelled:
+            self.model.stop_training = True
+        return self.cancelled
+
+    def _is_cancelled(self) -> bool:
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            return True
+        now = time.monotonic()
+        if self._last_poll is not None and now - self._last_poll < self.poll_interval:
+            return False
+        self._last_poll = now
         with self.session_factory() as session:
             job = session.get(TrainingJob, self.job_id)
-            if job is not None and job.status == TrainingStatus.CANCELLED:
-                logger.info("Cancellation detected for job %s at epoch %d", self.job_id, epoch)
-                self.cancelled = True
-                self.model.stop_training = True
+            return job is not None and job.status == TrainingStatus.CANCELLED
@@ -3,6 +3,8 @@
 Replaces the old ``CustomProgressBar`` text emissions: instead of broadcasting
 formatted strings to every client, it writes structured metrics to the
 ``training_metric`` table and emits them to the Socket.IO room for this job only.
+Rows are written off the training thread, in batches, by the process's
+``MetricWriter``; it is flushed before the job's final status is recorded.
 """
 
 import asyncio
@@ -11,9 +13,10 @@ from datetime import UTC, datetime
 import tensorflow as tf
 
 from app.models.training_job import TrainingJob, TrainingStatus
-from app.models.training_metric import TrainingMetric
+from app.services.metric_writer import MetricWriter, metric_writer
 from app.shared.constants import SOCKETIO_DL_NAMESPACE, SOCKETIO_LISTENER
 from app.shared.logging_config import get_logger
+from app.socketio_instance import emit_relay
 
 logger = get_logger(__name__)
 
@@ -26,8 +29,16 @@ def schedule_room_emit(sio_instance, loop, job_id: str, data: dict) -> None:
     """Thread-safely emit ``data`` to a job's Socket.IO room from a worker thread.
 
     Shared by the per-epoch metrics emit and the terminal status emit (and the
-    failure path in ``model_run``). A dropped event must never crash training.
+    failure path in ``model_run``). In a training worker process the event is
+    relayed to the API process instead. A dropped event must never crash training.
     """
+    relay = emit_relay()
+    if relay is not None:
+        try:
+            relay(job_id, data)
+        except Exception:  # noqa: BLE001 - a dropped progress event must not kill training
+            logger.warning("Failed to relay room emit for job %s", job_id)
+        return
     if loop is None or not loop.is_running():
         logger.warning("No running event loop for room emit (job %s)", job_id)
         return
@@ -50,22 +61,24 @@ class MetricsCallback(tf.keras.callbacks.Callback):
             (callbacks run in a worker thread, so they own their sessions).
         sio_instance: The Socket.IO server used to emit progress.
         loop: The main event loop, for thread-safe coroutine scheduling.
+        writer: Where metric rows go; the process's ``metric_writer()`` by default.
     """
 
-    def __init__(self, job_id, session_factory, sio_instance, loop) -> None:
+    def __init__(self, job_id, session_factory, sio_instance, loop, writer: MetricWriter | None = None) -> None:
         super().__init__()
         self.job_id = job_id
         self.session_factory = session_factory
         self.sio = sio_instance
         self.loop = loop
+        self.writer = writer or metric_writer()
         self.start_time = None
 
     def on_train_begin(self, logs: dict = None) -> None:
-        """Mark the job RUNNING and record the start time."""
+        """Mark the job RUNNING and record the start time (unless it was cancelled already)."""
         self.start_time = _utcnow()
         with self.session_factory() as session:
             job = session.get(TrainingJob, self.job_id)
-            if job is not None:
+            if job is not None and job.status != TrainingStatus.CANCELLED:
                 job.status = TrainingStatus.RUNNING
                 job.started_at = self.start_time
                 session.add(job)
@@ -86,19 +99,22 @@ class MetricsCallback(tf.keras.callbacks.Callback):
             ),
         }
 
-        # 1. Persist each present metric as its own row.
-        with self.session_factory() as session:
-            for name, value in payload.items():
-                if name != "epoch" and value is not None:
-                    session.add(
-                        TrainingMetric(
-                            job_id=self.job_id,
-                            epoch=epoch + 1,
-                            metric_name=name,
-                            metric_value=value,
-                        )
-                    )
-            session.commit()
+        # 1. Queue each present metric as its own row for the metric writer.
+        recorded_at = _utcnow()
+        self.writer.add(
+            self.session_factory,
+            [
+                {
+                    "job_id": self.job_id,
+                    "epoch": epoch + 1,
+                    "metric_name": name,
+                    "metric_value": value,
+                    "recorded_at": recorded_at,
+                }
+                for name, value in payload.items()
+                if name != "epoch" and value is not None
+            ],
+        )
 
         # 2. Emit to this job's room only (no global broadcast).
         self._emit({"type": "metrics", **payload})
@@ -109,8 +125,10 @@ class MetricsCallback(tf.keras.callbacks.Callback):
         A cancelled job sets ``model.stop_training`` which ends ``fit`` cleanly
         and still fires ``on_train_end``; guarding on the current status keeps us
         from overwriting CANCELLED/FAILED with COMPLETED. Emits a terminal status
-        event so subscribers know the run is over.
+        event so subscribers know the run is over. Buffered metrics are written
+        first, so a finished job's history is complete.
         """
+        self.writer.flush()
         final_status = None
         with self.session_factory() as session:
             job = session.get(TrainingJob, self.job_id)
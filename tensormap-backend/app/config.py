@@ -15,6 +15,21 @@ class Settings(BaseSettings):
     cors_allowed_origins: str = "http://localhost:3300"
     upload_folder: str = "./data"
     max_content_length: int = 200 * 1024 * 1024
+    thumbnail_cache_size: int = 256 * 1024 * 1024
+    # Tabular jobs stream CSVs larger than this from disk unless the job says otherwise.
+    tabular_stream_threshold: int = 1024 * 1024 * 1024
+    # Training metrics are buffered and written in one transaction once this many
+    # rows wait or the oldest has waited this many seconds (see metric_writer).
+    metric_flush_rows: int = 500
+    metric_flush_interval: float = 2.0
+    # A training job checks for cancellation every this many batches; its DB
+    # status (the fallback to the in-memory signal) is polled at most every
+    # this many seconds.
+    cancel_check_batches: int = 20
+    cancel_poll_interval: float = 5.0
+    # Processes applying a preprocess pipeline: 0 = one per core (capped at 8);
+    # 1 = apply inline in the request thread.
+    preprocess_workers: int = 0
     api_base: str = "/api/v1"
     debug: bool = False
 
@@ -3,6 +3,7 @@ Creates the FastAPI app, configures CORS and exception handlers, mounts
 routers, and wraps the ASGI app with Socket.IO for real-time training progress.
 """
 
+import asyncio
 import os
 from contextlib import asynccontextmanager
 
@@ -24,19 +25,21 @@ from app.exceptions import (
 from app.middleware import RequestIDMiddleware, RequestLoggingMiddleware
 from app.routers import data_process, data_upload, deep_learning, health, layers, project, training
 from app.shared.logging_config import get_logger
-from app.socketio_instance import sio
+from app.socketio_instance import bind_event_loop, sio
 
 logger = get_logger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Run Alembic migrations on startup, then yield control to the app."""
+    """Run Alembic migrations and startup recovery, then yield control to the app."""
     from alembic import command
     from alembic.config import Config
     from alembic.runtime.migration import MigrationContext
     from alembic.script import ScriptDirectory
 
+    bind_event_loop(asyncio.get_running_loop())
+
     if os.environ.get("TESTING"):
         logger.info("TESTING mode — skipping Alembic migrations")
     else:
@@ -74,8 +77,34 @@ async def lifespan(app: FastAPI):
             orphan_recovery()
         except Exception as e:
             logger.error(f"Orphan recovery error: {e}")
+
+        # Start the training workers now so they have TensorFlow imported
+        # before the first job arrives, and resume the queue left at shutdown.
+        from app.services.training_service import dispatch_queued_jobs, training_pool
+
+        try:
+            training_pool().start()
+        except Exception as e:
+            logger.error(f"Training worker start error: {e}")
+        try:
+            dispatch_queued_jobs()
+        except Exception as e:
+            logger.error(f"Training queue error: {e}")
+
+        # Uploads still waiting to be profiled when the process stopped. Legacy
+        # uploads that were never profiled are left to scripts/backfill_file_profiles.py.
+        try:
+            from app.services.file_profiling import resume_pending_profiles
+
+            resume_pending_profiles()
+        except Exception as e:
+            logger.error(f"Profile recovery error: {e}")
     yield
 
+    from app.services.training_service import shutdown_training_pool
+
+    shutdown_training_pool()
+
 
 app = FastAPI(title="TensorMap API", lifespan=lifespan)
 settings = get_settings()
@@ -1,17 +1,22 @@
-from app.models.data import DataFile, DataProcess, ImageProperties
+from app.models.data import DataFile, DataProcess, ImageProperties, ProfileStatus
+from app.models.dataset_version import DatasetVersion
 from app.models.ml import ModelBasic, ModelConfigs
 from app.models.project import Project
 from app.models.training_job import TrainingJob, TrainingStatus
 from app.models.training_metric import TrainingMetric
+from app.models.upload_session import UploadSession
 
 __all__ = [
     "DataFile",
     "DataProcess",
+    "DatasetVersion",
     "ImageProperties",
     "ModelBasic",
     "ModelConfigs",
+    "ProfileStatus",
     "Project",
     "TrainingJob",
     "TrainingMetric",
     "TrainingStatus",
+    "UploadSession",
 ]
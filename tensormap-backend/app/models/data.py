@@ -1,8 +1,10 @@
 import uuid as uuid_pkg
 from datetime import datetime
+from enum import StrEnum
 from typing import TYPE_CHECKING, Optional
 
 from sqlalchemy import JSON, CheckConstraint, Column, DateTime, ForeignKey, UniqueConstraint, func
+from sqlalchemy import Enum as SAEnum
 from sqlalchemy.dialects.postgresql import UUID as PgUUID
 from sqlmodel import Field, Relationship, SQLModel
 
@@ -11,6 +13,25 @@ if TYPE_CHECKING:
     from app.models.project import Project
 
 
+class ProfileStatus(StrEnum):
+    """Progress of the background profiling of an uploaded file.
+
+    A CSV upload is PENDING until a worker picks it up (RUNNING) and ends
+    READY — columns, row count, dtypes, read schema, null counts, sidecar and
+    row index in place — or FAILED (e.g. the CSV cannot be parsed). ZIPs are
+    READY on upload. Rows uploaded before profiling existed have no status.
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    READY = "ready"
+    FAILED = "failed"
+
+
+def _enum_values(enum_cls) -> list[str]:
+    return [member.value for member in enum_cls]
+
+
 class DataFile(SQLModel, table=True):
     """Uploaded dataset file (CSV or ZIP image archive)."""
 
@@ -19,9 +40,33 @@ class DataFile(SQLModel, table=True):
     id: uuid_pkg.UUID = Field(sa_column=Column(PgUUID(as_uuid=True), primary_key=True, default=uuid_pkg.uuid4))
     file_name: str = Field(max_length=100, nullable=False)
     file_type: str = Field(max_length=10, nullable=False)
-    disk_name: str = Field(max_length=150, nullable=False)
+    # Path under the upload folder; content-addressed, so DataFiles with
+    # identical uploads share one stored blob (see services/blob_store.py).
+    disk_name: str = Field(max_length=150, nullable=False, index=True)
     columns: list[str] | None = Field(default=None, sa_column=Column(JSON, nullable=True))
     row_count: int | None = Field(default=None, nullable=True)
+    # Filled in by the profiling job (see services/file_profiling.py).
+    profile_status: ProfileStatus | None = Field(
+        default=None,
+        sa_column=Column(
+            SAEnum(ProfileStatus, native_enum=False, length=20, values_callable=_enum_values),
+            nullable=True,
+            index=True,
+        ),
+    )
+    profile_error: str | None = Field(default=None, max_length=500, nullable=True)
+    dtypes: dict[str, str] | None = Field(default=None, sa_column=Column(JSON, nullable=True))
+    null_counts: dict[str, int] | None = Field(default=None, sa_column=Column(JSON, nullable=True))
+    # Narrowest lossless dtypes to load the upload with (``ChunkSchema.to_json``).
+    read_schema: dict | None = Field(default=None, sa_column=Column(JSON, nullable=True))
+    # SHA-256 of the uploaded bytes, computed while the upload is streamed to disk.
+    content_hash: str | None = Field(default=None, max_length=64, index=True, nullable=True)
+    # Head DatasetVersion that readers see; None until the file is first
+    # preprocessed (the upload itself is then the data). No FK: the version
+    # table already references data_file.
+    current_version_id: uuid_pkg.UUID | None = Field(
+        default=None, sa_column=Column(PgUUID(as_uuid=True), nullable=True)
+    )
     project_id: uuid_pkg.UUID | None = Field(
         sa_column=Column(PgUUID(as_uuid=True), ForeignKey("project.id", ondelete="CASCADE"), index=True, nullable=True)
     )
@@ -0,0 +1,40 @@
+import uuid as uuid_pkg
+from datetime import datetime
+
+from sqlalchemy import JSON, Column, DateTime, ForeignKey, UniqueConstraint, func
+from sqlalchemy.dialects.postgresql import UUID as PgUUID
+from sqlmodel import Field, SQLModel
+
+
+class DatasetVersion(SQLModel, table=True):
+    """One immutable version of a CSV DataFile.
+
+    Version 0 is the upload itself. Every preprocessing request adds a child
+    of the current head that stores only its fitted transformation *recipe*
+    (steps plus the parameters learned while fitting, e.g. min/max or category
+    sets), so creating, undoing or branching a version is a metadata change.
+    The version's CSV (``disk_name``) is written only when a consumer first
+    reads it, by replaying recipes from the nearest materialized ancestor, and
+    may be dropped again at any time.
+    """
+
+    __tablename__ = "dataset_version"
+
+    id: uuid_pkg.UUID = Field(default_factory=uuid_pkg.uuid4, sa_column=Column(PgUUID(as_uuid=True), primary_key=True))
+    file_id: uuid_pkg.UUID = Field(
+        sa_column=Column(
+            PgUUID(as_uuid=True), ForeignKey("data_file.id", ondelete="CASCADE"), index=True, nullable=False
+        )
+    )
+    parent_id: uuid_pkg.UUID | None = Field(
+        default=None,
+        sa_column=Column(PgUUID(as_uuid=True), ForeignKey("dataset_version.id", ondelete="CASCADE"), nullable=True),
+    )
+    number: int = Field(nullable=False)
+    # recipe shape: [{"transformation": "Min-Max Normalization", "feature": "age", "params": null, "state": {...}}]
+    recipe: list[dict] | None = Field(default=None, sa_column=Column(JSON, nullable=True))
+    disk_name: str | None = Field(default=None, max_length=150, nullable=True)
+    columns: list[str] | None = Field(default=None, sa_column=Column(JSON, nullable=True))
+    created_on: datetime | None = Field(default=None, sa_column=Column(DateTime, server_default=func.now()))
+
+    __table_args__ = (UniqueConstraint("file_id", "number", name="uq_dataset_version_file_number"),)
@@ -38,6 +38,9 @@ class ModelBasic(SQLModel, table=True):
     graph_json: dict | None = Field(default=None, sa_column=Column(JSON, nullable=True))
     # graph_ir stores the validated IRGraph JSON (replaces model_configs KV table)
     graph_ir: dict | None = Field(default=None, sa_column=Column(JSON, nullable=True))
+    # Image augmentation applied while training on an image dataset, shape:
+    # {"flip": "horizontal", "rotation": 0.1, "crop": 0.2, "brightness": 0.2, "contrast": 0.2}
+    augmentation: dict | None = Field(default=None, sa_column=Column(JSON, nullable=True))
     created_on: datetime | None = Field(default=None, sa_column=Column(DateTime, server_default=func.now()))
     updated_on: datetime | None = Field(
         default=None, sa_column=Column(DateTime, server_default=func.now(), onupdate=func.now())
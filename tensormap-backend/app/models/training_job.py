@@ -2,7 +2,7 @@ import uuid as uuid_pkg
 from datetime import datetime
 from enum import StrEnum
 
-from sqlalchemy import JSON, Column, DateTime, ForeignKey
+from sqlalchemy import JSON, Column, DateTime, ForeignKey, Integer
 from sqlalchemy import Enum as SAEnum
 from sqlalchemy.dialects.postgresql import UUID as PgUUID
 from sqlmodel import Field, SQLModel
@@ -11,10 +11,13 @@ from sqlmodel import Field, SQLModel
 class TrainingStatus(StrEnum):
     """Lifecycle states for a training job.
 
-    A job moves PENDING -> RUNNING -> COMPLETED on the happy path, or to
-    FAILED (training raised) / CANCELLED (user requested a stop).
+    A job moves QUEUED -> PENDING -> RUNNING -> COMPLETED on the happy path,
+    or to FAILED (training raised) / CANCELLED (user requested a stop).
+    QUEUED jobs wait for a free worker slot; PENDING ones were handed to a
+    worker and have not started training yet.
     """
 
+    QUEUED = "queued"
     PENDING = "pending"
     RUNNING = "running"
     COMPLETED = "completed"
@@ -46,6 +49,14 @@ class TrainingJob(SQLModel, table=True):
         default=None,
         sa_column=Column(PgUUID(as_uuid=True), ForeignKey("project.id", ondelete="CASCADE"), index=True, nullable=True),
     )
+    # Dataset version the job trains on, pinned when the job is created so later
+    # preprocessing cannot change its data. None = the file as uploaded.
+    dataset_version_id: uuid_pkg.UUID | None = Field(
+        default=None,
+        sa_column=Column(
+            PgUUID(as_uuid=True), ForeignKey("dataset_version.id", ondelete="SET NULL"), index=True, nullable=True
+        ),
+    )
     # native_enum=False stores the value as a portable VARCHAR + CHECK constraint,
     # avoiding a Postgres ENUM type that would need its own migration step.
     status: TrainingStatus = Field(
@@ -56,11 +67,20 @@ class TrainingJob(SQLModel, table=True):
             index=True,
         ),
     )
-    # hyperparams shape: {"optimizer": "adam", "lr": 0.001, "epochs": 50, "batch_size": 32}
+    # Higher runs first among queued jobs (see training_service.dispatch_queued_jobs).
+    priority: int = Field(default=0, sa_column=Column(Integer, nullable=False, server_default="0"))
+    # When the job was submitted; orders jobs of equal priority and project share.
+    queued_at: datetime | None = Field(default=None, sa_column=Column(DateTime, nullable=True))
+    # hyperparams shape: {"optimizer": "adam", "lr": 0.001, "epochs": 50, "batch_size": 32,
+    #   "input_pipeline": {"parallel_calls": None, "cache": "disk", "prefetch": None, "deterministic": True}}
     hyperparams: dict | None = Field(default=None, sa_column=Column(JSON, nullable=True))
     started_at: datetime | None = Field(default=None, sa_column=Column(DateTime, nullable=True))
     completed_at: datetime | None = Field(default=None, sa_column=Column(DateTime, nullable=True))
     error_message: str | None = Field(default=None, max_length=2000, nullable=True)
+    # Cost of preparing a tabular job's training data: {"streaming", "cache_hit" (in-memory
+    #   only), "rows", "features", "seconds", "baseline_rss_bytes", "peak_rss_bytes"}
+    #   (see model_run._record_data_prep).
+    data_prep: dict | None = Field(default=None, sa_column=Column(JSON, nullable=True))
     # Forward-looking columns reserved for later phases (analysis + tuning).
     analysis_cache: dict | None = Field(default=None, sa_column=Column(JSON, nullable=True))
     last_export_download_at: datetime | None = Field(default=None, sa_column=Column(DateTime, nullable=True))
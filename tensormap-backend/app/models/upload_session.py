@@ -0,0 +1,35 @@
+import uuid as uuid_pkg
+from datetime import datetime
+
+from sqlalchemy import JSON, BigInteger, Column, DateTime, ForeignKey, func
+from sqlalchemy.dialects.postgresql import UUID as PgUUID
+from sqlmodel import Field, SQLModel
+
+
+class UploadSession(SQLModel, table=True):
+    """An in-progress resumable upload.
+
+    Chunks are written at their byte offsets into a temp file under the
+    upload folder and the byte ranges received so far are tracked here, so a
+    client can resume after a dropped connection by asking what is missing.
+    Finalizing verifies the SHA-256 and hands the file to the normal upload
+    path; the session row and temp file are then removed.
+    """
+
+    __tablename__ = "upload_session"
+
+    id: uuid_pkg.UUID = Field(default_factory=uuid_pkg.uuid4, sa_column=Column(PgUUID(as_uuid=True), primary_key=True))
+    file_name: str = Field(max_length=100, nullable=False)
+    total_size: int = Field(sa_column=Column(BigInteger, nullable=False))
+    # Expected SHA-256 (hex); may instead be supplied when finalizing.
+    sha256: str | None = Field(default=None, max_length=64, nullable=True)
+    # Sorted, non-overlapping half-open byte ranges: [[0, 8388608], [16777216, 20000000]]
+    received: list[list[int]] = Field(default_factory=list, sa_column=Column(JSON, nullable=False))
+    project_id: uuid_pkg.UUID | None = Field(
+        default=None,
+        sa_column=Column(PgUUID(as_uuid=True), ForeignKey("project.id", ondelete="CASCADE"), nullable=True),
+    )
+    created_on: datetime | None = Field(default=None, sa_column=Column(DateTime, server_default=func.now()))
+    updated_on: datetime | None = Field(
+        default=None, sa_column=Column(DateTime, server_default=func.now(), onupdate=func.now())
+    )
@@ -1,7 +1,8 @@
 import uuid as uuid_pkg
+from typing import Literal
 
 from fastapi import APIRouter, Depends, Query
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from sqlmodel import Session
 
 from app.database import get_db
@@ -11,6 +12,7 @@ from app.schemas.data_process import (
 )
 from app.services.data_process import (
     add_target_service,
+    checkout_version_service,
     delete_one_target_by_id_service,
     get_all_targets_service,
     get_column_stats_service,
@@ -18,14 +20,21 @@ from app.services.data_process import (
     get_data_metrics,
     get_file_data,
     get_one_target_by_id_service,
+    list_versions_service,
     preprocess_data,
+    undo_version_service,
 )
+from app.services.image_browse import THUMBNAIL_MEDIA_TYPE, browse_images_service, get_thumbnail_service
+from app.services.sketches import DEFAULT_SKETCH_ERROR, MAX_SKETCH_ERROR, MIN_SKETCH_ERROR
 from app.shared.logging_config import get_logger
 
 logger = get_logger(__name__)
 
 router = APIRouter(tags=["data-process"])
 
+# Exact profiles read every value; approximate ones come from sketches (see services/sketches.py).
+ProfileMode = Literal["exact", "approximate"]
+
 
 @router.post("/data/process/target")
 def add_target(request: TargetAddRequest, db: Session = Depends(get_db)):
@@ -62,16 +71,26 @@ def delete_target(file_id: uuid_pkg.UUID, db: Session = Depends(get_db)):
 
 
 @router.get("/data/process/data_metrics/{file_id}")
-def get_metrics(file_id: uuid_pkg.UUID, db: Session = Depends(get_db)):
-    """Return descriptive statistics and correlation matrix for a CSV file."""
-    body, status_code = get_data_metrics(db, file_id=file_id)
+def get_metrics(
+    file_id: uuid_pkg.UUID,
+    mode: ProfileMode = Query("exact"),
+    error: float = Query(DEFAULT_SKETCH_ERROR, ge=MIN_SKETCH_ERROR, le=MAX_SKETCH_ERROR),
+    db: Session = Depends(get_db),
+):
+    """Return descriptive statistics and correlation matrix for a CSV file (exact or sketched)."""
+    body, status_code = get_data_metrics(db, file_id=file_id, approximate=mode == "approximate", error=error)
     return JSONResponse(status_code=status_code, content=body)
 
 
 @router.get("/data/process/stats/{file_id}")
-async def get_column_stats(file_id: uuid_pkg.UUID, db: Session = Depends(get_db)):
-    """Return per-column descriptive statistics for a CSV file."""
-    body, status_code = get_column_stats_service(db, file_id=file_id)
+async def get_column_stats(
+    file_id: uuid_pkg.UUID,
+    mode: ProfileMode = Query("exact"),
+    error: float = Query(DEFAULT_SKETCH_ERROR, ge=MIN_SKETCH_ERROR, le=MAX_SKETCH_ERROR),
+    db: Session = Depends(get_db),
+):
+    """Return per-column descriptive statistics for a CSV file (exact or with sketched extras)."""
+    body, status_code = get_column_stats_service(db, file_id=file_id, approximate=mode == "approximate", error=error)
     return JSONResponse(status_code=status_code, content=body)
 
 
@@ -94,9 +113,54 @@ async def get_file(
     return JSONResponse(status_code=status_code, content=body)
 
 
+@router.get("/data/process/images/{file_id}")
+def browse_images(
+    file_id: uuid_pkg.UUID,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=500),
+    label: str | None = Query(None),
+    db: Session = Depends(get_db),
+):
+    """Return a page of an image dataset (ordered by class, then path) with thumbnail URLs."""
+    body, status_code = browse_images_service(db, file_id=file_id, page=page, page_size=page_size, label=label)
+    return JSONResponse(status_code=status_code, content=body)
+
+
+@router.get("/data/process/images/{file_id}/thumbnails/{index}")
+def get_thumbnail(file_id: uuid_pkg.UUID, index: int, db: Session = Depends(get_db)):
+    """Return the JPEG thumbnail of one image of an image dataset."""
+    result, status_code = get_thumbnail_service(db, file_id=file_id, index=index)
+    if status_code != 200:
+        return JSONResponse(status_code=status_code, content=result)
+    return Response(content=result, media_type=THUMBNAIL_MEDIA_TYPE, headers={"Cache-Control": "max-age=86400"})
+
+
 @router.post("/data/process/preprocess/{file_id}")
 def preprocess(file_id: uuid_pkg.UUID, request: PreprocessRequest, db: Session = Depends(get_db)):
-    """Apply transformations to a CSV file, overwriting it in place."""
+    """Apply transformations to a CSV file, recording the result as a new version."""
     logger.debug("Preprocessing file_id=%s with %d transformations", file_id, len(request.transformations))
     body, status_code = preprocess_data(db, file_id=file_id, transformations=request.transformations)
     return JSONResponse(status_code=status_code, content=body)
+
+
+@router.get("/data/process/versions/{file_id}")
+def get_versions(file_id: uuid_pkg.UUID, db: Session = Depends(get_db)):
+    """List the versions of a CSV file, oldest first."""
+    body, status_code = list_versions_service(db, file_id=file_id)
+    return JSONResponse(status_code=status_code, content=body)
+
+
+@router.post("/data/process/versions/{file_id}/checkout/{version_id}")
+def checkout_version(file_id: uuid_pkg.UUID, version_id: uuid_pkg.UUID, db: Session = Depends(get_db)):
+    """Make a version the current one; later preprocessing branches from it."""
+    logger.debug("Checking out version %s of file_id=%s", version_id, file_id)
+    body, status_code = checkout_version_service(db, file_id=file_id, version_id=version_id)
+    return JSONResponse(status_code=status_code, content=body)
+
+
+@router.post("/data/process/versions/{file_id}/undo")
+def undo_version(file_id: uuid_pkg.UUID, db: Session = Depends(get_db)):
+    """Revert a file to the version before its latest preprocessing step."""
+    logger.debug("Undoing last version of file_id=%s", file_id)
+    body, status_code = undo_version_service(db, file_id=file_id)
+    return JSONResponse(status_code=status_code, content=body)
@@ -1,16 +1,23 @@
 import uuid as uuid_pkg
 
-from fastapi import APIRouter, Depends, Form, Query, UploadFile
+from fastapi import APIRouter, Depends, File, Form, Path, Query, UploadFile
 from fastapi.responses import JSONResponse
 from sqlmodel import Session
 
-from app.config import get_settings
 from app.database import get_db
+from app.schemas.data_upload import UploadSessionCreateRequest, UploadSessionFinalizeRequest
 from app.services.data_upload import (
     add_file_service,
     delete_one_file_by_id_service,
     get_all_files_service,
 )
+from app.services.upload_session import (
+    abort_upload_session_service,
+    create_upload_session_service,
+    finalize_upload_session_service,
+    get_upload_session_service,
+    put_chunk_service,
+)
 from app.shared.logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -21,19 +28,29 @@ ALLOWED_EXTENSIONS = {"csv", "zip"}
 class _UploadFileWrapper:
     """Wraps FastAPI UploadFile to match the interface expected by service functions.
 
-    The service reads the underlying stream via ``.file`` (Werkzeug-style) for its
-    size check, so expose it directly rather than keeping a private ``._file``.
+    The service streams the upload straight from ``.file`` (Werkzeug-style),
+    so expose it directly rather than keeping a private ``._file``.
     """
 
     def __init__(self, upload_file: UploadFile):
         self.file = upload_file.file
         self.filename = upload_file.filename
 
-    def save(self, path: str) -> None:
-        self.file.seek(0)
-        content = self.file.read()
-        with open(path, "wb") as f:
-            f.write(content)
+
+def _allowed(filename: str) -> bool:
+    ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    return ext in ALLOWED_EXTENSIONS
+
+
+def _unsupported_type() -> JSONResponse:
+    return JSONResponse(
+        status_code=400,
+        content={
+            "success": False,
+            "message": "Only CSV and ZIP files are supported.",
+            "data": None,
+        },
+    )
 
 
 @router.post("/data/upload/file")
@@ -51,41 +68,11 @@ def upload_file(
             content={"success": False, "message": "Please select the file.", "data": None},
         )
 
-    ext = data.filename.rsplit(".", 1)[-1].lower() if "." in data.filename else ""
-    if ext not in ALLOWED_EXTENSIONS:
-        return JSONResponse(
-            status_code=400,
-            content={
-                "success": False,
-                "message": "Only CSV and ZIP files are supported.",
-                "data": None,
-            },
-        )
-
-    max_size = get_settings().max_content_length
-
-    # Enforce the size limit without loading the entire file into memory.
-    total_read = 0
-    chunk_size = 1024 * 1024  # 1 MB
-
-    while True:
-        chunk = data.file.read(chunk_size)
-        if not chunk:
-            break
-        total_read += len(chunk)
-        if total_read > max_size:
-            return JSONResponse(
-                status_code=413,
-                content={
-                    "success": False,
-                    "message": f"File too large. Maximum allowed size is {max_size // (1024 * 1024)} MB.",
-                    "data": None,
-                },
-            )
-
-    # Rewind the file so downstream code can re-read it from the beginning.
-    data.file.seek(0)
+    if not _allowed(data.filename):
+        return _unsupported_type()
 
+    # The size limit is enforced by the service while it streams the file to
+    # disk, so the upload is only read once.
     wrapper = _UploadFileWrapper(data)
     body, status_code = add_file_service(db, wrapper, project_id=project_id)
     return JSONResponse(status_code=status_code, content=body)
@@ -109,3 +96,51 @@ def delete_file(file_id: uuid_pkg.UUID, db: Session = Depends(get_db)):
     logger.debug("Deleting file with id: %s", file_id)
     body, status_code = delete_one_file_by_id_service(db, file_id=file_id)
     return JSONResponse(status_code=status_code, content=body)
+
+
+@router.post("/data/upload/sessions")
+def create_upload_session(request: UploadSessionCreateRequest, db: Session = Depends(get_db)):
+    """Start a resumable chunked upload."""
+    if not _allowed(request.file_name):
+        return _unsupported_type()
+    body, status_code = create_upload_session_service(db, request)
+    return JSONResponse(status_code=status_code, content=body)
+
+
+@router.get("/data/upload/sessions/{session_id}")
+def get_upload_session(session_id: uuid_pkg.UUID, db: Session = Depends(get_db)):
+    """Report the byte ranges received so far, so an interrupted client can resume."""
+    body, status_code = get_upload_session_service(db, session_id)
+    return JSONResponse(status_code=status_code, content=body)
+
+
+@router.put("/data/upload/sessions/{session_id}/chunks/{chunk_index}")
+def put_chunk(
+    session_id: uuid_pkg.UUID,
+    chunk_index: int = Path(ge=0),
+    chunk: UploadFile = File(...),
+    offset: int = Form(..., ge=0),
+    db: Session = Depends(get_db),
+):
+    """Write one chunk of a resumable upload at its byte offset."""
+    body, status_code = put_chunk_service(db, session_id, chunk_index, offset, chunk.file, length=chunk.size)
+    return JSONResponse(status_code=status_code, content=body)
+
+
+@router.post("/data/upload/sessions/{session_id}/finalize")
+def finalize_upload_session(
+    session_id: uuid_pkg.UUID,
+    request: UploadSessionFinalizeRequest | None = None,
+    db: Session = Depends(get_db),
+):
+    """Verify the checksum of a complete upload and create its DataFile."""
+    sha256 = request.sha256 if request is not None else None
+    body, status_code = finalize_upload_session_service(db, session_id, sha256)
+    return JSONResponse(status_code=status_code, content=body)
+
+
+@router.delete("/data/upload/sessions/{session_id}")
+def abort_upload_session(session_id: uuid_pkg.UUID, db: Session = Depends(get_db)):
+    """Abandon a resumable upload and discard what was received."""
+    body, status_code = abort_upload_session_service(db, session_id)
+    return JSONResponse(status_code=status_code, content=body)
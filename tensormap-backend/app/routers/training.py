@@ -9,23 +9,24 @@ than an owner. ``get_job_or_404`` therefore returns 404 (not 403) for unknown
 jobs; there is no per-user authorization to enforce.
 """
 
-import asyncio
-
 from fastapi import APIRouter, Depends, Query
 from fastapi.responses import JSONResponse, Response
 from sqlmodel import Session, select
 
 from app.database import get_db
 from app.exceptions import AppException
+from app.models.data import DataFile
 from app.models.ml import ModelBasic
 from app.models.training_job import TrainingJob, TrainingStatus
-from app.schemas.training import TrainingStartRequest
+from app.schemas.training import InputPipelineConfig, TrainingStartRequest
+from app.services.dataset_versions import head_version
 from app.services.training_service import (
-    check_concurrency_limit,
     create_training_job,
+    dispatch_queued_jobs,
     get_job_metrics_grouped,
     get_latest_metrics,
-    launch_training_job,
+    queue_info,
+    signal_cancellation,
     update_job_status,
 )
 from app.shared.logging_config import get_logger
@@ -50,10 +51,12 @@ def _envelope(message: str, data) -> dict:
 
 @router.post("/run", status_code=202)
 async def start_training(request: TrainingStartRequest, db: Session = Depends(get_db)) -> JSONResponse:
-    """Create a training job (PENDING), fire it in the background, return 202.
+    """Queue a training job, start it if a worker slot is free, return 202.
 
     Hyperparameters default to the model's saved training config; any provided
-    in the request override them for this run.
+    in the request override them for this run. A job that has to wait stays
+    QUEUED and the response carries its ``queue_position`` and
+    ``estimated_start_at``.
     """
     model = db.exec(select(ModelBasic).where(ModelBasic.model_name == request.model_name)).first()
     if model is None or (request.project_id is not None and model.project_id != request.project_id):
@@ -64,30 +67,32 @@ async def start_training(request: TrainingStartRequest, db: Session = Depends(ge
             "Training configuration not set. Please configure training parameters first.",
         )
 
-    # Reject early if we're already at the concurrency limit (raises 429).
-    check_concurrency_limit(db)
-
     hyperparams = {
         "optimizer": request.optimizer or model.optimizer,
         "lr": request.lr,
         "epochs": request.epochs or model.epochs,
         "batch_size": request.batch_size or model.batch_size,
+        "input_pipeline": (request.input_pipeline or InputPipelineConfig()).model_dump(),
     }
+    # Pin the dataset version current at submission so preprocessing done
+    # while the job waits or runs cannot change what it trains on.
+    data_file = db.get(DataFile, model.file_id)
+    dataset_version_id = head_version(db, data_file).id if data_file and data_file.file_type == "csv" else None
     job = create_training_job(
         model_id=model.id,
         project_id=model.project_id,
         hyperparams=hyperparams,
         session=db,
+        dataset_version_id=dataset_version_id,
+        priority=request.priority,
     )
 
-    logger.info("Training job %s created for model '%s'", job.id, request.model_name)
-    loop = asyncio.get_running_loop()
-    launch_training_job(request.model_name, job.id, loop)
+    logger.info("Training job %s queued for model '%s'", job.id, request.model_name)
+    dispatch_queued_jobs(db)
+    db.refresh(job)
 
-    return JSONResponse(
-        status_code=202,
-        content=_envelope("Training job accepted", {"job_id": job.id, "status": job.status.value}),
-    )
+    data = {"job_id": job.id, "status": job.status.value, "priority": job.priority, **queue_info(job, db)}
+    return JSONResponse(status_code=202, content=_envelope("Training job accepted", data))
 
 
 @router.get("/training-jobs")
@@ -123,10 +128,14 @@ def get_training_job(job: TrainingJob = Depends(get_job_or_404), db: Session = D
         "job_id": job.id,
         "model_id": job.model_id,
         "status": job.status.value,
+        "priority": job.priority,
+        **queue_info(job, db),
         "hyperparams": job.hyperparams,
+        "dataset_version_id": str(job.dataset_version_id) if job.dataset_version_id else None,
         "started_at": job.started_at.isoformat() if job.started_at else None,
         "completed_at": job.completed_at.isoformat() if job.completed_at else None,
         "error_message": job.error_message,
+        "data_prep": job.data_prep,
         "latest_metrics": get_latest_metrics(job.id, db),
     }
     return JSONResponse(status_code=200, content=_envelope("Training job retrieved", data))
@@ -143,11 +152,17 @@ def get_job_metrics(job: TrainingJob = Depends(get_job_or_404), db: Session = De
 def cancel_training_job(job: TrainingJob = Depends(get_job_or_404), db: Session = Depends(get_db)) -> Response:
     """Request cancellation of a job.
 
-    Only sets status=CANCELLED; the running training loop stops itself at the
-    next epoch boundary via ``CancellationCheckCallback``. Cancelling an
-    already-finished job is a no-op (still 204).
+    Sets status=CANCELLED; a queued job is simply never dispatched. For a
+    dispatched job its cancellation event is set — directly, or over IPC in a
+    worker — and the running training loop stops itself within a few batches
+    via ``CancellationCheckCallback``.
+    Cancelling an already-finished job is a no-op (still 204).
     """
-    if job.status in (TrainingStatus.PENDING, TrainingStatus.RUNNING):
+    if job.status in (TrainingStatus.QUEUED, TrainingStatus.PENDING, TrainingStatus.RUNNING):
+        was_queued = job.status == TrainingStatus.QUEUED
         update_job_status(job.id, TrainingStatus.CANCELLED, db)
         logger.info("Cancellation requested for job %s", job.id)
+        if not was_queued:
+            signal_cancellation(job.id)
+            dispatch_queued_jobs(db)
     return Response(status_code=204)
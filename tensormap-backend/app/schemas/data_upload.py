@@ -0,0 +1,21 @@
+"""Request schemas for the resumable upload endpoints."""
+
+import uuid as uuid_pkg
+
+from pydantic import BaseModel, Field
+
+
+class UploadSessionCreateRequest(BaseModel):
+    """Request body for starting a resumable upload."""
+
+    file_name: str = Field(min_length=1, max_length=100)
+    total_size: int = Field(gt=0)
+    # Hex SHA-256 of the whole file; may instead be given when finalizing.
+    sha256: str | None = Field(default=None, pattern=r"^[0-9a-fA-F]{64}$")
+    project_id: uuid_pkg.UUID | None = None
+
+
+class UploadSessionFinalizeRequest(BaseModel):
+    """Request body for finalizing a resumable upload."""
+
+    sha256: str | None = Field(default=None, pattern=r"^[0-9a-fA-F]{64}$")
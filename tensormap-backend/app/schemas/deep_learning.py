@@ -1,7 +1,7 @@
 """Request schemas for model validation, code generation, and training endpoints."""
 
 import uuid as uuid_pkg
-from typing import Any
+from typing import Any, Literal
 
 from pydantic import BaseModel, Field
 
@@ -94,6 +94,22 @@ class ModelSaveRequest(BaseModel):
     project_id: uuid_pkg.UUID | None = None
 
 
+class ImageAugmentationConfig(BaseModel):
+    """Random image augmentation applied to each training batch (image classification only).
+
+    ``rotation`` is a fraction of a full turn, ``crop`` the largest fraction
+    of each side cropped away (the crop is resized back to the image size),
+    and ``brightness``/``contrast`` the largest relative change. 0 disables
+    a transform.
+    """
+
+    flip: Literal["none", "horizontal", "vertical", "horizontal_and_vertical"] = "none"
+    rotation: float = Field(default=0.0, ge=0, le=0.5)
+    crop: float = Field(default=0.0, ge=0, lt=1)
+    brightness: float = Field(default=0.0, ge=0, le=1)
+    contrast: float = Field(default=0.0, ge=0, le=1)
+
+
 class TrainingConfigRequest(BaseModel):
     """Request body for setting training configuration on a saved model."""
 
@@ -106,4 +122,5 @@ class TrainingConfigRequest(BaseModel):
     metric: str = Field(min_length=1)
     epochs: int = Field(gt=0)
     batch_size: int = Field(default=32, gt=0)
+    augmentation: ImageAugmentationConfig | None = None
     project_id: uuid_pkg.UUID | None = None
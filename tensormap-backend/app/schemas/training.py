@@ -2,17 +2,43 @@
 
 import uuid as uuid_pkg
 from datetime import datetime
+from typing import Literal
 
 from pydantic import BaseModel, Field
 
 
+class InputPipelineConfig(BaseModel):
+    """tf.data input-pipeline settings for training.
+
+    ``cache`` is "none" (decode every epoch), "memory" (decode once during the
+    first epoch and keep the images in RAM) or "disk" (the persistent
+    decoded-image cache shared by every job on the same dataset and image
+    settings). ``parallel_calls`` and ``prefetch`` default to tf.data's
+    autotuning; ``prefetch=0`` disables prefetching. ``deterministic=False``
+    lets parallel decoding yield images out of order for more throughput.
+
+    For tabular datasets, ``streaming`` reads batches from disk every epoch
+    instead of loading the dataset into memory, mixing rows through a
+    ``shuffle_buffer`` of that many rows; by default only CSVs larger than
+    the server's ``TABULAR_STREAM_THRESHOLD`` are streamed.
+    """
+
+    parallel_calls: int | None = Field(default=None, gt=0)
+    cache: Literal["none", "memory", "disk"] = "disk"
+    prefetch: int | None = Field(default=None, ge=0)
+    deterministic: bool = True
+    streaming: bool | None = None
+    shuffle_buffer: int | None = Field(default=None, gt=0)
+
+
 class TrainingStartRequest(BaseModel):
     """Request body for starting a training run.
 
     Only ``model_name`` is required; hyperparameters default to whatever was
     saved on the model via the training-config endpoint, so existing callers
     keep working. Any field provided here overrides the stored value for this
-    run (recorded in the job's ``hyperparams``).
+    run (recorded in the job's ``hyperparams``). Jobs wait for a free worker
+    slot in a queue; those with a higher ``priority`` start first.
     """
 
     model_name: str = Field(min_length=1)
@@ -21,6 +47,8 @@ class TrainingStartRequest(BaseModel):
     lr: float | None = Field(default=None, gt=0)
     epochs: int | None = Field(default=None, gt=0)
     batch_size: int | None = Field(default=None, gt=0)
+    input_pipeline: InputPipelineConfig | None = None
+    priority: int = Field(default=0, ge=-100, le=100)
 
 
 class TrainingJobResponse(BaseModel):
@@ -29,6 +57,10 @@ class TrainingJobResponse(BaseModel):
     job_id: str
     model_id: int
     status: str
+    priority: int = 0
+    # Only for queued jobs: 1 = next to start, and when it is expected to.
+    queue_position: int | None = None
+    estimated_start_at: datetime | None = None
     hyperparams: dict | None = None
     started_at: datetime | None = None
     completed_at: datetime | None = None
@@ -0,0 +1,113 @@
+"""Content-addressed storage for uploaded files.
+
+Uploads are stored once per distinct content under
+``<upload_folder>/blobs/<hash[:2]>/<hash>.<ext>`` and every ``DataFile`` with
+the same bytes points its ``disk_name`` at that blob. Everything derived from
+the bytes — the artifact directory with the columnar sidecar, row index and
+profile cache (see ``dataset_reader.artifact_dir``), and a ZIP's extraction
+directory — hangs off the blob path, so it is built once and shared too.
+
+A blob's reference count is the number of ``DataFile`` rows naming it; the
+delete services call ``unreferenced`` after committing and only remove the
+blobs nothing points at any more. ``blob_lock`` serializes placing a blob
+against releasing it so an upload cannot attach to a blob that a concurrent
+delete is removing. It is a file lock next to the blob (see
+``app.shared.file_lock``), so it holds across uvicorn worker processes.
+"""
+
+import contextlib
+import os
+import shutil
+import uuid as uuid_pkg
+from collections.abc import Iterable, Iterator
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session, select
+
+from app.models import DataFile
+from app.services.dataset_reader import remove_artifacts
+from app.shared.file_lock import file_lock
+from app.shared.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+BLOB_DIR = "blobs"
+
+
+@contextlib.contextmanager
+def blob_lock(upload_folder: str, disk_name: str) -> Iterator[None]:
+    """Hold the lock guarding ``disk_name`` while placing or releasing it."""
+    with file_lock(os.path.join(upload_folder, disk_name)):
+        yield
+
+
+def blob_name(content_hash: str, ext: str) -> str:
+    """Return the ``disk_name`` (relative to the upload folder) for content with ``content_hash``."""
+    return f"{BLOB_DIR}/{content_hash[:2]}/{content_hash}.{ext}"
+
+
+def staging_path(upload_folder: str, ext: str) -> str:
+    """Return a unique path to stream an upload to before its hash is known."""
+    return os.path.join(upload_folder, f".incoming-{uuid_pkg.uuid4().hex}.{ext}")
+
+
+def extract_dir(upload_folder: str, disk_name: str) -> str:
+    """Return the directory a ZIP stored as ``disk_name`` is extracted into."""
+    return os.path.join(upload_folder, disk_name.rsplit(".", 1)[0])
+
+
+def place_blob(upload_folder: str, staged_path: str, disk_name: str) -> bool:
+    """Move ``staged_path`` into the store as ``disk_name``; call under ``blob_lock``.
+
+    Returns True if the blob is new. If identical content is already stored
+    the staged copy is discarded and False is returned.
+
+    Raises:
+        OSError: If the blob cannot be moved into place.
+    """
+    blob_path = os.path.join(upload_folder, disk_name)
+    if os.path.exists(blob_path):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(staged_path)
+        logger.info("Deduplicated upload onto existing blob %s", disk_name)
+        return False
+    os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+    os.replace(staged_path, blob_path)
+    return True
+
+
+def unreferenced(db: Session, disk_names: Iterable[str]) -> set[str]:
+    """Return the subset of ``disk_names`` that no DataFile references any more.
+
+    Call after the deleting transaction has committed. A failed lookup keeps
+    every blob: leaking storage is preferable to deleting shared data.
+    """
+    names = set(disk_names)
+    if not names:
+        return set()
+    try:
+        referenced = set(db.exec(select(DataFile.disk_name).where(DataFile.disk_name.in_(names))).all())
+    except SQLAlchemyError:
+        logger.exception("Could not count blob references; keeping %d blob(s)", len(names))
+        return set()
+    return names - referenced
+
+
+def remove_blob(upload_folder: str, disk_name: str, file_type: str) -> bool:
+    """Remove a blob with its derived artifacts; returns False if it was already gone.
+
+    Raises:
+        OSError: If the blob exists but cannot be removed.
+    """
+    blob_path = os.path.join(upload_folder, disk_name)
+    removed = True
+    try:
+        os.remove(blob_path)
+    except FileNotFoundError:
+        removed = False
+    remove_artifacts(blob_path)
+    if file_type == "zip" and "." in disk_name:
+        extract_path = os.path.realpath(extract_dir(upload_folder, disk_name))
+        if extract_path.startswith(os.path.realpath(upload_folder) + os.sep):
+            shutil.rmtree(extract_path, ignore_errors=True)
+    return removed
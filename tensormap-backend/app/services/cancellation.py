@@ -0,0 +1,51 @@
+"""In-memory cancellation signals for the training jobs running in this process.
+
+Each running job registers a ``threading.Event`` here; cancelling the job sets
+it, and ``CancellationCheckCallback`` reads it every few batches, which costs
+nothing next to a training step. In the API process the DELETE endpoint
+cancels through ``registry`` directly; a training worker process has its own
+registry, which its IPC thread sets when the API process forwards the
+cancellation (see ``training_workers``). Polling the job's DB status remains
+the fallback for cancellations that reach neither, e.g. from another API
+process.
+"""
+
+import threading
+
+
+class CancellationRegistry:
+    """Per-job cancellation events, keyed by job id."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._events: dict[str, threading.Event] = {}
+
+    def register(self, job_id: str) -> threading.Event:
+        """Return the event of ``job_id``, creating it if the job is not registered yet."""
+        with self._lock:
+            return self._events.setdefault(job_id, threading.Event())
+
+    def unregister(self, job_id: str) -> None:
+        """Forget ``job_id`` once it stopped running."""
+        with self._lock:
+            self._events.pop(job_id, None)
+
+    def cancel(self, job_id: str) -> bool:
+        """Set the event of ``job_id``; return whether the job runs here."""
+        with self._lock:
+            event = self._events.get(job_id)
+        if event is None:
+            return False
+        event.set()
+        return True
+
+    def cancel_all(self) -> None:
+        """Cancel every registered job."""
+        with self._lock:
+            events = list(self._events.values())
+        for event in events:
+            event.set()
+
+
+# The registry of this process.
+registry = CancellationRegistry()
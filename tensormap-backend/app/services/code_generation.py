@@ -2,8 +2,11 @@ from jinja2 import Environment, FileSystemLoader
 from sqlmodel import Session, select
 
 from app.models import DataFile, ImageProperties, ModelBasic
+from app.services.image_manifest import class_names, file_manifest
 from app.shared.constants import (
+    AUGMENTATION,
     BATCH_SIZE,
+    CLASS_NAMES,
     CODE_TEMPLATE_FOLDER,
     COLOR_MODE,
     DATASET,
@@ -66,6 +69,13 @@ def generate_code(model_name: str, db: Session) -> str:
                     LABEL_MODE: image_prop.label_mode,
                 }
             )
+        # Pin the class order the server trains with, read from the manifest.
+        try:
+            data[DATASET][CLASS_NAMES] = class_names(file_manifest(file))
+        except FileNotFoundError:
+            logger.warning("No image manifest for file %s; generated code will infer classes", file.id)
+            data[DATASET][CLASS_NAMES] = None
+        data[DATASET][AUGMENTATION] = model_configs.augmentation
 
     logger.debug("Generating code for model type: %s", model_configs.model_type)
     template_loader = FileSystemLoader(searchpath=TEMPLATE_ROOT)
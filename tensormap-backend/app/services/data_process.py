@@ -1,18 +1,44 @@
-import contextlib
 import json
-import os
-import shutil
 import uuid as uuid_pkg
-from collections.abc import Callable
+from contextlib import AbstractContextManager, ExitStack, nullcontext
 from typing import Any
 
-import numpy as np
 import pandas as pd
 from sqlalchemy import func
+from sqlalchemy.exc import SQLAlchemyError
 from sqlmodel import Session, select
 
 from app.config import get_settings
-from app.models import DataFile, DataProcess
+from app.models import DataFile, DataProcess, DatasetVersion
+from app.services.dataset_reader import DatasetReader
+from app.services.dataset_stats import (
+    APPROXIMATE_DESCRIBE_FIELDS,
+    APPROXIMATE_STATS_FIELDS,
+    approximate_column_stats_payload,
+    approximate_describe_payload,
+    column_stats_payload,
+    compute_correlation,
+    compute_dataset_stats,
+    compute_sketch_stats,
+    describe_payload,
+)
+from app.services.dataset_versions import (
+    VersionNotFoundError,
+    checkout_version,
+    create_version,
+    get_version,
+    head_version,
+    list_versions,
+    reading_version,
+    version_columns,
+)
+from app.services.file_profiling import stored_schema
+from app.services.image_manifest import file_manifest
+from app.services.profile_cache import load_profile, store_profile
+from app.services.row_index import load_row_index, read_rows
+from app.services.sketches import DEFAULT_SKETCH_ERROR
+from app.services.transform_engine import TRANSFORMATION_REGISTRY as _TRANSFORMATION_REGISTRY
+from app.services.transform_engine import DropColumn, OneHotEncode
 from app.shared.logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -34,10 +60,43 @@ def _paginated_resp(data: list, pagination: dict) -> tuple:
     return body, 200
 
 
-def _get_file_path(file: DataFile) -> str:
-    """Resolve the on-disk path for a DataFile record."""
-    settings = get_settings()
-    return f"{settings.upload_folder}/{file.disk_name}"
+def _reading_file(db: Session, file: DataFile) -> AbstractContextManager[str]:
+    """Hold the on-disk path of the head version of a DataFile record while it is read.
+
+    Files that were never preprocessed are read straight from the upload;
+    otherwise the head version is materialized on first access and kept on
+    disk until the block exits.
+    """
+    if file.current_version_id is None:
+        settings = get_settings()
+        return nullcontext(f"{settings.upload_folder}/{file.disk_name}")
+    return reading_version(db, file)
+
+
+def _enter_reading_file(stack: ExitStack, db: Session, file: DataFile) -> tuple[str | None, tuple | None]:
+    """Enter ``_reading_file`` on ``stack``; return ``(path, None)`` or ``(None, error response)``.
+
+    Materializing the head version replays its recipe, so it can fail like
+    any read (missing parent CSV, I/O or transform error).
+    """
+    try:
+        return stack.enter_context(_reading_file(db, file)), None
+    except Exception as e:
+        logger.exception("Could not prepare the head version of file %s", file.id)
+        return None, _resp(500, False, f"Error preparing dataset version: {e}")
+
+
+def _profile_kind(kind: str, approximate: bool, error: float) -> str:
+    """Profile cache key: approximate profiles are cached per error bound."""
+    return f"{kind}:approx:{error:g}" if approximate else kind
+
+
+def _mark_precision(data: dict, approximate: bool, fields: list[str], error: float) -> dict:
+    """Tell the client whether ``data`` is exact, and if not which values are estimates."""
+    data["exact"] = not approximate
+    if approximate:
+        data["approximation"] = {"error": error, "fields": fields}
+    return data
 
 
 def add_target_service(db: Session, file_id: uuid_pkg.UUID, target: str) -> tuple:
@@ -141,75 +200,98 @@ def get_one_target_by_id_service(db: Session, file_id: uuid_pkg.UUID) -> tuple:
     return _resp(200, True, "Target fields of all files received successfully", data)
 
 
-def get_data_metrics(db: Session, file_id: uuid_pkg.UUID) -> tuple:
-    """Compute descriptive statistics and correlation matrix for a CSV dataset."""
+def get_data_metrics(
+    db: Session, file_id: uuid_pkg.UUID, approximate: bool = False, error: float = DEFAULT_SKETCH_ERROR
+) -> tuple:
+    """Compute descriptive statistics and correlation matrix for a CSV dataset.
+
+    With ``approximate`` the quartiles (or, for non-numeric datasets, unique
+    counts and top values) come from mergeable sketches built in one parallel
+    pass, to within ``error`` (see ``sketches``); everything else is exact.
+    """
     file = db.exec(select(DataFile).where(DataFile.id == file_id)).first()
     if not file:
         return _resp(400, False, "File doesn't exist in DB")
 
-    file_path = _get_file_path(file)
-    try:
-        df = pd.read_csv(file_path)
-    except FileNotFoundError:
-        return _resp(500, False, f"File not found: {file_path}")
-    except pd.errors.ParserError as e:
-        logger.exception("CSV parsing error: %s", str(e))
-        return _resp(500, False, f"Error reading CSV: {e}")
-    except Exception as e:
-        logger.exception("Error reading file: %s", str(e))
-        return _resp(500, False, f"Error reading CSV: {e}")
-
-    metrics = {
-        "data_types": df.dtypes.apply(str).to_dict(),
-        "correlation_matrix": df.corr(numeric_only=True).map(str).to_dict(),
-        "metric": df.describe().map(str).to_dict(),
-    }
-    return _resp(200, True, "Dataset metrics generated successfully", metrics)
-
+    with ExitStack() as stack:
+        file_path, failure = _enter_reading_file(stack, db, file)
+        if failure:
+            return failure
+        kind = _profile_kind("metrics", approximate, error)
+        cached = load_profile(file_path, kind)
+        if cached is not None:
+            return _resp(200, True, cached["message"], cached["data"])
 
-def get_column_stats_service(db: Session, file_id: uuid_pkg.UUID) -> tuple:
-    """Compute per-column descriptive statistics for a CSV dataset."""
+        try:
+            reader = DatasetReader(file_path, schema=stored_schema(file, file_path, widen=True))
+            if approximate:
+                sketch = compute_sketch_stats(reader, error=error)
+                stats, metric = sketch.stats, approximate_describe_payload(sketch)
+            else:
+                stats = compute_dataset_stats(reader)
+                metric = describe_payload(stats, reader)
+            # DataFrame.corr(numeric_only=True) also treats bool columns as numeric.
+            corr_cols, corr = compute_correlation(reader, include_bool=True)
+            metrics = {
+                "data_types": {name: acc.dtype for name, acc in stats.columns.items()},
+                "correlation_matrix": pd.DataFrame(corr, index=corr_cols, columns=corr_cols).map(str).to_dict(),
+                "metric": metric,
+            }
+        except FileNotFoundError:
+            return _resp(500, False, f"File not found: {file_path}")
+        except pd.errors.ParserError as e:
+            logger.exception("CSV parsing error: %s", str(e))
+            return _resp(500, False, f"Error reading CSV: {e}")
+        except Exception as e:
+            logger.exception("Error reading file: %s", str(e))
+            return _resp(500, False, f"Error reading CSV: {e}")
+
+        _mark_precision(metrics, approximate, APPROXIMATE_DESCRIBE_FIELDS, error)
+        message = "Dataset metrics generated successfully"
+        store_profile(file_path, kind, message, metrics)
+        return _resp(200, True, message, metrics)
+
+
+def get_column_stats_service(
+    db: Session, file_id: uuid_pkg.UUID, approximate: bool = False, error: float = DEFAULT_SKETCH_ERROR
+) -> tuple:
+    """Compute per-column descriptive statistics for a CSV dataset.
+
+    With ``approximate`` each column also gets an estimated distinct count,
+    median (numeric) or top values (other columns), from sketches.
+    """
     file = db.exec(select(DataFile).where(DataFile.id == file_id)).first()
     if not file:
         return _resp(400, False, "File doesn't exist in DB")
 
-    file_path = _get_file_path(file)
-    try:
-        df = pd.read_csv(file_path)
-    except FileNotFoundError:
-        return _resp(500, False, f"File not found: {file_path}")
-    except pd.errors.ParserError as e:
-        logger.exception("CSV parsing error: %s", str(e))
-        return _resp(500, False, f"Error reading CSV: {e}")
-    except Exception as e:
-        logger.exception("Error reading file: %s", str(e))
-        return _resp(500, False, f"Error reading CSV: {e}")
-
-    total_rows = len(df)
-    total_cols = len(df.columns)
-
-    def _safe_float(v) -> float | None:
-        """Return float(v) if v is a finite number, else None."""
-        return float(v) if pd.notna(v) else None
-
-    numeric_cols = df.select_dtypes(include="number").columns
-    columns = []
-    for col in df.columns:
-        is_numeric = col in numeric_cols
-        null_count = int(df[col].isnull().sum())
-        entry: dict = {
-            "column": col,
-            "dtype": str(df[col].dtype),
-            "count": int(df[col].count()),
-            "null_count": null_count,
-            "mean": _safe_float(df[col].mean()) if is_numeric else None,
-            "min": _safe_float(df[col].min()) if is_numeric else None,
-            "max": _safe_float(df[col].max()) if is_numeric else None,
-        }
-        columns.append(entry)
+    with ExitStack() as stack:
+        file_path, failure = _enter_reading_file(stack, db, file)
+        if failure:
+            return failure
+        kind = _profile_kind("column_stats", approximate, error)
+        cached = load_profile(file_path, kind)
+        if cached is not None:
+            return _resp(200, True, cached["message"], cached["data"])
 
-    data = {"total_rows": total_rows, "total_cols": total_cols, "columns": columns}
-    return _resp(200, True, "Column statistics generated successfully", data)
+        try:
+            reader = DatasetReader(file_path, schema=stored_schema(file, file_path, widen=True))
+            if approximate:
+                data = approximate_column_stats_payload(compute_sketch_stats(reader, error=error))
+            else:
+                data = column_stats_payload(compute_dataset_stats(reader))
+        except FileNotFoundError:
+            return _resp(500, False, f"File not found: {file_path}")
+        except pd.errors.ParserError as e:
+            logger.exception("CSV parsing error: %s", str(e))
+            return _resp(500, False, f"Error reading CSV: {e}")
+        except Exception as e:
+            logger.exception("Error reading file: %s", str(e))
+            return _resp(500, False, f"Error reading CSV: {e}")
+
+        _mark_precision(data, approximate, APPROXIMATE_STATS_FIELDS, error)
+        message = "Column statistics generated successfully"
+        store_profile(file_path, kind, message, data)
+        return _resp(200, True, message, data)
 
 
 def get_correlation_matrix(db: Session, file_id: uuid_pkg.UUID) -> tuple:
@@ -226,163 +308,121 @@ def get_correlation_matrix(db: Session, file_id: uuid_pkg.UUID) -> tuple:
     if not file:
         return _resp(400, False, "File doesn't exist in DB")
 
-    file_path = _get_file_path(file)
-    try:
-        df = pd.read_csv(file_path)
-    except FileNotFoundError:
-        return _resp(500, False, f"File not found: {file_path}")
-    except pd.errors.ParserError as e:
-        logger.exception("CSV parsing error: %s", str(e))
-        return _resp(500, False, f"Error reading CSV: {e}")
-    except Exception as e:
-        logger.exception("Error reading file: %s", str(e))
-        return _resp(500, False, f"Error reading CSV: {e}")
-
-    numeric_df = df.select_dtypes(include="number")
-    if numeric_df.empty:
-        return _resp(200, True, "No numeric columns found", {"columns": [], "matrix": []})
-
-    corr = numeric_df.corr()
-    # Convert the DataFrame to a plain list-of-lists; NaN becomes None (JSON null)
-    columns = corr.columns.tolist()
-    matrix = [[None if pd.isna(v) else round(float(v), 6) for v in row] for row in corr.to_numpy()]
-    return _resp(
-        200,
-        True,
-        "Correlation matrix computed successfully",
-        {"columns": columns, "matrix": matrix},
-    )
-
+    with ExitStack() as stack:
+        file_path, failure = _enter_reading_file(stack, db, file)
+        if failure:
+            return failure
+        cached = load_profile(file_path, "correlation")
+        if cached is not None:
+            return _resp(200, True, cached["message"], cached["data"])
 
-def get_file_data(db: Session, file_id: uuid_pkg.UUID, page: int = 1, page_size: int = 50) -> tuple:
-    """Read and return the paginated contents of a CSV file as JSON."""
-    file = db.exec(select(DataFile).where(DataFile.id == file_id)).first()
-    if not file:
-        return _resp(400, False, "Unable to open file")
+        try:
+            reader = DatasetReader(file_path, schema=stored_schema(file, file_path, widen=True))
+            columns, corr = compute_correlation(reader)
+        except FileNotFoundError:
+            return _resp(500, False, f"File not found: {file_path}")
+        except pd.errors.ParserError as e:
+            logger.exception("CSV parsing error: %s", str(e))
+            return _resp(500, False, f"Error reading CSV: {e}")
+        except Exception as e:
+            logger.exception("Error reading file: %s", str(e))
+            return _resp(500, False, f"Error reading CSV: {e}")
+
+        if not columns:
+            message = "No numeric columns found"
+            data = {"columns": [], "matrix": []}
+        else:
+            # Convert the matrix to a plain list-of-lists; NaN becomes None (JSON null)
+            matrix = [[None if pd.isna(v) else round(float(v), 6) for v in row] for row in corr]
+            message = "Correlation matrix computed successfully"
+            data = {"columns": columns, "matrix": matrix}
+        store_profile(file_path, "correlation", message, data)
+        return _resp(200, True, message, data)
 
-    file_path = _get_file_path(file)
 
+def _image_manifest_page(file: DataFile, page: int, page_size: int) -> tuple:
+    """Page through the image manifest of a ZIP dataset (path, label, size, width, height)."""
     try:
-        with open(file_path, "rb") as f:
-            total_rows = sum(1 for _ in f) - 1
-        total_rows = max(total_rows, 0)
+        manifest = file_manifest(file)
     except FileNotFoundError:
-        return _resp(500, False, f"File not found: {file_path}")
-    except Exception as e:
-        return _resp(500, False, f"Error reading file count: {e}")
-
+        return _resp(500, False, "Image dataset not found on disk")
+    total_rows = len(manifest)
     total_pages = (total_rows + page_size - 1) // page_size if page_size > 0 else 0
-
     if total_rows > 0 and page > total_pages:
         return _resp(400, False, f"Page {page} exceeds total pages ({total_pages})")
-
-    if total_rows == 0:
-        return _paginated_resp([], {"page": page, "page_size": page_size, "total_rows": 0, "total_pages": 0})
-
     start_idx = (page - 1) * page_size
-    skip = list(range(1, start_idx + 1)) if start_idx > 0 else None
-
-    try:
-        df_page = pd.read_csv(file_path, skiprows=skip, nrows=page_size)
-    except FileNotFoundError:
-        return _resp(500, False, f"File not found: {file_path}")
-    except pd.errors.ParserError as e:
-        logger.exception("CSV parsing error: %s", str(e))
-        return _resp(500, False, f"Error reading CSV: {e}")
-    except Exception as e:
-        logger.exception("Error reading file: %s", str(e))
-        return _resp(500, False, f"Error reading CSV: {e}")
-
-    # For empty or any dataframe slice, to_dict will convert to list of plain dict elements avoiding json strings
-    json_str = df_page.to_json(orient="records")
-    data_list = json.loads(json_str)
-
+    data_list = json.loads(manifest.iloc[start_idx : start_idx + page_size].to_json(orient="records"))
     return _paginated_resp(
         data_list, {"page": page, "page_size": page_size, "total_rows": total_rows, "total_pages": total_pages}
     )
 
 
-def _one_hot_encode(df: pd.DataFrame, col: str, _params: dict | None) -> pd.DataFrame:
-    return pd.get_dummies(df, columns=[col], dtype=int)
-
-
-def _categorical_to_numerical(df: pd.DataFrame, col: str, _params: dict | None) -> pd.DataFrame:
-    # Preserve integer dtype so downstream consumers see a proper int column.
-    # pd.Categorical.codes returns int with -1 for NaNs — keep that convention
-    # rather than promoting to float just to hold NaN.
-    df[col] = pd.Categorical(df[col]).codes
-    return df
-
-
-def _drop_column(df: pd.DataFrame, col: str, _params: dict | None) -> pd.DataFrame:
-    return df.drop(columns=[col])
-
-
-def _min_max_normalize(df: pd.DataFrame, col: str, _params: dict | None) -> pd.DataFrame:
-    col_min = df[col].min()
-    col_max = df[col].max()
-    df[col] = 0.0 if np.isclose(col_min, col_max) else (df[col] - col_min) / (col_max - col_min)
-    return df
-
-
-def _zscore_standardize(df: pd.DataFrame, col: str, _params: dict | None) -> pd.DataFrame:
-    mean = df[col].mean()
-    std = df[col].std()
-    df[col] = 0.0 if np.isclose(std, 0) else (df[col] - mean) / std
-    return df
+def get_file_data(db: Session, file_id: uuid_pkg.UUID, page: int = 1, page_size: int = 50) -> tuple:
+    """Read and return the paginated contents of a CSV file (or a ZIP's image manifest) as JSON."""
+    file = db.exec(select(DataFile).where(DataFile.id == file_id)).first()
+    if not file:
+        return _resp(400, False, "Unable to open file")
+    if file.file_type == "zip":
+        return _image_manifest_page(file, page, page_size)
 
+    with ExitStack() as stack:
+        file_path, failure = _enter_reading_file(stack, db, file)
+        if failure:
+            return failure
+        try:
+            index = load_row_index(file_path)
+            total_rows = index.total_rows
+        except FileNotFoundError:
+            return _resp(500, False, f"File not found: {file_path}")
+        except Exception as e:
+            return _resp(500, False, f"Error reading file count: {e}")
 
-def _log_transform(df: pd.DataFrame, col: str, _params: dict | None) -> pd.DataFrame:
-    s = df[col]
-    invalid = int((s < -1).sum())
-    if invalid:
-        raise ValueError(f"Log Transform: {invalid} value(s) below -1 in column '{col}'")
-    df[col] = np.log1p(s)
-    return df
+        total_pages = (total_rows + page_size - 1) // page_size if page_size > 0 else 0
 
+        if total_rows > 0 and page > total_pages:
+            return _resp(400, False, f"Page {page} exceeds total pages ({total_pages})")
 
-def _fill_missing(df: pd.DataFrame, col: str, params: dict | None) -> pd.DataFrame:
-    strategy = (params or {}).get("strategy", "mean")
-    if strategy == "median":
-        df[col] = df[col].fillna(df[col].median())
-    elif strategy == "mode":
-        mode_vals = df[col].mode()
-        fill_val = mode_vals[0] if not mode_vals.empty else df[col].median()
-        df[col] = df[col].fillna(fill_val)
-    elif strategy == "mean":
-        df[col] = df[col].fillna(df[col].mean())
-    else:
-        raise ValueError(f"Unknown fill strategy '{strategy}'. Valid: 'mean', 'median', 'mode'")
-    return df
+        if total_rows == 0:
+            return _paginated_resp([], {"page": page, "page_size": page_size, "total_rows": 0, "total_pages": 0})
 
+        start_idx = (page - 1) * page_size
 
-# Single source of truth: maps transformation name → handler function.
-# Adding a new transformation only requires adding one entry here.
-# This is the ONLY place to register new transformations.
-_TRANSFORMATION_REGISTRY: dict[str, Callable[..., pd.DataFrame]] = {
-    "One Hot Encoding": _one_hot_encode,
-    "Categorical to Numerical": _categorical_to_numerical,
-    "Drop Column": _drop_column,
-    "Min-Max Normalization": _min_max_normalize,
-    "Z-score Standardization": _zscore_standardize,
-    "Log Transform": _log_transform,
-    "Fill Missing Values": _fill_missing,
-}
+        try:
+            df_page = read_rows(file_path, index, start_idx, page_size)
+        except FileNotFoundError:
+            return _resp(500, False, f"File not found: {file_path}")
+        except pd.errors.ParserError as e:
+            logger.exception("CSV parsing error: %s", str(e))
+            return _resp(500, False, f"Error reading CSV: {e}")
+        except Exception as e:
+            logger.exception("Error reading file: %s", str(e))
+            return _resp(500, False, f"Error reading CSV: {e}")
+
+        # For empty or any dataframe slice, to_dict will convert to list of plain dict elements avoiding json strings
+        json_str = df_page.to_json(orient="records")
+        data_list = json.loads(json_str)
+
+        return _paginated_resp(
+            data_list, {"page": page, "page_size": page_size, "total_rows": total_rows, "total_pages": total_pages}
+        )
 
 
 def preprocess_data(db: Session, file_id: uuid_pkg.UUID, transformations: list) -> tuple:
-    """Apply column transformations to a CSV, overwriting the existing file."""
+    """Record column transformations as a new version of a CSV file.
+
+    The transformations are fitted on the current head version and stored as
+    a recipe; the uploaded CSV is never modified, and the new version's rows
+    are only written when something reads them.
+    """
     file = db.exec(select(DataFile).where(DataFile.id == file_id)).first()
     if not file:
         return _resp(400, False, "File doesn't exist in DB")
 
-    file_path = _get_file_path(file)
-
     try:
-        df = pd.read_csv(file_path)
+        columns = version_columns(db, file)
 
-        # Validate all transformations before applying any, so the request either
-        # fully succeeds or fully fails — no partial mutations.
+        # Validate all transformations before fitting any, so the request either
+        # fully succeeds or fully fails — no partial versions.
         for t in transformations:
             if t.transformation not in _TRANSFORMATION_REGISTRY:
                 return _resp(
@@ -390,45 +430,98 @@ def preprocess_data(db: Session, file_id: uuid_pkg.UUID, transformations: list)
                     False,
                     f"Unknown transformation '{t.transformation}'. Valid options: {sorted(_TRANSFORMATION_REGISTRY)}",
                 )
-            if t.feature not in df.columns:
+            if t.feature not in columns:
                 return _resp(
                     422,
                     False,
-                    f"Column '{t.feature}' not found. Available columns: {list(df.columns)}",
+                    f"Column '{t.feature}' not found. Available columns: {columns}",
                 )
 
+        # Columns removed by an earlier step cannot be referenced later on.
+        live = set(columns)
         for t in transformations:
-            if t.feature not in df.columns:
+            if t.feature not in live:
                 return _resp(
                     422,
                     False,
                     f"Column '{t.feature}' not found (may have been removed by a prior transformation)",
                 )
-            handler = _TRANSFORMATION_REGISTRY[t.transformation]
-            df = handler(df, t.feature, t.params)
-
-        # Backup the original before overwriting so the user can recover.
-        # Only one .bak is retained — repeated preprocessing silently replaces it.
-        try:
-            shutil.copy2(file_path, file_path + ".bak")
-        except OSError:
-            logger.exception("Could not create backup at %s.bak", file_path)
-
-        # Write to a temp file, then atomically replace the original so an
-        # interruption between writing and replacing never leaves a truncated CSV.
-        tmp_path = file_path + ".tmp"
-        try:
-            df.to_csv(tmp_path, index=False)
-            os.replace(tmp_path, file_path)
-        finally:
-            with contextlib.suppress(OSError):
-                os.remove(tmp_path)
-        return _resp(200, True, "Dataset preprocessed successfully")
+            if _TRANSFORMATION_REGISTRY[t.transformation] in (DropColumn, OneHotEncode):
+                live.discard(t.feature)
+
+        steps = [
+            {"transformation": t.transformation, "feature": t.feature, "params": t.params} for t in transformations
+        ]
+        version = create_version(db, file, steps)
+        return _resp(200, True, "Dataset preprocessed successfully", _version_payload(version, file))
     except ValueError as e:
+        db.rollback()
         return _resp(422, False, str(e))
     except pd.errors.ParserError as e:
         logger.exception("CSV parsing error: %s", str(e))
         return _resp(500, False, f"Error parsing CSV data: {e}")
     except Exception as e:
+        db.rollback()
         logger.exception("Error preprocessing data: %s", str(e))
         return _resp(500, False, f"Error preprocessing data: {e}")
+
+
+def _version_payload(version: DatasetVersion, file: DataFile) -> dict:
+    return {
+        "version_id": str(version.id),
+        "number": version.number,
+        "parent_id": str(version.parent_id) if version.parent_id else None,
+        "transformations": [
+            {"transformation": s["transformation"], "feature": s["feature"], "params": s["params"]}
+            for s in version.recipe or []
+        ],
+        "columns": version.columns,
+        "is_current": version.id == file.current_version_id,
+    }
+
+
+def list_versions_service(db: Session, file_id: uuid_pkg.UUID) -> tuple:
+    """List the versions of a CSV file, oldest first."""
+    file = db.exec(select(DataFile).where(DataFile.id == file_id)).first()
+    if not file:
+        return _resp(400, False, "File doesn't exist in DB")
+    if file.file_type != "csv":
+        return _resp(400, False, "Only CSV files have versions")
+    try:
+        versions = list_versions(db, file_id) if file.current_version_id is not None else [head_version(db, file)]
+    except SQLAlchemyError:
+        logger.exception("Error listing versions")
+        return _resp(500, False, "An error occurred while listing the versions")
+    return _resp(200, True, "Versions found successfully", [_version_payload(v, file) for v in versions])
+
+
+def checkout_version_service(db: Session, file_id: uuid_pkg.UUID, version_id: uuid_pkg.UUID) -> tuple:
+    """Make an existing version the head of a file (undo/redo and branching)."""
+    file = db.exec(select(DataFile).where(DataFile.id == file_id)).first()
+    if not file:
+        return _resp(400, False, "File doesn't exist in DB")
+    try:
+        version = checkout_version(db, file, version_id)
+    except VersionNotFoundError as e:
+        return _resp(404, False, str(e))
+    except SQLAlchemyError:
+        db.rollback()
+        logger.exception("Error checking out version")
+        return _resp(500, False, "An error occurred while switching versions")
+    return _resp(200, True, f"Switched to version {version.number}", _version_payload(version, file))
+
+
+def undo_version_service(db: Session, file_id: uuid_pkg.UUID) -> tuple:
+    """Move the head of a file back to its parent version."""
+    file = db.exec(select(DataFile).where(DataFile.id == file_id)).first()
+    if not file:
+        return _resp(400, False, "File doesn't exist in DB")
+    if file.current_version_id is None:
+        return _resp(400, False, "Nothing to undo")
+    try:
+        head = get_version(db, file, file.current_version_id)
+    except VersionNotFoundError as e:
+        return _resp(404, False, str(e))
+    if head.parent_id is None:
+        return _resp(400, False, "Nothing to undo")
+    return checkout_version_service(db, file_id, head.parent_id)
@@ -1,18 +1,35 @@
 import contextlib
 import os
-import shutil
 import uuid as uuid_pkg
 import zipfile
 from typing import Any
 
-import pandas as pd
 from sqlalchemy import func
 from sqlalchemy.exc import SQLAlchemyError
 from sqlmodel import Session, select
 from werkzeug.utils import secure_filename
 
 from app.config import get_settings
-from app.models import DataFile, ImageProperties, ModelBasic
+from app.models import DataFile, ImageProperties, ModelBasic, ProfileStatus
+from app.services.blob_store import (
+    blob_lock,
+    blob_name,
+    extract_dir,
+    place_blob,
+    remove_blob,
+    staging_path,
+    unreferenced,
+)
+from app.services.dataset_reader import remove_artifacts
+from app.services.dataset_versions import remove_version_file, version_file_paths
+from app.services.file_profiling import copy_profile, profiled_sibling, schedule_profile
+from app.services.image_manifest import (
+    InvalidArchiveError,
+    ZipPathTraversalError,
+    ZipTooLargeError,
+    extract_archive,
+)
+from app.services.ingest import UploadTooLargeError, ingest_upload
 from app.shared.logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -23,126 +40,142 @@ def _resp(status_code: int, success: bool, message: str, data: Any = None) -> tu
     return {"success": success, "message": message, "data": data}, status_code
 
 
-def add_file_service(db: Session, file_wrapper: Any, project_id: uuid_pkg.UUID | None = None) -> tuple:
-    """Save an uploaded file to disk and create a DataFile record."""
+def add_file_service(
+    db: Session,
+    file_wrapper: Any,
+    project_id: uuid_pkg.UUID | None = None,
+    expected_sha256: str | None = None,
+) -> tuple:
+    """Stream an uploaded file into the blob store and create a DataFile record.
+
+    The upload is read exactly once (see ``ingest_upload``): the same pass
+    enforces the size limit and hashes the content. The hash then names the
+    blob (see ``blob_store``): re-uploading identical bytes creates a new
+    DataFile that shares the stored file, its sidecar, index and profile
+    cache, and — for ZIPs — its extraction directory.
+
+    CSVs are not parsed here: the response is sent once the bytes are stored,
+    and the file is profiled in the background (see ``file_profiling``) —
+    unless identical content was already profiled, whose results are reused.
+
+    If ``expected_sha256`` is given (resumable uploads), content with any
+    other hash is discarded with a 422 before anything is recorded.
+    """
     settings = get_settings()
     upload_folder = settings.upload_folder
     os.makedirs(upload_folder, exist_ok=True)
 
-    # Enforce max upload size before saving to disk
-    file_size = 0
-    try:
-        file_wrapper.file.seek(0, 2)
-        file_size = file_wrapper.file.tell()
-    except (AttributeError, OSError) as exc:
-        logger.warning("Could not determine upload size; rejecting upload. Reason: %s", exc)
-        return _resp(413, False, "File size could not be verified. Upload rejected.")
-    finally:
-        with contextlib.suppress(AttributeError, OSError):
-            file_wrapper.file.seek(0)
-    if file_size > settings.max_content_length:
-        return _resp(413, False, "File too large. Maximum allowed size is 200MB.")
-
-    # Generate unique filename to prevent collisions
     original_name = file_wrapper.filename.rsplit(".", 1)[0].lower()
     original_ext = file_wrapper.filename.rsplit(".", 1)[1].lower()
-    unique_id = uuid_pkg.uuid4().hex[:8]
-    safe_filename = f"{original_name}_{unique_id}.{original_ext}"
-    file_path = os.path.join(upload_folder, safe_filename)
+    staged_path = staging_path(upload_folder, original_ext)
+
+    max_size = settings.max_content_length
+    try:
+        ingest = ingest_upload(file_wrapper.file, staged_path, max_size)
+    except UploadTooLargeError:
+        return _resp(413, False, f"File too large. Maximum allowed size is {max_size // (1024 * 1024)} MB.")
+    except OSError:
+        logger.exception("Could not store upload %s", file_wrapper.filename)
+        return _resp(500, False, "An error occurred while saving the file")
 
-    file_wrapper.save(file_path)
+    if expected_sha256 is not None and ingest.sha256 != expected_sha256.lower():
+        with contextlib.suppress(OSError):
+            os.remove(staged_path)
+        logger.warning("Checksum mismatch for %s: got %s", file_wrapper.filename, ingest.sha256)
+        return _resp(422, False, "Checksum mismatch: the uploaded content does not match the expected SHA-256")
 
     file_name_db = secure_filename(original_name)
     file_type_db = original_ext
-    logger.info("Saving file: %s (disk name: %s)", file_name_db, safe_filename)
+    disk_name = blob_name(ingest.sha256, file_type_db)
+    file_path = os.path.join(upload_folder, disk_name)
+    logger.info("Saving file: %s (disk name: %s)", file_name_db, disk_name)
 
     file_id = uuid_pkg.uuid4()
 
-    # Extract ZIP archives for image datasets
-    if file_type_db == "zip":
-        extract_dir_name = safe_filename.rsplit(".", 1)[0]
-        extract_path = os.path.join(upload_folder, extract_dir_name)
-        os.makedirs(extract_path, exist_ok=True)
-
-        max_extracted = 2 * 1024 * 1024 * 1024  # 2 GB decompression-bomb limit
-        total_extracted = 0
-
-        with zipfile.ZipFile(file_path, "r") as zf:
-            for member in zf.namelist():
-                member_path = os.path.realpath(os.path.join(extract_path, member))
-                if not member_path.startswith(os.path.realpath(extract_path) + os.sep):
-                    zf.close()
-                    os.remove(file_path)
-                    shutil.rmtree(extract_path, ignore_errors=True)
-                    return _resp(400, False, "Invalid ZIP: path traversal detected")
-
-                total_extracted += zf.getinfo(member).file_size
-                if total_extracted > max_extracted:
-                    zf.close()
+    with blob_lock(upload_folder, disk_name):
+        try:
+            is_new = place_blob(upload_folder, staged_path, disk_name)
+        except OSError:
+            logger.exception("Could not store upload %s", file_wrapper.filename)
+            with contextlib.suppress(OSError):
+                os.remove(staged_path)
+            return _resp(500, False, "An error occurred while saving the file")
+
+        # Extract ZIP archives for image datasets, indexing the images as they land.
+        if file_type_db == "zip":
+            if is_new:
+                try:
+                    extract_archive(file_path, extract_dir(upload_folder, disk_name))
+                except (InvalidArchiveError, zipfile.BadZipFile) as e:
                     os.remove(file_path)
-                    shutil.rmtree(extract_path, ignore_errors=True)
-                    return _resp(413, False, "ZIP too large after extraction. Maximum extracted size is 2 GB.")
-
-            zf.extractall(extract_path)
-
-        logger.info("Extracted ZIP to %s", extract_path)
+                    remove_artifacts(file_path)
+                    if isinstance(e, ZipPathTraversalError):
+                        return _resp(400, False, "Invalid ZIP: path traversal detected")
+                    if isinstance(e, ZipTooLargeError):
+                        return _resp(413, False, "ZIP too large after extraction. Maximum extracted size is 2 GB.")
+                    return _resp(400, False, "Invalid ZIP: the archive is corrupt")
+
+            record = DataFile(
+                id=file_id,
+                file_name=file_name_db,
+                file_type=file_type_db,
+                disk_name=disk_name,
+                project_id=project_id,
+                columns=None,
+                row_count=None,
+                content_hash=ingest.sha256,
+                profile_status=ProfileStatus.READY,
+            )
+            db.add(record)
+            db.flush()
+
+            db.add(
+                ImageProperties(
+                    id=file_id,
+                    image_size=224,
+                    batch_size=32,
+                    color_mode="rgb",
+                    label_mode="int",
+                )
+            )
+            db.commit()
+            return _resp(
+                201, True, "File saved successfully", {"file_id": str(file_id), "profile_status": record.profile_status}
+            )
 
         record = DataFile(
             id=file_id,
             file_name=file_name_db,
             file_type=file_type_db,
-            disk_name=safe_filename,
+            disk_name=disk_name,
             project_id=project_id,
-            columns=None,
-            row_count=None,
+            content_hash=ingest.sha256,
         )
+        sibling = profiled_sibling(db, disk_name) if file_type_db == "csv" and not is_new else None
+        if sibling is not None:
+            copy_profile(sibling, record)
+        elif file_type_db == "csv":
+            record.profile_status = ProfileStatus.PENDING
         db.add(record)
-        db.flush()
-
-        db.add(
-            ImageProperties(
-                id=file_id,
-                image_size=224,
-                batch_size=32,
-                color_mode="rgb",
-                label_mode="int",
-            )
-        )
         db.commit()
-        return _resp(201, True, "File saved successfully")
 
-    # Cache column names and row count at upload time (CSV only)
-    columns_list: list[str] | None = None
-    row_count: int | None = None
-    if file_type_db == "csv":
-        try:
-            df_header = pd.read_csv(file_path, nrows=0)
-            columns_list = list(df_header.columns)
-            row_count = sum(chunk.shape[0] for chunk in pd.read_csv(file_path, chunksize=10_000))
-        except (pd.errors.ParserError, OSError, UnicodeDecodeError, MemoryError):
-            logger.warning("Could not extract columns/row_count from %s", file_path)
-
-    record = DataFile(
-        id=file_id,
-        file_name=file_name_db,
-        file_type=file_type_db,
-        disk_name=safe_filename,
-        project_id=project_id,
-        columns=columns_list,
-        row_count=row_count,
+    if record.profile_status == ProfileStatus.PENDING:
+        # Queued only after the commit, so the worker always finds the row.
+        schedule_profile(file_id)
+    return _resp(
+        201, True, "File saved successfully", {"file_id": str(file_id), "profile_status": record.profile_status}
     )
-    db.add(record)
-    db.commit()
-    return _resp(201, True, "File saved successfully")
 
 
 def get_all_files_service(
     db: Session, project_id: uuid_pkg.UUID | None = None, offset: int = 0, limit: int = 50
 ) -> tuple:
-    """Return a paginated list of uploaded files with their CSV column names."""
-    settings = get_settings()
-    upload_folder = settings.upload_folder
+    """Return a paginated list of uploaded files with their CSV column names.
 
+    Only cached values are served; no file is read. CSVs whose profile is not
+    ready yet — including legacy uploads awaiting ``backfill_profiles`` — are
+    listed as pending with no fields.
+    """
     try:
         base_filter = select(DataFile)
         if project_id is not None:
@@ -153,46 +186,30 @@ def get_all_files_service(
         files = db.exec(base_filter.offset(offset).limit(limit)).all()
         data = []
         for file in files:
-            # Prefer cached columns/row_count from the DB
-            if file.columns is not None:
-                fields = file.columns
-                row_count = file.row_count or 0
-            elif file.file_type == "csv":
-                # Backfill: read header + count rows, then persist the cache
-                try:
-                    file_path = f"{upload_folder}/{file.disk_name}"
-                    df_header = pd.read_csv(file_path, nrows=0)
-                    fields = list(df_header.columns)
-                    row_count = sum(chunk.shape[0] for chunk in pd.read_csv(file_path, chunksize=10_000))
-                    file.columns = fields
-                    file.row_count = row_count
-                    db.add(file)
-                    db.commit()
-                except (pd.errors.ParserError, OSError, UnicodeDecodeError, MemoryError):
-                    logger.warning("Failed to read CSV for file %s (id=%s)", file.file_name, file.id)
-                    fields = []
-                    row_count = 0
-            else:
-                # Non-CSV files (e.g. ZIP) have no columns to cache
-                fields = []
-                row_count = 0
+            status = file.profile_status
+            if status is None:
+                # Uploaded before background profiling: ready if its columns were cached.
+                status = (
+                    ProfileStatus.PENDING if file.file_type == "csv" and file.columns is None else ProfileStatus.READY
+                )
+            pending = status in (ProfileStatus.PENDING, ProfileStatus.RUNNING)
+            # Non-CSV files (e.g. ZIP) have no columns.
+            fields = file.columns if file.columns is not None else []
             data.append(
                 {
                     "file_name": file.file_name,
                     "file_type": file.file_type,
                     "file_id": str(file.id),
                     "fields": fields,
-                    "row_count": row_count,
-                    "error": fields == [],
+                    "row_count": file.row_count or 0,
+                    "profile_status": status,
+                    "error": fields == [] and not pending,
                 }
             )
         body = {"success": True, "message": "Saved files found successfully", "data": data}
         body["pagination"] = {"total": total, "offset": offset, "limit": limit}
         return body, 200
-    except pd.errors.ParserError:
-        logger.exception("CSV parsing error")
-        return _resp(500, False, "An error occurred while parsing a CSV file")
-    except (SQLAlchemyError, OSError, UnicodeDecodeError, MemoryError):
+    except SQLAlchemyError:
         logger.exception("Error fetching files")
         return _resp(500, False, "An error occurred while fetching the files")
 
@@ -207,7 +224,8 @@ def delete_one_file_by_id_service(db: Session, file_id: uuid_pkg.UUID) -> tuple:
         if not file:
             return _resp(400, False, "File not in the DB")
 
-        file_path = os.path.join(upload_folder, file.disk_name)
+        # Materialized dataset versions are removed along with the upload.
+        version_paths = version_file_paths(db, file)
 
         # Null out every ModelBasic that references this DataFile so FK
         # constraints do not block the DB delete.
@@ -227,14 +245,16 @@ def delete_one_file_by_id_service(db: Session, file_id: uuid_pkg.UUID) -> tuple:
     # failed commit does not orphan the disk file with a surviving DB record.
     # Disk failures after a successful commit are logged but do not revert the
     # deletion — the record is already gone from the application's perspective.
+    # The upload itself is a shared blob: it goes only with its last reference.
     try:
-        with contextlib.suppress(FileNotFoundError):
-            os.remove(file_path)
+        for path in version_paths:
+            remove_version_file(path)
 
-        if file.file_type == "zip":
-            extract_dir_name = file.disk_name.rsplit(".", 1)[0]
-            extract_path = os.path.join(upload_folder, extract_dir_name)
-            shutil.rmtree(extract_path, ignore_errors=True)
+        with blob_lock(upload_folder, file.disk_name):
+            if unreferenced(db, [file.disk_name]):
+                remove_blob(upload_folder, file.disk_name, file.file_type)
+            else:
+                logger.info("Blob %s is still referenced; keeping it", file.disk_name)
     except OSError:
         logger.exception("Failed to remove disk file for id=%s", file_id)
         return _resp(200, True, "File record deleted, but the physical file could not be removed from storage")
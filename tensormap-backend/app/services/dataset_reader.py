@@ -0,0 +1,386 @@
+"""Single read path for tabular (CSV) datasets.
+
+Every consumer of an uploaded CSV — the data-process endpoints, preprocessing
+and training — loads rows through ``DatasetReader`` instead of calling
+``pd.read_csv`` itself. The reader prefers a typed Parquet sidecar that is
+materialized once next to the CSV, so repeat reads skip text parsing entirely
+and can load only the columns they need. When the sidecar is missing or older
+than the CSV the reader transparently falls back to parsing the CSV.
+
+Derived artifacts for ``<name>.csv`` live in the sibling directory
+``<name>.csv.cache/`` so they can be removed together with the dataset.
+
+Readers of an upload pass the ``ChunkSchema`` profiled for it
+(``file_profiling.stored_schema``): columns are then parsed straight into
+their narrowest lossless dtypes — downcast numbers, ``category`` for
+low-cardinality text — and nothing is inferred per read.
+"""
+
+import contextlib
+import os
+import shutil
+import uuid as uuid_pkg
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.shared.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+ARTIFACT_DIR_SUFFIX = ".cache"
+SIDECAR_NAME = "columns.parquet"
+# Rows per chunk for streaming consumers; bounds their peak memory.
+DEFAULT_CHUNK_ROWS = 50_000
+# Text columns with at most this many distinct values, each used at least
+# twice on average, are read as ``category``.
+CATEGORY_MAX_VALUES = 1000
+CATEGORY_MAX_RATIO = 0.5
+_NARROW_INTS = ("int8", "int16", "int32")
+# What a plain ``pd.read_csv`` gives for each downcast dtype.
+_WIDE_DTYPES = {"float32": "float64", "int8": "int64", "int16": "int64", "int32": "int64", "category": "object"}
+
+
+def artifact_dir(csv_path: str) -> str:
+    """Return the directory holding derived artifacts for ``csv_path``."""
+    return csv_path + ARTIFACT_DIR_SUFFIX
+
+
+def sidecar_path(csv_path: str) -> str:
+    """Return the path of the Parquet sidecar for ``csv_path``."""
+    return os.path.join(artifact_dir(csv_path), SIDECAR_NAME)
+
+
+def _arrow_type(dtype: str, text: bool) -> pa.DataType:
+    if dtype == "object":
+        # Object columns are either strings or booleans with gaps.
+        return pa.string() if text else pa.bool_()
+    return pa.from_numpy_dtype(dtype)
+
+
+def build_sidecar(csv_path: str, chunksize: int = DEFAULT_CHUNK_ROWS, schema: "ChunkSchema | None" = None) -> bool:
+    """Materialize the Parquet sidecar for ``csv_path``.
+
+    The CSV is streamed in chunks conformed to a ``ChunkSchema``, so reading
+    the sidecar back yields the dtypes a plain ``pd.read_csv`` would while
+    peak memory stays bounded by ``chunksize``. Pass ``schema`` when it is
+    already known (e.g. from the upload) to skip the scan that infers it. The
+    file is written to a temp path and atomically swapped in. Failures are
+    logged and reported as ``False``: readers simply keep using the CSV.
+    """
+    target = sidecar_path(csv_path)
+    tmp_path = f"{target}.{uuid_pkg.uuid4().hex}.tmp"
+    try:
+        os.stat(csv_path)
+        os.makedirs(artifact_dir(csv_path), exist_ok=True)
+        reader = DatasetReader(csv_path, use_sidecar=False)
+        if schema is None:
+            schema = reader.schema(chunksize)
+        arrow_schema = pa.schema(
+            [(name, _arrow_type(dtype, name in schema.text_columns)) for name, dtype in schema.dtypes.items()]
+        )
+        with pq.ParquetWriter(tmp_path, arrow_schema) as writer:
+            for chunk in reader.iter_chunks(chunksize, schema=schema):
+                writer.write_table(pa.Table.from_pandas(chunk, schema=arrow_schema, preserve_index=False))
+        os.replace(tmp_path, target)
+    except (pd.errors.ParserError, pa.ArrowException, OSError, UnicodeDecodeError, MemoryError):
+        logger.warning("Could not build columnar sidecar for %s", csv_path, exc_info=True)
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        return False
+    logger.info("Built columnar sidecar %s", target)
+    return True
+
+
+def is_numeric_dtype(dtype) -> bool:
+    """pandas ``select_dtypes(include="number")`` semantics (bool excluded)."""
+    return pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+
+
+def merge_dtypes(current: str | None, new: str) -> str:
+    """Reconcile a column's dtype across chunks the way a full ``read_csv`` would.
+
+    Identical dtypes are kept; an int/float mix widens to ``float64``; any other
+    mix (e.g. bool in one chunk, object in another) becomes ``object``.
+    """
+    if current is None or current == new:
+        return new
+    if is_numeric_dtype(current) and is_numeric_dtype(new):
+        return "float64"
+    return "object"
+
+
+@dataclass(frozen=True)
+class ChunkSchema:
+    """The column dtypes a full read produces, for reading a dataset in chunks.
+
+    Parsing a CSV in chunks infers types per chunk, so a column can come back
+    as int in one chunk and text in another. Passing a ``ChunkSchema`` to
+    ``DatasetReader.iter_chunks`` makes every chunk match a full read:
+    ``text_columns`` are parsed as strings and the rest are cast to ``dtypes``.
+
+    A ``"category"`` dtype reads the column as a categorical over its
+    ``categories``, which are fixed so every chunk agrees on them.
+    """
+
+    dtypes: dict[str, str]
+    text_columns: frozenset[str] = field(default_factory=frozenset)
+    categories: dict[str, list[str]] = field(default_factory=dict)
+
+    def _dtype(self, name: str):
+        dtype = self.dtypes[name]
+        return pd.CategoricalDtype(self.categories[name]) if dtype == "category" else dtype
+
+    def conform(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """Cast the columns of ``chunk`` to the reconciled dtypes."""
+        for name in self.dtypes:
+            if name in chunk.columns:
+                dtype = self._dtype(name)
+                if chunk[name].dtype != dtype:
+                    chunk[name] = chunk[name].astype(dtype)
+        return chunk
+
+    def csv_dtypes(self) -> dict:
+        """``pd.read_csv`` dtypes that parse straight into the schema (text as strings, numbers at their width)."""
+        dtypes = {}
+        for name, dtype in self.dtypes.items():
+            if name in self.text_columns:
+                dtypes[name] = self._dtype(name) if dtype == "category" else str
+            elif is_numeric_dtype(dtype):
+                dtypes[name] = dtype
+        return dtypes
+
+    def widened(self) -> "ChunkSchema":
+        """Return the schema with what a plain ``pd.read_csv`` gives: 64-bit numbers, text for categories."""
+        return ChunkSchema({name: _WIDE_DTYPES.get(d, d) for name, d in self.dtypes.items()}, self.text_columns)
+
+    def to_json(self) -> dict:
+        return {
+            "dtypes": dict(self.dtypes),
+            "text_columns": sorted(self.text_columns),
+            "categories": dict(self.categories),
+        }
+
+    @classmethod
+    def from_json(cls, data) -> "ChunkSchema | None":
+        """Rebuild a schema stored with ``to_json``; None if ``data`` is not one."""
+        if not isinstance(data, dict) or not isinstance(data.get("dtypes"), dict):
+            return None
+        return cls(dict(data["dtypes"]), frozenset(data.get("text_columns", ())), dict(data.get("categories", {})))
+
+
+def _only_bools(series: pd.Series) -> bool:
+    return bool(series.dropna().map(type).eq(bool).all())
+
+
+class SchemaBuilder:
+    """Fold the chunks of a CSV, as ``pd.read_csv`` parses them, into a ``ChunkSchema``.
+
+    Object columns become text columns unless every chunk held only booleans
+    (``True``/``False`` with gaps), which pandas keeps as Python bools rather
+    than strings.
+    """
+
+    def __init__(self) -> None:
+        self.dtypes: dict[str, str] = {}
+        self._bool_like: dict[str, bool] = {}
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        for name in chunk.columns:
+            series = chunk[name]
+            self.dtypes[name] = merge_dtypes(self.dtypes.get(name), str(series.dtype))
+            if series.notna().any():
+                chunk_bools = series.dtype == bool or (series.dtype == object and _only_bools(series))
+                self._bool_like[name] = self._bool_like.get(name, True) and chunk_bools
+
+    def build(self, text_columns: bool = True) -> ChunkSchema:
+        """Return the schema; ``text_columns=False`` for chunks that are already typed."""
+        if not text_columns:
+            return ChunkSchema(dict(self.dtypes))
+        text = frozenset(n for n, d in self.dtypes.items() if d == "object" and not self._bool_like.get(n, False))
+        return ChunkSchema(dict(self.dtypes), text)
+
+
+def _narrowest_int(low: int, high: int) -> str:
+    for dtype in _NARROW_INTS:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return dtype
+    return "int64"
+
+
+def _float32_safe(values: np.ndarray) -> bool:
+    """True if every value reads back the same from float32's shortest text (``0.1`` does, ``0.123456789`` not)."""
+    values = values[~np.isnan(values)]
+    with np.errstate(over="ignore"):
+        narrow = values.astype(np.float32)
+    inexact = narrow.astype(np.float64) != values
+    if not inexact.any():
+        return True
+    return bool((narrow[inexact].astype(str).astype(np.float64) == values[inexact]).all())
+
+
+class DowncastSchemaBuilder(SchemaBuilder):
+    """A ``SchemaBuilder`` that also finds the narrowest lossless dtype of each column.
+
+    ``build_compact`` reads int columns as the smallest int type holding
+    their range, float columns as float32 when that loses no digit of any
+    value's text (see ``_float32_safe``), and text columns with few distinct
+    values (``CATEGORY_MAX_VALUES``, ``CATEGORY_MAX_RATIO``) as ``category``.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._ranges: dict[str, tuple[int, int]] = {}
+        self._float32: dict[str, bool] = {}
+        # Distinct texts per column; None once it cannot be a category.
+        self._values: dict[str, set[str] | None] = {}
+        self._non_null: dict[str, int] = {}
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        super().update(chunk)
+        for name in chunk.columns:
+            series = chunk[name]
+            if pd.api.types.is_integer_dtype(series.dtype) and len(series):
+                low, high = int(series.min()), int(series.max())
+                if name in self._ranges:
+                    low, high = min(low, self._ranges[name][0]), max(high, self._ranges[name][1])
+                self._ranges[name] = (low, high)
+            if is_numeric_dtype(series.dtype) and self._float32.get(name, True):
+                self._float32[name] = _float32_safe(series.to_numpy(dtype="float64", na_value=np.nan))
+            self._update_values(name, series)
+
+    def _update_values(self, name: str, series: pd.Series) -> None:
+        values = self._values.get(name, set())
+        if values is None:
+            return
+        present = series.dropna()
+        if series.dtype != object:
+            # Parsed as numbers or bools here, so the column's text is lost.
+            values = None if len(present) else values
+        else:
+            distinct = present.unique()
+            if all(isinstance(v, str) for v in distinct):
+                values |= set(distinct)
+                self._non_null[name] = self._non_null.get(name, 0) + len(present)
+            else:
+                values = None
+            if values is not None and len(values) > CATEGORY_MAX_VALUES:
+                values = None
+        self._values[name] = values
+
+    def build_compact(self) -> ChunkSchema:
+        """Return the schema with every column at its narrowest lossless dtype."""
+        schema = self.build()
+        dtypes: dict[str, str] = {}
+        categories: dict[str, list[str]] = {}
+        for name, dtype in schema.dtypes.items():
+            values = self._values.get(name)
+            if dtype == "int64" and name in self._ranges:
+                dtype = _narrowest_int(*self._ranges[name])
+            elif dtype == "float64" and self._float32.get(name, False):
+                dtype = "float32"
+            elif name in schema.text_columns and values and len(values) <= CATEGORY_MAX_RATIO * self._non_null[name]:
+                dtype = "category"
+                categories[name] = sorted(values)
+            dtypes[name] = dtype
+        return ChunkSchema(dtypes, schema.text_columns, categories)
+
+
+def remove_artifacts(csv_path: str) -> None:
+    """Delete every derived artifact (sidecar, caches) for ``csv_path``."""
+    shutil.rmtree(artifact_dir(csv_path), ignore_errors=True)
+
+
+class DatasetReader:
+    """Load a tabular dataset, preferring its columnar sidecar over the CSV.
+
+    Args:
+        csv_path: On-disk path of the uploaded CSV.
+        use_sidecar: Set to False to always parse the CSV.
+        schema: Dtypes to load the columns with, e.g. the schema profiled for
+            an upload; without it they are inferred on every read.
+    """
+
+    def __init__(self, csv_path: str, use_sidecar: bool = True, schema: ChunkSchema | None = None) -> None:
+        self.csv_path = csv_path
+        self.sidecar_path = sidecar_path(csv_path)
+        self.use_sidecar = use_sidecar
+        self._schema = schema
+
+    def has_sidecar(self) -> bool:
+        """Return True if a sidecar exists and is not older than the CSV."""
+        if not self.use_sidecar or not os.path.exists(self.sidecar_path):
+            return False
+        return os.stat(self.sidecar_path).st_mtime_ns >= os.stat(self.csv_path).st_mtime_ns
+
+    def read(self, columns: list[str] | None = None) -> pd.DataFrame:
+        """Load the dataset, optionally restricted to ``columns`` (in that order)."""
+        if self.has_sidecar():
+            frame = pd.read_parquet(self.sidecar_path, columns=columns)
+            return frame if self._schema is None else self._schema.conform(frame)
+        dtype = self._schema.csv_dtypes() if self._schema else None
+        if columns is None:
+            return pd.read_csv(self.csv_path, dtype=dtype)
+        return pd.read_csv(self.csv_path, usecols=columns, dtype=dtype)[columns]
+
+    def read_numeric(self) -> pd.DataFrame:
+        """Load only the numeric columns (pandas ``select_dtypes("number")`` semantics).
+
+        With a sidecar the column types are known from the Parquet schema, so
+        non-numeric columns are never read from disk.
+        """
+        if self.has_sidecar():
+            empty = pq.read_schema(self.sidecar_path).empty_table().to_pandas()
+            numeric = list(empty.select_dtypes(include="number").columns)
+            frame = pd.read_parquet(self.sidecar_path, columns=numeric)
+            return frame if self._schema is None else self._schema.conform(frame)
+        dtype = self._schema.csv_dtypes() if self._schema else None
+        return pd.read_csv(self.csv_path, dtype=dtype).select_dtypes(include="number")
+
+    def iter_chunks(
+        self,
+        chunksize: int = DEFAULT_CHUNK_ROWS,
+        columns: list[str] | None = None,
+        schema: ChunkSchema | None = None,
+    ) -> Iterator[pd.DataFrame]:
+        """Yield the dataset as consecutive DataFrames of at most ``chunksize`` rows.
+
+        At least one (possibly empty) chunk is always yielded so consumers see
+        the column names. Without ``schema`` (or one given to the reader),
+        per-chunk dtypes can differ from a full read (e.g. an int column that
+        only has gaps in a later chunk); callers must either reconcile them or
+        pass ``self.schema()``.
+        """
+        schema = schema or self._schema
+        if self.has_sidecar():
+            yielded = False
+            for batch in pq.ParquetFile(self.sidecar_path).iter_batches(batch_size=chunksize, columns=columns):
+                yielded = True
+                chunk = batch.to_pandas()
+                yield chunk if schema is None else schema.conform(chunk)
+            if not yielded:
+                yield pd.read_parquet(self.sidecar_path, columns=columns)
+            return
+        dtype = schema.csv_dtypes() if schema else None
+        with pd.read_csv(self.csv_path, chunksize=chunksize, usecols=columns, dtype=dtype) as chunks:
+            for chunk in chunks:
+                if columns is not None:
+                    chunk = chunk[columns]
+                yield chunk if schema is None else schema.conform(chunk)
+
+    def schema(self, chunksize: int = DEFAULT_CHUNK_ROWS) -> ChunkSchema:
+        """Return the reader's schema, or scan the dataset once for the dtypes a full read gives.
+
+        See ``SchemaBuilder``.
+        """
+        if self._schema is not None:
+            return self._schema
+        builder = SchemaBuilder()
+        for chunk in self.iter_chunks(chunksize):
+            builder.update(chunk)
+        return builder.build(text_columns=not self.has_sidecar())
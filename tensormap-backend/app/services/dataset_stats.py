@@ -0,0 +1,563 @@
+"""Single-pass, bounded-memory statistics for tabular datasets.
+
+``compute_dataset_stats`` streams a dataset in fixed-size chunks (see
+``DatasetReader.iter_chunks``) and folds every chunk into one accumulator per
+column: row/null counts, min/max, and mean plus the sum of squared deviations
+(M2) for the variance. Peak memory is bounded by the chunk size, not the file.
+
+Accumulators are mergeable with Chan et al.'s parallel update of Welford's
+algorithm, so chunks can be reduced in any grouping (e.g. across workers) and
+give the same result. Within a chunk the sums are computed exactly the way
+pandas' ``nanmean``/``nanvar`` do, so a dataset that fits in a single chunk
+reproduces ``DataFrame.describe()`` bit for bit; larger ones agree to within
+floating-point rounding.
+
+``compute_correlation`` applies the same idea to the Pearson correlation
+matrix, accumulating pairwise sufficient statistics chunk by chunk.
+
+``compute_sketch_stats`` is the approximate profiling mode: next to the
+exact accumulators it folds every column into mergeable sketches (see
+``sketches``) for distinct counts, quantiles and top values, so a describe
+needs one parallel pass instead of the two an exact one takes.
+"""
+
+import math
+import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from app.services.dataset_reader import DEFAULT_CHUNK_ROWS, DatasetReader, is_numeric_dtype, merge_dtypes
+from app.services.sketches import DEFAULT_SKETCH_ERROR, FrequentItems, HyperLogLog, QuantileSketch, hash_values
+from app.shared.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+DESCRIBE_PERCENTILES = [0.25, 0.5, 0.75]
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+
+@dataclass
+class ColumnAccumulator:
+    """Mergeable running statistics for a single column."""
+
+    count: int = 0
+    null_count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    min: float = math.nan
+    max: float = math.nan
+    dtype: str | None = None
+
+    @property
+    def is_numeric(self) -> bool:
+        return self.dtype is not None and is_numeric_dtype(self.dtype)
+
+    @property
+    def std(self) -> float:
+        """Sample standard deviation (ddof=1), NaN for fewer than two values."""
+        if self.count < 2:
+            return math.nan
+        return math.sqrt(self.m2 / (self.count - 1))
+
+    def update(self, series: pd.Series) -> None:
+        """Fold one chunk of this column into the running statistics."""
+        mask = series.isna().to_numpy()
+        nulls = int(mask.sum())
+        partial = ColumnAccumulator(count=len(series) - nulls, null_count=nulls, dtype=str(series.dtype))
+        if partial.count and is_numeric_dtype(series.dtype):
+            # Mirror pandas' nanmean/nanvar: zero-fill the gaps and sum the full
+            # array, so single-chunk results match DataFrame.describe() exactly.
+            values = np.where(mask, 0.0, series.to_numpy(dtype="float64", na_value=np.nan))
+            partial.mean = values.sum() / partial.count
+            squared = (partial.mean - values) ** 2
+            squared[mask] = 0.0
+            partial.m2 = squared.sum()
+            partial.min = float(np.nanmin(np.where(mask, np.nan, values)))
+            partial.max = float(np.nanmax(np.where(mask, np.nan, values)))
+        self.merge(partial)
+
+    def merge(self, other: "ColumnAccumulator") -> None:
+        """Combine ``other`` into this accumulator (Chan et al. parallel update)."""
+        self.null_count += other.null_count
+        self.dtype = merge_dtypes(self.dtype, other.dtype) if other.dtype is not None else self.dtype
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        self.min = float(np.fmin(self.min, other.min))
+        self.max = float(np.fmax(self.max, other.max))
+
+
+@dataclass
+class DatasetStats:
+    """Per-column accumulators for a whole dataset, in column order."""
+
+    columns: dict[str, ColumnAccumulator] = field(default_factory=dict)
+    total_rows: int = 0
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        """Fold one chunk of rows into the statistics."""
+        self.total_rows += len(chunk)
+        for name in chunk.columns:
+            self.columns.setdefault(name, ColumnAccumulator()).update(chunk[name])
+
+    def merge(self, other: "DatasetStats") -> None:
+        """Combine statistics computed over a disjoint set of rows."""
+        self.total_rows += other.total_rows
+        for name, acc in other.columns.items():
+            self.columns.setdefault(name, ColumnAccumulator()).merge(acc)
+
+    def numeric_columns(self) -> list[str]:
+        return [name for name, acc in self.columns.items() if acc.is_numeric]
+
+
+def compute_dataset_stats(reader: DatasetReader, chunksize: int = DEFAULT_CHUNK_ROWS) -> DatasetStats:
+    """Compute ``DatasetStats`` in one streaming pass over ``reader``."""
+    stats = DatasetStats()
+    for chunk in reader.iter_chunks(chunksize):
+        stats.update(chunk)
+    return stats
+
+
+def _num(value) -> float | None:
+    """Return ``value`` as a float, or None if it is missing (NaN)."""
+    return None if value is None or math.isnan(value) else float(value)
+
+
+def column_stats_payload(stats: DatasetStats) -> dict:
+    """Build the ``/data/process/stats`` response body from ``stats``."""
+    columns = []
+    for name, acc in stats.columns.items():
+        numeric = acc.is_numeric
+        columns.append(
+            {
+                "column": name,
+                "dtype": acc.dtype,
+                "count": acc.count,
+                "null_count": acc.null_count,
+                "mean": _num(acc.mean if acc.count else math.nan) if numeric else None,
+                "min": _num(acc.min) if numeric else None,
+                "max": _num(acc.max) if numeric else None,
+            }
+        )
+    return {"total_rows": stats.total_rows, "total_cols": len(stats.columns), "columns": columns}
+
+
+# Quartiles are located with a quantile sketch of this rank error; only the
+# values within a few times it of each quartile are then kept in memory.
+_BRACKET_ERROR = 0.001
+
+
+def _lerp(a: float, b: float, t: float) -> float:
+    """numpy's linear interpolation between order statistics, bit for bit."""
+    diff = b - a
+    return b - diff * (1 - t) if t >= 0.5 else a + diff * t
+
+
+class OrderStatistics:
+    """Exact order statistics of a stream of values near quantiles ``qs``, in bounded memory.
+
+    Feed every non-null value of the stream to ``update`` (in any number of
+    calls) once per pass, and call ``finish_pass`` after each pass; it returns
+    True while another pass is needed. The first pass sketches the values
+    (see ``QuantileSketch``); the second counts the values below a narrow
+    bracket around each quantile and keeps those inside it, so memory is a
+    small fraction of the stream. When the sketch misses a bracket — it is
+    probabilistic, so this is rare — a third pass keeps every value.
+    """
+
+    def __init__(self, qs: list[float]) -> None:
+        self.qs = qs
+        self.n = 0
+        self._sketch: QuantileSketch | None = QuantileSketch.for_error(_BRACKET_ERROR)
+        self._brackets: list[tuple[float, float]] = []
+        self._below: list[int] = []
+        self._kept: list[list[np.ndarray]] = []
+        # (rank of the first value, sorted values) per bracket, once done.
+        self._sorted: list[tuple[int, np.ndarray]] = []
+
+    def update(self, values: np.ndarray) -> None:
+        """Fold non-null float values of the current pass."""
+        if self._sketch is not None:
+            self._sketch.update(values)
+            return
+        for i, (lo, hi) in enumerate(self._brackets):
+            self._below[i] += int(np.count_nonzero(values < lo))
+            self._kept[i].append(values[(values >= lo) & (values <= hi)])
+
+    def finish_pass(self) -> bool:
+        """End a pass; return whether the stream must be fed again."""
+        if self._sketch is not None:
+            sketch, self._sketch = self._sketch, None
+            self.n = sketch.n
+            if self.n == 0:
+                return False
+            margin = 4 * _BRACKET_ERROR
+            lows = sketch.quantiles([q - margin for q in self.qs])
+            highs = sketch.quantiles([q + margin for q in self.qs])
+            self._brackets = [
+                (-math.inf if q - margin <= 0 else lo, math.inf if q + margin >= 1 else hi)
+                for q, lo, hi in zip(self.qs, lows, highs, strict=True)
+            ]
+            self._reset()
+            return True
+        self._sorted = [
+            (below, np.sort(np.concatenate(kept))) for below, kept in zip(self._below, self._kept, strict=True)
+        ]
+        self._kept = []
+        if all(self._has(rank) for rank in self._ranks()):
+            return False
+        logger.info("Quantile brackets missed; keeping every value")
+        self._brackets = [(-math.inf, math.inf)]
+        self._reset()
+        return True
+
+    def _reset(self) -> None:
+        self._below = [0] * len(self._brackets)
+        self._kept = [[] for _ in self._brackets]
+
+    def _ranks(self) -> set[int]:
+        ranks = set()
+        for q in self.qs:
+            prev = math.floor((self.n - 1) * q)
+            ranks.update((prev, min(prev + 1, self.n - 1)))
+        return ranks
+
+    def _has(self, rank: int) -> bool:
+        return any(start <= rank < start + len(values) for start, values in self._sorted)
+
+    def at(self, rank: int) -> float:
+        """Return the value of 0-based ``rank`` in sorted order."""
+        for start, values in self._sorted:
+            if start <= rank < start + len(values):
+                return float(values[rank - start])
+        raise LookupError(f"Rank {rank} was not kept")
+
+    def quantiles(self) -> list[float]:
+        """``Series.quantile(qs)`` (linear interpolation), NaN for an empty stream."""
+        result = []
+        for q in self.qs:
+            if self.n == 0:
+                result.append(math.nan)
+                continue
+            virtual = (self.n - 1) * q
+            prev = math.floor(virtual)
+            result.append(_lerp(self.at(prev), self.at(min(prev + 1, self.n - 1)), virtual - prev))
+        return result
+
+    def median(self) -> float:
+        """``Series.median()``: the mean of the middle values, NaN for an empty stream."""
+        if self.n == 0:
+            return math.nan
+        return (self.at((self.n - 1) // 2) + self.at(self.n // 2)) / 2
+
+
+def exact_quantiles(
+    reader: DatasetReader,
+    columns: list[str],
+    qs: list[float] = DESCRIBE_PERCENTILES,
+    chunksize: int = DEFAULT_CHUNK_ROWS,
+) -> dict[str, list[float]]:
+    """Exact ``Series.quantile(qs)`` of numeric ``columns``, streaming all of them together.
+
+    Usually two passes (see ``OrderStatistics``); memory is bounded by the
+    chunk size plus a small fraction of each column.
+    """
+    selectors = {name: OrderStatistics(qs) for name in columns}
+    active = list(columns)
+    while active:
+        for chunk in reader.iter_chunks(chunksize, columns=active):
+            for name in active:
+                selectors[name].update(chunk[name].dropna().to_numpy(dtype="float64"))
+        active = [name for name in active if selectors[name].finish_pass()]
+    return {name: selector.quantiles() for name, selector in selectors.items()}
+
+
+def _categorical_describe(reader: DatasetReader, columns: list[str], chunksize: int) -> dict:
+    """``describe()``'s count/unique/top/freq of ``columns`` from one pass of value counts.
+
+    Memory grows with the number of distinct values, not rows.
+    """
+    schema = reader.schema(chunksize)
+    counts: dict[str, dict] = {name: {} for name in columns}
+    for chunk in reader.iter_chunks(chunksize, schema=schema):
+        for name in columns:
+            seen = counts[name]
+            # Insertion order is first appearance, as in a full ``value_counts``.
+            for value, n in chunk[name].value_counts(sort=False).items():
+                seen[value] = seen.get(value, 0) + n
+
+    result = {}
+    for name in columns:
+        seen = counts[name]
+        # Sorted exactly as ``value_counts`` sorts its hash-table output, so ties resolve the same.
+        ordered = pd.Series(list(seen.values()), index=pd.Index(list(seen), dtype=object), dtype="int64")
+        ordered = ordered.sort_values(ascending=False)
+        top, freq = (ordered.index[0], ordered.iloc[0]) if len(ordered) else (np.nan, np.nan)
+        summary = {"count": int(ordered.sum()), "unique": len(ordered), "top": top, "freq": freq}
+        result[name] = {label: str(v) for label, v in summary.items()}
+    return result
+
+
+def describe_payload(stats: DatasetStats, reader: DatasetReader, chunksize: int = DEFAULT_CHUNK_ROWS) -> dict:
+    """Reproduce ``DataFrame.describe().map(str).to_dict()`` from streamed stats.
+
+    Moments come from the accumulators; exact quartiles from
+    ``exact_quantiles``, usually two passes over all numeric columns together. For a
+    dataset with no numeric columns, the count/unique/top/freq summary comes
+    from one pass of value counts.
+    """
+    numeric = stats.numeric_columns()
+    if not numeric:
+        return _categorical_describe(reader, list(stats.columns), chunksize)
+
+    quartiles = exact_quantiles(reader, numeric, chunksize=chunksize)
+    result = {}
+    for name in numeric:
+        acc = stats.columns[name]
+        values = [acc.count, acc.mean if acc.count else math.nan, acc.std, acc.min, *quartiles[name], acc.max]
+        labels = ["count", "mean", "std", "min", "25%", "50%", "75%", "max"]
+        result[name] = {label: str(float(v)) for label, v in zip(labels, values, strict=True)}
+    return result
+
+
+# Values of an approximate describe that come from sketches; the rest are exact.
+APPROXIMATE_DESCRIBE_FIELDS = ["25%", "50%", "75%", "unique", "top", "freq"]
+APPROXIMATE_STATS_FIELDS = ["distinct_count", "median", "top_values"]
+TOP_VALUES = 5
+
+
+@dataclass
+class SketchStats:
+    """``DatasetStats`` plus per-column sketches for approximate profiling."""
+
+    error: float = DEFAULT_SKETCH_ERROR
+    stats: DatasetStats = field(default_factory=DatasetStats)
+    distinct: dict[str, HyperLogLog] = field(default_factory=dict)
+    quantiles: dict[str, QuantileSketch] = field(default_factory=dict)
+    frequent: dict[str, FrequentItems] = field(default_factory=dict)
+
+    @classmethod
+    def from_chunk(cls, chunk: pd.DataFrame, error: float, seed: int = 0) -> "SketchStats":
+        """Sketch one chunk of rows."""
+        sketch = cls(error=error)
+        sketch.stats.update(chunk)
+        for name in chunk.columns:
+            series = chunk[name]
+            sketch.distinct[name] = HyperLogLog.for_error(error)
+            sketch.distinct[name].update_hashes(hash_values(series))
+            sketch.frequent[name] = FrequentItems.for_error(error)
+            sketch.frequent[name].update(series)
+            if is_numeric_dtype(series.dtype):
+                sketch.quantiles[name] = QuantileSketch.for_error(error, seed=seed)
+                sketch.quantiles[name].update(series.dropna().to_numpy(dtype="float64"))
+        return sketch
+
+    def merge(self, other: "SketchStats") -> None:
+        """Combine sketches computed over a disjoint set of rows."""
+        self.stats.merge(other.stats)
+        for mine, theirs in (
+            (self.distinct, other.distinct),
+            (self.quantiles, other.quantiles),
+            (self.frequent, other.frequent),
+        ):
+            for name, sketch in theirs.items():
+                if name in mine:
+                    mine[name].merge(sketch)
+                else:
+                    mine[name] = sketch
+
+
+def compute_sketch_stats(
+    reader: DatasetReader,
+    error: float = DEFAULT_SKETCH_ERROR,
+    chunksize: int = DEFAULT_CHUNK_ROWS,
+    max_workers: int = DEFAULT_WORKERS,
+) -> SketchStats:
+    """Sketch ``reader`` in one streaming pass, chunks in parallel on a thread pool.
+
+    At most ``max_workers`` chunks are in flight, so memory stays bounded by
+    chunk size plus the sketches (whose size depends only on ``error``).
+    """
+    total = SketchStats(error=error)
+    pending: deque[Future] = deque()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for seed, chunk in enumerate(reader.iter_chunks(chunksize)):
+            pending.append(pool.submit(SketchStats.from_chunk, chunk, error, seed))
+            while len(pending) >= max_workers:
+                total.merge(pending.popleft().result())
+        while pending:
+            total.merge(pending.popleft().result())
+    return total
+
+
+def approximate_describe_payload(sketch: SketchStats) -> dict:
+    """``describe_payload`` from sketches alone: no column is read again.
+
+    Count, mean, std, min and max are exact; quartiles, unique counts and the
+    top value with its frequency are estimates (``APPROXIMATE_DESCRIBE_FIELDS``).
+    """
+    stats = sketch.stats
+    numeric = stats.numeric_columns()
+    result = {}
+    if not numeric:
+        for name, acc in stats.columns.items():
+            top = sketch.frequent[name].top()
+            if top:
+                unique = max(len(sketch.frequent[name].counts), round(sketch.distinct[name].estimate()))
+                result[name] = {"count": acc.count, "unique": unique, "top": top[0][0], "freq": top[0][1]}
+            else:
+                result[name] = {"count": acc.count, "unique": 0, "top": math.nan, "freq": math.nan}
+            result[name] = {label: str(v) for label, v in result[name].items()}
+        return result
+
+    for name in numeric:
+        acc = stats.columns[name]
+        quartiles = sketch.quantiles[name].quantiles(DESCRIBE_PERCENTILES)
+        values = [acc.count, acc.mean if acc.count else math.nan, acc.std, acc.min, *quartiles, acc.max]
+        labels = ["count", "mean", "std", "min", "25%", "50%", "75%", "max"]
+        result[name] = {label: str(float(v)) for label, v in zip(labels, values, strict=True)}
+    return result
+
+
+def approximate_column_stats_payload(sketch: SketchStats) -> dict:
+    """``column_stats_payload`` plus estimated distinct counts, medians and top values.
+
+    The added fields (``APPROXIMATE_STATS_FIELDS``) are estimates; the others
+    are exact.
+    """
+    payload = column_stats_payload(sketch.stats)
+    for column in payload["columns"]:
+        name = column["column"]
+        acc = sketch.stats.columns[name]
+        column["distinct_count"] = round(sketch.distinct[name].estimate())
+        column["median"] = _num(sketch.quantiles[name].quantiles([0.5])[0]) if acc.is_numeric else None
+        column["top_values"] = (
+            None
+            if acc.is_numeric
+            else [{"value": str(v), "count": c} for v, c in sketch.frequent[name].top(TOP_VALUES)]
+        )
+    return payload
+
+
+@dataclass
+class CorrelationAccumulator:
+    """Mergeable pairwise sufficient statistics for a Pearson correlation matrix.
+
+    Nulls are handled pairwise like ``DataFrame.corr()``: the entry for
+    columns ``(i, j)`` only uses rows where both are present. For every pair
+    the accumulator keeps the pair count ``n[i, j]``, the mean of column ``i``
+    over those rows ``mean[i, j]``, its sum of squared deviations ``m2[i, j]``
+    and the co-moment ``comoment[i, j]``. Chunks are reduced with a handful of
+    ``k x k`` matrix products; partials combine with the pairwise form of
+    Chan et al.'s update, so they can be built in parallel and merged in any
+    order.
+    """
+
+    n: np.ndarray
+    mean: np.ndarray
+    m2: np.ndarray
+    comoment: np.ndarray
+
+    @classmethod
+    def empty(cls, k: int) -> "CorrelationAccumulator":
+        return cls(*(np.zeros((k, k)) for _ in range(4)))
+
+    @classmethod
+    def from_values(cls, values: np.ndarray) -> "CorrelationAccumulator":
+        """Build the partial statistics for one ``rows x k`` float block (NaN = null)."""
+        present = ~np.isnan(values)
+        counts = present.sum(axis=0)
+        # Shift each column by its chunk mean before taking raw sums: this keeps
+        # Σx·y - Σx·Σy/n from cancelling catastrophically on large offsets.
+        shift = np.where(counts > 0, np.nansum(values, axis=0) / np.maximum(counts, 1), 0.0)
+        centred = np.where(present, values - shift, 0.0)
+        mask = present.astype(np.float64)
+
+        n = mask.T @ mask
+        sums = centred.T @ mask  # sums[i, j] = Σ x_i over rows where i and j are present
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = np.where(n > 0, sums / n, 0.0)
+            m2 = (centred * centred).T @ mask - sums * means
+            comoment = centred.T @ centred - sums * means.T
+        return cls(n=n, mean=np.where(n > 0, means + shift[:, None], 0.0), m2=m2, comoment=comoment)
+
+    def merge(self, other: "CorrelationAccumulator") -> None:
+        """Combine ``other`` into this accumulator."""
+        total = self.n + other.n
+        with np.errstate(invalid="ignore", divide="ignore"):
+            weight = np.where(total > 0, self.n * other.n / total, 0.0)
+            share = np.where(total > 0, other.n / total, 0.0)
+        delta = other.mean - self.mean
+        self.mean = self.mean + delta * share
+        self.m2 = self.m2 + other.m2 + delta * delta * weight
+        self.comoment = self.comoment + other.comoment + delta * delta.T * weight
+        self.n = total
+
+    def correlation(self) -> np.ndarray:
+        """Return the Pearson correlation matrix (NaN where undefined)."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            denom = np.sqrt(self.m2 * self.m2.T)
+            corr = np.where((self.n > 1) & (denom > 0), self.comoment / denom, np.nan)
+        corr = np.clip(corr, -1.0, 1.0)
+        diagonal = np.diagonal(corr).copy()
+        np.fill_diagonal(corr, np.where(np.isnan(diagonal), np.nan, 1.0))
+        return corr
+
+
+def _correlatable(dtype: str, include_bool: bool) -> bool:
+    return is_numeric_dtype(dtype) or (include_bool and dtype == "bool")
+
+
+def compute_correlation(
+    reader: DatasetReader,
+    chunksize: int = DEFAULT_CHUNK_ROWS,
+    include_bool: bool = False,
+    max_workers: int = DEFAULT_WORKERS,
+) -> tuple[list[str], np.ndarray]:
+    """Stream ``reader`` once and return ``(columns, correlation_matrix)``.
+
+    Columns follow ``select_dtypes("number")`` (plus bool when
+    ``include_bool``, matching ``DataFrame.corr(numeric_only=True)``) under the
+    dtype a full read would give. Chunks are reduced on a thread pool (the
+    matrix products release the GIL) with at most ``max_workers`` chunks in
+    flight, so memory stays bounded by chunk size.
+    """
+    candidates: list[str] | None = None
+    dtypes: dict[str, str] = {}
+    total: CorrelationAccumulator | None = None
+    pending: deque[Future] = deque()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for chunk in reader.iter_chunks(chunksize):
+            if candidates is None:
+                # A column that is not numeric in the first chunk cannot be
+                # numeric in a full read either; later chunks can only demote.
+                candidates = [c for c in chunk.columns if _correlatable(str(chunk[c].dtype), include_bool)]
+                total = CorrelationAccumulator.empty(len(candidates))
+            block = np.full((len(chunk), len(candidates)), np.nan)
+            for i, name in enumerate(candidates):
+                dtypes[name] = merge_dtypes(dtypes.get(name), str(chunk[name].dtype))
+                if _correlatable(dtypes[name], include_bool):
+                    block[:, i] = chunk[name].to_numpy(dtype="float64", na_value=np.nan)
+            pending.append(pool.submit(CorrelationAccumulator.from_values, block))
+            while len(pending) >= max_workers:
+                total.merge(pending.popleft().result())
+        while pending:
+            total.merge(pending.popleft().result())
+
+    keep = [i for i, name in enumerate(candidates or []) if _correlatable(dtypes[name], include_bool)]
+    if not keep:
+        return [], np.empty((0, 0))
+    return [candidates[i] for i in keep], total.correlation()[np.ix_(keep, keep)]
@@ -0,0 +1,295 @@
+"""Copy-on-write versions of CSV datasets.
+
+Preprocessing never rewrites an uploaded CSV. ``create_version`` fits the
+requested transformations on the current head's data and records them, with
+their fitted state, as a new ``DatasetVersion`` whose parent is the head. No
+rows are written at that point: a version is materialized only when a
+consumer asks for its path (``materialize_version``), by streaming the
+nearest materialized ancestor through the recipes of every version in
+between. Undo, checkout and branching just move ``DataFile.current_version_id``.
+
+Materialized CSVs are a cache. The upload (version 0) is always kept; other
+versions keep their CSV while they are the head, pinned by an active training
+job or being read (``reading_version``), and are otherwise dropped when
+another version is materialized. A version is built by one process at a
+time; concurrent callers wait for that build and reuse it.
+"""
+
+import contextlib
+import os
+import uuid as uuid_pkg
+from collections.abc import Iterable, Iterator
+
+import pandas as pd
+from sqlmodel import Session, select
+
+from app.config import get_settings
+from app.models import DataFile, DatasetVersion, TrainingJob, TrainingStatus
+from app.services.dataset_reader import DEFAULT_CHUNK_ROWS, ChunkSchema, DatasetReader, build_sidecar, remove_artifacts
+from app.services.file_profiling import stored_schema
+from app.services.row_index import build_row_index
+from app.services.training_service import ACTIVE_STATUSES
+from app.services.transform_engine import TRANSFORMATION_REGISTRY, Transform, fit_pipeline, write_pipeline
+from app.shared.file_lock import file_lock, lock_path
+from app.shared.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Jobs that will still read their version: queued ones have not claimed a worker yet.
+_ACTIVE_JOB_STATES = (TrainingStatus.QUEUED, *ACTIVE_STATUSES)
+# Materialized versions live under <upload_folder>/versions/.
+VERSION_DIR = "versions"
+
+
+class VersionNotFoundError(LookupError):
+    """Raised when a version id does not belong to the file it was requested for."""
+
+
+def _path(disk_name: str) -> str:
+    return f"{get_settings().upload_folder}/{disk_name}"
+
+
+def _is_materialized(version: DatasetVersion) -> bool:
+    return version.disk_name is not None and os.path.exists(_path(version.disk_name))
+
+
+def list_versions(db: Session, file_id: uuid_pkg.UUID) -> list[DatasetVersion]:
+    """Return every version of a file, oldest first."""
+    return list(
+        db.exec(select(DatasetVersion).where(DatasetVersion.file_id == file_id).order_by(DatasetVersion.number)).all()
+    )
+
+
+def get_version(db: Session, file: DataFile, version_id: uuid_pkg.UUID) -> DatasetVersion:
+    """Return version ``version_id`` of ``file``.
+
+    Raises:
+        VersionNotFoundError: If the version does not exist or belongs to another file.
+    """
+    version = db.get(DatasetVersion, version_id)
+    if version is None or version.file_id != file.id:
+        raise VersionNotFoundError(f"Version {version_id} not found for this file")
+    return version
+
+
+def head_version(db: Session, file: DataFile) -> DatasetVersion:
+    """Return the head version of ``file``, recording the upload as version 0 on first use."""
+    if file.current_version_id is not None:
+        return get_version(db, file, file.current_version_id)
+    root = db.exec(select(DatasetVersion).where(DatasetVersion.file_id == file.id, DatasetVersion.number == 0)).first()
+    if root is None:
+        root = DatasetVersion(file_id=file.id, number=0, disk_name=file.disk_name, columns=file.columns)
+        db.add(root)
+    file.current_version_id = root.id
+    db.add(file)
+    db.commit()
+    return root
+
+
+def build_transforms(recipe: list[dict]) -> list[Transform]:
+    """Rebuild fitted transforms from a stored recipe."""
+    transforms = []
+    for step in recipe:
+        transform = TRANSFORMATION_REGISTRY[step["transformation"]](step["feature"], step["params"])
+        transform.set_state(step["state"])
+        transforms.append(transform)
+    return transforms
+
+
+def _source(db: Session, version: DatasetVersion) -> tuple[str, list[Transform]]:
+    """Return the nearest materialized ancestor's CSV and the transforms that turn it into ``version``."""
+    lineage = [version]
+    while not _is_materialized(lineage[-1]):
+        if lineage[-1].parent_id is None:
+            raise FileNotFoundError(f"Dataset file for version {version.id} is missing")
+        lineage.append(db.get(DatasetVersion, lineage[-1].parent_id))
+    base, replay = lineage[-1], lineage[-2::-1]
+    return _path(base.disk_name), [t for v in replay for t in build_transforms(v.recipe)]
+
+
+def _stream(csv_path: str, chunksize: int, schema: ChunkSchema | None = None):
+    # Transforms write their output back to CSV, so the upload is read at full
+    # width (``stored_schema(..., widen=True)``); only its inference is skipped.
+    reader = DatasetReader(csv_path, schema=schema)
+    schema = reader.schema(chunksize)
+
+    def chunks() -> Iterable[pd.DataFrame]:
+        return reader.iter_chunks(chunksize, schema=schema)
+
+    return chunks
+
+
+def create_version(
+    db: Session, file: DataFile, steps: list[dict], chunksize: int = DEFAULT_CHUNK_ROWS
+) -> DatasetVersion:
+    """Fit ``steps`` on the head of ``file`` and record the result as the new head.
+
+    Each step is ``{"transformation": name, "feature": column, "params": dict | None}``
+    with a name from ``TRANSFORMATION_REGISTRY``.
+
+    Raises:
+        ValueError: If a step is invalid or rejects the data (nothing is recorded).
+    """
+    transforms = [TRANSFORMATION_REGISTRY[s["transformation"]](s["feature"], s["params"]) for s in steps]
+    parent = head_version(db, file)
+    base_path, replay = _source(db, parent)
+    fit_pipeline(_stream(base_path, chunksize, stored_schema(file, base_path, widen=True)), replay + transforms)
+
+    columns = parent.columns if parent.columns is not None else version_columns(db, file)
+    for t in transforms:
+        columns = t.output_columns(columns)
+    recipe = [{**step, "state": t.get_state()} for step, t in zip(steps, transforms, strict=True)]
+
+    # Lock the file's row so concurrent preprocess calls number their versions in turn.
+    db.exec(select(DataFile).where(DataFile.id == file.id).with_for_update()).one()
+    number = max(v.number for v in list_versions(db, file.id)) + 1
+    version = DatasetVersion(file_id=file.id, parent_id=parent.id, number=number, recipe=recipe, columns=columns)
+    db.add(version)
+    file.current_version_id = version.id
+    file.columns = columns
+    db.add(file)
+    db.commit()
+    logger.info("Recorded version %d of file %s (%d step(s))", number, file.id, len(recipe))
+    return version
+
+
+def version_columns(db: Session, file: DataFile) -> list[str]:
+    """Return the column names of the head of ``file`` without materializing it."""
+    if file.current_version_id is not None:
+        version = get_version(db, file, file.current_version_id)
+        if version.columns is not None:
+            return version.columns
+    schema = stored_schema(file, _path(file.disk_name))
+    if schema is not None:
+        return list(schema.dtypes)
+    return list(next(DatasetReader(_path(file.disk_name)).iter_chunks(1)).columns)
+
+
+def checkout_version(db: Session, file: DataFile, version_id: uuid_pkg.UUID) -> DatasetVersion:
+    """Make ``version_id`` the head of ``file``; new versions then branch from it."""
+    version = get_version(db, file, version_id)
+    file.current_version_id = version.id
+    file.columns = version.columns
+    db.add(file)
+    db.commit()
+    return version
+
+
+def _build_lock(csv_path: str) -> str:
+    """Path whose lock is held while ``csv_path`` is built or pruned."""
+    return f"{csv_path}.build"
+
+
+def materialize_version(db: Session, version: DatasetVersion, chunksize: int = DEFAULT_CHUNK_ROWS) -> str:
+    """Return the CSV path of ``version``, writing it from its recipe chain if needed."""
+    if _is_materialized(version):
+        return _path(version.disk_name)
+
+    file = db.get(DataFile, version.file_id)
+    # Versions belong to one DataFile, not to the (possibly shared) upload blob.
+    disk_name = f"{VERSION_DIR}/{file.id.hex}.v{version.number}.csv"
+    csv_path = _path(disk_name)
+    os.makedirs(os.path.dirname(csv_path), exist_ok=True)
+    with file_lock(_build_lock(csv_path)):
+        # Another request or process may have built it while we waited.
+        db.refresh(version)
+        if _is_materialized(version):
+            return _path(version.disk_name)
+        base_path, replay = _source(db, version)
+        tmp_path = f"{csv_path}.{uuid_pkg.uuid4().hex}.tmp"
+        try:
+            stream = _stream(base_path, chunksize, stored_schema(file, base_path, widen=True))
+            write_pipeline(stream(), replay, tmp_path)
+            os.replace(tmp_path, csv_path)
+        finally:
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+        remove_artifacts(csv_path)
+        build_sidecar(csv_path)
+        try:
+            build_row_index(csv_path)
+        except OSError:
+            # Not fatal: get_file_data rebuilds a missing or stale index on demand.
+            logger.warning("Could not build row index for %s", csv_path)
+
+        version.disk_name = disk_name
+        db.add(version)
+        db.commit()
+    logger.info("Materialized version %d of file %s from %s", version.number, file.id, base_path)
+    prune_materializations(db, file, keep=version.id)
+    return csv_path
+
+
+def resolve_version_path(db: Session, file: DataFile, version_id: uuid_pkg.UUID | None = None) -> str:
+    """Return a readable CSV path for ``version_id`` (default: the head) of ``file``."""
+    version_id = version_id or file.current_version_id
+    if version_id is None:
+        return _path(file.disk_name)
+    return materialize_version(db, get_version(db, file, version_id))
+
+
+@contextlib.contextmanager
+def reading_version(db: Session, file: DataFile, version_id: uuid_pkg.UUID | None = None) -> Iterator[str]:
+    """Like ``resolve_version_path``, but ``prune_materializations`` keeps the CSV until the block exits."""
+    version_id = version_id or file.current_version_id
+    if version_id is None:
+        yield _path(file.disk_name)
+        return
+    version = get_version(db, file, version_id)
+    while True:
+        csv_path = materialize_version(db, version)
+        with file_lock(csv_path, shared=True):
+            # A prune may have deleted it between the build and the lock: build it again.
+            if os.path.exists(csv_path):
+                yield csv_path
+                return
+        db.refresh(version)
+
+
+def prune_materializations(db: Session, file: DataFile, keep: uuid_pkg.UUID | None = None) -> None:
+    """Drop cached CSVs of versions that are neither the upload, the head, ``keep`` nor pinned by a live job.
+
+    CSVs that are being read or built are skipped; a later prune drops them.
+    """
+    versions = [v for v in list_versions(db, file.id) if v.parent_id is not None and v.disk_name is not None]
+    if not versions:
+        return
+    pinned = set(
+        db.exec(
+            select(TrainingJob.dataset_version_id).where(
+                TrainingJob.dataset_version_id.in_([v.id for v in versions]),
+                TrainingJob.status.in_(_ACTIVE_JOB_STATES),
+            )
+        ).all()
+    )
+    for version in versions:
+        if version.id in pinned or version.id in (keep, file.current_version_id):
+            continue
+        csv_path = _path(version.disk_name)
+        with (
+            file_lock(_build_lock(csv_path), blocking=False) as idle,
+            file_lock(csv_path, blocking=False) as unread,
+        ):
+            if not (idle and unread):
+                continue
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(csv_path)
+            remove_artifacts(csv_path)
+            version.disk_name = None
+            db.add(version)
+            db.commit()
+
+
+def version_file_paths(db: Session, file: DataFile) -> list[str]:
+    """Return the materialized CSVs of derived versions of ``file`` (for disk cleanup)."""
+    if file.current_version_id is None:
+        return []
+    return [_path(v.disk_name) for v in list_versions(db, file.id) if v.parent_id is not None and v.disk_name]
+
+
+def remove_version_file(csv_path: str) -> None:
+    """Delete a materialized version's CSV with its artifacts and lock files, once its DataFile is gone."""
+    for path in (csv_path, lock_path(csv_path), lock_path(_build_lock(csv_path))):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(path)
+    remove_artifacts(csv_path)
@@ -391,6 +391,7 @@ def update_training_config_service(
     model.metric = config["metric"]
     model.epochs = config["epochs"]
     model.batch_size = config.get("batch_size", 32)
+    model.augmentation = config.get("augmentation")
     model.loss = loss
 
     try:
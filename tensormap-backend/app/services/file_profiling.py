@@ -0,0 +1,314 @@
+"""Background profiling of uploaded CSVs.
+
+An upload returns as soon as its bytes are stored (see ``add_file_service``);
+everything learned by parsing the CSV — row count, column names and dtypes,
+null counts, the compact schema readers load it with — plus the derived
+artifacts (typed columnar sidecar, row offset index) are produced afterwards
+by ``profile_file`` on a small worker pool. Progress is tracked on
+``DataFile.profile_status`` and, when a file is done, a ``file_profile``
+event goes to its Socket.IO room (see ``socketio_instance.subscribe_file``).
+
+Jobs that were queued or running when the process stopped are picked up
+again on startup by ``resume_pending_profiles``. Files uploaded before
+profiling existed (no status) are profiled in bulk by ``backfill_profiles``,
+run by an operator through ``scripts/backfill_file_profiles.py`` rather than
+on startup, where every uvicorn worker would repeat it.
+"""
+
+import contextlib
+import os
+import threading
+import uuid as uuid_pkg
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+
+import pandas as pd
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session, or_, select
+
+from app.config import get_settings
+from app.models import DataFile, ProfileStatus
+from app.services.dataset_reader import (
+    DEFAULT_CHUNK_ROWS,
+    ChunkSchema,
+    DatasetReader,
+    DowncastSchemaBuilder,
+    build_sidecar,
+)
+from app.services.row_index import build_row_index
+from app.shared.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+PROFILE_WORKERS = min(2, os.cpu_count() or 1)
+# Files profiled per backfill commit.
+BACKFILL_BATCH_SIZE = 50
+# Errors that mean the CSV itself cannot be profiled; the file is marked FAILED.
+PROFILE_ERRORS = (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError, MemoryError, OSError)
+
+_pool = ThreadPoolExecutor(max_workers=PROFILE_WORKERS, thread_name_prefix="profile")
+# Striped locks so files sharing a blob build its sidecar and index once at a time.
+# Kept apart from ``blob_store.blob_lock`` so a long profile never delays an upload.
+_LOCKS = [threading.Lock() for _ in range(16)]
+
+
+@contextlib.contextmanager
+def _profile_lock(disk_name: str) -> Iterator[None]:
+    with _LOCKS[hash(disk_name) % len(_LOCKS)]:
+        yield
+
+
+@dataclass(frozen=True)
+class CsvProfile:
+    """What one parse pass over a CSV learned about it."""
+
+    row_count: int
+    schema: ChunkSchema
+    null_counts: dict[str, int]
+    # ``schema`` with every column at its narrowest lossless dtype.
+    read_schema: ChunkSchema
+
+    @property
+    def columns(self) -> list[str]:
+        return list(self.schema.dtypes)
+
+
+def profile_csv(csv_path: str, chunksize: int = DEFAULT_CHUNK_ROWS) -> CsvProfile:
+    """Parse ``csv_path`` once, in chunks, counting rows and nulls and inferring its ``ChunkSchema``s.
+
+    Raises:
+        pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError:
+            If the file is not a readable CSV.
+    """
+    builder = DowncastSchemaBuilder()
+    rows = 0
+    nulls: dict[str, int] = {}
+    for chunk in DatasetReader(csv_path, use_sidecar=False).iter_chunks(chunksize):
+        rows += len(chunk)
+        builder.update(chunk)
+        for name, count in chunk.isna().sum().items():
+            nulls[name] = nulls.get(name, 0) + int(count)
+    return CsvProfile(row_count=rows, schema=builder.build(), null_counts=nulls, read_schema=builder.build_compact())
+
+
+def profile_event(file: DataFile) -> dict:
+    """Return the Socket.IO payload describing a file's profiling state."""
+    return {
+        "type": "file_profile",
+        "file_id": str(file.id),
+        "status": file.profile_status.value if file.profile_status else None,
+        "fields": file.columns or [],
+        "row_count": file.row_count,
+        "error": file.profile_error,
+    }
+
+
+def _notify(file: DataFile) -> None:
+    # Imported lazily: the callbacks module pulls in TensorFlow.
+    from app.callbacks.metrics_callback import schedule_room_emit
+    from app.socketio_instance import event_loop, file_room, sio
+
+    if event_loop() is None:  # not inside the app, e.g. the backfill CLI
+        return
+    schedule_room_emit(sio, event_loop(), file_room(file.id), profile_event(file))
+
+
+def _run(file: DataFile) -> CsvProfile | Exception:
+    """Profile a file's CSV and build its sidecar and row index; a parse error is returned, not raised.
+
+    Touches no DB state, so it is safe to run on any thread. The artifacts
+    are built under a per-blob lock, since files with identical content
+    share them.
+    """
+    path = os.path.join(get_settings().upload_folder, file.disk_name)
+    try:
+        with _profile_lock(file.disk_name):
+            profile = profile_csv(path)
+            build_sidecar(path, schema=profile.schema)
+            try:
+                build_row_index(path)
+            except OSError:
+                logger.warning("Could not build row index for %s", path)
+    except PROFILE_ERRORS as e:
+        logger.warning("Could not profile file %s (%s): %s", file.file_name, file.id, e)
+        return e
+    return profile
+
+
+def _record(file: DataFile, outcome: CsvProfile | Exception) -> None:
+    if isinstance(outcome, Exception):
+        file.profile_status = ProfileStatus.FAILED
+        file.profile_error = str(outcome)[:500] or type(outcome).__name__
+        return
+    file.columns = outcome.columns
+    file.row_count = outcome.row_count
+    file.dtypes = dict(outcome.schema.dtypes)
+    file.null_counts = outcome.null_counts
+    file.read_schema = outcome.read_schema.to_json()
+    file.profile_status = ProfileStatus.READY
+    file.profile_error = None
+
+
+def profile_file(session: Session, file_id: uuid_pkg.UUID) -> ProfileStatus | None:
+    """Profile one CSV DataFile and store the results on it; returns the final status.
+
+    Returns None if the file no longer exists.
+    """
+    file = session.get(DataFile, file_id)
+    if file is None:
+        return None
+    file.profile_status = ProfileStatus.RUNNING
+    session.add(file)
+    session.commit()
+
+    _record(file, _run(file))
+    session.add(file)
+    session.commit()
+    logger.info("Profiled file %s: %s", file_id, file.profile_status.value)
+    _notify(file)
+    return file.profile_status
+
+
+def copy_profile(source: DataFile, target: DataFile) -> None:
+    """Give ``target`` the profile of ``source``, an already profiled file with the same content."""
+    target.columns = source.columns
+    target.row_count = source.row_count
+    target.dtypes = source.dtypes
+    target.null_counts = source.null_counts
+    target.read_schema = source.read_schema
+    target.profile_status = ProfileStatus.READY
+
+
+def stored_schema(file: DataFile, csv_path: str, widen: bool = False) -> ChunkSchema | None:
+    """Return the read schema profiled for ``file`` if ``csv_path`` is its upload, else None.
+
+    Preprocessed versions have other columns and dtypes, so theirs are
+    inferred as before. ``widen`` returns the full-width schema
+    (``ChunkSchema.widened``) for consumers whose results must match a plain
+    ``pd.read_csv``: statistics, and preprocessing, which writes CSV back.
+    """
+    schema = ChunkSchema.from_json(file.read_schema)
+    if schema is None:
+        return None
+    upload = os.path.join(get_settings().upload_folder, file.disk_name)
+    if os.path.normpath(csv_path) != os.path.normpath(upload):
+        return None
+    return schema.widened() if widen else schema
+
+
+def profiled_sibling(session: Session, disk_name: str) -> DataFile | None:
+    """Return a READY file stored as ``disk_name``, whose profile an identical upload can reuse."""
+    return session.exec(
+        select(DataFile).where(DataFile.disk_name == disk_name, DataFile.profile_status == ProfileStatus.READY)
+    ).first()
+
+
+def _profile_in_thread(file_id: uuid_pkg.UUID) -> None:
+    from app.services.training_service import make_session
+
+    try:
+        with make_session() as session:
+            profile_file(session, file_id)
+    except SQLAlchemyError:
+        # E.g. the file was deleted while it was being profiled.
+        logger.exception("Profiling of file %s could not be recorded", file_id)
+
+
+def schedule_profile(file_id: uuid_pkg.UUID) -> Future:
+    """Queue a committed PENDING DataFile for profiling on the worker pool."""
+    return _pool.submit(_profile_in_thread, file_id)
+
+
+def resume_pending_profiles(session: Session | None = None) -> int:
+    """Re-queue files left PENDING/RUNNING by a previous process; returns how many.
+
+    Called on startup. Best-effort, like ``training_service.orphan_recovery``.
+    """
+    from app.services.training_service import make_session
+
+    own_session = session is None
+    session = session or make_session()
+    try:
+        stale = session.exec(
+            select(DataFile).where(DataFile.profile_status.in_((ProfileStatus.PENDING, ProfileStatus.RUNNING)))
+        ).all()
+        for file in stale:
+            file.profile_status = ProfileStatus.PENDING
+            session.add(file)
+        session.commit()
+        for file in stale:
+            schedule_profile(file.id)
+        if stale:
+            logger.info("Re-queued profiling for %d file(s)", len(stale))
+        return len(stale)
+    finally:
+        if own_session:
+            session.close()
+
+
+def _backfill_filter(retry_failed: bool):
+    legacy = DataFile.profile_status.is_(None)
+    if retry_failed:
+        legacy = or_(legacy, DataFile.profile_status == ProfileStatus.FAILED)
+    return (DataFile.file_type == "csv", legacy)
+
+
+def backfill_profiles(
+    session: Session,
+    workers: int = PROFILE_WORKERS,
+    batch_size: int = BACKFILL_BATCH_SIZE,
+    limit: int | None = None,
+    retry_failed: bool = False,
+    dry_run: bool = False,
+) -> dict:
+    """Profile CSVs uploaded before background profiling existed.
+
+    Files are profiled ``workers`` at a time and their results committed once
+    per batch of ``batch_size``. A profiled file is never picked up again, so
+    an interrupted run loses at most one batch and simply resumes when run
+    again; files that fail are recorded as FAILED and skipped unless
+    ``retry_failed``. With ``dry_run`` the files are only counted.
+
+    Returns:
+        Dict with statistics: {ready: int, failed: int, pending: int, failed_files: list, duration_seconds: float}
+    """
+    stats = {"ready": 0, "failed": 0, "pending": 0, "failed_files": [], "start_time": datetime.now()}
+    where = _backfill_filter(retry_failed)
+
+    if dry_run:
+        stats["pending"] = len(session.exec(select(DataFile.id).where(*where).limit(limit)).all())
+    else:
+        last_id = None
+        remaining = limit
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="profile-backfill") as pool:
+            while remaining is None or remaining > 0:
+                # Keyset pagination: FAILED files stay matched with retry_failed, so never re-read a page.
+                stmt = select(DataFile).where(*where).order_by(DataFile.id)
+                if last_id is not None:
+                    stmt = stmt.where(DataFile.id > last_id)
+                files = session.exec(stmt.limit(min(batch_size, remaining or batch_size))).all()
+                if not files:
+                    break
+                for file, outcome in zip(files, pool.map(_run, files), strict=True):
+                    _record(file, outcome)
+                    session.add(file)
+                    if file.profile_status == ProfileStatus.READY:
+                        stats["ready"] += 1
+                    else:
+                        stats["failed"] += 1
+                        stats["failed_files"].append(
+                            {"id": str(file.id), "name": file.file_name, "error": file.profile_error}
+                        )
+                session.commit()
+                for file in files:
+                    _notify(file)
+                logger.info("Backfilled profiles of %d file(s)", len(files))
+                last_id = files[-1].id
+                if remaining is not None:
+                    remaining -= len(files)
+
+    stats["end_time"] = datetime.now()
+    stats["duration_seconds"] = (stats["end_time"] - stats["start_time"]).total_seconds()
+    return stats
@@ -0,0 +1,269 @@
+"""Browsing image datasets page by page, with cached thumbnails.
+
+``browse_images_service`` pages through a ZIP dataset's image manifest
+(ordered by class, then path; optionally one class only) and returns a
+thumbnail URL per image. Thumbnails are made lazily on a small worker pool
+— listing a page queues its thumbnails so they are usually ready by the time
+the browser asks — and never on the request thread. JPEGs are decoded at a
+reduced scale (DCT scaling), so even large photos are never decoded at full
+resolution.
+
+Thumbnails are kept in ``<upload_folder>/.thumbnails``, keyed by the stored
+blob and the image's path, and the directory is capped at
+``Settings.thumbnail_cache_size`` bytes by evicting the least recently
+served thumbnails.
+"""
+
+import contextlib
+import hashlib
+import os
+import threading
+import uuid as uuid_pkg
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+import pandas as pd
+import tensorflow as tf
+from sqlmodel import Session, select
+
+from app.config import get_settings
+from app.models import DataFile
+from app.services.blob_store import extract_dir
+from app.services.image_manifest import class_names, file_manifest
+from app.shared.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+THUMBNAIL_SIZE = 128  # longest side, in pixels
+THUMBNAIL_DIR = ".thumbnails"
+THUMBNAIL_MEDIA_TYPE = "image/jpeg"
+THUMBNAIL_WORKERS = min(4, os.cpu_count() or 1)
+
+_pool = ThreadPoolExecutor(max_workers=THUMBNAIL_WORKERS, thread_name_prefix="thumbnail")
+# Thumbnails being made, so concurrent requests for one image share the work.
+_pending: dict[str, Future] = {}
+_pending_lock = threading.Lock()
+
+
+def _resp(status_code: int, success: bool, message: str, data: Any = None) -> tuple:
+    """Build a standard API response tuple of (body_dict, status_code)."""
+    return {"success": success, "message": message, "data": data}, status_code
+
+
+class ThumbnailCache:
+    """A directory of thumbnails capped at ``max_bytes``, evicting the least recently used.
+
+    Recency is tracked in memory and seeded from file modification times
+    (bumped on every hit), so it survives restarts. One instance per
+    directory per process.
+    """
+
+    def __init__(self, root: str, max_bytes: int) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, int] | None = None  # key -> size, least recent first
+        self._total = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key + ".jpg")
+
+    def _load(self) -> OrderedDict[str, int]:
+        if self._entries is None:
+            found = []
+            for dirpath, _, filenames in os.walk(self.root):
+                for name in filenames:
+                    if name.endswith(".jpg"):
+                        st = os.stat(os.path.join(dirpath, name))
+                        found.append((st.st_mtime, name[:-4], st.st_size))
+            self._entries = OrderedDict((key, size) for _, key, size in sorted(found))
+            self._total = sum(self._entries.values())
+        return self._entries
+
+    def get(self, key: str) -> bytes | None:
+        """Return a cached thumbnail and mark it recently used, or None."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            entries = self._load()
+            if key in entries:
+                entries.move_to_end(key)
+        with contextlib.suppress(OSError):
+            os.utime(path)
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store a thumbnail, then evict least recently used ones until under the cap."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid_pkg.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            entries = self._load()
+            self._total += len(data) - entries.pop(key, 0)
+            entries[key] = len(data)
+            while self._total > self.max_bytes and len(entries) > 1:
+                old_key, old_size = entries.popitem(last=False)
+                self._total -= old_size
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(self._path(old_key))
+
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            self._load()
+            return self._total
+
+
+_caches: dict[str, ThumbnailCache] = {}
+_caches_lock = threading.Lock()
+
+
+def thumbnail_cache() -> ThumbnailCache:
+    """Return the process-wide thumbnail cache for the configured upload folder."""
+    settings = get_settings()
+    root = os.path.join(settings.upload_folder, THUMBNAIL_DIR)
+    with _caches_lock:
+        cache = _caches.get(root)
+        if cache is None:
+            cache = _caches[root] = ThumbnailCache(root, settings.thumbnail_cache_size)
+        return cache
+
+
+def thumbnail_key(disk_name: str, path: str) -> str:
+    return hashlib.sha1(f"{disk_name}\0{path}\0{THUMBNAIL_SIZE}".encode()).hexdigest()
+
+
+def _jpeg_ratio(width, height) -> int:
+    # Largest DCT downscale (1/2, 1/4, 1/8) that keeps the short side >= THUMBNAIL_SIZE.
+    if pd.isna(width) or pd.isna(height):
+        return 1
+    for ratio in (8, 4, 2):
+        if min(width, height) // ratio >= THUMBNAIL_SIZE:
+            return ratio
+    return 1
+
+
+def make_thumbnail(path: str, width=None, height=None) -> bytes:
+    """Return a JPEG thumbnail of the image at ``path`` fitting THUMBNAIL_SIZE x THUMBNAIL_SIZE."""
+    raw = tf.io.read_file(path)
+    if path.lower().endswith((".jpg", ".jpeg")):
+        image = tf.io.decode_jpeg(raw, channels=3, ratio=_jpeg_ratio(width, height))
+    else:
+        image = tf.image.decode_image(raw, channels=3, expand_animations=False)
+    if max(image.shape[0], image.shape[1]) > THUMBNAIL_SIZE:
+        image = tf.image.resize(image, (THUMBNAIL_SIZE, THUMBNAIL_SIZE), preserve_aspect_ratio=True, antialias=True)
+        image = tf.cast(tf.clip_by_value(tf.round(image), 0, 255), tf.uint8)
+    return tf.io.encode_jpeg(image, quality=85).numpy()
+
+
+def _build(cache: ThumbnailCache, key: str, path: str, width, height) -> bytes:
+    try:
+        data = make_thumbnail(path, width, height)
+        cache.put(key, data)
+        return data
+    finally:
+        with _pending_lock:
+            _pending.pop(key, None)
+
+
+def request_thumbnail(file: DataFile, row: pd.Series) -> Future:
+    """Return a future for the thumbnail of one manifest row, made on the worker pool if not cached."""
+    cache = thumbnail_cache()
+    key = thumbnail_key(file.disk_name, row["path"])
+    data = cache.get(key)
+    if data is not None:
+        future: Future = Future()
+        future.set_result(data)
+        return future
+    with _pending_lock:
+        future = _pending.get(key)
+        if future is None:
+            path = os.path.join(extract_dir(get_settings().upload_folder, file.disk_name), row["path"])
+            future = _pending[key] = _pool.submit(_build, cache, key, path, row["width"], row["height"])
+    return future
+
+
+def _zip_file(db: Session, file_id: uuid_pkg.UUID) -> tuple[DataFile | None, tuple | None]:
+    file = db.exec(select(DataFile).where(DataFile.id == file_id)).first()
+    if file is None:
+        return None, _resp(404, False, "File not found")
+    if file.file_type != "zip":
+        return None, _resp(400, False, "Only image (ZIP) datasets can be browsed")
+    return file, None
+
+
+def browse_images_service(
+    db: Session, file_id: uuid_pkg.UUID, page: int = 1, page_size: int = 50, label: str | None = None
+) -> tuple:
+    """Return one page of an image dataset, each image with its manifest row and thumbnail URL."""
+    file, error = _zip_file(db, file_id)
+    if error:
+        return error
+    try:
+        manifest = file_manifest(file)
+    except FileNotFoundError:
+        return _resp(500, False, "Image dataset not found on disk")
+
+    # Classes and counts describe the whole dataset, so the client can switch filters.
+    counts = manifest["label"].value_counts().to_dict()
+    classes = [{"label": n, "count": int(counts[n])} for n in class_names(manifest)]
+    if label is not None:
+        manifest = manifest[manifest["label"] == label]
+    total_rows = len(manifest)
+    total_pages = (total_rows + page_size - 1) // page_size
+    if total_rows > 0 and page > total_pages:
+        return _resp(400, False, f"Page {page} exceeds total pages ({total_pages})")
+
+    start = (page - 1) * page_size
+    rows = manifest.iloc[start : start + page_size]
+    base = f"{get_settings().api_base}/data/process/images/{file_id}/thumbnails"
+    images = []
+    for index, row in rows.iterrows():
+        request_thumbnail(file, row)  # warm the cache in the background
+        images.append(
+            {
+                "index": int(index),
+                "path": row["path"],
+                "label": row["label"],
+                "size": int(row["size"]),
+                "width": None if pd.isna(row["width"]) else int(row["width"]),
+                "height": None if pd.isna(row["height"]) else int(row["height"]),
+                "thumbnail_url": f"{base}/{index}",
+            }
+        )
+
+    body, status = _resp(
+        200,
+        True,
+        "Images retrieved",
+        {"images": images, "classes": classes},
+    )
+    body["pagination"] = {"page": page, "page_size": page_size, "total_rows": total_rows, "total_pages": total_pages}
+    return body, status
+
+
+def get_thumbnail_service(db: Session, file_id: uuid_pkg.UUID, index: int) -> tuple:
+    """Return ``(jpeg_bytes, 200)`` for manifest row ``index``, or a standard error response."""
+    file, error = _zip_file(db, file_id)
+    if error:
+        return error
+    try:
+        manifest = file_manifest(file)
+    except FileNotFoundError:
+        return _resp(500, False, "Image dataset not found on disk")
+    if not 0 <= index < len(manifest):
+        return _resp(404, False, "Image not found")
+    row = manifest.iloc[index]
+    try:
+        return request_thumbnail(file, row).result(), 200
+    except (OSError, tf.errors.OpError):
+        logger.warning("Could not make thumbnail of %s in file %s", row["path"], file_id, exc_info=True)
+        return _resp(422, False, "Image could not be decoded")
@@ -0,0 +1,129 @@
+"""Persistent cache of decoded, resized images.
+
+Decoding and resizing every JPEG/PNG dominates the CPU cost of an image
+training epoch, and it is the same work every time the image settings are
+unchanged. ``load_image_cache`` does it once per dataset and setting: every
+manifest row is decoded, resized and rounded to uint8 into one ``.npy``
+array of shape ``(images, height, width, channels)``, in manifest order.
+Later jobs memory-map the array and stream batches from it (see
+``image_pipeline.image_datasets``).
+
+The cache lives in the archive's artifact directory (see
+``dataset_reader.artifact_dir``), so it is keyed by the stored blob — shared
+by every ``DataFile`` with the same content and removed with it — plus the
+image size and color mode in the file name. The build decodes in parallel
+through a tf.data map and publishes the array with an atomic rename, so
+readers never see a partial cache. Jobs run in separate worker processes, so
+the build holds a file lock next to the cache (see ``app.shared.file_lock``)
+and concurrent jobs on one dataset build it once.
+"""
+
+import contextlib
+import os
+import uuid as uuid_pkg
+
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+
+from app.config import get_settings
+from app.models import DataFile
+from app.services.blob_store import extract_dir
+from app.services.dataset_reader import artifact_dir
+from app.services.image_pipeline import COLOR_CHANNELS, load_image
+from app.shared.file_lock import file_lock
+from app.shared.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Images decoded per write into the cache array.
+BUILD_BATCH_SIZE = 256
+
+
+def cache_path(zip_path: str, image_size: tuple[int, int], color_mode: str) -> str:
+    """Return the path of the decoded-image cache of ``zip_path`` for one image setting."""
+    height, width = image_size
+    return os.path.join(artifact_dir(zip_path), f"images-{height}x{width}-{color_mode}.npy")
+
+
+def _open_cache(path: str, shape: tuple[int, ...]) -> np.ndarray | None:
+    try:
+        images = np.load(path, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    if images.shape != shape or images.dtype != np.uint8:
+        logger.info("Discarding stale image cache %s (shape %s, expected %s)", path, images.shape, shape)
+        return None
+    return images
+
+
+def build_image_cache(
+    root: str, manifest: pd.DataFrame, image_size: tuple[int, int], color_mode: str, path: str
+) -> None:
+    """Decode every image of ``manifest`` (relative to ``root``) into a uint8 array at ``path``."""
+    channels = COLOR_CHANNELS[color_mode]
+    shape = (len(manifest), image_size[0], image_size[1], channels)
+    paths = [os.path.join(root, p) for p in manifest["path"]]
+
+    def to_uint8(file_path):
+        image = load_image(file_path, image_size, channels)
+        return tf.cast(tf.clip_by_value(tf.round(image), 0, 255), tf.uint8)
+
+    ds = tf.data.Dataset.from_tensor_slices(paths)
+    ds = ds.map(to_uint8, num_parallel_calls=tf.data.AUTOTUNE, deterministic=True)
+    ds = ds.batch(BUILD_BATCH_SIZE).prefetch(tf.data.AUTOTUNE)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{uuid_pkg.uuid4().hex}.tmp"
+    try:
+        out = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.uint8, shape=shape)
+        pos = 0
+        for batch in ds:
+            out[pos : pos + len(batch)] = batch.numpy()
+            pos += len(batch)
+        out.flush()
+        del out
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+
+def load_image_cache(
+    zip_path: str, root: str, manifest: pd.DataFrame, image_size: tuple[int, int], color_mode: str
+) -> np.ndarray:
+    """Return the memory-mapped decoded images of ``manifest``, building the cache on first use.
+
+    Raises:
+        OSError: If the cache cannot be built.
+        tf.errors.OpError: If an image cannot be decoded.
+    """
+    path = cache_path(zip_path, image_size, color_mode)
+    shape = (len(manifest), image_size[0], image_size[1], COLOR_CHANNELS[color_mode])
+    images = _open_cache(path, shape)
+    if images is not None:
+        return images
+    with file_lock(path):
+        images = _open_cache(path, shape)  # built by another job meanwhile
+        if images is None:
+            logger.info("Building image cache %s for %d images", path, len(manifest))
+            build_image_cache(root, manifest, image_size, color_mode, path)
+            images = _open_cache(path, shape)
+    if images is None:
+        raise OSError(f"Image cache could not be read back: {path}")
+    return images
+
+
+def file_image_cache(
+    file: DataFile, manifest: pd.DataFrame, image_size: tuple[int, int], color_mode: str
+) -> np.ndarray:
+    """Return the decoded-image cache of a ZIP DataFile; see ``load_image_cache``."""
+    upload_folder = get_settings().upload_folder
+    return load_image_cache(
+        os.path.join(upload_folder, file.disk_name),
+        extract_dir(upload_folder, file.disk_name),
+        manifest,
+        image_size,
+        color_mode,
+    )
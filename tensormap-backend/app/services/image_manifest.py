@@ -0,0 +1,283 @@
+"""Parallel ZIP extraction and the image manifest of image datasets.
+
+``extract_archive`` validates every member of an uploaded ZIP up front (path
+traversal and the decompression-bomb limit, checked against the declared
+sizes before a byte is written), then streams the members to disk across a
+thread pool — each worker with its own ``ZipFile`` handle, since inflating
+and writing release the GIL. While a worker writes an image it also reads
+the image's dimensions from its header, so the same pass produces the
+*manifest*: one row per image with its path (relative to the extraction
+directory), class label, byte size and width/height.
+
+The manifest is stored as ``manifest.parquet`` in the archive's artifact
+directory (see ``dataset_reader.artifact_dir``), i.e. once per stored blob.
+Training, code generation and previews read it instead of walking the
+extracted tree. Labels and ordering follow
+``tf.keras.utils.image_dataset_from_directory``: an image's label is its
+top-level directory, images directly in the root are unlabeled, and rows are
+sorted by class, then directory, then file name. The last few manifests read
+are kept in memory while their file is unchanged, so paging through a
+dataset and fetching its thumbnails do not re-read the parquet per request.
+"""
+
+import contextlib
+import os
+import shutil
+import struct
+import threading
+import uuid as uuid_pkg
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from app.config import get_settings
+from app.models import DataFile
+from app.services.blob_store import extract_dir
+from app.services.dataset_reader import artifact_dir
+from app.shared.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+MANIFEST_NAME = "manifest.parquet"
+# Bump whenever the manifest's columns or semantics change.
+MANIFEST_VERSION = 1
+MANIFEST_COLUMNS = ["path", "label", "size", "width", "height"]
+# The formats image_dataset_from_directory indexes.
+IMAGE_EXTENSIONS = (".bmp", ".gif", ".jpeg", ".jpg", ".png")
+MAX_EXTRACTED_BYTES = 2 * 1024 * 1024 * 1024  # 2 GB decompression-bomb limit
+EXTRACT_WORKERS = min(8, os.cpu_count() or 1)
+_COPY_BLOCK = 1024 * 1024
+# Manifests kept in memory: path -> ((mtime_ns, size), frame), least recent first.
+LOADED_MANIFESTS = 8
+_loaded: OrderedDict[str, tuple[tuple[int, int], pd.DataFrame]] = OrderedDict()
+_loaded_lock = threading.Lock()
+
+
+class InvalidArchiveError(Exception):
+    """Raised when an uploaded ZIP is refused; nothing is left extracted."""
+
+
+class ZipPathTraversalError(InvalidArchiveError):
+    """A member would be written outside the extraction directory."""
+
+
+class ZipTooLargeError(InvalidArchiveError):
+    """The archive expands beyond the decompression-bomb limit."""
+
+
+def manifest_path(zip_path: str) -> str:
+    return os.path.join(artifact_dir(zip_path), MANIFEST_NAME)
+
+
+def image_dimensions(path: str) -> tuple[int, int] | None:
+    """Return ``(width, height)`` read from an image file's header, or None if unrecognised."""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(26)
+            if head.startswith(b"\x89PNG\r\n\x1a\n") and len(head) >= 24:
+                return struct.unpack(">II", head[16:24])
+            if head[:6] in (b"GIF87a", b"GIF89a") and len(head) >= 10:
+                return struct.unpack("<HH", head[6:10])
+            if head.startswith(b"BM") and len(head) >= 26:
+                width, height = struct.unpack("<ii", head[18:26])
+                return width, abs(height)  # negative height = top-down rows
+            if head.startswith(b"\xff\xd8"):
+                return _jpeg_dimensions(f)
+    except (OSError, struct.error):
+        pass
+    return None
+
+
+def _jpeg_dimensions(f) -> tuple[int, int] | None:
+    # Walk the marker segments to the first start-of-frame (SOF0-SOF15,
+    # except DHT/JPG/DAC, which share the range).
+    f.seek(2)
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        code = marker[1]
+        if code == 0xFF:  # fill byte
+            f.seek(-1, os.SEEK_CUR)
+            continue
+        if code == 0xD8 or 0xD0 <= code <= 0xD7:  # markers without a length
+            continue
+        (length,) = struct.unpack(">H", f.read(2))
+        if length < 2:
+            return None
+        if 0xC0 <= code <= 0xCF and code not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack(">xHH", f.read(5))
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+def _label(path: str) -> str | None:
+    parts = path.split("/")
+    return parts[0] if len(parts) > 1 else None
+
+
+def _manifest_row(root: str, rel_path: str, size: int) -> dict:
+    dims = image_dimensions(os.path.join(root, rel_path))
+    width, height = dims if dims is not None else (None, None)
+    return {"path": rel_path, "label": _label(rel_path), "size": size, "width": width, "height": height}
+
+
+def _sort_key(row: dict) -> tuple[str, str, str]:
+    # image_dataset_from_directory order: class, then directory, then file name.
+    directory, _, name = row["path"].rpartition("/")
+    return row["label"] or "", directory, name
+
+
+def _to_frame(rows: list[dict]) -> pd.DataFrame:
+    df = pd.DataFrame(sorted(rows, key=_sort_key), columns=MANIFEST_COLUMNS)
+    return df.astype({"size": "int64", "width": "Int64", "height": "Int64"})
+
+
+def _extract_members(zip_path: str, dest: str, members: list[zipfile.ZipInfo]) -> list[dict]:
+    rows = []
+    with zipfile.ZipFile(zip_path) as zf:
+        for info in members:
+            target = os.path.join(dest, info.filename)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with zf.open(info) as src, open(target, "wb") as dst:
+                shutil.copyfileobj(src, dst, _COPY_BLOCK)
+            if info.filename.lower().endswith(IMAGE_EXTENSIONS):
+                rows.append(_manifest_row(dest, info.filename, info.file_size))
+    return rows
+
+
+def _check_members(infos: list[zipfile.ZipInfo], dest: str, max_bytes: int) -> None:
+    root = os.path.realpath(dest) + os.sep
+    total = 0
+    for info in infos:
+        if not os.path.realpath(os.path.join(dest, info.filename)).startswith(root):
+            raise ZipPathTraversalError(f"Member escapes the extraction directory: {info.filename!r}")
+        total += info.file_size
+        if total > max_bytes:
+            raise ZipTooLargeError(f"Archive expands beyond {max_bytes} bytes")
+
+
+def extract_archive(
+    zip_path: str, dest: str, max_bytes: int = MAX_EXTRACTED_BYTES, workers: int = EXTRACT_WORKERS
+) -> pd.DataFrame:
+    """Extract ``zip_path`` into ``dest`` in parallel and store its manifest; see the module docstring.
+
+    Declared sizes are trustworthy here: ``zipfile`` never inflates a member
+    past its declared size and fails the CRC check if the data disagrees.
+
+    Raises:
+        InvalidArchiveError: If a member escapes ``dest`` or the archive is too
+            large; ``dest`` is then removed.
+        zipfile.BadZipFile, OSError: If the archive is corrupt or cannot be
+            written; ``dest`` is then removed.
+    """
+    try:
+        with zipfile.ZipFile(zip_path) as zf:
+            infos = zf.infolist()
+        _check_members(infos, dest, max_bytes)
+
+        os.makedirs(dest, exist_ok=True)
+        # A name repeated in the archive resolves to its last entry, as with extractall.
+        files = list({info.filename: info for info in infos if not info.is_dir()}.values())
+        for info in infos:
+            if info.is_dir():
+                os.makedirs(os.path.join(dest, info.filename), exist_ok=True)
+
+        # Deal the members out largest-first so the workers finish together.
+        workers = max(1, min(workers, len(files)))
+        shards: list[list[zipfile.ZipInfo]] = [[] for _ in range(workers)]
+        for i, info in enumerate(sorted(files, key=lambda m: m.file_size, reverse=True)):
+            shards[i % workers].append(info)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="unzip") as pool:
+            results = pool.map(_extract_members, [zip_path] * workers, [dest] * workers, shards)
+            rows = [row for shard_rows in results for row in shard_rows]
+    except Exception:
+        shutil.rmtree(dest, ignore_errors=True)
+        raise
+
+    manifest = _to_frame(rows)
+    write_manifest(zip_path, manifest)
+    logger.info("Extracted %d members (%d images) of %s with %d workers", len(files), len(manifest), zip_path, workers)
+    return manifest
+
+
+def scan_directory(root: str) -> pd.DataFrame:
+    """Build a manifest by walking an already-extracted directory (legacy uploads)."""
+    rows = []
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                full = os.path.join(dirpath, name)
+                rel_path = os.path.relpath(full, root).replace(os.sep, "/")
+                rows.append(_manifest_row(root, rel_path, os.path.getsize(full)))
+    return _to_frame(rows)
+
+
+def write_manifest(zip_path: str, manifest: pd.DataFrame) -> None:
+    """Persist ``manifest`` next to the archive. Best-effort: readers rebuild a missing one."""
+    path = manifest_path(zip_path)
+    # Unique per writer: a rebuild in one request may race another's.
+    tmp_path = f"{path}.{uuid_pkg.uuid4().hex}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        manifest.attrs["version"] = MANIFEST_VERSION
+        manifest.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+    except (OSError, ValueError):
+        logger.warning("Could not write image manifest for %s", zip_path, exc_info=True)
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+
+
+def _read_manifest(path: str) -> pd.DataFrame | None:
+    """Read a current-version manifest file, from memory while the file is unchanged."""
+    with contextlib.suppress(OSError, ValueError):
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        with _loaded_lock:
+            cached = _loaded.get(path)
+            if cached is not None and cached[0] == stamp:
+                _loaded.move_to_end(path)
+                return cached[1]
+        manifest = pd.read_parquet(path)
+        if manifest.attrs.get("version") != MANIFEST_VERSION:
+            return None
+        with _loaded_lock:
+            _loaded[path] = (stamp, manifest)
+            _loaded.move_to_end(path)
+            while len(_loaded) > LOADED_MANIFESTS:
+                _loaded.popitem(last=False)
+        return manifest
+    return None
+
+
+def load_manifest(zip_path: str, extract_path: str) -> pd.DataFrame:
+    """Return the manifest of an image dataset, rebuilding it from ``extract_path`` if missing or stale.
+
+    The frame may be shared with other callers; do not modify it in place.
+
+    Raises:
+        FileNotFoundError: If neither a manifest nor the extracted images exist.
+    """
+    manifest = _read_manifest(manifest_path(zip_path))
+    if manifest is not None:
+        return manifest
+    if not os.path.isdir(extract_path):
+        raise FileNotFoundError(f"Image dataset not extracted: {extract_path}")
+    logger.info("Rebuilding image manifest for %s", zip_path)
+    manifest = scan_directory(extract_path)
+    write_manifest(zip_path, manifest)
+    return manifest
+
+
+def file_manifest(file: DataFile) -> pd.DataFrame:
+    """Return the manifest of a ZIP DataFile; see ``load_manifest``."""
+    upload_folder = get_settings().upload_folder
+    return load_manifest(os.path.join(upload_folder, file.disk_name), extract_dir(upload_folder, file.disk_name))
+
+
+def class_names(manifest: pd.DataFrame) -> list[str]:
+    """Return the sorted class labels of a manifest."""
+    return sorted(manifest["label"].dropna().unique().tolist())
@@ -0,0 +1,262 @@
+"""tf.data input pipelines for image datasets, built from the image manifest.
+
+``image_datasets`` yields the same training/validation datasets as calling
+``tf.keras.utils.image_dataset_from_directory`` once per subset with a fixed
+seed — same class indices, same seeded file shuffle and split, same decode
+and resize — but takes the file list from the persisted manifest (see
+``image_manifest``) instead of walking the extracted tree twice.
+
+Given the decoded images from the shard cache (see ``image_cache``), the
+datasets stream batches straight out of the memory-mapped array instead of
+decoding files.
+
+How the pipeline runs — decode parallelism, caching, prefetch depth and
+whether element order is deterministic — is set per training job through
+``InputPipelineOptions``. A model's ``AugmentationOptions`` add a random
+augmentation stage to the training subset, applied to whole batches after
+decoding (or after reading the cache), so every epoch sees new variants
+without storing any.
+"""
+
+import os
+from dataclasses import dataclass, fields
+
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+
+from app.services.image_manifest import class_names
+
+COLOR_CHANNELS = {"grayscale": 1, "rgb": 3, "rgba": 4}
+# Input-pipeline cache modes: decode every epoch, decode once into memory
+# during the first epoch, or use the persistent decoded-image cache.
+CACHE_MODES = ("none", "memory", "disk")
+
+
+@dataclass(frozen=True)
+class InputPipelineOptions:
+    """Input-pipeline settings of one training job, stored under ``hyperparams["input_pipeline"]``."""
+
+    parallel_calls: int | None = None  # decode/gather parallelism; None = tf.data.AUTOTUNE
+    cache: str = "disk"  # one of CACHE_MODES
+    prefetch: int | None = None  # batches to prefetch; None = tf.data.AUTOTUNE, 0 = off
+    deterministic: bool = True  # False lets parallel maps yield elements out of order
+    # Tabular datasets: stream from disk (see tabular_pipeline) instead of
+    # loading into memory; None = stream when the CSV is larger than
+    # ``Settings.tabular_stream_threshold``.
+    streaming: bool | None = None
+    shuffle_buffer: int | None = None  # rows; None = tabular_pipeline.DEFAULT_SHUFFLE_BUFFER
+
+    @classmethod
+    def from_hyperparams(cls, hyperparams: dict | None) -> "InputPipelineOptions":
+        """Read the options recorded on a job; unknown keys are ignored and missing ones default."""
+        stored = (hyperparams or {}).get("input_pipeline") or {}
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in stored.items() if k in names})
+
+    @property
+    def num_parallel_calls(self) -> int:
+        return self.parallel_calls or tf.data.AUTOTUNE
+
+    def finish(self, ds: tf.data.Dataset) -> tf.data.Dataset:
+        """Apply the prefetch setting to a batched dataset."""
+        if self.prefetch == 0:
+            return ds
+        return ds.prefetch(tf.data.AUTOTUNE if self.prefetch is None else self.prefetch)
+
+
+@dataclass(frozen=True)
+class AugmentationOptions:
+    """Random augmentation of training images, stored on ``ModelBasic.augmentation``.
+
+    See ``schemas.deep_learning.ImageAugmentationConfig`` for the meaning of
+    each factor; 0 (or "none") disables a transform.
+    """
+
+    flip: str = "none"
+    rotation: float = 0.0
+    crop: float = 0.0
+    brightness: float = 0.0
+    contrast: float = 0.0
+
+    @classmethod
+    def from_config(cls, config: dict | None) -> "AugmentationOptions":
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in (config or {}).items() if k in names})
+
+    def layer(self, seed: int) -> tf.keras.Sequential | None:
+        """Return the batched augmentation as Keras preprocessing layers, or None if nothing is enabled."""
+        layers = []
+        if self.flip != "none":
+            layers.append(tf.keras.layers.RandomFlip(self.flip, seed=seed))
+        if self.rotation:
+            layers.append(tf.keras.layers.RandomRotation(self.rotation, seed=seed))
+        if self.crop:
+            # A negative zoom factor zooms in: a random crop resized back to the image size.
+            layers.append(tf.keras.layers.RandomZoom((-self.crop, 0.0), seed=seed))
+        if self.brightness:
+            layers.append(tf.keras.layers.RandomBrightness(self.brightness, value_range=(0, 255), seed=seed))
+        if self.contrast:
+            layers.append(tf.keras.layers.RandomContrast(self.contrast, seed=seed))
+        return tf.keras.Sequential(layers, name="augmentation") if layers else None
+
+
+def split_manifest(
+    manifest: pd.DataFrame, validation_split: float, seed: int
+) -> tuple[tuple[np.ndarray, np.ndarray], tuple[np.ndarray, np.ndarray], list[str]]:
+    """Return ``(train_rows, train_labels), (val_rows, val_labels), class_names``.
+
+    Unlabeled images (directly in the archive root) are skipped. Rows are
+    positions in ``manifest``; labels are class indices.
+
+    Raises:
+        ValueError: If either subset would be empty.
+    """
+    rows = np.flatnonzero(manifest["label"].notna().to_numpy())
+    names = class_names(manifest)
+    labels = manifest["label"].iloc[rows].map({name: i for i, name in enumerate(names)}).to_numpy(dtype="int32")
+
+    # Seeded global shuffle, then the validation subset is the tail.
+    order = np.arange(len(rows))
+    np.random.RandomState(seed).shuffle(order)
+    rows, labels = rows[order], labels[order]
+    num_val = int(validation_split * len(rows))
+    if num_val == 0 or num_val == len(rows):
+        raise ValueError(
+            f"Cannot split {len(rows)} labeled images with validation_split={validation_split}: "
+            "both the training and validation subsets need at least one image"
+        )
+    return (rows[:-num_val], labels[:-num_val]), (rows[-num_val:], labels[-num_val:]), names
+
+
+def _labels_dataset(labels: np.ndarray, label_mode: str, num_classes: int) -> tf.data.Dataset:
+    ds = tf.data.Dataset.from_tensor_slices(labels)
+    if label_mode == "binary":
+        return ds.map(lambda y: tf.expand_dims(tf.cast(y, "float32"), axis=-1), num_parallel_calls=tf.data.AUTOTUNE)
+    if label_mode == "categorical":
+        return ds.map(lambda y: tf.one_hot(y, num_classes), num_parallel_calls=tf.data.AUTOTUNE)
+    return ds
+
+
+def load_image(path, image_size: tuple[int, int], channels: int):
+    """Decode and resize one image file to float32, as image_dataset_from_directory does."""
+    image = tf.image.decode_image(tf.io.read_file(path), channels=channels, expand_animations=False)
+    image = tf.image.resize(image, image_size, method="bilinear")
+    image.set_shape((image_size[0], image_size[1], channels))
+    return image
+
+
+def _augmented(
+    ds: tf.data.Dataset, augment: tf.keras.Sequential | None, options: InputPipelineOptions
+) -> tf.data.Dataset:
+    if augment is None:
+        return ds
+    return ds.map(
+        lambda x, y: (augment(x, training=True), y),
+        num_parallel_calls=options.num_parallel_calls,
+        deterministic=options.deterministic,
+    )
+
+
+def _subset_dataset(
+    root: str,
+    paths: np.ndarray,
+    labels: np.ndarray,
+    num_classes: int,
+    image_size: tuple[int, int],
+    batch_size: int,
+    color_mode: str,
+    label_mode: str,
+    seed: int,
+    options: InputPipelineOptions,
+    augment: tf.keras.Sequential | None = None,
+) -> tf.data.Dataset:
+    full_paths = [os.path.join(root, p) for p in paths]
+    ds = tf.data.Dataset.zip(
+        (tf.data.Dataset.from_tensor_slices(full_paths), _labels_dataset(labels, label_mode, num_classes))
+    )
+    channels = COLOR_CHANNELS[color_mode]
+
+    def decode(x, y):
+        return load_image(x, image_size, channels), y
+
+    map_args = {"num_parallel_calls": options.num_parallel_calls, "deterministic": options.deterministic}
+    if options.cache == "memory":
+        # Decode once, then reshuffle the cached images every epoch.
+        ds = ds.map(decode, **map_args).cache().shuffle(buffer_size=batch_size * 8, seed=seed)
+    else:
+        ds = ds.shuffle(buffer_size=batch_size * 8, seed=seed).map(decode, **map_args)
+    return options.finish(_augmented(ds.batch(batch_size), augment, options))
+
+
+def _cached_subset_dataset(
+    images: np.ndarray,
+    rows: np.ndarray,
+    labels: np.ndarray,
+    num_classes: int,
+    batch_size: int,
+    label_mode: str,
+    seed: int,
+    options: InputPipelineOptions,
+    augment: tf.keras.Sequential | None = None,
+) -> tf.data.Dataset:
+    # Shuffle and batch the row numbers, then gather each batch from the
+    # (memory-mapped) array in one read; no per-image work is left.
+    ds = tf.data.Dataset.zip(
+        (tf.data.Dataset.from_tensor_slices(rows), _labels_dataset(labels, label_mode, num_classes))
+    )
+    ds = ds.shuffle(buffer_size=batch_size * 8, seed=seed).batch(batch_size)
+
+    def gather(batch_rows, y):
+        x = tf.numpy_function(lambda r: images[r], [batch_rows], tf.uint8, stateful=False)
+        x.set_shape((None, *images.shape[1:]))
+        return tf.cast(x, "float32"), y
+
+    ds = ds.map(gather, num_parallel_calls=options.num_parallel_calls, deterministic=options.deterministic)
+    return options.finish(_augmented(ds, augment, options))
+
+
+def image_datasets(
+    root: str,
+    manifest: pd.DataFrame,
+    validation_split: float,
+    image_size: tuple[int, int],
+    batch_size: int,
+    color_mode: str,
+    label_mode: str,
+    seed: int = 123,
+    images: np.ndarray | None = None,
+    options: InputPipelineOptions | None = None,
+    augmentation: AugmentationOptions | None = None,
+) -> tuple[tf.data.Dataset, tf.data.Dataset]:
+    """Return the ``(training, validation)`` datasets of the images under ``root``.
+
+    ``images``, if given, holds every manifest row already decoded and resized
+    (see ``image_cache.load_image_cache``) and is streamed from instead of the
+    image files. ``options`` defaults to ``InputPipelineOptions()``.
+    ``augmentation`` applies to the training subset only.
+
+    Raises:
+        ValueError: If a subset would be empty, ``color_mode`` is unknown, or
+            ``label_mode`` is "binary" without exactly two classes.
+    """
+    options = options or InputPipelineOptions()
+    if color_mode not in COLOR_CHANNELS:
+        raise ValueError(f"color_mode must be one of {sorted(COLOR_CHANNELS)}, got {color_mode!r}")
+    train, val, names = split_manifest(manifest, validation_split, seed)
+    if label_mode == "binary" and len(names) != 2:
+        raise ValueError(f'label_mode="binary" needs exactly 2 classes, found {len(names)}: {names}')
+    augment = augmentation.layer(seed) if augmentation is not None else None
+    if images is not None:
+        args = (len(names), batch_size, label_mode, seed, options)
+        return (
+            _cached_subset_dataset(images, *train, *args, augment),
+            _cached_subset_dataset(images, *val, *args),
+        )
+
+    paths = manifest["path"].to_numpy(dtype=object)
+    args = (len(names), image_size, batch_size, color_mode, label_mode, seed, options)
+    return (
+        _subset_dataset(root, paths[train[0]], train[1], *args, augment),
+        _subset_dataset(root, paths[val[0]], val[1], *args),
+    )
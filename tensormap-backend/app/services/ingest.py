@@ -0,0 +1,65 @@
+"""Single-pass ingest of uploaded files.
+
+``ingest_upload`` copies an upload stream to disk in fixed-size blocks and,
+in the same pass over the bytes, enforces the size limit and computes the
+SHA-256 content hash. Nothing is read twice and peak memory is bounded by
+the block size, not the file. CSVs are parsed later, in the background (see
+``file_profiling``).
+"""
+
+import contextlib
+import hashlib
+import os
+from dataclasses import dataclass
+from typing import BinaryIO
+
+from app.shared.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+BLOCK_SIZE = 1024 * 1024  # 1 MB
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds the configured size limit."""
+
+
+@dataclass(frozen=True)
+class IngestResult:
+    """What the ingest pass learned about an uploaded file."""
+
+    size: int
+    sha256: str
+
+
+def ingest_upload(source: BinaryIO, path: str, max_bytes: int) -> IngestResult:
+    """Stream ``source`` to ``path`` in one pass; see the module docstring.
+
+    The file is written to a temp path and renamed into place, so ``path``
+    never holds a partial upload.
+
+    Raises:
+        UploadTooLargeError: If ``source`` holds more than ``max_bytes`` bytes.
+        OSError: If the file cannot be written.
+    """
+    tmp_path = path + ".part"
+    size = 0
+    digest = hashlib.sha256()
+    try:
+        with open(tmp_path, "wb") as sink:
+            while block := source.read(BLOCK_SIZE):
+                size += len(block)
+                if size > max_bytes:
+                    raise UploadTooLargeError(f"Upload exceeds {max_bytes} bytes")
+                digest.update(block)
+                sink.write(block)
+            # Durable before the caller acknowledges the upload.
+            sink.flush()
+            os.fsync(sink.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+
+    logger.info("Ingested %s (%d bytes, sha256=%s)", path, size, digest.hexdigest()[:12])
+    return IngestResult(size=size, sha256=digest.hexdigest())
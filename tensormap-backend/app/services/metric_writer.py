@@ -0,0 +1,144 @@
+"""Buffered, batched persistence of training metrics.
+
+``MetricsCallback`` used to open a session, insert one row per metric and
+commit on the training thread at every epoch: with short epochs and several
+jobs that is a stream of tiny transactions, each stalling its job. Callbacks
+now hand their rows to a ``MetricWriter`` and return; its thread buffers rows
+across epochs and jobs of the process and bulk-inserts them in one
+transaction once ``flush_rows`` rows are waiting or the oldest has waited
+``flush_interval`` seconds (``METRIC_FLUSH_ROWS`` / ``METRIC_FLUSH_INTERVAL``).
+
+``flush`` blocks until everything handed over so far is committed; callbacks
+call it before a job's final status is written, so a finished job's metrics
+are all readable. Rows whose write fails are retried once, a flush interval
+later. ``close`` (also run at interpreter exit) makes one last attempt and
+drops, with a warning, rows whose database no longer has the metrics table.
+"""
+
+import atexit
+import queue
+import threading
+import time
+from collections.abc import Callable
+
+from sqlalchemy import insert, inspect
+from sqlmodel import Session
+
+from app.config import get_settings
+from app.models.training_metric import TrainingMetric
+from app.shared.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+_STOP = object()
+
+
+class MetricWriter:
+    """A background thread that bulk-inserts ``TrainingMetric`` rows.
+
+    Args:
+        flush_interval: Seconds a row may wait in the buffer.
+        flush_rows: Buffered rows that trigger a write straight away.
+    """
+
+    def __init__(self, flush_interval: float, flush_rows: int) -> None:
+        self.flush_interval = flush_interval
+        self.flush_rows = max(1, flush_rows)
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        # Rows per session factory (tests give each job its own database).
+        self._buffer: dict[Callable[[], Session], list[dict]] = {}
+        self._retry: dict[Callable[[], Session], list[dict]] = {}
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="metric-writer", daemon=True)
+                self._thread.start()
+
+    def add(self, session_factory: Callable[[], Session], rows: list[dict]) -> None:
+        """Queue ``TrainingMetric`` rows (column dicts) for writing through ``session_factory``."""
+        if rows:
+            self._ensure_started()
+            self._queue.put((session_factory, rows))
+
+    def flush(self, timeout: float = 30.0) -> bool:
+        """Write every row queued so far; return False if that took longer than ``timeout``."""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        if not done.wait(timeout):
+            logger.warning("Metric flush did not finish within %.0fs", timeout)
+            return False
+        return True
+
+    def close(self, timeout: float = 30.0) -> None:
+        """Flush and stop the writer thread."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        deadline: float | None = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if isinstance(item, tuple):
+                factory, rows = item
+                self._buffer.setdefault(factory, []).extend(rows)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+                if sum(map(len, self._buffer.values())) < self.flush_rows and time.monotonic() < deadline:
+                    continue
+            if self._buffer or self._retry:
+                self._write(final=item is _STOP)
+            deadline = time.monotonic() + self.flush_interval if self._retry else None
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is _STOP:
+                return
+
+    def _write(self, final: bool = False) -> None:
+        batches, self._buffer = self._buffer, {}
+        retries, self._retry = self._retry, {}
+        for factory in batches.keys() | retries.keys():
+            rows = retries.get(factory, []) + batches.get(factory, [])
+            try:
+                with factory() as session:
+                    # On close the database may be gone already (e.g. torn down at exit).
+                    if final and not inspect(session.get_bind()).has_table(TrainingMetric.__tablename__):
+                        logger.warning("Dropping %d training metric rows: their database is gone", len(rows))
+                        continue
+                    session.exec(insert(TrainingMetric), params=rows)
+                    session.commit()
+            except Exception:  # noqa: BLE001 - a metrics write must not kill the writer
+                if final:
+                    logger.warning("Dropping %d training metric rows: the final write failed", len(rows))
+                elif factory in retries:
+                    logger.exception("Dropping %d training metric rows after a failed retry", len(retries[factory]))
+                else:
+                    logger.exception("Failed to write %d training metric rows; retrying", len(rows))
+                if batches.get(factory):
+                    self._retry[factory] = batches[factory]
+                continue
+            logger.debug("Wrote %d training metric rows", len(rows))
+
+
+_writer: MetricWriter | None = None
+_writer_lock = threading.Lock()
+
+
+def metric_writer() -> MetricWriter:
+    """Return this process's metric writer, created on first use and flushed at exit."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            settings = get_settings()
+            _writer = MetricWriter(settings.metric_flush_interval, settings.metric_flush_rows)
+            atexit.register(_writer.close)
+        return _writer
@@ -1,7 +1,10 @@
 import asyncio
 import contextvars
 import os
+import threading
+import time
 
+import numpy as np
 import pandas as pd
 import tensorflow as tf
 from sqlmodel import Session, select
@@ -10,7 +13,15 @@ from app.callbacks import CancellationCheckCallback, MetricsCallback
 from app.config import get_settings
 from app.models.data import DataFile, ImageProperties
 from app.models.ml import ModelBasic
-from app.models.training_job import TrainingStatus
+from app.models.training_job import TrainingJob, TrainingStatus
+from app.services.dataset_reader import DatasetReader
+from app.services.dataset_versions import VersionNotFoundError, resolve_version_path
+from app.services.file_profiling import stored_schema
+from app.services.image_cache import file_image_cache
+from app.services.image_manifest import file_manifest
+from app.services.image_pipeline import AugmentationOptions, InputPipelineOptions, image_datasets
+from app.services.tabular_pipeline import tabular_datasets
+from app.services.tensor_cache import TrainingArrays, load_training_arrays
 from app.shared.constants import (
     MODEL_GENERATION_LOCATION,
     MODEL_GENERATION_TYPE,
@@ -19,7 +30,8 @@ from app.shared.constants import (
 )
 from app.shared.enums import ProblemType
 from app.shared.logging_config import get_logger
-from app.socketio_instance import sio
+from app.shared.memory import PeakRssMonitor
+from app.socketio_instance import emit_relay, sio
 
 logger = get_logger(__name__)
 
@@ -112,6 +124,10 @@ def _model_result(message: str, test: int) -> None:
     requests stay isolated.
     """
     data = {"message": message, "test": test}
+    relay = emit_relay()
+    if relay is not None:
+        relay(None, data)
+        return
     loop = _training_loop_ctx.get()
     if loop is not None and loop.is_running():
         future = asyncio.run_coroutine_threadsafe(
@@ -126,15 +142,48 @@ def _model_result(message: str, test: int) -> None:
         logger.warning("No running event loop for Socket.IO emit: %s", message)
 
 
-def _helper_generate_file_location(db: Session, file_id) -> str:
-    """Resolve the on-disk path for a dataset file by its DB ID."""
+def _helper_generate_file_location(db: Session, file_id, version_id=None) -> str:
+    """Resolve the on-disk path for a dataset file by its DB ID.
+
+    CSV files resolve to ``version_id`` (a job's pinned version) or, without
+    it, the file's current version, materialized if needed.
+    """
     upload_folder = get_settings().upload_folder
     file = db.exec(select(DataFile).where(DataFile.id == file_id)).first()
     if file is None:
         raise ModelRunError(f"Dataset file not found (id={file_id})")
     if file.file_type == "zip":
         return upload_folder + "/" + file.disk_name.rsplit(".", 1)[0]
-    return upload_folder + "/" + file.disk_name
+    if version_id is None and file.current_version_id is None:
+        return upload_folder + "/" + file.disk_name
+    try:
+        return resolve_version_path(db, file, version_id)
+    except VersionNotFoundError as e:
+        raise ModelRunError(str(e)) from e
+
+
+def _image_inputs(
+    db: Session, file_id, image_size: tuple[int, int], color_mode: str, use_cache: bool = True
+) -> tuple[pd.DataFrame, np.ndarray | None]:
+    """Return the image manifest of a ZIP dataset and, if ``use_cache``, its decoded-image cache.
+
+    The cache is built on first use for each image size and color mode. If
+    it cannot be built, training falls back to decoding the image files.
+    """
+    file = db.exec(select(DataFile).where(DataFile.id == file_id)).first()
+    if file is None:
+        raise ModelRunError(f"Dataset file not found (id={file_id})")
+    try:
+        manifest = file_manifest(file)
+    except FileNotFoundError as e:
+        raise ModelRunError(str(e)) from e
+    if not use_cache:
+        return manifest, None
+    try:
+        return manifest, file_image_cache(file, manifest, image_size, color_mode)
+    except (OSError, tf.errors.OpError):
+        logger.warning("Image cache unavailable for file %s; decoding images per epoch", file_id, exc_info=True)
+        return manifest, None
 
 
 def _helper_generate_json_model_file_location(model_name: str) -> str:
@@ -146,12 +195,15 @@ def _helper_generate_json_model_file_location(model_name: str) -> str:
     return path
 
 
-def _build_training_callbacks(job_id: str | None) -> list[tf.keras.callbacks.Callback]:
+def _build_training_callbacks(
+    job_id: str | None, cancel_event: threading.Event | None = None
+) -> list[tf.keras.callbacks.Callback]:
     """Return the Keras callbacks for a run.
 
     Without a job_id (legacy/direct calls) we keep the text-based
     ``CustomProgressBar``. With a job_id we use the persistent ``MetricsCallback``
-    (DB + room-scoped Socket.IO) plus ``CancellationCheckCallback``.
+    (DB + room-scoped Socket.IO) plus ``CancellationCheckCallback``, which also
+    watches ``cancel_event``.
     """
     if job_id is None:
         return [CustomProgressBar()]
@@ -161,15 +213,21 @@ def _build_training_callbacks(job_id: str | None) -> list[tf.keras.callbacks.Cal
     loop = _training_loop_ctx.get()
     return [
         MetricsCallback(job_id, make_session, sio, loop),
-        CancellationCheckCallback(job_id, make_session),
+        CancellationCheckCallback(job_id, make_session, cancel_event),
     ]
 
 
+def _was_cancelled(callbacks: list[tf.keras.callbacks.Callback]) -> bool:
+    """Return whether the run was cancelled, so the final evaluation can be skipped."""
+    return any(isinstance(cb, CancellationCheckCallback) and cb.cancelled for cb in callbacks)
+
+
 def model_run(
     model_name: str,
     db: Session,
     loop: asyncio.AbstractEventLoop | None = None,
     job_id: str | None = None,
+    cancel_event: threading.Event | None = None,
 ) -> None:
     """Load, compile, and train a Keras model, emitting progress via Socket.IO.
 
@@ -179,17 +237,20 @@ def model_run(
     When ``job_id`` is given, training progress is persisted to the
     ``training_metric`` table and the job's lifecycle (running/completed/failed)
     is recorded; on failure the job is marked FAILED with the error message.
+    Setting ``cancel_event`` stops the run like cancelling the job does.
     """
     token = _training_loop_ctx.set(loop)
     try:
-        _run(model_name, db, job_id=job_id)
+        _run(model_name, db, job_id=job_id, cancel_event=cancel_event)
     except Exception as e:
         logger.exception("Training failed for model '%s': %s", model_name, str(e))
         if job_id is not None:
             from app.callbacks.metrics_callback import schedule_room_emit
+            from app.services.metric_writer import metric_writer
             from app.services.training_service import make_session, update_job_status
 
             try:
+                metric_writer().flush()
                 with make_session() as session:
                     update_job_status(job_id, TrainingStatus.FAILED, session, error_message=str(e))
                 schedule_room_emit(sio, loop, job_id, {"type": "status", "status": "failed", "error": str(e)})
@@ -202,43 +263,67 @@ def model_run(
         _training_loop_ctx.reset(token)
 
 
-def _prepare_training_data(features, target_field, training_split):
-    """Prepare training data with transparent logging of dropped rows (Issue #5).
+def _prepare_training_data(arrays: TrainingArrays, training_split):
+    """Split prepared training arrays with transparent logging of dropped rows (Issue #5).
 
-    Instead of silently dropping rows with missing values, this function logs
-    the count and emits a Socket.IO warning so the user knows their dataset
-    was trimmed before training.
+    Instead of silently dropping rows with missing values (done once, when
+    the arrays are cached; see ``tensor_cache``), this function logs the
+    count and emits a Socket.IO warning so the user knows their dataset was
+    trimmed before training. The splits are views of the arrays, not copies.
     """
-    original_rows = len(features)
-    rows_with_missing = int(features.isnull().any(axis=1).sum())
+    _report_dropped_rows(arrays.source_rows, arrays.rows)
+    return arrays.split(training_split)
 
-    if rows_with_missing > 0:
-        pct = (rows_with_missing / original_rows) * 100 if original_rows else 0
-        msg = f"Warning: Removed {rows_with_missing} rows ({pct:.1f}%) with missing values before training"
+
+def _report_dropped_rows(source_rows: int, rows: int) -> None:
+    dropped = source_rows - rows
+    if dropped > 0:
+        pct = (dropped / source_rows) * 100
+        msg = f"Warning: Removed {dropped} rows ({pct:.1f}%) with missing values before training"
         logger.warning(msg)
         _model_result(msg, -1)
+    logger.info("Data preparation: %d -> %d rows retained", source_rows, rows)
+
+
+def _stream_tabular(options: InputPipelineOptions, csv_path: str) -> bool:
+    """Whether a tabular job streams its dataset from disk (see ``tabular_pipeline``)."""
+    if options.streaming is not None:
+        return options.streaming
+    return os.path.getsize(csv_path) > get_settings().tabular_stream_threshold
+
+
+def _record_data_prep(db: Session, job_id: str | None, prep: dict, rss: PeakRssMonitor, seconds: float) -> None:
+    """Log the cost of preparing a job's training data and store it on the job."""
+    stats = {
+        **prep,
+        "seconds": round(seconds, 3),
+        "baseline_rss_bytes": rss.baseline_bytes,
+        "peak_rss_bytes": rss.peak_bytes,
+    }
+    logger.info("Data preparation for job %s: %s", job_id, stats)
+    job = db.get(TrainingJob, job_id) if job_id is not None else None
+    if job is not None:
+        job.data_prep = stats
+        db.add(job)
+        db.commit()
+
+
+def _pinned_version(db: Session, job_id: str | None):
+    """Return the dataset version a job was pinned to (None = the file's current version)."""
+    if job_id is None:
+        return None
+    job = db.get(TrainingJob, job_id)
+    return job.dataset_version_id if job is not None else None
 
-    features = features.dropna()
-    logger.info("Data preparation: %d -> %d rows retained", original_rows, len(features))
-
-    if target_field not in features.columns:
-        raise ValueError(f"Target field '{target_field}' not found in dataset after cleaning")
-
-    # Shuffle to prevent issues with ordered datasets
-    features = features.sample(frac=1, random_state=42).reset_index(drop=True)
-
-    X = features.drop(target_field, axis=1)
-    y = features[target_field]
-    # Encode string labels to integers for categorical targets
-    if not pd.api.types.is_numeric_dtype(y):
-        y = pd.Categorical(y).codes
 
-    split_index = int(len(X) * float(training_split) / 100)
-    return X[:split_index], y[:split_index], X[split_index:], y[split_index:]
+def _input_pipeline_options(db: Session, job_id: str | None) -> InputPipelineOptions:
+    """Return the input-pipeline settings recorded on a job (defaults without one)."""
+    job = db.get(TrainingJob, job_id) if job_id is not None else None
+    return InputPipelineOptions.from_hyperparams(job.hyperparams if job is not None else None)
 
 
-def _run(model_name: str, db: Session, job_id: str | None = None) -> None:
-    callbacks = _build_training_callbacks(job_id)
+def _run(model_name: str, db: Session, job_id: str | None = None, cancel_event: threading.Event | None = None) -> None:
+    callbacks = _build_training_callbacks(job_id, cancel_event)
     model_configs = db.exec(select(ModelBasic).where(ModelBasic.model_name == model_name)).first()
     if model_configs is None:
         raise ModelRunError(f"Model configuration not found: {model_name}")
@@ -270,36 +355,69 @@ def _run(model_name: str, db: Session, job_id: str | None = None) -> None:
             label_mode,
         )
         validation_split = 1 - (model_configs.training_split / 100)
-        train_data = tf.keras.utils.image_dataset_from_directory(
-            directory,
-            validation_split=validation_split,
-            subset="training",
-            seed=123,
-            image_size=image_size,
-            batch_size=batch_size,
-            color_mode=color_mode,
-            label_mode=label_mode,
+        options = _input_pipeline_options(db, job_id)
+        logger.debug("Input pipeline: %s", options)
+        manifest, images = _image_inputs(
+            db, model_configs.file_id, image_size, color_mode, use_cache=options.cache == "disk"
         )
-        test_data = tf.keras.utils.image_dataset_from_directory(
+        train_data, test_data = image_datasets(
             directory,
+            manifest,
             validation_split=validation_split,
-            subset="validation",
-            seed=123,
             image_size=image_size,
             batch_size=batch_size,
             color_mode=color_mode,
             label_mode=label_mode,
+            images=images,
+            options=options,
+            augmentation=AugmentationOptions.from_config(model_configs.augmentation),
         )
     else:
-        file_location = _helper_generate_file_location(db, file_id=model_configs.file_id)
-        features = pd.read_csv(file_location)
-
-        # Issue #5: use _prepare_training_data for transparent missing-value handling
-        x_training, y_training, x_testing, y_testing = _prepare_training_data(
-            features, model_configs.target_field, model_configs.training_split
+        file_location = _helper_generate_file_location(
+            db, file_id=model_configs.file_id, version_id=_pinned_version(db, job_id)
         )
-
+        file = db.get(DataFile, model_configs.file_id)
+        schema = stored_schema(file, file_location) if file is not None else None
         batch_size = model_configs.batch_size if model_configs.batch_size is not None else 32
+        options = _input_pipeline_options(db, job_id)
+        train_data = None
+        started = time.monotonic()
+        if _stream_tabular(options, file_location):
+            with PeakRssMonitor() as rss:
+                train_data, test_data, scan = tabular_datasets(
+                    DatasetReader(file_location, schema=schema),
+                    model_configs.target_field,
+                    model_configs.training_split,
+                    batch_size,
+                    options,
+                )
+            rows = scan.train_rows + scan.val_rows
+            _record_data_prep(
+                db,
+                job_id,
+                {"streaming": True, "rows": rows, "features": len(scan.feature_columns)},
+                rss,
+                time.monotonic() - started,
+            )
+            _report_dropped_rows(scan.source_rows, rows)
+        else:
+            with PeakRssMonitor() as rss:
+                arrays = load_training_arrays(file_location, model_configs.target_field, schema)
+            _record_data_prep(
+                db,
+                job_id,
+                {
+                    "streaming": False,
+                    "cache_hit": arrays.cache_hit,
+                    "rows": arrays.rows,
+                    "features": len(arrays.feature_columns),
+                },
+                rss,
+                time.monotonic() - started,
+            )
+
+            # Issue #5: use _prepare_training_data for transparent missing-value handling
+            x_training, y_training, x_testing, y_testing = _prepare_training_data(arrays, model_configs.training_split)
 
     with open(_helper_generate_json_model_file_location(model_name=model_name)) as f:
         json_string = f.read()
@@ -323,7 +441,13 @@ def _run(model_name: str, db: Session, job_id: str | None = None) -> None:
             callbacks=callbacks,
             verbose=0,
         )
-        model.evaluate(test_data, callbacks=callbacks, verbose=0)
+        if not _was_cancelled(callbacks):
+            model.evaluate(test_data, callbacks=callbacks, verbose=0)
+    elif train_data is not None:
+        # Streamed tabular data, already batched by the pipeline.
+        model.fit(train_data, epochs=model_configs.epochs, callbacks=callbacks, verbose=0)
+        if not _was_cancelled(callbacks):
+            model.evaluate(test_data, callbacks=callbacks, verbose=0)
     else:
         model.fit(
             x_training,
@@ -333,4 +457,5 @@ def _run(model_name: str, db: Session, job_id: str | None = None) -> None:
             callbacks=callbacks,
             verbose=0,
         )
-        model.evaluate(x_testing, y_testing, callbacks=callbacks, verbose=0)
+        if not _was_cancelled(callbacks):
+            model.evaluate(x_testing, y_testing, callbacks=callbacks, verbose=0)
@@ -0,0 +1,110 @@
+"""Persistent cache for dataset profiles (metrics, column stats, correlation).
+
+Profiles are pure functions of a dataset's bytes, so they are computed once
+and stored in ``profile.json`` inside the dataset's artifact directory (see
+``dataset_reader.artifact_dir``). Each cache file records a content
+fingerprint and a format version; a lookup is a hit only if both still match,
+so a rewritten CSV or a change to the profile code can never serve stale
+numbers. The cache is keyed by content alone, so every DataFile sharing an
+upload blob (see ``blob_store``) shares its profiles. Deleting the last
+reference to a file drops the cache with it. Writers merge their entry into
+the file under a file lock, so concurrent requests keep each other's entries.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import uuid as uuid_pkg
+
+from app.services.dataset_reader import artifact_dir
+from app.shared.file_lock import file_lock
+from app.shared.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Bump whenever the shape or semantics of any cached profile changes.
+PROFILE_CACHE_VERSION = 2
+PROFILE_CACHE_NAME = "profile.json"
+# Bytes hashed from each end of the file: cheap, yet catches in-place edits
+# that happen to preserve both size and mtime.
+_FINGERPRINT_BLOCK = 64 * 1024
+
+
+def _cache_path(csv_path: str) -> str:
+    return os.path.join(artifact_dir(csv_path), PROFILE_CACHE_NAME)
+
+
+def file_fingerprint(csv_path: str) -> dict:
+    """Return a content fingerprint (size, mtime and head/tail hash) for a file.
+
+    Raises:
+        OSError: If the file cannot be stat'ed or read.
+    """
+    st = os.stat(csv_path)
+    digest = hashlib.blake2b(digest_size=16)
+    with open(csv_path, "rb") as f:
+        digest.update(f.read(_FINGERPRINT_BLOCK))
+        if st.st_size > _FINGERPRINT_BLOCK:
+            f.seek(max(st.st_size - _FINGERPRINT_BLOCK, _FINGERPRINT_BLOCK))
+            digest.update(f.read(_FINGERPRINT_BLOCK))
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "hash": digest.hexdigest()}
+
+
+def _read_cache(csv_path: str) -> dict | None:
+    try:
+        with open(_cache_path(csv_path)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_profile(csv_path: str, kind: str) -> dict | None:
+    """Return the cached ``{"message", "data"}`` entry for ``kind``, or None on a miss."""
+    cache = _read_cache(csv_path)
+    if cache is None:
+        return None
+    try:
+        fingerprint = file_fingerprint(csv_path)
+    except OSError:
+        return None
+    if cache.get("version") != PROFILE_CACHE_VERSION or cache.get("fingerprint") != fingerprint:
+        return None
+    entry = cache.get("entries", {}).get(kind)
+    if entry is not None:
+        logger.debug("Profile cache hit: %s for %s", kind, csv_path)
+    return entry
+
+
+def store_profile(csv_path: str, kind: str, message: str, data) -> None:
+    """Record a computed profile. Best-effort: failures only cost a recompute later."""
+    try:
+        fingerprint = file_fingerprint(csv_path)
+    except OSError:
+        return
+
+    path = _cache_path(csv_path)
+    tmp_path = f"{path}.{uuid_pkg.uuid4().hex}.tmp"
+    try:
+        with file_lock(path):
+            cache = _read_cache(csv_path)
+            if (
+                cache is None
+                or cache.get("version") != PROFILE_CACHE_VERSION
+                or cache.get("fingerprint") != fingerprint
+            ):
+                cache = {"version": PROFILE_CACHE_VERSION, "fingerprint": fingerprint, "entries": {}}
+            cache["entries"][kind] = {"message": message, "data": data}
+            with open(tmp_path, "w") as f:
+                json.dump(cache, f)
+            os.replace(tmp_path, path)
+    except (OSError, TypeError, ValueError):
+        logger.warning("Could not write profile cache for %s", csv_path, exc_info=True)
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+
+
+def invalidate_profile(csv_path: str) -> None:
+    """Drop every cached profile for ``csv_path``."""
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(_cache_path(csv_path))
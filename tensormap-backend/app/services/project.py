@@ -1,6 +1,5 @@
 import contextlib
 import os
-import shutil
 import uuid as uuid_pkg
 from datetime import UTC, datetime
 from typing import Any
@@ -14,6 +13,9 @@ from app.models.data import DataFile
 from app.models.ml import ModelBasic
 from app.models.project import Project
 from app.schemas.project import ProjectCreateRequest, ProjectUpdateRequest
+from app.services.blob_store import blob_lock, remove_blob, unreferenced
+from app.services.dataset_reader import remove_artifacts
+from app.services.dataset_versions import version_file_paths
 from app.shared.constants import MODEL_GENERATION_LOCATION, MODEL_GENERATION_TYPE
 from app.shared.logging_config import get_logger
 
@@ -165,6 +167,7 @@ def delete_project_service(db: Session, project_id: uuid_pkg.UUID) -> tuple:
         # Collect disk paths *before* the DB cascade so we still have the records.
         data_files = db.exec(select(DataFile).where(DataFile.project_id == project_id)).all()
         models = db.exec(select(ModelBasic).where(ModelBasic.project_id == project_id)).all()
+        version_paths = [path for file in data_files for path in version_file_paths(db, file)]
 
         db.delete(project)
         db.commit()
@@ -178,25 +181,29 @@ def delete_project_service(db: Session, project_id: uuid_pkg.UUID) -> tuple:
     # between commit and cleanup, orphaned files remain with no DB record
     # to retry from. This is acceptable because the files are scoped to a
     # project that has been intentionally deleted.
+    # Uploads are shared, content-addressed blobs (see blob_store): each is
+    # removed only once no DataFile in any project references it.
     n_files = 0
-    for file in data_files:
-        file_path = os.path.realpath(os.path.join(upload_folder, file.disk_name))
+    for disk_name, file_type in {file.disk_name: file.file_type for file in data_files}.items():
+        file_path = os.path.realpath(os.path.join(upload_folder, disk_name))
         if not file_path.startswith(upload_folder + os.sep):
-            logger.warning("Path traversal blocked for disk_name=%s", file.disk_name)
+            logger.warning("Path traversal blocked for disk_name=%s", disk_name)
             continue
+        with blob_lock(upload_folder, disk_name):
+            if not unreferenced(db, [disk_name]):
+                logger.info("Blob %s is still referenced; keeping it", disk_name)
+                continue
+            try:
+                # Only files that were actually present and removed are counted.
+                n_files += remove_blob(upload_folder, disk_name, file_type)
+            except OSError:
+                logger.exception("Failed to remove blob %s", disk_name)
+
+    # Materialized dataset versions are per-file and always go with the project.
+    for version_path in version_paths:
         with contextlib.suppress(FileNotFoundError):
-            os.remove(file_path)
-            # Only files that were actually present and removed are counted.
-            n_files += 1
-
-        if file.file_type == "zip" and "." in file.disk_name:
-            # The extraction directory is derived from the ZIP's disk_name by
-            # stripping the extension (e.g. data_abc123.zip -> data_abc123/).
-            # This mirrors the convention in add_file_service in data_upload.py.
-            extract_dir_name = file.disk_name.rsplit(".", 1)[0]
-            extract_path = os.path.realpath(os.path.join(upload_folder, extract_dir_name))
-            if extract_path.startswith(upload_folder + os.sep):
-                shutil.rmtree(extract_path, ignore_errors=True)
+            os.remove(version_path)
+        remove_artifacts(version_path)
 
     # Remove generated model JSON files from disk.
     n_models = 0
@@ -0,0 +1,136 @@
+"""Byte-offset row index for O(page) random access into CSV files.
+
+The index records the byte offset of every ``stride``-th data row plus the
+total row count, so paging can seek close to the requested row and parse only
+``page_size`` rows instead of scanning the file from the top. It is built in a
+single vectorized pass at upload time (and again after preprocessing) and is
+stored as ``rows.idx.npz`` in the dataset's artifact directory.
+
+Rows are counted as physical lines, matching the line-count semantics the
+preview endpoint has always used.
+"""
+
+import contextlib
+import io
+import os
+import uuid as uuid_pkg
+import zipfile
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from app.services.dataset_reader import artifact_dir
+from app.shared.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+ROW_INDEX_NAME = "rows.idx.npz"
+# One checkpoint every DEFAULT_STRIDE rows: 5M rows -> ~5k offsets (40 KB),
+# and at most DEFAULT_STRIDE - 1 lines are skipped line-by-line per page.
+DEFAULT_STRIDE = 1024
+_SCAN_BLOCK = 4 * 1024 * 1024
+
+
+def row_index_path(csv_path: str) -> str:
+    """Return the on-disk path of the row index for ``csv_path``."""
+    return os.path.join(artifact_dir(csv_path), ROW_INDEX_NAME)
+
+
+@dataclass(frozen=True)
+class RowIndex:
+    """Sampled line-start offsets for a CSV.
+
+    ``offsets[k]`` is the byte offset at which data row ``k * stride`` starts
+    (data rows are 0-based and exclude the header line).
+    """
+
+    offsets: np.ndarray
+    stride: int
+    total_rows: int
+
+    def seek_row(self, f, row: int) -> None:
+        """Position binary file ``f`` at the start of data row ``row``."""
+        checkpoint = row // self.stride
+        f.seek(int(self.offsets[checkpoint]))
+        for _ in range(row - checkpoint * self.stride):
+            f.readline()
+
+
+def build_row_index(csv_path: str, stride: int = DEFAULT_STRIDE, persist: bool = True) -> RowIndex:
+    """Scan ``csv_path`` once and return (and by default persist) its row index.
+
+    Raises:
+        OSError: If the CSV cannot be read.
+    """
+    checkpoints: list[np.ndarray] = []
+    newlines_seen = 0
+    size = 0
+    last_byte = b""
+    with open(csv_path, "rb") as f:
+        while True:
+            block = f.read(_SCAN_BLOCK)
+            if not block:
+                break
+            positions = np.flatnonzero(np.frombuffer(block, dtype=np.uint8) == 0x0A)
+            # The n-th newline (0-based, file-wide) ends the line before data row n,
+            # so keep every stride-th newline counting from the file start.
+            picked = positions[(-newlines_seen) % stride :: stride]
+            checkpoints.append(picked.astype(np.int64) + size + 1)
+            newlines_seen += len(positions)
+            size += len(block)
+            last_byte = block[-1:]
+
+    lines = newlines_seen + (1 if size and last_byte != b"\n" else 0)
+    total_rows = max(lines - 1, 0)
+    offsets = np.concatenate(checkpoints) if checkpoints else np.empty(0, dtype=np.int64)
+    # A trailing newline yields a checkpoint at EOF for a row that does not exist.
+    offsets = offsets[: (total_rows + stride - 1) // stride]
+    index = RowIndex(offsets=offsets, stride=stride, total_rows=total_rows)
+
+    if persist:
+        path = row_index_path(csv_path)
+        # Unique per build: concurrent builds of one CSV must not share a temp file.
+        tmp_path = f"{path}.{uuid_pkg.uuid4().hex}.tmp.npz"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            np.savez(tmp_path, offsets=offsets, stride=stride, total_rows=total_rows)
+            os.replace(tmp_path, path)
+        except OSError:
+            logger.warning("Could not persist row index for %s", csv_path, exc_info=True)
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+    return index
+
+
+def load_row_index(csv_path: str) -> RowIndex:
+    """Return the persisted row index, rebuilding it if missing or stale.
+
+    Raises:
+        OSError: If the CSV cannot be read.
+    """
+    path = row_index_path(csv_path)
+    csv_mtime = os.stat(csv_path).st_mtime_ns
+    try:
+        if os.stat(path).st_mtime_ns >= csv_mtime:
+            with np.load(path) as data:
+                return RowIndex(
+                    offsets=data["offsets"],
+                    stride=int(data["stride"]),
+                    total_rows=int(data["total_rows"]),
+                )
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+        pass
+    logger.info("Row index missing or stale for %s; rebuilding", csv_path)
+    return build_row_index(csv_path)
+
+
+def read_rows(csv_path: str, index: RowIndex, start: int, count: int) -> pd.DataFrame:
+    """Parse ``count`` data rows starting at ``start`` using the row index."""
+    with open(csv_path, "rb") as f:
+        header = f.readline()
+        index.seek_row(f, start)
+        body = b"".join(f.readline() for _ in range(min(count, index.total_rows - start)))
+    if not header.endswith(b"\n"):
+        header += b"\n"
+    return pd.read_csv(io.BytesIO(header + body))
@@ -0,0 +1,194 @@
+"""Mergeable sketches for approximate single-pass profiling.
+
+Each sketch summarises one column in bounded memory, is updated a chunk at a
+time and merges with a sketch built over other rows, so chunks can be
+sketched in parallel and combined in any order (see
+``dataset_stats.compute_sketch_stats``):
+
+- ``HyperLogLog`` estimates the number of distinct values (relative error
+  about ``1.04 / sqrt(2 ** precision)``);
+- ``QuantileSketch`` is a KLL-style stack of compactors for quantiles: a
+  returned quantile's rank is within about ``error * n`` of the requested
+  one, with high probability;
+- ``FrequentItems`` is a Misra–Gries summary (the counter-based twin of
+  space-saving) for the most frequent values: each reported count is a lower
+  bound at most ``n / (capacity + 1)`` below the true one.
+
+The ``for_error`` constructors size a sketch for a target relative error.
+"""
+
+import math
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+# Target relative error of approximate profiles unless a request asks otherwise.
+DEFAULT_SKETCH_ERROR = 0.01
+MIN_SKETCH_ERROR = 0.005
+MAX_SKETCH_ERROR = 0.1
+
+
+def hash_values(series: pd.Series) -> np.ndarray:
+    """64-bit hashes of the non-null values of ``series``.
+
+    Numbers are hashed as float64 so a column parsed as int in one chunk and
+    float in another hashes consistently.
+    """
+    values = series.dropna()
+    if pd.api.types.is_numeric_dtype(values.dtype) and not pd.api.types.is_bool_dtype(values.dtype):
+        values = values.astype("float64")
+    return pd.util.hash_pandas_object(values, index=False).to_numpy()
+
+
+def _bit_length(x: np.ndarray) -> np.ndarray:
+    """Bit length of each uint64 (0 for 0), exact: 32-bit halves convert to float64 losslessly."""
+    high = (x >> np.uint64(32)).astype(np.float64)
+    low = (x & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(high > 0, 32 + np.frexp(high)[1], np.frexp(low)[1])
+
+
+@dataclass
+class HyperLogLog:
+    """Distinct-count estimator (Flajolet et al.) over 64-bit hashes."""
+
+    precision: int = 14
+    registers: np.ndarray = field(default=None, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.registers is None:
+            self.registers = np.zeros(1 << self.precision, dtype=np.uint8)
+
+    @classmethod
+    def for_error(cls, error: float) -> "HyperLogLog":
+        return cls(precision=min(16, max(4, math.ceil(math.log2((1.04 / error) ** 2)))))
+
+    def update_hashes(self, hashes: np.ndarray) -> None:
+        """Fold 64-bit hashes (see ``hash_values``) into the registers."""
+        if len(hashes) == 0:
+            return
+        p = self.precision
+        index = (hashes >> np.uint64(64 - p)).astype(np.intp)
+        rest = hashes & np.uint64((1 << (64 - p)) - 1)
+        rank = ((64 - p) - _bit_length(rest) + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> float:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return m * math.log(m / zeros)  # linear counting for small cardinalities
+        return float(raw)
+
+
+@dataclass
+class QuantileSketch:
+    """KLL-style quantile sketch: level ``h`` holds items of weight ``2 ** h``.
+
+    A level holding more than ``k`` items is sorted and every other item
+    (from a random offset) is promoted to the next level. While nothing has
+    been compacted the sketch holds every value and its quantiles are exact,
+    with pandas' linear interpolation.
+    """
+
+    k: int = 400
+    levels: list[np.ndarray] = field(default_factory=list, repr=False)
+    n: int = 0
+    seed: int = 0
+
+    def __post_init__(self) -> None:
+        self._rng = np.random.default_rng(self.seed)
+
+    @classmethod
+    def for_error(cls, error: float, seed: int = 0) -> "QuantileSketch":
+        return cls(k=math.ceil(4 / error), seed=seed)
+
+    @property
+    def is_exact(self) -> bool:
+        return len(self.levels) <= 1
+
+    def update(self, values: np.ndarray) -> None:
+        """Fold non-null float values into the sketch."""
+        if len(values) == 0:
+            return
+        self._add(0, np.asarray(values, dtype=np.float64))
+        self.n += len(values)
+        self._compress()
+
+    def merge(self, other: "QuantileSketch") -> None:
+        for h, items in enumerate(other.levels):
+            self._add(h, items)
+        self.n += other.n
+        self._compress()
+
+    def _add(self, h: int, items: np.ndarray) -> None:
+        while len(self.levels) <= h:
+            self.levels.append(np.empty(0))
+        self.levels[h] = np.concatenate([self.levels[h], items])
+
+    def _compress(self) -> None:
+        h = 0
+        while h < len(self.levels):
+            items = self.levels[h]
+            if len(items) > self.k:
+                items = np.sort(items)
+                even = len(items) - len(items) % 2
+                self._add(h + 1, items[self._rng.integers(2) : even : 2])
+                self.levels[h] = items[even:]
+            h += 1
+
+    def quantiles(self, qs: list[float]) -> list[float]:
+        """Return the values at quantiles ``qs`` (NaN when the sketch is empty)."""
+        if self.n == 0:
+            return [math.nan] * len(qs)
+        if self.is_exact:
+            return [float(v) for v in np.quantile(self.levels[0], qs)]
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2.0**h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        items, cumulative = items[order], np.cumsum(weights[order])
+        ranks = np.searchsorted(cumulative, np.asarray(qs) * cumulative[-1], side="left")
+        return [float(items[min(r, len(items) - 1)]) for r in ranks]
+
+
+@dataclass
+class FrequentItems:
+    """Misra–Gries summary of the most frequent values, keeping at most ``capacity`` counters."""
+
+    capacity: int = 100
+    counts: pd.Series = field(default_factory=lambda: pd.Series(dtype="float64"), repr=False)
+    n: int = 0
+
+    @classmethod
+    def for_error(cls, error: float) -> "FrequentItems":
+        return cls(capacity=math.ceil(1 / error))
+
+    @property
+    def max_undercount(self) -> float:
+        return self.n / (self.capacity + 1)
+
+    def update(self, series: pd.Series) -> None:
+        """Fold the non-null values of one chunk of a column into the summary."""
+        values = series.dropna()
+        self._combine(values.value_counts(sort=False).astype("float64"), len(values))
+
+    def merge(self, other: "FrequentItems") -> None:
+        self._combine(other.counts, other.n)
+
+    def _combine(self, counts: pd.Series, n: int) -> None:
+        combined = self.counts.add(counts, fill_value=0) if len(self.counts) else counts
+        if len(combined) > self.capacity:
+            # Subtract the (capacity + 1)-th largest count: at most ``capacity`` survive.
+            threshold = combined.nlargest(self.capacity + 1).iloc[-1]
+            combined = combined[combined > threshold] - threshold
+        self.counts = combined
+        self.n += n
+
+    def top(self, k: int = 1) -> list[tuple[object, int]]:
+        """Return up to ``k`` ``(value, estimated_count)`` pairs, most frequent first."""
+        return [(value, int(count)) for value, count in self.counts.nlargest(k).items()]
@@ -0,0 +1,186 @@
+"""Streaming tf.data input pipelines for tabular (CSV) datasets.
+
+The in-memory path (``tensor_cache``) needs the whole dataset in RAM once,
+to shuffle it. ``tabular_datasets`` trains on datasets of any size instead:
+rows are read from disk chunk by chunk through ``DatasetReader`` — from the
+columnar sidecar when there is one, otherwise the CSV — every epoch, mixed
+through a shuffle buffer, batched and prefetched.
+
+Rows are prepared as for in-memory training: rows with a missing value are
+dropped and a non-numeric target is encoded as the index of its label among
+the sorted labels. What that needs from the whole dataset (row counts, the
+labels) comes from one streaming pass, ``scan_tabular``. The
+training/validation split hashes each row's position in the file
+(``in_training_split``), so it is deterministic, needs no shuffled copy of
+the data and puts a row in the same subset every epoch and every job.
+"""
+
+import math
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+
+from app.services.dataset_reader import DEFAULT_CHUNK_ROWS, ChunkSchema, DatasetReader
+from app.services.image_pipeline import InputPipelineOptions
+
+SPLIT_SEED = 42
+# Rows held in the shuffle buffer unless a job sets ``shuffle_buffer``.
+DEFAULT_SHUFFLE_BUFFER = 10_000
+_SPLIT_BUCKETS = 10_000
+
+
+def _mix64(x: np.ndarray) -> np.ndarray:
+    """SplitMix64 finalizer: a fast, well-spread 64-bit hash of each value."""
+    with np.errstate(over="ignore"):
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def in_training_split(rows: np.ndarray, training_split: float, seed: int = SPLIT_SEED) -> np.ndarray:
+    """Return, for each row number, whether it belongs to the first ``training_split`` percent.
+
+    About ``training_split`` percent of rows land in training, decided by a
+    hash of the row number alone.
+    """
+    with np.errstate(over="ignore"):
+        hashes = _mix64(rows.astype(np.uint64) + np.uint64(seed) * np.uint64(0x9E3779B97F4A7C15))
+    return hashes % np.uint64(_SPLIT_BUCKETS) < round(float(training_split) * _SPLIT_BUCKETS / 100)
+
+
+@dataclass(frozen=True)
+class TabularScan:
+    """What one streaming pass over a dataset learned for training on it."""
+
+    feature_columns: list[str]
+    source_rows: int
+    train_rows: int
+    val_rows: int
+    # Sorted labels of a non-numeric target; None for a numeric one.
+    classes: list | None
+
+    @property
+    def dropped_rows(self) -> int:
+        return self.source_rows - self.train_rows - self.val_rows
+
+
+def _features(chunk: pd.DataFrame, columns: list[str]) -> np.ndarray:
+    try:
+        return chunk[columns].to_numpy(dtype=np.float32, na_value=np.nan)
+    except (TypeError, ValueError) as e:
+        for name in columns:
+            if not pd.api.types.is_numeric_dtype(chunk[name]):
+                raise ValueError(f"Feature column '{name}' is not numeric; encode it before training") from e
+        raise
+
+
+def _labels(target: pd.Series, classes: list | None) -> np.ndarray:
+    if classes is None:
+        return target.to_numpy(dtype=np.float32)
+    return pd.Categorical(target, categories=classes).codes.astype(np.float32)
+
+
+def _chunks(reader: DatasetReader, schema: ChunkSchema, chunksize: int):
+    """Yield ``(chunk, first_row_number, complete_rows_mask)`` over the dataset."""
+    offset = 0
+    for chunk in reader.iter_chunks(chunksize, schema=schema):
+        yield chunk, offset, chunk.notna().all(axis=1).to_numpy()
+        offset += len(chunk)
+
+
+def scan_tabular(
+    reader: DatasetReader,
+    target_field: str,
+    training_split: float,
+    chunksize: int = DEFAULT_CHUNK_ROWS,
+    schema: ChunkSchema | None = None,
+) -> TabularScan:
+    """Count the rows of each subset and collect the target's labels in one streaming pass.
+
+    Raises:
+        ValueError: If ``target_field`` is missing, a feature is not numeric or
+            either subset would be empty.
+    """
+    schema = schema or reader.schema(chunksize)
+    if target_field not in schema.dtypes:
+        raise ValueError(f"Target field '{target_field}' not found in dataset after cleaning")
+    features = [name for name in schema.dtypes if name != target_field]
+    source_rows = train_rows = val_rows = 0
+    labels: set | None = set()
+    for chunk, offset, complete in _chunks(reader, schema, chunksize):
+        if offset == 0:
+            _features(chunk, features)  # fail before training on text features
+        train = in_training_split(np.arange(offset, offset + len(chunk)), training_split)
+        source_rows += len(chunk)
+        train_rows += int((complete & train).sum())
+        val_rows += int((complete & ~train).sum())
+        target = chunk[target_field][complete]
+        if labels is not None and pd.api.types.is_numeric_dtype(target.dtype):
+            labels = None
+        elif labels is not None:
+            labels.update(target.unique())
+    if train_rows == 0 or val_rows == 0:
+        raise ValueError(
+            f"Cannot split {train_rows + val_rows} complete rows with training_split={training_split}: "
+            "both the training and validation subsets need at least one row"
+        )
+    classes = None if labels is None else pd.Categorical(list(labels)).categories.tolist()
+    return TabularScan(features, source_rows, train_rows, val_rows, classes)
+
+
+def _subset_dataset(
+    reader: DatasetReader,
+    schema: ChunkSchema,
+    target_field: str,
+    training_split: float,
+    scan: TabularScan,
+    training: bool,
+    batch_size: int,
+    shuffle_buffer: int,
+    chunksize: int,
+    options: InputPipelineOptions,
+) -> tf.data.Dataset:
+    def batches():
+        for chunk, offset, complete in _chunks(reader, schema, chunksize):
+            keep = complete & (in_training_split(np.arange(offset, offset + len(chunk)), training_split) == training)
+            if keep.any():
+                rows = chunk[keep]
+                yield _features(rows, scan.feature_columns), _labels(rows[target_field], scan.classes)
+
+    signature = (
+        tf.TensorSpec((None, len(scan.feature_columns)), tf.float32),
+        tf.TensorSpec((None,), tf.float32),
+    )
+    ds = tf.data.Dataset.from_generator(batches, output_signature=signature).unbatch()
+    if training:
+        ds = ds.shuffle(buffer_size=shuffle_buffer, seed=SPLIT_SEED, reshuffle_each_iteration=True)
+    rows = scan.train_rows if training else scan.val_rows
+    ds = ds.batch(batch_size).apply(tf.data.experimental.assert_cardinality(math.ceil(rows / batch_size)))
+    return options.finish(ds)
+
+
+def tabular_datasets(
+    reader: DatasetReader,
+    target_field: str,
+    training_split: float,
+    batch_size: int,
+    options: InputPipelineOptions | None = None,
+    chunksize: int = DEFAULT_CHUNK_ROWS,
+) -> tuple[tf.data.Dataset, tf.data.Dataset, TabularScan]:
+    """Return ``(training, validation, scan)``: datasets streaming ``(features, target)`` batches from disk.
+
+    ``options`` defaults to ``InputPipelineOptions()``; its ``shuffle_buffer``
+    (rows) defaults to ``DEFAULT_SHUFFLE_BUFFER``. Only the training subset
+    is shuffled.
+
+    Raises:
+        ValueError: See ``scan_tabular``.
+    """
+    options = options or InputPipelineOptions()
+    schema = reader.schema(chunksize)
+    scan = scan_tabular(reader, target_field, training_split, chunksize, schema)
+    args = (reader, schema, target_field, training_split, scan)
+    rest = (batch_size, options.shuffle_buffer or DEFAULT_SHUFFLE_BUFFER, chunksize, options)
+    return _subset_dataset(*args, True, *rest), _subset_dataset(*args, False, *rest), scan
@@ -0,0 +1,174 @@
+"""Persistent cache of prepared tabular training arrays.
+
+Preparing a CSV for training — dropping rows with missing values, shuffling,
+splitting off the target and encoding string labels — is the same work for
+every job on the same data, however often only the hyperparameters change.
+``load_training_arrays`` does it once per dataset version and target field:
+features go to a float32 ``x.npy`` of shape ``(rows, features)`` and the
+target to a float32 ``y.npy``, both already shuffled. Jobs memory-map the
+arrays and split them by slicing, so neither the CSV nor a DataFrame is
+loaded again and the training split costs no copy.
+
+The cache lives in the CSV's artifact directory (see
+``dataset_reader.artifact_dir``): the upload blob for version 0, the
+materialized CSV for later versions, so it is removed with them. The CSV's
+size and mtime are recorded with the arrays and a mismatch rebuilds them.
+Arrays are written column by column into a temp directory that is renamed
+into place, so peak memory stays near one loaded dataset and readers never
+see a partial cache. A file lock next to the cache directory makes jobs in
+other worker processes wait for a build in progress instead of repeating it.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import uuid as uuid_pkg
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from app.services.dataset_reader import ChunkSchema, DatasetReader, artifact_dir
+from app.shared.file_lock import file_lock
+from app.shared.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Bump when the prepared layout changes so old caches are rebuilt.
+CACHE_VERSION = 1
+# Seed of the row shuffle; matches the ``DataFrame.sample(frac=1, random_state=42)`` it replaced.
+SHUFFLE_SEED = 42
+
+
+@dataclass(frozen=True)
+class TrainingArrays:
+    """Shuffled float32 features and target of a dataset, usually memory-mapped."""
+
+    x: np.ndarray
+    y: np.ndarray
+    feature_columns: list[str]
+    # Rows in the dataset before those with missing values were dropped.
+    source_rows: int
+    cache_hit: bool = False
+
+    @property
+    def rows(self) -> int:
+        return len(self.y)
+
+    @property
+    def dropped_rows(self) -> int:
+        return self.source_rows - self.rows
+
+    def split(self, training_split: float) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Return ``(x_train, y_train, x_test, y_test)`` views, the first ``training_split`` percent for training."""
+        index = int(self.rows * float(training_split) / 100)
+        return self.x[:index], self.y[:index], self.x[index:], self.y[index:]
+
+
+def cache_path(csv_path: str, target_field: str) -> str:
+    """Return the directory holding the training arrays of ``csv_path`` for ``target_field``."""
+    key = hashlib.sha1(f"{target_field}\0{CACHE_VERSION}".encode()).hexdigest()[:16]
+    return os.path.join(artifact_dir(csv_path), f"tensors-{key}")
+
+
+def _source_stamp(csv_path: str) -> list[int]:
+    st = os.stat(csv_path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _encode_target(target: pd.Series) -> np.ndarray:
+    """Return the target as float32, string labels as their sorted category codes."""
+    if isinstance(target.dtype, pd.CategoricalDtype):
+        # Read as a category: code only the labels present, like plain strings.
+        target = target.cat.remove_unused_categories()
+    if not pd.api.types.is_numeric_dtype(target):
+        return pd.Categorical(target).codes.astype(np.float32)
+    return target.to_numpy(dtype=np.float32)
+
+
+def build_training_arrays(frame: pd.DataFrame, target_field: str, path: str, stamp: list[int]) -> None:
+    """Prepare ``frame`` for training and write its arrays to the cache directory ``path``.
+
+    Raises:
+        ValueError: If ``target_field`` is missing or a feature column is not numeric.
+    """
+    if target_field not in frame.columns:
+        raise ValueError(f"Target field '{target_field}' not found in dataset after cleaning")
+    keep = frame.notna().all(axis=1).to_numpy()
+    rows = int(keep.sum())
+    order = np.random.RandomState(SHUFFLE_SEED).permutation(rows)
+    features = [name for name in frame.columns if name != target_field]
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{uuid_pkg.uuid4().hex}.tmp"
+    os.makedirs(tmp_path)
+    try:
+        x = np.lib.format.open_memmap(
+            os.path.join(tmp_path, "x.npy"), mode="w+", dtype=np.float32, shape=(rows, len(features))
+        )
+        for j, name in enumerate(features):
+            try:
+                values = frame[name].to_numpy(dtype=np.float32, na_value=np.nan)
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"Feature column '{name}' is not numeric; encode it before training") from e
+            x[:, j] = values[keep][order]
+        x.flush()
+        del x
+        np.save(os.path.join(tmp_path, "y.npy"), _encode_target(frame[target_field][keep])[order])
+        meta = {
+            "version": CACHE_VERSION,
+            "source": stamp,
+            "source_rows": len(frame),
+            "feature_columns": features,
+            "target_field": target_field,
+        }
+        with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        shutil.rmtree(path, ignore_errors=True)  # a stale cache
+        os.replace(tmp_path, path)
+    finally:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+def _open_cache(path: str, stamp: list[int]) -> TrainingArrays | None:
+    try:
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        if meta.get("version") != CACHE_VERSION or meta.get("source") != stamp:
+            logger.info("Discarding stale training arrays %s", path)
+            return None
+        x = np.load(os.path.join(path, "x.npy"), mmap_mode="r")
+        y = np.load(os.path.join(path, "y.npy"), mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    if x.shape != (len(y), len(meta["feature_columns"])):
+        return None
+    return TrainingArrays(x, y, meta["feature_columns"], meta["source_rows"], cache_hit=True)
+
+
+def load_training_arrays(csv_path: str, target_field: str, schema: ChunkSchema | None = None) -> TrainingArrays:
+    """Return the memory-mapped training arrays of ``csv_path``, building the cache on first use.
+
+    ``schema`` is passed to the ``DatasetReader`` that loads the CSV on a miss.
+
+    Raises:
+        ValueError: See ``build_training_arrays``.
+        OSError: If the cache cannot be written or read back.
+    """
+    path = cache_path(csv_path, target_field)
+    stamp = _source_stamp(csv_path)
+    arrays = _open_cache(path, stamp)
+    if arrays is not None:
+        return arrays
+    with file_lock(path):
+        arrays = _open_cache(path, stamp)  # built by another job meanwhile
+        if arrays is None:
+            frame = DatasetReader(csv_path, schema=schema).read()
+            logger.info("Building training arrays %s for %d rows", path, len(frame))
+            build_training_arrays(frame, target_field, path, stamp)
+            del frame
+            arrays = _open_cache(path, stamp)
+    if arrays is None:
+        raise OSError(f"Training arrays could not be read back: {path}")
+    return TrainingArrays(arrays.x, arrays.y, arrays.feature_columns, arrays.source_rows, cache_hit=False)
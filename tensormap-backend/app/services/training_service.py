@@ -1,34 +1,57 @@
 """Business logic for persistent training jobs.
 
 Replaces the old stateless fire-and-block training flow. A job is created
-(PENDING) by the run endpoint, executed in a background thread (RUNNING), and
-ends COMPLETED / FAILED / CANCELLED. Metrics are persisted per epoch by
-``MetricsCallback`` and read back here for the API and Socket.IO catch-up.
+(QUEUED) by the run endpoint, handed to a training worker process (PENDING,
+see ``training_workers``) by ``dispatch_queued_jobs`` once a slot is free,
+trains (RUNNING), and ends COMPLETED / FAILED / CANCELLED. Metrics are
+persisted per epoch by ``MetricsCallback`` and read back here for the API and
+Socket.IO catch-up.
+
+The queue is the ``training_job`` table itself, so it survives restarts, and
+the concurrency limit is enforced there too: every API process runs its own
+worker pool, so a slot is only claimed by an update that re-counts the active
+jobs in the database (see ``_claim``).
+Queued jobs are dispatched by descending priority; among jobs of equal
+priority the project with the fewest active jobs goes first, so one
+project's burst cannot hold every slot while others wait, then the oldest
+job.
 """
 
-import asyncio
+import heapq
 import os
+import threading
 import uuid as uuid_pkg
-from datetime import UTC, datetime
+from collections import Counter
+from datetime import UTC, datetime, timedelta
 
+from sqlalchemy import func, text, update
 from sqlmodel import Session, select
 
 from app.database import engine
-from app.exceptions import AppException
+from app.models.ml import ModelBasic
 from app.models.training_job import TrainingJob, TrainingStatus
 from app.models.training_metric import TrainingMetric
+from app.services.cancellation import registry as cancellation
+from app.services.training_workers import TrainingWorkerPool
 from app.shared.logging_config import get_logger
 
 logger = get_logger(__name__)
 
 # Maximum number of jobs allowed to run concurrently. Counted across PENDING and
 # RUNNING so a burst of quick requests can't all slip past before any flips to
-# RUNNING (the spec's RUNNING-only check has that race).
+# RUNNING (the spec's RUNNING-only check has that race). Also the number of
+# training worker processes.
 MAX_CONCURRENT_TRAINING_JOBS = int(os.getenv("MAX_CONCURRENT_TRAINING_JOBS", "3"))
 
-# Strong references to in-flight background tasks. Without this, asyncio may
-# garbage-collect a fire-and-forget task mid-run (see asyncio.create_task docs).
-_background_tasks: set[asyncio.Task] = set()
+ACTIVE_STATUSES = (TrainingStatus.PENDING, TrainingStatus.RUNNING)
+# Completed jobs whose run time feeds the queue's start-time estimates.
+DURATION_SAMPLE_JOBS = 200
+
+_pool: TrainingWorkerPool | None = None
+_pool_lock = threading.Lock()
+_dispatch_lock = threading.Lock()
+# Postgres advisory lock serializing slot claims across API processes.
+_DISPATCH_LOCK_KEY = 0x54_4D_4A_51
 
 
 def _utcnow() -> datetime:
@@ -49,13 +72,18 @@ def create_training_job(
     project_id: uuid_pkg.UUID | None,
     hyperparams: dict | None,
     session: Session,
+    dataset_version_id: uuid_pkg.UUID | None = None,
+    priority: int = 0,
 ) -> TrainingJob:
-    """Persist a new job in the PENDING state and return it."""
+    """Persist a new job in the QUEUED state and return it."""
     job = TrainingJob(
         model_id=model_id,
         project_id=project_id,
         hyperparams=hyperparams,
-        status=TrainingStatus.PENDING,
+        dataset_version_id=dataset_version_id,
+        status=TrainingStatus.QUEUED,
+        priority=priority,
+        queued_at=_utcnow(),
     )
     session.add(job)
     session.commit()
@@ -107,16 +135,151 @@ def get_latest_metrics(job_id: str, session: Session) -> dict:
     return grouped[-1] if grouped else {}
 
 
-def check_concurrency_limit(session: Session) -> None:
-    """Raise HTTP 429 if the active-job limit is already reached."""
-    active = session.exec(
-        select(TrainingJob).where(TrainingJob.status.in_((TrainingStatus.PENDING, TrainingStatus.RUNNING)))
-    ).all()
-    if len(active) >= MAX_CONCURRENT_TRAINING_JOBS:
-        raise AppException(
-            429,
-            f"Max concurrent training jobs reached ({MAX_CONCURRENT_TRAINING_JOBS}). Try again shortly.",
+def _as_utc(value: datetime | None) -> datetime | None:
+    """Return ``value`` as an aware UTC datetime (the DB hands back naive ones)."""
+    if value is None or value.tzinfo is not None:
+        return value
+    return value.replace(tzinfo=UTC)
+
+
+def _dispatch_order(queued: list[TrainingJob], active: Counter) -> list[TrainingJob]:
+    """Return queued jobs in the order they will be dispatched.
+
+    Highest priority first; within a priority, the job of the project with the
+    fewest active or already-ordered jobs, then the oldest. ``active`` counts
+    the active jobs per project id.
+    """
+    shares = Counter(active)
+    remaining = sorted(queued, key=lambda j: (-j.priority, _as_utc(j.queued_at) or _utcnow()))
+    order = []
+    while remaining:
+        top = remaining[0].priority
+        job = min((j for j in remaining if j.priority == top), key=lambda j: shares[j.project_id])
+        remaining.remove(job)
+        shares[job.project_id] += 1
+        order.append(job)
+    return order
+
+
+def _queue_state(session: Session) -> tuple[list[TrainingJob], list[TrainingJob]]:
+    """Return ``(active jobs, queued jobs in dispatch order)``."""
+    active = session.exec(select(TrainingJob).where(TrainingJob.status.in_(ACTIVE_STATUSES))).all()
+    queued = session.exec(select(TrainingJob).where(TrainingJob.status == TrainingStatus.QUEUED)).all()
+    return list(active), _dispatch_order(list(queued), Counter(j.project_id for j in active))
+
+
+def _claim(session: Session, job_id: str) -> bool:
+    """Move a queued job to PENDING if a slot is free across every process; commit.
+
+    The active jobs are counted by the claiming update itself. SQLite runs
+    one writer at a time; on Postgres concurrent claims are serialized by a
+    transaction-scoped advisory lock, so two processes never both see the
+    last free slot.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        session.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _DISPATCH_LOCK_KEY})
+    active = (
+        select(func.count()).select_from(TrainingJob).where(TrainingJob.status.in_(ACTIVE_STATUSES)).scalar_subquery()
+    )
+    claimed = session.exec(
+        update(TrainingJob)
+        .where(
+            TrainingJob.id == job_id,
+            TrainingJob.status == TrainingStatus.QUEUED,
+            active < MAX_CONCURRENT_TRAINING_JOBS,
         )
+        .values(status=TrainingStatus.PENDING)
+    ).rowcount
+    session.commit()
+    return bool(claimed)
+
+
+def dispatch_queued_jobs(session: Session | None = None) -> list[str]:
+    """Hand queued jobs to the training workers while slots are free; return their ids.
+
+    Called when a job is submitted, when one ends and at startup. Each job is
+    claimed by moving it from QUEUED to PENDING with a conditional update that
+    also checks for a free slot (``_claim``), so a job is never dispatched
+    twice and the limit holds across API processes.
+    """
+    own_session = session is None
+    session = session or make_session()
+    launched = []
+    try:
+        with _dispatch_lock:
+            active, order = _queue_state(session)
+            free = MAX_CONCURRENT_TRAINING_JOBS - len(active)
+            for job in order[: max(free, 0)]:
+                if not _claim(session, job.id):
+                    continue
+                model = session.get(ModelBasic, job.model_id)
+                if model is None:
+                    update_job_status(job.id, TrainingStatus.FAILED, session, error_message="Model not found")
+                    continue
+                launch_training_job(model.model_name, job.id)
+                launched.append(job.id)
+        if launched:
+            logger.info("Dispatched %d queued training job(s): %s", len(launched), launched)
+        return launched
+    finally:
+        if own_session:
+            session.close()
+
+
+def _expected_durations(session: Session) -> tuple[dict[int, timedelta], timedelta | None]:
+    """Return the mean run time of recently completed jobs per model id, and over all models."""
+    rows = session.exec(
+        select(TrainingJob.model_id, TrainingJob.started_at, TrainingJob.completed_at)
+        .where(
+            TrainingJob.status == TrainingStatus.COMPLETED,
+            TrainingJob.started_at.is_not(None),
+            TrainingJob.completed_at.is_not(None),
+        )
+        .order_by(TrainingJob.completed_at.desc())
+        .limit(DURATION_SAMPLE_JOBS)
+    ).all()
+    by_model: dict[int, list[timedelta]] = {}
+    for model_id, started_at, completed_at in rows:
+        by_model.setdefault(model_id, []).append(_as_utc(completed_at) - _as_utc(started_at))
+    means = {model_id: sum(d, timedelta()) / len(d) for model_id, d in by_model.items()}
+    overall = [d for durations in by_model.values() for d in durations]
+    return means, (sum(overall, timedelta()) / len(overall) if overall else None)
+
+
+def queue_positions(session: Session) -> dict[str, tuple[int, datetime | None]]:
+    """Return ``{job_id: (position, estimated_start)}`` for every queued job.
+
+    Positions count from 1 in dispatch order. Start times replay that order
+    over the worker slots, assuming each job runs as long as its model's
+    recently completed jobs (all models' when it has none); they are None
+    until some job has completed.
+    """
+    active, order = _queue_state(session)
+    by_model, overall = _expected_durations(session)
+    now = _utcnow()
+    slots: list[datetime] | None = None
+    if overall is not None:
+        # When each busy slot frees up; a job past its expected run time frees it now.
+        slots = sorted(max(now, (_as_utc(j.started_at) or now) + by_model.get(j.model_id, overall)) for j in active)
+        slots = slots[:MAX_CONCURRENT_TRAINING_JOBS]
+        slots += [now] * (MAX_CONCURRENT_TRAINING_JOBS - len(slots))
+        heapq.heapify(slots)
+    positions = {}
+    for position, job in enumerate(order, start=1):
+        start = None
+        if slots is not None:
+            start = heapq.heappop(slots)
+            heapq.heappush(slots, start + by_model.get(job.model_id, overall))
+        positions[job.id] = (position, start)
+    return positions
+
+
+def queue_info(job: TrainingJob, session: Session) -> dict:
+    """Return a job's ``queue_position`` and ``estimated_start_at`` (both None unless it is queued)."""
+    position, start = (None, None)
+    if job.status == TrainingStatus.QUEUED:
+        position, start = queue_positions(session).get(job.id, (None, None))
+    return {"queue_position": position, "estimated_start_at": start.isoformat() if start else None}
 
 
 def orphan_recovery(session: Session | None = None) -> int:
@@ -124,14 +287,13 @@ def orphan_recovery(session: Session | None = None) -> int:
 
     Called on startup: any job still 'active' in the DB cannot actually be
     running (the process that owned it is gone), so it is failed with a clear
-    message. Returns the number of jobs recovered.
+    message. QUEUED jobs never started and stay queued. Returns the number of
+    jobs recovered.
     """
     own_session = session is None
     session = session or make_session()
     try:
-        orphans = session.exec(
-            select(TrainingJob).where(TrainingJob.status.in_((TrainingStatus.PENDING, TrainingStatus.RUNNING)))
-        ).all()
+        orphans = session.exec(select(TrainingJob).where(TrainingJob.status.in_(ACTIVE_STATUSES))).all()
         for job in orphans:
             job.status = TrainingStatus.FAILED
             job.error_message = "Recovered orphaned job after restart"
@@ -146,33 +308,103 @@ def orphan_recovery(session: Session | None = None) -> int:
             session.close()
 
 
-def _train_in_thread(model_name: str, job_id: str, loop: asyncio.AbstractEventLoop) -> None:
-    """Run a training job in a worker thread with its own DB session.
+def run_training_job(model_name: str, job_id: str, cancel_event: threading.Event | None = None) -> None:
+    """Run a training job with its own DB session; the body of a training worker's job.
 
     Owns the full lifecycle for the background run: status flips happen inside
     ``model_run`` via the callbacks; here we only guarantee the job is marked
-    FAILED if training raises before/around the callbacks.
+    FAILED if training raises before/around the callbacks. Without a
+    ``cancel_event`` (run outside a worker) the job registers its own in the
+    process's cancellation registry.
     """
     # Imported lazily to avoid importing TensorFlow at app startup.
     from app.services.model_run import model_run
 
+    own_event = cancel_event is None
+    cancel_event = cancel_event or cancellation.register(job_id)
     with make_session() as session:
         try:
-            model_run(model_name, session, loop=loop, job_id=job_id)
-        except Exception as e:  # noqa: BLE001 - last-resort guard for the background thread
+            model_run(model_name, session, job_id=job_id, cancel_event=cancel_event)
+        except Exception as e:  # noqa: BLE001 - last-resort guard for the background run
             logger.exception("Background training failed for job %s: %s", job_id, e)
             try:
                 update_job_status(job_id, TrainingStatus.FAILED, session, error_message=str(e))
             except Exception:  # noqa: BLE001
                 logger.exception("Failed to mark job %s as failed", job_id)
+        finally:
+            if own_event:
+                cancellation.unregister(job_id)
 
 
-def launch_training_job(model_name: str, job_id: str, loop: asyncio.AbstractEventLoop) -> None:
-    """Schedule a training job to run in the background and return immediately.
+def _relay_event(room: str | None, data: dict) -> None:
+    """Emit a Socket.IO event raised by a job in a worker process."""
+    from app.callbacks.metrics_callback import schedule_room_emit
+    from app.socketio_instance import event_loop, sio
 
-    Uses ``asyncio.to_thread`` (training is blocking/CPU-bound) wrapped in a
-    tracked task so the event loop keeps a strong reference until it finishes.
+    schedule_room_emit(sio, event_loop(), room, data)
+
+
+def _fail_crashed_job(job_id: str, exitcode: int | None) -> None:
+    """Mark a job FAILED after its worker process died, unless it had already finished."""
+    from app.callbacks.metrics_callback import schedule_room_emit
+    from app.socketio_instance import event_loop, sio
+
+    message = f"Training worker exited unexpectedly (exit code {exitcode})"
+    if exitcode == -9:
+        message += "; it may have run out of memory"
+    with make_session() as session:
+        job = session.get(TrainingJob, job_id)
+        if job is None or job.status not in ACTIVE_STATUSES:
+            return
+        update_job_status(job_id, TrainingStatus.FAILED, session, error_message=message)
+    schedule_room_emit(sio, event_loop(), job_id, {"type": "status", "status": "failed", "error": message})
+
+
+def _job_ended(job_id: str) -> None:
+    """A worker finished ``job_id``: give its slot to the next queued job."""
+    dispatch_queued_jobs()
+
+
+def training_pool() -> TrainingWorkerPool:
+    """Return the process-wide pool of training workers, created (not started) on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = TrainingWorkerPool(
+                MAX_CONCURRENT_TRAINING_JOBS,
+                run_training_job,
+                on_event=_relay_event,
+                on_crash=_fail_crashed_job,
+                on_done=_job_ended,
+            )
+        return _pool
+
+
+def shutdown_training_pool() -> None:
+    """Stop the training workers, if they were started."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
+
+
+def launch_training_job(model_name: str, job_id: str) -> None:
+    """Hand a claimed (PENDING) training job to the worker pool and return immediately.
+
+    Training runs in a separate process so it does not compete with request
+    handling for the GIL; the pool's workers start on first use if the app
+    did not start them.
     """
-    task = asyncio.create_task(asyncio.to_thread(_train_in_thread, model_name, job_id, loop))
-    _background_tasks.add(task)
-    task.add_done_callback(_background_tasks.discard)
+    training_pool().submit(model_name, job_id)
+
+
+def signal_cancellation(job_id: str) -> None:
+    """Signal a cancelled job wherever it runs: in this process, or in a worker (or waiting for one).
+
+    A job reached by neither still stops once its DB status is polled.
+    """
+    if cancellation.cancel(job_id):
+        return
+    if _pool is not None:
+        _pool.cancel(job_id)
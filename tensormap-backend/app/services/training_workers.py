@@ -0,0 +1,332 @@
+"""Pool of worker processes that run training jobs outside the API process.
+
+A Keras ``fit`` running on a thread of the API process shares its GIL, heap
+and threadpool with every HTTP request. ``TrainingWorkerPool`` keeps a fixed
+number of worker processes instead, each running one job at a time:
+
+- Workers are spawned (not forked: TensorFlow is not fork-safe) when the pool
+  starts and import the ``preload`` modules, i.e. TensorFlow, before taking
+  their first job, so a job starts without paying for the import.
+- Each worker has a duplex pipe to the API process. Jobs (``run``) and
+  cancellations (``cancel``, which set the job's event in the worker's
+  ``cancellation.registry``) go down it; Socket.IO events raised by the job
+  (``emit``, see ``socketio_instance.set_emit_relay``) and the end of a job
+  (``done``) come back. Jobs persist their status and metrics to the database
+  themselves, as before.
+- A monitor thread in the API process relays the events and watches the
+  workers. A worker that exits while running a job — crashed, or killed by
+  the OOM killer — fails only that job (``on_crash``) and is replaced, after
+  a backoff if it keeps dying; the monitor keeps serving the other workers
+  meanwhile.
+  ``on_done`` hears about every job that ended either way, so the caller can
+  start the next one.
+
+Jobs submitted while every worker is busy wait in the pool, in order.
+"""
+
+import contextlib
+import importlib
+import multiprocessing
+import queue
+import signal
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, field
+from multiprocessing.connection import Connection, wait
+from multiprocessing.process import BaseProcess
+
+from app.services.cancellation import registry
+from app.shared.logging_config import get_logger
+from app.socketio_instance import set_emit_relay
+
+logger = get_logger(__name__)
+
+# Modules every worker imports before its first job.
+DEFAULT_PRELOAD = ("app.services.model_run",)
+# A worker exiting sooner than this after it started is restarted with an
+# exponential backoff (up to MAX_RESTART_DELAY seconds), so one that cannot
+# start at all does not respawn in a tight loop.
+MIN_WORKER_UPTIME = 10.0
+MAX_RESTART_DELAY = 60.0
+
+
+def _worker_main(conn: Connection, target: Callable, preload: Sequence[str]) -> None:
+    """Entry point of a worker process: run the jobs received on ``conn`` one at a time."""
+    # Ctrl+C reaches the whole process group; the API process decides when workers stop.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    send_lock = threading.Lock()
+
+    def send(message: tuple) -> None:
+        with send_lock:
+            conn.send(message)
+
+    set_emit_relay(lambda room, data: send(("emit", room, data)))
+    for name in preload:
+        importlib.import_module(name)
+
+    jobs: queue.Queue = queue.Queue()
+
+    def listen() -> None:
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                # The API process is gone: stop the running job at its next check.
+                registry.cancel_all()
+                message = ("stop",)
+            if message[0] == "cancel":
+                registry.cancel(message[1])
+                continue
+            if message[0] == "run":
+                # Registered on receipt, so a cancellation is not lost before the job starts.
+                registry.register(message[2])
+            jobs.put(message)
+            if message[0] == "stop":
+                return
+
+    threading.Thread(target=listen, name="training-worker-ipc", daemon=True).start()
+    while (message := jobs.get())[0] == "run":
+        _, model_name, job_id = message
+        try:
+            target(model_name, job_id, registry.register(job_id))
+        except Exception:  # noqa: BLE001 - a failed job must not take the worker down
+            logger.exception("Training job %s raised in worker", job_id)
+        finally:
+            registry.unregister(job_id)
+        try:
+            send(("done", job_id))
+        except OSError:
+            return
+
+
+@dataclass(eq=False)
+class _Worker:
+    process: BaseProcess
+    conn: Connection
+    job_id: str | None = None
+    started: float = field(default_factory=time.monotonic)
+
+
+class TrainingWorkerPool:
+    """A fixed-size pool of processes running training jobs.
+
+    Args:
+        size: Number of worker processes, i.e. jobs running at once.
+        target: Module-level ``(model_name, job_id, cancel_event)`` callable
+            that runs a job inside a worker; ``cancel_event`` is set when the
+            job is cancelled.
+        on_event: ``(room, data)`` callable receiving the Socket.IO events
+            emitted by jobs, in the API process.
+        on_crash: ``(job_id, exitcode)`` callable called, in the API process,
+            when a worker exits while running ``job_id``.
+        on_done: Optional ``(job_id)`` callable called, in the API process,
+            after a job ended, normally or with its worker (after ``on_crash``).
+        preload: Modules each worker imports before its first job.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        target: Callable[..., None],
+        on_event: Callable[[str | None, dict], None],
+        on_crash: Callable[[str, int | None], None],
+        on_done: Callable[[str], None] | None = None,
+        preload: Sequence[str] = DEFAULT_PRELOAD,
+    ) -> None:
+        self.size = max(1, size)
+        self.target = target
+        self.on_event = on_event
+        self.on_crash = on_crash
+        self.on_done = on_done
+        self.preload = tuple(preload)
+        self._ctx = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._workers: list[_Worker] = []
+        self._pending: deque[tuple[str, str]] = deque()
+        self._monitor: threading.Thread | None = None
+        self._stopping = False
+        self._restart_delay = 0.0
+        # Monotonic times at which replacement workers are due.
+        self._respawn_at: list[float] = []
+        self._spawned = 0
+
+    def _spawn(self) -> _Worker:
+        parent_conn, child_conn = self._ctx.Pipe()
+        self._spawned += 1
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self.target, self.preload),
+            name=f"training-worker-{self._spawned}",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        logger.info("Started %s (pid %s)", process.name, process.pid)
+        return _Worker(process, parent_conn)
+
+    def start(self) -> None:
+        """Spawn the workers and the monitor thread; a no-op once started."""
+        with self._lock:
+            if self._stopping or self._monitor is not None:
+                return
+            while len(self._workers) < self.size:
+                self._workers.append(self._spawn())
+            self._monitor = threading.Thread(target=self._watch, name="training-pool-monitor", daemon=True)
+            self._monitor.start()
+
+    def submit(self, model_name: str, job_id: str) -> None:
+        """Queue a job; it starts as soon as a worker is free."""
+        self.start()
+        with self._lock:
+            self._pending.append((model_name, job_id))
+            self._dispatch()
+
+    def cancel(self, job_id: str) -> bool:
+        """Stop a job: drop it if still waiting, else signal its worker. Returns whether the job was found."""
+        with self._lock:
+            for item in self._pending:
+                if item[1] == job_id:
+                    self._pending.remove(item)
+                    return True
+            for worker in self._workers:
+                if worker.job_id == job_id:
+                    # A dying worker cannot be signalled; the monitor fails its job.
+                    with contextlib.suppress(OSError):
+                        worker.conn.send(("cancel", job_id))
+                    return True
+        return False
+
+    def running_jobs(self) -> dict[str, int | None]:
+        """Return ``{job_id: worker pid}`` for the jobs currently running."""
+        with self._lock:
+            return {w.job_id: w.process.pid for w in self._workers if w.job_id is not None}
+
+    def _dispatch(self) -> None:
+        """Hand waiting jobs to idle workers. Call with ``_lock`` held."""
+        for worker in self._workers:
+            if not self._pending:
+                return
+            if worker.job_id is not None or not worker.process.is_alive():
+                continue
+            model_name, job_id = self._pending.popleft()
+            try:
+                worker.conn.send(("run", model_name, job_id))
+            except OSError:
+                self._pending.appendleft((model_name, job_id))
+                continue
+            worker.job_id = job_id
+            logger.info("Job %s dispatched to %s", job_id, worker.process.name)
+
+    def _watch(self) -> None:
+        while not self._stopping:
+            self._respawn_due()
+            with self._lock:
+                workers = list(self._workers)
+                timeout = min([0.5, *(at - time.monotonic() for at in self._respawn_at)])
+            by_handle = {}
+            for worker in workers:
+                by_handle[worker.conn] = worker
+                by_handle[worker.process.sentinel] = worker
+            for ready in wait(list(by_handle), timeout=max(0.0, timeout)):
+                worker = by_handle[ready]
+                if worker not in self._workers:
+                    continue  # already replaced through its other handle
+                if ready is worker.conn and self._receive(worker):
+                    continue
+                self._replace(worker)
+
+    def _respawn_due(self) -> None:
+        """Start the replacement workers whose backoff has elapsed."""
+        with self._lock:
+            now = time.monotonic()
+            due = [at for at in self._respawn_at if at <= now]
+            if self._stopping or not due:
+                return
+            self._respawn_at = [at for at in self._respawn_at if at > now]
+            for _ in due:
+                self._workers.append(self._spawn())
+            self._dispatch()
+
+    def _receive(self, worker: _Worker) -> bool:
+        """Handle the messages waiting from ``worker``; False once its pipe is closed."""
+        try:
+            while worker.conn.poll():
+                message = worker.conn.recv()
+                if message[0] == "emit":
+                    self._relay(message[1], message[2])
+                elif message[0] == "done":
+                    with self._lock:
+                        worker.job_id = None
+                        self._dispatch()
+                    self._ended(message[1])
+        except (EOFError, OSError):
+            return False
+        return True
+
+    def _relay(self, room: str | None, data: dict) -> None:
+        try:
+            self.on_event(room, data)
+        except Exception:  # noqa: BLE001 - a dropped progress event must not stop the monitor
+            logger.exception("Failed to relay training event for room %s", room)
+
+    def _ended(self, job_id: str) -> None:
+        if self.on_done is None:
+            return
+        try:
+            self.on_done(job_id)
+        except Exception:  # noqa: BLE001 - must not stop the monitor
+            logger.exception("on_done failed for job %s", job_id)
+
+    def _replace(self, worker: _Worker) -> None:
+        """Reap a worker that exited (or whose pipe broke), fail its job and start a replacement."""
+        self._receive(worker)  # events sent before it died
+        worker.process.join(timeout=5)
+        if worker.process.is_alive():
+            worker.process.kill()
+            worker.process.join()
+        exitcode = worker.process.exitcode
+        worker.conn.close()
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+            job_id, worker.job_id = worker.job_id, None
+        if self._stopping:
+            return
+        logger.error("%s exited with code %s while running job %s", worker.process.name, exitcode, job_id)
+        if time.monotonic() - worker.started < MIN_WORKER_UPTIME:
+            self._restart_delay = min(max(1.0, self._restart_delay * 2), MAX_RESTART_DELAY)
+        else:
+            self._restart_delay = 0.0
+        if job_id is not None:
+            try:
+                self.on_crash(job_id, exitcode)
+            except Exception:  # noqa: BLE001
+                logger.exception("Failed to record the crash of job %s", job_id)
+            self._ended(job_id)
+        # Respawned by the monitor loop, so other workers are served during the backoff.
+        with self._lock:
+            self._respawn_at.append(time.monotonic() + self._restart_delay)
+        self._respawn_due()
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """Stop the workers, letting running jobs finish for up to ``timeout`` seconds."""
+        with self._lock:
+            self._stopping = True
+            self._pending.clear()
+            self._respawn_at.clear()
+        if self._monitor is not None:
+            self._monitor.join()
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            with contextlib.suppress(OSError):
+                worker.conn.send(("stop",))
+        for worker in workers:
+            worker.process.join(timeout)
+            if worker.process.is_alive():
+                logger.warning("Terminating %s (job %s)", worker.process.name, worker.job_id)
+                worker.process.terminate()
+                worker.process.join()
+            worker.conn.close()
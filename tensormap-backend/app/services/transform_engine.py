@@ -0,0 +1,469 @@
+"""Streaming, two-phase execution engine for ``preprocess_data`` pipelines.
+
+Each transformation is a ``Transform`` with an optional *fit* step that
+collects what it needs (min/max, mean/std, category sets, fill values) and an
+*apply* step that is a pure function of one block of rows. ``run_pipeline``
+executes a pipeline in bounded memory:
+
+1. Fit passes stream the dataset chunk by chunk. Every chunk is pushed through
+   the already-usable prefix of the pipeline and handed to the transforms
+   being fitted. A transform that reads a column an unfitted transform still
+   has to rewrite (e.g. Z-score after Fill Missing Values on the same column)
+   is fitted in a later pass, so results match running the steps one after
+   another on the whole frame. Typical pipelines need a single fit pass; a
+   median fill takes two more (see ``OrderStatistics``).
+2. The apply pass transforms row blocks in a shared pool of worker processes,
+   which also encode them to CSV text; the parent only streams the text, in
+   order, to the output file.
+
+Memory stays proportional to the chunk size (plus category sets, and a small
+fraction of the column for median fills), independent of the file size.
+
+Fitted state is JSON-serializable (``get_state``/``set_state``), so a fitted
+pipeline can be stored as a dataset version's recipe and replayed later
+without refitting (see ``app.services.dataset_versions``).
+"""
+
+import abc
+import atexit
+import math
+import multiprocessing
+import os
+import pickle
+import threading
+import uuid
+from collections import Counter, deque
+from collections.abc import Callable, Iterable
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+from app.config import get_settings
+from app.services.dataset_reader import DEFAULT_CHUNK_ROWS, ChunkSchema, DatasetReader
+from app.services.dataset_stats import ColumnAccumulator, OrderStatistics
+from app.shared.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def _to_json(value):
+    """Convert a numpy/pandas scalar to a JSON-safe value (NaN becomes None)."""
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def _from_json(value):
+    return np.nan if value is None else value
+
+
+class Transform(abc.ABC):
+    """A single column transformation, split into fit and apply steps."""
+
+    needs_fit = False
+
+    def __init__(self, column: str, params: dict | None = None) -> None:
+        self.column = column
+        self.params = params
+        self.fitted = not self.needs_fit
+
+    def fit(self, series: pd.Series) -> None:  # noqa: B027 - optional hook
+        """Accumulate state from one chunk of the (already transformed) column."""
+
+    def finish_fit(self) -> bool | None:  # noqa: B027 - optional hook
+        """Finalize fitted state after the last chunk.
+
+        Returns:
+            True if the column must be streamed through ``fit`` again.
+
+        Raises:
+            ValueError: If the data cannot be transformed (reported as 422).
+        """
+
+    @abc.abstractmethod
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Transform one block of rows; a pure function of ``df`` and the fitted state."""
+
+    def get_state(self) -> dict:
+        """Return the fitted state as a JSON-serializable dict."""
+        return {}
+
+    def set_state(self, state: dict) -> None:
+        """Restore state from ``get_state``; the transform is then fitted."""
+        self.fitted = True
+
+    def output_columns(self, columns: list[str]) -> list[str]:
+        """Return the column names ``apply`` produces from ``columns``."""
+        return columns
+
+
+class _CategorySet(Transform):
+    """Base for transforms that need the column's full set of categories."""
+
+    needs_fit = True
+
+    def __init__(self, column: str, params: dict | None = None) -> None:
+        super().__init__(column, params)
+        self._seen: set = set()
+        self.categories: pd.Index | None = None
+
+    def fit(self, series: pd.Series) -> None:
+        self._seen.update(series.dropna().unique())
+
+    def finish_fit(self) -> None:
+        # Same inference (and ordering) pd.Categorical applies to a whole column.
+        self.categories = pd.Categorical(list(self._seen)).categories
+        self._seen = set()
+
+    def _categorical(self, series: pd.Series) -> pd.Categorical:
+        return pd.Categorical(series, categories=self.categories)
+
+    def get_state(self) -> dict:
+        return {"categories": [_to_json(c) for c in self.categories]}
+
+    def set_state(self, state: dict) -> None:
+        super().set_state(state)
+        self.categories = pd.Index(state["categories"])
+
+
+class OneHotEncode(_CategorySet):
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        df[self.column] = self._categorical(df[self.column])
+        return pd.get_dummies(df, columns=[self.column], dtype=int)
+
+    def output_columns(self, columns: list[str]) -> list[str]:
+        # get_dummies appends the indicator columns after the remaining ones.
+        return [c for c in columns if c != self.column] + [f"{self.column}_{c}" for c in self.categories]
+
+
+class CategoricalToNumerical(_CategorySet):
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        # Preserve integer dtype so downstream consumers see a proper int column.
+        # Categorical codes are -1 for NaNs — keep that convention rather than
+        # promoting to float just to hold NaN.
+        df[self.column] = self._categorical(df[self.column]).codes
+        return df
+
+
+class DropColumn(Transform):
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        return df.drop(columns=[self.column])
+
+    def output_columns(self, columns: list[str]) -> list[str]:
+        return [c for c in columns if c != self.column]
+
+
+class _Moments(Transform):
+    """Base for transforms driven by the column's streaming moments."""
+
+    needs_fit = True
+
+    def __init__(self, column: str, params: dict | None = None) -> None:
+        super().__init__(column, params)
+        self.stats = ColumnAccumulator()
+
+    def fit(self, series: pd.Series) -> None:
+        self.stats.update(series)
+
+    def finish_fit(self) -> None:
+        # Reject text here: the recipe is only applied when a version is materialized.
+        if self.stats.count and not self.stats.is_numeric:
+            raise ValueError(f"Column '{self.column}' is not numeric (dtype {self.stats.dtype})")
+
+    def get_state(self) -> dict:
+        return {k: _to_json(getattr(self.stats, k)) for k in ("count", "mean", "m2", "min", "max")}
+
+    def set_state(self, state: dict) -> None:
+        super().set_state(state)
+        self.stats = ColumnAccumulator(**{k: _from_json(v) for k, v in state.items()})
+
+
+class MinMaxNormalize(_Moments):
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        col_min, col_max = self.stats.min, self.stats.max
+        df[self.column] = 0.0 if np.isclose(col_min, col_max) else (df[self.column] - col_min) / (col_max - col_min)
+        return df
+
+
+class ZscoreStandardize(_Moments):
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        mean = self.stats.mean if self.stats.count else np.nan
+        std = self.stats.std
+        df[self.column] = 0.0 if np.isclose(std, 0) else (df[self.column] - mean) / std
+        return df
+
+
+class LogTransform(Transform):
+    # Fitted only to validate the whole column before anything is written.
+    needs_fit = True
+
+    def __init__(self, column: str, params: dict | None = None) -> None:
+        super().__init__(column, params)
+        self._invalid = 0
+
+    def fit(self, series: pd.Series) -> None:
+        self._invalid += int((series < -1).sum())
+
+    def finish_fit(self) -> None:
+        if self._invalid:
+            raise ValueError(f"Log Transform: {self._invalid} value(s) below -1 in column '{self.column}'")
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        df[self.column] = np.log1p(df[self.column])
+        return df
+
+
+class FillMissing(Transform):
+    needs_fit = True
+    STRATEGIES = ("mean", "median", "mode")
+
+    def __init__(self, column: str, params: dict | None = None) -> None:
+        super().__init__(column, params)
+        self.strategy = (params or {}).get("strategy", "mean")
+        if self.strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown fill strategy '{self.strategy}'. Valid: 'mean', 'median', 'mode'")
+        self.stats = ColumnAccumulator()
+        self._order = OrderStatistics([0.5])
+        self._non_numeric = False
+        self._counts: Counter = Counter()
+        self.fill_value = None
+
+    def fit(self, series: pd.Series) -> None:
+        if self.strategy == "mean":
+            self.stats.update(series)
+        elif self.strategy == "median":
+            values = series.dropna()
+            if not pd.api.types.is_numeric_dtype(values):
+                self._non_numeric = self._non_numeric or not values.empty
+            else:
+                self._order.update(values.to_numpy(dtype="float64"))
+        else:
+            self._counts.update(series.dropna().tolist())
+
+    def finish_fit(self) -> bool | None:
+        if self.strategy == "mean":
+            if self.stats.count and not self.stats.is_numeric:
+                raise TypeError(f"Cannot compute the mean of non-numeric column '{self.column}'")
+            self.fill_value = self.stats.mean if self.stats.count else np.nan
+        elif self.strategy == "median":
+            if self._non_numeric:
+                raise TypeError(f"Cannot compute the median of non-numeric column '{self.column}'")
+            if self._order.finish_pass():
+                return True
+            self.fill_value = self._order.median()
+            self._order = OrderStatistics([0.5])
+        elif self._counts:
+            top = max(self._counts.values())
+            # Series.mode()[0] semantics: the smallest of the most frequent values.
+            self.fill_value = pd.Series([v for v, c in self._counts.items() if c == top]).sort_values().iloc[0]
+        else:
+            self.fill_value = np.nan
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        df[self.column] = df[self.column].fillna(self.fill_value)
+        return df
+
+    def get_state(self) -> dict:
+        return {"fill_value": _to_json(self.fill_value)}
+
+    def set_state(self, state: dict) -> None:
+        super().set_state(state)
+        self.fill_value = _from_json(state["fill_value"])
+
+
+# Single source of truth: maps transformation name → Transform class. Adding a
+# new transformation only requires adding one entry here.
+# This is the ONLY place to register new transformations.
+TRANSFORMATION_REGISTRY: dict[str, type[Transform]] = {
+    "One Hot Encoding": OneHotEncode,
+    "Categorical to Numerical": CategoricalToNumerical,
+    "Drop Column": DropColumn,
+    "Min-Max Normalization": MinMaxNormalize,
+    "Z-score Standardization": ZscoreStandardize,
+    "Log Transform": LogTransform,
+    "Fill Missing Values": FillMissing,
+}
+
+
+def _plan_pass(transforms: list[Transform], fitted: list[bool]) -> list[str]:
+    """Decide what every transform does during the next fit pass.
+
+    Returns one action per transform: ``"apply"`` (usable now), ``"fit"``
+    (fitted in this pass) or ``"skip"`` (its column is still being rewritten
+    by an earlier transform that is not fitted yet).
+    """
+    blocked: set[str] = set()
+    actions = []
+    for t, done in zip(transforms, fitted, strict=True):
+        if t.column in blocked:
+            actions.append("skip")
+        elif not done:
+            actions.append("fit")
+            blocked.add(t.column)
+        else:
+            actions.append("apply")
+    return actions
+
+
+def fit_pipeline(chunks: Callable[[], Iterable[pd.DataFrame]], transforms: list[Transform]) -> None:
+    """Fit every unfitted transform in ``transforms`` over the stream ``chunks()``.
+
+    ``chunks`` is called once per fit pass. Transforms that are already fitted
+    (e.g. restored with ``set_state``) are only applied; one whose
+    ``finish_fit`` asks for another pass is fitted again in the next.
+
+    Raises:
+        ValueError: If a transform rejects the data.
+    """
+    fitted = [t.fitted for t in transforms]
+    passes = 0
+    while not all(fitted):
+        actions = _plan_pass(transforms, fitted)
+        for chunk in chunks():
+            for t, action in zip(transforms, actions, strict=True):
+                if action == "fit":
+                    t.fit(chunk[t.column])
+                elif action == "apply":
+                    chunk = t.apply(chunk)
+        for i, (t, action) in enumerate(zip(transforms, actions, strict=True)):
+            if action == "fit" and not t.finish_fit():
+                t.fitted = fitted[i] = True
+        passes += 1
+    logger.debug("Fitted %d transform(s) in %d pass(es)", len(transforms), passes)
+
+
+def _apply_and_encode(transforms: list[Transform], chunk: pd.DataFrame, header: bool) -> str:
+    for t in transforms:
+        chunk = t.apply(chunk)
+    return chunk.to_csv(index=False, header=header)
+
+
+def _default_workers() -> int:
+    """Apply-pass worker count from ``Settings.preprocess_workers``."""
+    return get_settings().preprocess_workers or min(8, os.cpu_count() or 1)
+
+
+# One pool per worker count, shared by every preprocess call in this process;
+# spawning interpreters that import pandas costs more than a small file's apply.
+_pools: dict[int, ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            if not _pools:
+                atexit.register(_shutdown_pools)
+            # spawn: forking a process that may hold TensorFlow threads is unsafe.
+            pool = _pools[workers] = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return pool
+
+
+def _discard_pool(workers: int) -> None:
+    with _pools_lock:
+        pool = _pools.pop(workers, None)
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _shutdown_pools() -> None:
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(cancel_futures=True)
+
+
+# The pipeline a pool worker last unpickled, keyed by the call that sent it.
+_worker_pipeline: tuple[str, list[Transform]] = ("", [])
+
+
+def _encode_in_worker(key: str, payload: bytes, chunk: pd.DataFrame) -> str:
+    global _worker_pipeline
+    if _worker_pipeline[0] != key:
+        _worker_pipeline = (key, pickle.loads(payload))
+    return _apply_and_encode(_worker_pipeline[1], chunk, header=False)
+
+
+def _apply(
+    chunks: Iterable[pd.DataFrame],
+    transforms: list[Transform],
+    write: Callable[[str], object],
+    workers: int,
+) -> None:
+    if multiprocessing.current_process().daemon:
+        # Training workers are daemonic and may not start children.
+        workers = 1
+    pool: ProcessPoolExecutor | None = None
+    key, payload = "", b""
+    pending: deque[Future] = deque()
+    try:
+        for i, chunk in enumerate(chunks):
+            if i == 0:
+                # The first block carries the header; small files never leave it.
+                write(_apply_and_encode(transforms, chunk, header=True))
+                continue
+            if workers <= 1:
+                write(_apply_and_encode(transforms, chunk, header=False))
+                continue
+            if pool is None:
+                pool = _get_pool(workers)
+                key, payload = uuid.uuid4().hex, pickle.dumps(transforms)
+            pending.append(pool.submit(_encode_in_worker, key, payload, chunk))
+            # Keep a bounded number of blocks in flight and write them in order.
+            while len(pending) >= 2 * workers:
+                write(pending.popleft().result())
+        while pending:
+            write(pending.popleft().result())
+    except BrokenProcessPool:
+        _discard_pool(workers)
+        raise
+    finally:
+        # The pool outlives this call; only drop the blocks it no longer needs.
+        for future in pending:
+            future.cancel()
+
+
+def run_pipeline(
+    reader: DatasetReader,
+    transforms: list[Transform],
+    out_path: str,
+    chunksize: int = DEFAULT_CHUNK_ROWS,
+    workers: int | None = None,
+    schema: ChunkSchema | None = None,
+) -> None:
+    """Fit ``transforms`` on ``reader`` and stream the transformed CSV to ``out_path``.
+
+    ``workers`` defaults to ``Settings.preprocess_workers``.
+
+    Raises:
+        ValueError: If a transform rejects the data during fitting.
+    """
+    if schema is None:
+        schema = reader.schema(chunksize)
+
+    def chunks() -> Iterable[pd.DataFrame]:
+        return reader.iter_chunks(chunksize, schema=schema)
+
+    fit_pipeline(chunks, transforms)
+    write_pipeline(chunks(), transforms, out_path, workers)
+
+
+def write_pipeline(
+    chunks: Iterable[pd.DataFrame],
+    transforms: list[Transform],
+    out_path: str,
+    workers: int | None = None,
+) -> None:
+    """Apply fitted ``transforms`` to ``chunks`` and stream the result to ``out_path`` as CSV."""
+    if workers is None:
+        workers = _default_workers()
+    with open(out_path, "w", newline="", encoding="utf-8") as out:
+        _apply(chunks, transforms, out.write, workers)
@@ -0,0 +1,261 @@
+"""Resumable chunked uploads.
+
+A client creates a session declaring the file name and size, PUTs chunks at
+byte offsets (in any order, retrying any that fail), asks which ranges have
+arrived, and finalizes. Each chunk request is short and streams straight
+into a sparse temp file at its offset, so a dropped connection costs one
+chunk rather than the whole transfer. Finalizing requires every byte and a
+SHA-256; the temp file is then handed to ``add_file_service``, which checks
+the hash in the same pass that stores and profiles the file.
+"""
+
+import contextlib
+import os
+import uuid as uuid_pkg
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+from typing import Any, BinaryIO
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session, select
+
+from app.config import get_settings
+from app.models import UploadSession
+from app.schemas.data_upload import UploadSessionCreateRequest
+from app.services.data_upload import add_file_service
+from app.services.ingest import BLOCK_SIZE
+from app.shared.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Suggested chunk size returned to clients; any size is accepted.
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # 8 MB
+# Sessions untouched for this long are discarded when new ones are created.
+SESSION_TTL = timedelta(hours=24)
+SESSION_DIR = ".sessions"
+
+
+def _resp(status_code: int, success: bool, message: str, data: Any = None) -> tuple:
+    """Build a standard API response tuple of (body_dict, status_code)."""
+    return {"success": success, "message": message, "data": data}, status_code
+
+
+def _utcnow() -> datetime:
+    # Naive UTC, matching the DateTime columns.
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def _part_path(session_id: uuid_pkg.UUID) -> str:
+    return os.path.join(get_settings().upload_folder, SESSION_DIR, f"{session_id.hex}.part")
+
+
+def merge_range(ranges: list[list[int]], start: int, end: int) -> list[list[int]]:
+    """Add the half-open range ``[start, end)`` to sorted disjoint ``ranges``, coalescing neighbours."""
+    merged: list[list[int]] = []
+    for lo, hi in sorted([*map(list, ranges), [start, end]]):
+        if merged and lo <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], hi)
+        else:
+            merged.append([lo, hi])
+    return merged
+
+
+def missing_ranges(ranges: list[list[int]], total_size: int) -> list[list[int]]:
+    """Return the gaps in ``ranges`` over ``[0, total_size)``."""
+    gaps, pos = [], 0
+    for lo, hi in ranges:
+        if lo > pos:
+            gaps.append([pos, lo])
+        pos = max(pos, hi)
+    if pos < total_size:
+        gaps.append([pos, total_size])
+    return gaps
+
+
+def _payload(session: UploadSession) -> dict:
+    received = session.received or []
+    return {
+        "session_id": str(session.id),
+        "file_name": session.file_name,
+        "total_size": session.total_size,
+        "chunk_size": UPLOAD_CHUNK_SIZE,
+        "received": received,
+        "bytes_received": sum(hi - lo for lo, hi in received),
+        "missing": missing_ranges(received, session.total_size),
+    }
+
+
+def _discard(db: Session, session: UploadSession) -> None:
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(_part_path(session.id))
+    db.delete(session)
+
+
+def _expire_stale_sessions(db: Session) -> None:
+    stale = db.exec(select(UploadSession).where(UploadSession.updated_on < _utcnow() - SESSION_TTL)).all()
+    for session in stale:
+        logger.info("Expiring stale upload session %s (%s)", session.id, session.file_name)
+        _discard(db, session)
+
+
+def create_upload_session_service(db: Session, data: UploadSessionCreateRequest) -> tuple:
+    """Start a resumable upload and reserve its temp file."""
+    max_size = get_settings().max_content_length
+    if data.total_size > max_size:
+        return _resp(413, False, f"File too large. Maximum allowed size is {max_size // (1024 * 1024)} MB.")
+
+    session = UploadSession(
+        file_name=data.file_name,
+        total_size=data.total_size,
+        sha256=data.sha256.lower() if data.sha256 else None,
+        received=[],
+        project_id=data.project_id,
+        updated_on=_utcnow(),
+    )
+    path = _part_path(session.id)
+    try:
+        _expire_stale_sessions(db)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.truncate(data.total_size)  # sparse; chunks fill it in at their offsets
+        db.add(session)
+        db.commit()
+    except (SQLAlchemyError, OSError):
+        db.rollback()
+        with contextlib.suppress(OSError):
+            os.remove(path)
+        logger.exception("Error creating upload session")
+        return _resp(500, False, "An error occurred while creating the upload session")
+
+    logger.info("Upload session %s started: %s (%d bytes)", session.id, session.file_name, session.total_size)
+    return _resp(201, True, "Upload session created", _payload(session))
+
+
+def get_upload_session_service(db: Session, session_id: uuid_pkg.UUID) -> tuple:
+    """Report which byte ranges of an upload have been received."""
+    session = db.get(UploadSession, session_id)
+    if session is None:
+        return _resp(404, False, "Upload session not found")
+    return _resp(200, True, "Upload session found", _payload(session))
+
+
+def put_chunk_service(
+    db: Session,
+    session_id: uuid_pkg.UUID,
+    chunk_index: int,
+    offset: int,
+    source: BinaryIO,
+    length: int | None = None,
+) -> tuple:
+    """Stream one chunk into the session's temp file at ``offset`` and record its range.
+
+    Chunks may arrive in any order and may be re-sent; overlapping bytes are
+    simply rewritten. A chunk whose ``length`` (when known) runs past the
+    declared file size is rejected before any of it is written.
+    """
+    session = db.get(UploadSession, session_id)
+    if session is None:
+        return _resp(404, False, "Upload session not found")
+    if offset >= session.total_size:
+        return _resp(400, False, f"Offset {offset} is past the end of the file ({session.total_size} bytes)")
+    if length is not None and offset + length > session.total_size:
+        return _resp(400, False, f"Chunk {chunk_index} extends past the declared file size")
+
+    end = offset
+    try:
+        fd = os.open(_part_path(session_id), os.O_WRONLY)
+        try:
+            while block := source.read(BLOCK_SIZE):
+                if end + len(block) > session.total_size:
+                    return _resp(400, False, f"Chunk {chunk_index} extends past the declared file size")
+                os.pwrite(fd, block, end)
+                end += len(block)
+        finally:
+            os.close(fd)
+    except FileNotFoundError:
+        return _resp(404, False, "Upload session not found")
+    except OSError:
+        logger.exception("Error writing chunk %d of upload session %s", chunk_index, session_id)
+        return _resp(500, False, "An error occurred while saving the chunk")
+
+    if end == offset:
+        return _resp(400, False, f"Chunk {chunk_index} is empty")
+
+    try:
+        # Lock the row: chunks of one session may be recorded by several API processes at once.
+        session = db.exec(
+            select(UploadSession)
+            .where(UploadSession.id == session_id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        ).first()
+        if session is None:
+            db.rollback()
+            return _resp(404, False, "Upload session not found")
+        session.received = merge_range(session.received or [], offset, end)
+        session.updated_on = _utcnow()
+        db.add(session)
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        logger.exception("Error recording chunk %d of upload session %s", chunk_index, session_id)
+        return _resp(500, False, "An error occurred while saving the chunk")
+
+    logger.debug("Upload session %s: chunk %d [%d, %d)", session_id, chunk_index, offset, end)
+    return _resp(200, True, "Chunk received", _payload(session))
+
+
+def finalize_upload_session_service(db: Session, session_id: uuid_pkg.UUID, sha256: str | None = None) -> tuple:
+    """Verify a complete upload and create its DataFile via the normal upload path.
+
+    On a checksum mismatch the received ranges are reset so the client can
+    re-send the file into the same session.
+    """
+    session = db.get(UploadSession, session_id)
+    if session is None:
+        return _resp(404, False, "Upload session not found")
+
+    expected = (sha256 or session.sha256 or "").lower()
+    if not expected:
+        return _resp(400, False, "A SHA-256 checksum is required to finalize the upload")
+    missing = missing_ranges(session.received or [], session.total_size)
+    if missing:
+        return _resp(409, False, "Upload is incomplete", {"missing": missing})
+
+    try:
+        with open(_part_path(session_id), "rb") as f:
+            upload = SimpleNamespace(file=f, filename=session.file_name)
+            body, status = add_file_service(db, upload, project_id=session.project_id, expected_sha256=expected)
+    except OSError:
+        logger.exception("Could not read upload session %s", session_id)
+        return _resp(500, False, "An error occurred while saving the file")
+
+    try:
+        if status == 201:
+            _discard(db, session)
+        elif status == 422:
+            session.received = []
+            session.updated_on = _utcnow()
+            db.add(session)
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        logger.exception("Error closing upload session %s", session_id)
+
+    logger.info("Upload session %s finalized with status %d", session_id, status)
+    return body, status
+
+
+def abort_upload_session_service(db: Session, session_id: uuid_pkg.UUID) -> tuple:
+    """Discard an upload session and its temp file."""
+    session = db.get(UploadSession, session_id)
+    if session is None:
+        return _resp(404, False, "Upload session not found")
+    try:
+        _discard(db, session)
+        db.commit()
+    except (SQLAlchemyError, OSError):
+        db.rollback()
+        logger.exception("Error aborting upload session %s", session_id)
+        return _resp(500, False, "An error occurred while aborting the upload session")
+    return _resp(200, True, "Upload session aborted")
@@ -0,0 +1,49 @@
+"""Advisory file locks shared by every process on the host.
+
+Training jobs run in worker processes and the API may run several uvicorn
+workers, so a ``threading.Lock`` cannot keep two of them from building the
+same on-disk artifact. ``file_lock`` takes an ``fcntl.flock`` on a ``.lock``
+file next to the path it guards instead. The lock files are left in place:
+removing one while another process waits on it would let a third lock a new
+file of the same name.
+"""
+
+import contextlib
+import fcntl
+import os
+from collections.abc import Iterator
+
+
+def lock_path(path: str) -> str:
+    """Return the lock file guarding ``path``."""
+    return f"{path}.lock"
+
+
+@contextlib.contextmanager
+def file_lock(path: str, shared: bool = False, blocking: bool = True) -> Iterator[bool]:
+    """Hold a lock on ``path`` for the duration of the block.
+
+    Args:
+        path: The file or directory to guard; it need not exist.
+        shared: Take a shared (reader) lock instead of an exclusive one.
+        blocking: Wait for the lock; otherwise give up at once if it is held.
+
+    Yields:
+        Whether the lock was acquired (always True when ``blocking``).
+    """
+    target = lock_path(path)
+    os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+    fd = os.open(target, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        flags = (fcntl.LOCK_SH if shared else fcntl.LOCK_EX) | (0 if blocking else fcntl.LOCK_NB)
+        try:
+            fcntl.flock(fd, flags)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
@@ -0,0 +1,59 @@
+"""Process memory measurement."""
+
+import os
+import threading
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss() -> int | None:
+    """Return this process's resident set size in bytes, or None where it cannot be read (non-Linux)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class PeakRssMonitor:
+    """Context manager sampling the process RSS on a background thread to find its peak.
+
+    The figure is process-wide: work running concurrently on other threads
+    (e.g. another training job) counts towards it.
+
+    Usage::
+
+        with PeakRssMonitor() as rss:
+            load_everything()
+        print(rss.baseline_bytes, rss.peak_bytes)
+    """
+
+    def __init__(self, interval: float = 0.01) -> None:
+        self.interval = interval
+        self.baseline_bytes: int | None = None
+        self.peak_bytes: int | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _sample(self) -> None:
+        rss = current_rss()
+        if rss is not None and (self.peak_bytes is None or rss > self.peak_bytes):
+            self.peak_bytes = rss
+
+    def _poll(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self) -> "PeakRssMonitor":
+        self.baseline_bytes = current_rss()
+        self.peak_bytes = self.baseline_bytes
+        if self.baseline_bytes is not None:
+            self._thread = threading.Thread(target=self._poll, name="rss-monitor", daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._sample()
@@ -3,9 +3,14 @@
 Progress is isolated per training job via Socket.IO rooms: a client subscribes
 to ``job_id`` and only receives that job's metrics (no global broadcast). Late
 or reconnecting subscribers get a one-shot catch-up of the persisted history.
+
+Uploaded files work the same way: ``subscribe_file`` joins the file's room,
+which receives a ``file_profile`` event when background profiling finishes
+(with an immediate catch-up of the current status).
 """
 
 import asyncio
+from collections.abc import Callable
 
 import socketio
 
@@ -20,6 +25,43 @@ sio = socketio.AsyncServer(
     cors_allowed_origins=get_settings().cors_allowed_origins_list,
 )
 
+# The server's event loop, bound at startup so worker threads that are not
+# tied to a request (e.g. file profiling) can emit.
+_loop: asyncio.AbstractEventLoop | None = None
+
+
+def bind_event_loop(loop: asyncio.AbstractEventLoop) -> None:
+    """Remember the loop Socket.IO runs on; called once from the app lifespan."""
+    global _loop
+    _loop = loop
+
+
+def event_loop() -> asyncio.AbstractEventLoop | None:
+    """Return the loop bound by ``bind_event_loop``, or None before startup."""
+    return _loop
+
+
+# Set in training worker processes, which have no Socket.IO server of their
+# own: events are handed to this ``(room, data)`` callable, which relays them
+# to the API process (see ``training_workers``).
+_relay: Callable[[str | None, dict], None] | None = None
+
+
+def set_emit_relay(relay: Callable[[str | None, dict], None] | None) -> None:
+    """Route this process's training events through ``relay`` instead of emitting them."""
+    global _relay
+    _relay = relay
+
+
+def emit_relay() -> Callable[[str | None, dict], None] | None:
+    """Return the relay set by ``set_emit_relay``, or None in the API process."""
+    return _relay
+
+
+def file_room(file_id) -> str:
+    """Return the Socket.IO room that receives an uploaded file's events."""
+    return f"file:{file_id}"
+
 
 @sio.on("connect", namespace=SOCKETIO_DL_NAMESPACE)
 async def dl_connect(sid, environ):
@@ -69,3 +111,41 @@ async def unsubscribe_job(sid, data):
     job_id = (data or {}).get("job_id")
     if job_id:
         await sio.leave_room(sid, job_id, namespace=SOCKETIO_DL_NAMESPACE)
+
+
+def _load_file_catchup(file_id: str) -> dict | None:
+    """Read a file's current profiling status (sync DB access); None if unknown."""
+    import uuid
+
+    from app.models.data import DataFile
+    from app.services.file_profiling import profile_event
+    from app.services.training_service import make_session
+
+    try:
+        key = uuid.UUID(str(file_id))
+    except ValueError:
+        return None
+    with make_session() as session:
+        file = session.get(DataFile, key)
+        return profile_event(file) if file is not None else None
+
+
+@sio.on("subscribe_file", namespace=SOCKETIO_DL_NAMESPACE)
+async def subscribe_file(sid, data):
+    """Join the room for an uploaded file and send its current profiling status."""
+    file_id = (data or {}).get("file_id")
+    if not file_id:
+        return
+
+    await sio.enter_room(sid, file_room(file_id), namespace=SOCKETIO_DL_NAMESPACE)
+    catchup = await asyncio.to_thread(_load_file_catchup, file_id)
+    if catchup is not None:
+        await sio.emit(SOCKETIO_LISTENER, catchup, to=sid, namespace=SOCKETIO_DL_NAMESPACE)
+
+
+@sio.on("unsubscribe_file", namespace=SOCKETIO_DL_NAMESPACE)
+async def unsubscribe_file(sid, data):
+    """Leave the room for an uploaded file."""
+    file_id = (data or {}).get("file_id")
+    if file_id:
+        await sio.leave_room(sid, file_room(file_id), namespace=SOCKETIO_DL_NAMESPACE)
@@ -0,0 +1,27 @@
+"""add augmentation to model_basic
+
+Per-model image augmentation settings (flip, rotation, crop, brightness,
+contrast) applied on the fly during image training.
+
+Revision ID: a8b9c0d1e2f3
+Revises: f7a8b9c0d1e2
+Create Date: 2026-10-18 04:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "a8b9c0d1e2f3"
+down_revision = "f7a8b9c0d1e2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("model_basic", sa.Column("augmentation", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("model_basic", "augmentation")
@@ -0,0 +1,43 @@
+"""add profiling columns to data_file
+
+CSV uploads are profiled by a background job after the upload returns; the
+job's status and results (dtypes, null counts) live on the data_file row.
+
+Revision ID: b9c0d1e2f3a4
+Revises: a8b9c0d1e2f3
+Create Date: 2026-10-18 05:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b9c0d1e2f3a4"
+down_revision = "a8b9c0d1e2f3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # native_enum=False -> portable VARCHAR + CHECK (no Postgres ENUM type).
+    op.add_column(
+        "data_file",
+        sa.Column(
+            "profile_status",
+            sa.Enum("pending", "running", "ready", "failed", native_enum=False, length=20),
+            nullable=True,
+        ),
+    )
+    op.add_column("data_file", sa.Column("profile_error", sa.String(length=500), nullable=True))
+    op.add_column("data_file", sa.Column("dtypes", sa.JSON(), nullable=True))
+    op.add_column("data_file", sa.Column("null_counts", sa.JSON(), nullable=True))
+    op.create_index("ix_data_file_profile_status", "data_file", ["profile_status"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_data_file_profile_status", table_name="data_file")
+    op.drop_column("data_file", "null_counts")
+    op.drop_column("data_file", "dtypes")
+    op.drop_column("data_file", "profile_error")
+    op.drop_column("data_file", "profile_status")
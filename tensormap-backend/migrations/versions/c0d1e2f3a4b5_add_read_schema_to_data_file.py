@@ -0,0 +1,28 @@
+"""add read_schema to data_file
+
+The profiling job also infers the narrowest lossless dtypes of an uploaded
+CSV (downcast numbers, categorical low-cardinality text); readers load the
+upload with them instead of inferring types on every read.
+
+Revision ID: c0d1e2f3a4b5
+Revises: b9c0d1e2f3a4
+Create Date: 2026-10-18 06:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c0d1e2f3a4b5"
+down_revision = "b9c0d1e2f3a4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("data_file", sa.Column("read_schema", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("data_file", "read_schema")
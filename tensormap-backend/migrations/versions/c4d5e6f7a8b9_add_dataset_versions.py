@@ -0,0 +1,66 @@
+"""add dataset_version table
+
+Preprocessing no longer overwrites the uploaded CSV (with a single .bak);
+each request records an immutable version instead:
+  - dataset_version: one row per version with its parent and fitted recipe
+  - data_file.current_version_id: the head version readers see
+  - training_job.dataset_version_id: the version a job was pinned to
+
+Revision ID: c4d5e6f7a8b9
+Revises: b2c3d4e5f6a7
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects.postgresql import UUID as PgUUID
+
+# revision identifiers, used by Alembic.
+revision = "c4d5e6f7a8b9"
+down_revision = "b2c3d4e5f6a7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create dataset_version and the head/pin references to it."""
+    op.create_table(
+        "dataset_version",
+        sa.Column("id", PgUUID(as_uuid=True), nullable=False),
+        sa.Column("file_id", PgUUID(as_uuid=True), nullable=False),
+        sa.Column("parent_id", PgUUID(as_uuid=True), nullable=True),
+        sa.Column("number", sa.Integer(), nullable=False),
+        sa.Column("recipe", sa.JSON(), nullable=True),
+        sa.Column("disk_name", sa.String(length=150), nullable=True),
+        sa.Column("columns", sa.JSON(), nullable=True),
+        sa.Column("created_on", sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(["file_id"], ["data_file.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["parent_id"], ["dataset_version.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("file_id", "number", name="uq_dataset_version_file_number"),
+    )
+    op.create_index("ix_dataset_version_file_id", "dataset_version", ["file_id"])
+
+    op.add_column("data_file", sa.Column("current_version_id", PgUUID(as_uuid=True), nullable=True))
+
+    op.add_column("training_job", sa.Column("dataset_version_id", PgUUID(as_uuid=True), nullable=True))
+    op.create_index("ix_training_job_dataset_version_id", "training_job", ["dataset_version_id"])
+    op.create_foreign_key(
+        "fk_training_job_dataset_version_id",
+        "training_job",
+        "dataset_version",
+        ["dataset_version_id"],
+        ["id"],
+        ondelete="SET NULL",
+    )
+
+
+def downgrade():
+    """Drop dataset versions and the columns referencing them."""
+    op.drop_constraint("fk_training_job_dataset_version_id", "training_job", type_="foreignkey")
+    op.drop_index("ix_training_job_dataset_version_id", table_name="training_job")
+    op.drop_column("training_job", "dataset_version_id")
+    op.drop_column("data_file", "current_version_id")
+    op.drop_index("ix_dataset_version_file_id", table_name="dataset_version")
+    op.drop_table("dataset_version")
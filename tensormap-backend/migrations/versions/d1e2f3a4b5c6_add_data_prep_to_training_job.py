@@ -0,0 +1,27 @@
+"""add data_prep to training_job
+
+Tabular jobs record how their training data was prepared (tensor cache hit,
+rows, duration, peak RSS).
+
+Revision ID: d1e2f3a4b5c6
+Revises: c0d1e2f3a4b5
+Create Date: 2026-10-18 07:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "d1e2f3a4b5c6"
+down_revision = "c0d1e2f3a4b5"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("training_job", sa.Column("data_prep", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("training_job", "data_prep")
@@ -0,0 +1,28 @@
+"""add content_hash to data_file
+
+SHA-256 of the uploaded bytes, computed while the upload is streamed to disk.
+
+Revision ID: d5e6f7a8b9c0
+Revises: c4d5e6f7a8b9
+Create Date: 2026-10-18 01:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "d5e6f7a8b9c0"
+down_revision = "c4d5e6f7a8b9"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("data_file", sa.Column("content_hash", sa.String(length=64), nullable=True))
+    op.create_index("ix_data_file_content_hash", "data_file", ["content_hash"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_data_file_content_hash", table_name="data_file")
+    op.drop_column("data_file", "content_hash")
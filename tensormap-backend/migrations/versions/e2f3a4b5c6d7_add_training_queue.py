@@ -0,0 +1,31 @@
+"""add training queue columns to training_job
+
+Jobs are queued (status "queued") instead of rejected when every worker
+slot is busy, ordered by priority and submission time. ``status`` is a
+VARCHAR without a CHECK constraint, so the new value needs no DDL.
+
+Revision ID: e2f3a4b5c6d7
+Revises: d1e2f3a4b5c6
+Create Date: 2026-10-18 08:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e2f3a4b5c6d7"
+down_revision = "d1e2f3a4b5c6"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("training_job", sa.Column("priority", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("training_job", sa.Column("queued_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.execute("UPDATE training_job SET status = 'cancelled' WHERE status = 'queued'")
+    op.drop_column("training_job", "queued_at")
+    op.drop_column("training_job", "priority")
@@ -0,0 +1,26 @@
+"""index data_file.disk_name
+
+Uploads are stored as content-addressed blobs shared by every DataFile with
+the same bytes; deletes count the rows naming a blob before removing it.
+
+Revision ID: e6f7a8b9c0d1
+Revises: d5e6f7a8b9c0
+Create Date: 2026-10-18 02:00:00.000000
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e6f7a8b9c0d1"
+down_revision = "d5e6f7a8b9c0"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_data_file_disk_name", "data_file", ["disk_name"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_data_file_disk_name", table_name="data_file")
@@ -0,0 +1,42 @@
+"""add upload_session table
+
+Resumable chunked uploads: one row per in-progress upload with the byte
+ranges received so far.
+
+Revision ID: f7a8b9c0d1e2
+Revises: e6f7a8b9c0d1
+Create Date: 2026-10-18 03:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects.postgresql import UUID as PgUUID
+
+# revision identifiers, used by Alembic.
+revision = "f7a8b9c0d1e2"
+down_revision = "e6f7a8b9c0d1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create upload_session."""
+    op.create_table(
+        "upload_session",
+        sa.Column("id", PgUUID(as_uuid=True), nullable=False),
+        sa.Column("file_name", sa.String(length=100), nullable=False),
+        sa.Column("total_size", sa.BigInteger(), nullable=False),
+        sa.Column("sha256", sa.String(length=64), nullable=True),
+        sa.Column("received", sa.JSON(), nullable=False),
+        sa.Column("project_id", PgUUID(as_uuid=True), nullable=True),
+        sa.Column("created_on", sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_on", sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(["project_id"], ["project.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade():
+    """Drop upload_session."""
+    op.drop_table("upload_session")
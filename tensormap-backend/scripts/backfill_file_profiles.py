@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+"""Backfill script to profile CSV uploads that predate background profiling.
+
+Files uploaded before profiling moved off the upload path have no
+profile_status: their columns/row count may be missing and they have no
+dtypes, null counts, columnar sidecar or row index. This script profiles
+them in parallel and commits the results in batches (see
+``app.services.file_profiling.backfill_profiles``). It is resumable: profiled
+files are never picked up again, so an interrupted run just continues where
+it stopped. The app does not run it on startup: run it once after upgrading.
+
+Usage:
+    python -m scripts.backfill_file_profiles [--dry-run] [--limit N] [--workers N] [--batch-size N] [--retry-failed]
+
+Options:
+    --dry-run: Only count the files that would be profiled
+    --limit N: Only process first N files (useful for testing)
+    --workers N: Files profiled in parallel
+    --batch-size N: Files per commit
+    --retry-failed: Also retry files whose profiling failed before
+"""
+
+import argparse
+import sys
+
+from sqlmodel import Session
+
+from app.database import engine
+from app.services.file_profiling import BACKFILL_BATCH_SIZE, PROFILE_WORKERS, backfill_profiles
+from app.shared.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def _print_report(stats: dict, dry_run: bool = False) -> None:
+    """Print a human-readable summary of the backfill operation."""
+    print("\n" + "=" * 60)
+    if dry_run:
+        print("[DRY-RUN] Backfill Plan")
+        print("=" * 60)
+        print(f"Files to profile: {stats['pending']}")
+        print("=" * 60)
+        return
+    print("Backfill Complete")
+    print("=" * 60)
+    print(f"Duration:       {stats['duration_seconds']:.2f} seconds")
+    print(f"Ready:          {stats['ready']}")
+    print(f"Failed:         {stats['failed']}")
+    print(f"Total:          {stats['ready'] + stats['failed']}")
+
+    if stats["failed_files"]:
+        print("\nFailed Files:")
+        print("-" * 60)
+        for failed in stats["failed_files"]:
+            print(f"  • {failed['name']} (id={failed['id']})")
+            print(f"    Error: {failed['error']}")
+
+    print("=" * 60)
+
+
+def main():
+    """CLI entry point for backfill script."""
+    parser = argparse.ArgumentParser(
+        description="Profile CSV uploads that have no profile yet",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Only count the files that would be profiled")
+    parser.add_argument("--limit", type=int, help="Maximum number of files to process")
+    parser.add_argument("--workers", type=int, default=PROFILE_WORKERS, help="Files profiled in parallel")
+    parser.add_argument("--batch-size", type=int, default=BACKFILL_BATCH_SIZE, help="Files per commit")
+    parser.add_argument("--retry-failed", action="store_true", help="Also retry files whose profiling failed")
+
+    args = parser.parse_args()
+
+    logger.info(
+        "Starting file profile backfill (dry_run=%s, limit=%s, workers=%d, batch_size=%d)",
+        args.dry_run,
+        args.limit,
+        args.workers,
+        args.batch_size,
+    )
+
+    try:
+        with Session(engine) as session:
+            stats = backfill_profiles(
+                session,
+                workers=args.workers,
+                batch_size=args.batch_size,
+                limit=args.limit,
+                retry_failed=args.retry_failed,
+                dry_run=args.dry_run,
+            )
+        _print_report(stats, dry_run=args.dry_run)
+
+        # Exit with non-zero if any failures
+        sys.exit(0 if stats["failed"] == 0 else 1)
+
+    except KeyboardInterrupt:
+        logger.warning("Backfill interrupted by user; completed batches are kept")
+        sys.exit(130)
+    except Exception as e:
+        logger.exception("Backfill failed with unexpected error: %s", str(e))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,23 @@
 import tensorflow as tf
 
 
+def augmentation_layers(config):
+    """Random augmentation applied to each training batch; None if nothing is enabled."""
+    config = config or {}
+    layers = []
+    if config.get("flip", "none") != "none":
+        layers.append(tf.keras.layers.RandomFlip(config["flip"], seed=123))
+    if config.get("rotation"):
+        layers.append(tf.keras.layers.RandomRotation(config["rotation"], seed=123))
+    if config.get("crop"):
+        layers.append(tf.keras.layers.RandomZoom((-config["crop"], 0.0), seed=123))
+    if config.get("brightness"):
+        layers.append(tf.keras.layers.RandomBrightness(config["brightness"], value_range=(0, 255), seed=123))
+    if config.get("contrast"):
+        layers.append(tf.keras.layers.RandomContrast(config["contrast"], seed=123))
+    return tf.keras.Sequential(layers) if layers else None
+
+
 def deep_learning_model():
     image_size = ({{data.dataset.image_size}}, {{data.dataset.image_size}})
     batch_size = {{data.dataset.batch_size}}
@@ -9,26 +26,21 @@ def deep_learning_model():
 
     directory = "{{data.dataset.file_name}}"
     validation_split = 1 - ({{data.dataset.training_split}} / 100)
-    train_data = tf.keras.utils.image_dataset_from_directory(
-        directory,
-        validation_split=validation_split,
-        subset="training",
-        seed=123,
-        image_size=image_size,
-        batch_size=batch_size,
-        color_mode=color_mode,
-        label_mode=label_mode,
-    )
-    test_data = tf.keras.utils.image_dataset_from_directory(
+    # One directory scan for both subsets.
+    train_data, test_data = tf.keras.utils.image_dataset_from_directory(
         directory,
         validation_split=validation_split,
-        subset="validation",
+        subset="both",
         seed=123,
         image_size=image_size,
         batch_size=batch_size,
         color_mode=color_mode,
         label_mode=label_mode,
+        class_names={{data.dataset.class_names}},
     )
+    augment = augmentation_layers({{data.dataset.augmentation}})
+    if augment is not None:
+        train_data = train_data.map(lambda x, y: (augment(x, training=True), y), num_parallel_calls=tf.data.AUTOTUNE)
 
     with open("{{data.dl_model.json_file}}") as f:
         json_string = f.read()
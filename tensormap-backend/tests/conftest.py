@@ -27,6 +27,7 @@ from sqlmodel.pool import StaticPool
 
 from app.database import get_db
 from app.main import app
+from app.services.metric_writer import MetricWriter
 
 
 @pytest.fixture(scope="session")
@@ -90,6 +91,8 @@ def training_session_factory(monkeypatch) -> Generator:
     ``training_service.make_session`` (which reads the module-level engine).
     This fixture points that engine at a fresh in-memory SQLite DB so callback
     and service tests share one database without touching the app engine.
+    Callbacks built without their own ``writer`` get a per-test
+    ``MetricWriter``, closed (and so flushed) before the DB goes away.
     """
     engine = create_engine(
         "sqlite://",
@@ -98,11 +101,14 @@ def training_session_factory(monkeypatch) -> Generator:
     )
     SQLModel.metadata.create_all(engine)
     monkeypatch.setattr("app.services.training_service.engine", engine)
+    writer = MetricWriter(flush_interval=0.05, flush_rows=500)
+    monkeypatch.setattr("app.services.metric_writer._writer", writer)
 
     def factory() -> Session:
         return Session(engine)
 
     yield factory
+    writer.close()
     engine.dispose()
 
 
@@ -71,10 +71,12 @@ def test_delete_project(client: TestClient):
 
 
 def test_upload_valid_csv(client: TestClient):
-    resp = client.post(
-        "/api/v1/data/upload/file",
-        files={"data": ("test.csv", io.BytesIO(CSV_BYTES), "text/csv")},
-    )
+    with patch("app.services.data_upload.schedule_profile") as mock_schedule:
+        resp = client.post(
+            "/api/v1/data/upload/file",
+            files={"data": ("test.csv", io.BytesIO(CSV_BYTES), "text/csv")},
+        )
+    mock_schedule.assert_called_once()
     assert resp.status_code == 201
     body = resp.json()
     assert body["success"] is True
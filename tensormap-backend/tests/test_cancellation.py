@@ -0,0 +1,55 @@
+"""Tests for the in-process cancellation registry and how cancellations reach it."""
+
+from unittest.mock import patch
+
+from app.services import training_service
+from app.services.cancellation import CancellationRegistry, registry
+
+
+def test_registry_sets_only_registered_jobs():
+    reg = CancellationRegistry()
+    event = reg.register("a")
+
+    assert reg.register("a") is event
+    assert reg.cancel("a") is True
+    assert event.is_set()
+    assert reg.cancel("b") is False
+
+    reg.unregister("a")
+    assert reg.cancel("a") is False
+
+
+def test_cancel_all_sets_every_event():
+    reg = CancellationRegistry()
+    events = [reg.register(job_id) for job_id in ("a", "b")]
+
+    reg.cancel_all()
+
+    assert all(event.is_set() for event in events)
+
+
+def test_signal_cancellation_prefers_a_job_running_in_process():
+    event = registry.register("local")
+    try:
+        with patch.object(training_service, "_pool") as pool:
+            training_service.signal_cancellation("local")
+            training_service.signal_cancellation("remote")
+    finally:
+        registry.unregister("local")
+
+    assert event.is_set()
+    pool.cancel.assert_called_once_with("remote")
+
+
+def test_in_process_run_registers_its_event(training_session_factory):
+    seen = {}
+
+    def fake_model_run(model_name, session, job_id, cancel_event):
+        seen["event"] = cancel_event
+        training_service.signal_cancellation(job_id)
+
+    with patch("app.services.model_run.model_run", side_effect=fake_model_run):
+        training_service.run_training_job("m1", "job-1")
+
+    assert seen["event"].is_set()
+    assert registry.cancel("job-1") is False  # unregistered once the run ended
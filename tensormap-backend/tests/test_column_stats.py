@@ -24,10 +24,11 @@ def _fake_file(tmp_path, csv_content, file_name="test"):
     f.file_name = file_name
     f.file_type = "csv"
     f.disk_name = f"{file_name}.csv"
+    f.current_version_id = None
     return f
 
 
-def _run(tmp_path, csv_content, file_name="test"):
+def _run(tmp_path, csv_content, file_name="test", **kwargs):
     """Call the service with a mocked DB session and patched settings."""
     fake_file = _fake_file(tmp_path, csv_content, file_name)
     db = MagicMock()
@@ -35,7 +36,7 @@ def _run(tmp_path, csv_content, file_name="test"):
 
     with patch("app.services.data_process.get_settings") as mock_cfg:
         mock_cfg.return_value.upload_folder = str(tmp_path)
-        body, status = get_column_stats_service(db, uuid.uuid4())
+        body, status = get_column_stats_service(db, uuid.uuid4(), **kwargs)
 
     return body, status
 
@@ -110,3 +111,18 @@ def test_response_shape(tmp_path):
     for row in body["data"]["columns"]:
         for key in ("column", "dtype", "count", "null_count", "mean", "min", "max"):
             assert key in row
+
+
+def test_approximate_mode_marks_estimates(tmp_path):
+    exact, _ = _run(tmp_path, CATEGORICAL_CSV)
+    assert exact["data"]["exact"] is True
+    assert "approximation" not in exact["data"]
+
+    body, status = _run(tmp_path, CATEGORICAL_CSV, approximate=True, error=0.05)
+    assert status == 200
+    data = body["data"]
+    assert data["exact"] is False
+    assert data["approximation"] == {"error": 0.05, "fields": ["distinct_count", "median", "top_values"]}
+    name = data["columns"][0]
+    assert (name["count"], name["distinct_count"]) == (3, 2)
+    assert name["top_values"][0] == {"value": "alice", "count": 2}
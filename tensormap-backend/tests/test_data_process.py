@@ -1,3 +1,4 @@
+import contextlib
 import uuid
 from unittest.mock import MagicMock, patch
 
@@ -11,6 +12,7 @@ def _make_db(file_name: str = "test_file", file_type: str = "csv") -> MagicMock:
     file = MagicMock()
     file.file_name = file_name
     file.file_type = file_type
+    file.current_version_id = None
     db = MagicMock()
     db.exec.return_value.first.return_value = file
     return db
@@ -26,10 +28,15 @@ def _sample_df() -> pd.DataFrame:
     )
 
 
+def _chunks(df: pd.DataFrame):
+    """Mimic the context-managed chunk reader ``pd.read_csv(chunksize=...)`` returns."""
+    return contextlib.nullcontext([df])
+
+
 class TestUnknownTransformation:
     def test_returns_422(self):
         db = _make_db()
-        with patch("app.services.data_process.pd.read_csv", return_value=_sample_df()):
+        with patch("app.services.data_process.pd.read_csv", return_value=_chunks(_sample_df())):
             items = [TransformationItem(transformation="INVALID_OP", feature="age")]
             _, status_code = preprocess_data(db, uuid.uuid4(), items)
 
@@ -37,7 +44,7 @@ class TestUnknownTransformation:
 
     def test_error_message_contains_bad_name(self):
         db = _make_db()
-        with patch("app.services.data_process.pd.read_csv", return_value=_sample_df()):
+        with patch("app.services.data_process.pd.read_csv", return_value=_chunks(_sample_df())):
             items = [TransformationItem(transformation="INVALID_OP", feature="age")]
             result, _ = preprocess_data(db, uuid.uuid4(), items)
 
@@ -45,7 +52,7 @@ class TestUnknownTransformation:
 
     def test_error_message_lists_valid_options(self):
         db = _make_db()
-        with patch("app.services.data_process.pd.read_csv", return_value=_sample_df()):
+        with patch("app.services.data_process.pd.read_csv", return_value=_chunks(_sample_df())):
             items = [TransformationItem(transformation="INVALID_OP", feature="age")]
             result, _ = preprocess_data(db, uuid.uuid4(), items)
 
@@ -57,7 +64,7 @@ class TestUnknownTransformation:
 class TestColumnNotFound:
     def test_returns_422(self):
         db = _make_db()
-        with patch("app.services.data_process.pd.read_csv", return_value=_sample_df()):
+        with patch("app.services.data_process.pd.read_csv", return_value=_chunks(_sample_df())):
             items = [TransformationItem(transformation="Drop Column", feature="nonexistent_col")]
             _, status_code = preprocess_data(db, uuid.uuid4(), items)
 
@@ -65,7 +72,7 @@ class TestColumnNotFound:
 
     def test_error_message_contains_missing_column(self):
         db = _make_db()
-        with patch("app.services.data_process.pd.read_csv", return_value=_sample_df()):
+        with patch("app.services.data_process.pd.read_csv", return_value=_chunks(_sample_df())):
             items = [TransformationItem(transformation="Drop Column", feature="nonexistent_col")]
             result, _ = preprocess_data(db, uuid.uuid4(), items)
 
@@ -73,7 +80,7 @@ class TestColumnNotFound:
 
     def test_error_message_lists_available_columns(self):
         db = _make_db()
-        with patch("app.services.data_process.pd.read_csv", return_value=_sample_df()):
+        with patch("app.services.data_process.pd.read_csv", return_value=_chunks(_sample_df())):
             items = [TransformationItem(transformation="Drop Column", feature="nonexistent_col")]
             result, _ = preprocess_data(db, uuid.uuid4(), items)
 
@@ -83,7 +90,7 @@ class TestColumnNotFound:
 
     def test_second_item_with_bad_column_also_caught(self):
         db = _make_db()
-        with patch("app.services.data_process.pd.read_csv", return_value=_sample_df()):
+        with patch("app.services.data_process.pd.read_csv", return_value=_chunks(_sample_df())):
             items = [
                 TransformationItem(transformation="Drop Column", feature="age"),
                 TransformationItem(transformation="Drop Column", feature="ghost_col"),
@@ -4,12 +4,14 @@ Strategy
 --------
 * The database and file-system are both mocked so the suite is fast and
   self-contained (no postgres, no real CSV files required).
-* We patch ``app.services.data_process._get_file_path`` to skip disk I/O
-  and ``app.services.data_process.pd.read_csv`` to return fabricated DataFrames.
-* Patching ``_get_file_path`` (rather than ``get_settings``) avoids the
+* We patch ``app.services.data_process._reading_file`` to skip disk I/O
+  and ``app.services.data_process.pd.read_csv`` to return fabricated DataFrames
+  (wrapped by ``_chunks`` because the service streams the file in chunks).
+* Patching ``_reading_file`` (rather than ``get_settings``) avoids the
   ``@lru_cache`` complication and the need for a valid ``.env`` file.
 """
 
+import contextlib
 import uuid
 from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
@@ -32,12 +34,17 @@ def _make_db(file_obj):
 
 
 def _fake_file(name="test", ftype="csv"):
-    return SimpleNamespace(file_name=name, file_type=ftype)
+    return SimpleNamespace(file_name=name, file_type=ftype, read_schema=None)
+
+
+def _chunks(df):
+    """Mimic the context-managed chunk reader ``pd.read_csv(chunksize=...)`` returns."""
+    return contextlib.nullcontext([df])
 
 
 FILE_ID = uuid.uuid4()
 
-_FILE_PATH_PATCH = "app.services.data_process._get_file_path"
+_FILE_PATH_PATCH = "app.services.data_process._reading_file"
 _FAKE_PATH = "/tmp/fake_dataset.csv"
 
 
@@ -56,11 +63,11 @@ class TestGetCorrelationMatrix:
         assert status == 400
         assert body["success"] is False
 
-    @patch(_FILE_PATH_PATCH, return_value=_FAKE_PATH)
+    @patch(_FILE_PATH_PATCH, side_effect=lambda db, file: contextlib.nullcontext(_FAKE_PATH))
     @patch("app.services.data_process.pd.read_csv")
     def test_happy_path_returns_200(self, mock_read_csv, _mock_path):
         """Returns 200 with columns and matrix for a valid numeric CSV."""
-        mock_read_csv.return_value = pd.DataFrame({"a": [1.0, 2.0, 3.0], "b": [4.0, 5.0, 6.0]})
+        mock_read_csv.return_value = _chunks(pd.DataFrame({"a": [1.0, 2.0, 3.0], "b": [4.0, 5.0, 6.0]}))
         db = _make_db(_fake_file())
 
         body, status = get_correlation_matrix(db, file_id=FILE_ID)
@@ -71,11 +78,11 @@ class TestGetCorrelationMatrix:
         assert len(body["data"]["matrix"]) == 2
         assert len(body["data"]["matrix"][0]) == 2
 
-    @patch(_FILE_PATH_PATCH, return_value=_FAKE_PATH)
+    @patch(_FILE_PATH_PATCH, side_effect=lambda db, file: contextlib.nullcontext(_FAKE_PATH))
     @patch("app.services.data_process.pd.read_csv")
     def test_diagonal_is_one(self, mock_read_csv, _mock_path):
         """Diagonal values of the correlation matrix must equal 1.0."""
-        mock_read_csv.return_value = pd.DataFrame({"x": [1, 2, 3], "y": [3, 1, 2]})
+        mock_read_csv.return_value = _chunks(pd.DataFrame({"x": [1, 2, 3], "y": [3, 1, 2]}))
         db = _make_db(_fake_file())
 
         body, _ = get_correlation_matrix(db, file_id=FILE_ID)
@@ -84,11 +91,11 @@ class TestGetCorrelationMatrix:
         for i in range(len(matrix)):
             assert matrix[i][i] == pytest.approx(1.0)
 
-    @patch(_FILE_PATH_PATCH, return_value=_FAKE_PATH)
+    @patch(_FILE_PATH_PATCH, side_effect=lambda db, file: contextlib.nullcontext(_FAKE_PATH))
     @patch("app.services.data_process.pd.read_csv")
     def test_values_clamped_in_range(self, mock_read_csv, _mock_path):
         """All non-null matrix values must be in [-1, 1]."""
-        mock_read_csv.return_value = pd.DataFrame({"a": [1, 2, 3, 4], "b": [2, 4, 6, 8], "c": [8, 6, 4, 2]})
+        mock_read_csv.return_value = _chunks(pd.DataFrame({"a": [1, 2, 3, 4], "b": [2, 4, 6, 8], "c": [8, 6, 4, 2]}))
         db = _make_db(_fake_file())
 
         body, _ = get_correlation_matrix(db, file_id=FILE_ID)
@@ -99,11 +106,11 @@ class TestGetCorrelationMatrix:
                 if val is not None:
                     assert -1.0 <= val <= 1.0
 
-    @patch(_FILE_PATH_PATCH, return_value=_FAKE_PATH)
+    @patch(_FILE_PATH_PATCH, side_effect=lambda db, file: contextlib.nullcontext(_FAKE_PATH))
     @patch("app.services.data_process.pd.read_csv")
     def test_no_numeric_columns_returns_empty(self, mock_read_csv, _mock_path):
         """A CSV with only string columns returns empty columns and matrix."""
-        mock_read_csv.return_value = pd.DataFrame({"name": ["alice", "bob"], "city": ["NY", "LA"]})
+        mock_read_csv.return_value = _chunks(pd.DataFrame({"name": ["alice", "bob"], "city": ["NY", "LA"]}))
         db = _make_db(_fake_file())
 
         body, status = get_correlation_matrix(db, file_id=FILE_ID)
@@ -112,12 +119,12 @@ class TestGetCorrelationMatrix:
         assert body["data"]["columns"] == []
         assert body["data"]["matrix"] == []
 
-    @patch(_FILE_PATH_PATCH, return_value=_FAKE_PATH)
+    @patch(_FILE_PATH_PATCH, side_effect=lambda db, file: contextlib.nullcontext(_FAKE_PATH))
     @patch("app.services.data_process.pd.read_csv")
     def test_non_numeric_columns_excluded(self, mock_read_csv, _mock_path):
         """String columns must not appear in the output."""
-        mock_read_csv.return_value = pd.DataFrame(
-            {"label": ["a", "b", "c"], "score": [1.0, 2.0, 3.0], "rank": [3, 2, 1]}
+        mock_read_csv.return_value = _chunks(
+            pd.DataFrame({"label": ["a", "b", "c"], "score": [1.0, 2.0, 3.0], "rank": [3, 2, 1]})
         )
         db = _make_db(_fake_file())
 
@@ -128,11 +135,11 @@ class TestGetCorrelationMatrix:
         assert "score" in columns
         assert "rank" in columns
 
-    @patch(_FILE_PATH_PATCH, return_value=_FAKE_PATH)
+    @patch(_FILE_PATH_PATCH, side_effect=lambda db, file: contextlib.nullcontext(_FAKE_PATH))
     @patch("app.services.data_process.pd.read_csv")
     def test_nan_serialised_as_none(self, mock_read_csv, _mock_path):
         """NaN correlation values (e.g. constant column) are serialised as None."""
-        mock_read_csv.return_value = pd.DataFrame({"constant": [5, 5, 5], "varying": [1, 2, 3]})
+        mock_read_csv.return_value = _chunks(pd.DataFrame({"constant": [5, 5, 5], "varying": [1, 2, 3]}))
         db = _make_db(_fake_file())
 
         body, _ = get_correlation_matrix(db, file_id=FILE_ID)
@@ -145,7 +152,7 @@ class TestGetCorrelationMatrix:
         assert matrix[constant_idx][varying_idx] is None
         assert matrix[varying_idx][constant_idx] is None
 
-    @patch(_FILE_PATH_PATCH, return_value=_FAKE_PATH)
+    @patch(_FILE_PATH_PATCH, side_effect=lambda db, file: contextlib.nullcontext(_FAKE_PATH))
     @patch("app.services.data_process.pd.read_csv", side_effect=FileNotFoundError("missing"))
     def test_file_not_found_on_disk(self, _mock_csv, _mock_path):
         """Returns 500 when the CSV file does not exist on disk."""
@@ -156,11 +163,11 @@ class TestGetCorrelationMatrix:
         assert status == 500
         assert body["success"] is False
 
-    @patch(_FILE_PATH_PATCH, return_value=_FAKE_PATH)
+    @patch(_FILE_PATH_PATCH, side_effect=lambda db, file: contextlib.nullcontext(_FAKE_PATH))
     @patch("app.services.data_process.pd.read_csv")
     def test_values_rounded_to_six_decimal_places(self, mock_read_csv, _mock_path):
         """Numeric values are rounded to at most 6 decimal places."""
-        mock_read_csv.return_value = pd.DataFrame({"p": [1, 2, 3, 4, 5], "q": [2, 3, 5, 4, 6]})
+        mock_read_csv.return_value = _chunks(pd.DataFrame({"p": [1, 2, 3, 4, 5], "q": [2, 3, 5, 4, 6]}))
         db = _make_db(_fake_file())
 
         body, _ = get_correlation_matrix(db, file_id=FILE_ID)
@@ -171,11 +178,11 @@ class TestGetCorrelationMatrix:
                 if val is not None:
                     assert val == round(val, 6)
 
-    @patch(_FILE_PATH_PATCH, return_value=_FAKE_PATH)
+    @patch(_FILE_PATH_PATCH, side_effect=lambda db, file: contextlib.nullcontext(_FAKE_PATH))
     @patch("app.services.data_process.pd.read_csv")
     def test_matrix_is_symmetric(self, mock_read_csv, _mock_path):
         """Correlation matrix must be symmetric: matrix[i][j] == matrix[j][i]."""
-        mock_read_csv.return_value = pd.DataFrame({"a": [1, 2, 3], "b": [4, 5, 6], "c": [7, 5, 3]})
+        mock_read_csv.return_value = _chunks(pd.DataFrame({"a": [1, 2, 3], "b": [4, 5, 6], "c": [7, 5, 3]}))
         db = _make_db(_fake_file())
 
         body, _ = get_correlation_matrix(db, file_id=FILE_ID)
@@ -35,6 +35,7 @@ def test_get_file_data_unsupported_file_type(mock_db, mock_settings, file_type,
     mock_file.file_name = "test"
     mock_file.file_type = file_type
     mock_file.disk_name = f"test.{file_type}"
+    mock_file.current_version_id = None
     mock_db.exec.return_value.first.return_value = mock_file
     with patch("builtins.open", side_effect=FileNotFoundError):
         body, status = get_file_data(mock_db, uuid.uuid4())
@@ -53,6 +54,7 @@ def test_get_file_data_csv_success(tmp_path, mock_db, mock_settings):
     mock_file.file_name = "test"
     mock_file.file_type = "csv"
     mock_file.disk_name = "test.csv"
+    mock_file.current_version_id = None
     mock_db.exec.return_value.first.return_value = mock_file
 
     body, status = get_file_data(mock_db, mock_file.id)
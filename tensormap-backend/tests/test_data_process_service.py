@@ -1,6 +1,7 @@
 """Unit tests for the data_process service.
 
-All database interactions use MagicMock — no running DB required.
+Database interactions use MagicMock, except for preprocessing, whose dataset
+versions are exercised against the test database session.
 CSV-based tests use pytest's tmp_path fixture for realistic temp files.
 """
 
@@ -11,6 +12,7 @@ import pandas as pd
 import pytest
 
 from app.models.data import DataFile, DataProcess
+from app.schemas.data_process import TransformationItem
 from app.services.data_process import (
     add_target_service,
     delete_one_target_by_id_service,
@@ -20,6 +22,7 @@ from app.services.data_process import (
     get_one_target_by_id_service,
     preprocess_data,
 )
+from app.services.dataset_versions import resolve_version_path
 
 # ---------------------------------------------------------------------------
 # Fixtures
@@ -44,6 +47,7 @@ def sample_file(file_id):
     f.file_name = "iris"
     f.file_type = "csv"
     f.disk_name = "iris.csv"
+    f.current_version_id = None
     f.row_count = None
     f.columns = None
     return f
@@ -322,6 +326,7 @@ class TestGetDataMetrics:
         reg_file.file_name = "housing"
         reg_file.file_type = "csv"
         reg_file.disk_name = "housing.csv"
+        reg_file.current_version_id = None
 
         mock_settings.return_value.upload_folder = str(regression_csv)
         mock_db.exec.return_value.first.return_value = reg_file
@@ -359,6 +364,7 @@ class TestGetDataMetrics:
         empty_file.file_name = "empty"
         empty_file.file_type = "csv"
         empty_file.disk_name = "empty.csv"
+        empty_file.current_version_id = None
 
         mock_settings.return_value.upload_folder = str(tmp_path)
         mock_db.exec.return_value.first.return_value = empty_file
@@ -420,6 +426,7 @@ class TestGetFileData:
         empty_file.file_name = "empty"
         empty_file.file_type = "csv"
         empty_file.disk_name = "empty.csv"
+        empty_file.current_version_id = None
         empty_file.row_count = None
 
         mock_settings.return_value.upload_folder = str(tmp_path)
@@ -457,51 +464,51 @@ class TestGetFileData:
 
 
 class TestPreprocessData:
-    @patch("app.services.data_process.get_settings")
-    def test_drop_column(self, mock_settings, mock_db, file_id, sample_file, classification_csv):
-        mock_settings.return_value.upload_folder = str(classification_csv)
-        mock_db.exec.return_value.first.return_value = sample_file
+    """Preprocessing records a new head version and leaves the upload untouched."""
 
-        t = MagicMock()
-        t.transformation = "Drop Column"
-        t.feature = "species"
+    @pytest.fixture()
+    def iris_file(self, db_session, classification_csv):
+        file = DataFile(file_name="iris", file_type="csv", disk_name="iris.csv")
+        db_session.add(file)
+        db_session.commit()
+        with (
+            patch("app.services.data_process.get_settings") as mock_settings,
+            patch("app.services.dataset_versions.get_settings", mock_settings),
+        ):
+            mock_settings.return_value.upload_folder = str(classification_csv)
+            yield file
 
-        body, status = preprocess_data(mock_db, file_id, [t])
+    def _head(self, db_session, file) -> pd.DataFrame:
+        return pd.read_csv(resolve_version_path(db_session, file))
 
-        assert status == 200
-        df = pd.read_csv(classification_csv / "iris.csv")
-        assert "species" not in df.columns
+    def test_drop_column(self, db_session, iris_file, classification_csv):
+        t = TransformationItem(transformation="Drop Column", feature="species")
 
-    @patch("app.services.data_process.get_settings")
-    def test_categorical_to_numerical(self, mock_settings, mock_db, file_id, sample_file, classification_csv):
-        mock_settings.return_value.upload_folder = str(classification_csv)
-        mock_db.exec.return_value.first.return_value = sample_file
+        body, status = preprocess_data(db_session, iris_file.id, [t])
+
+        assert status == 200
+        assert body["data"]["number"] == 1
+        assert "species" not in self._head(db_session, iris_file).columns
+        assert "species" in pd.read_csv(classification_csv / "iris.csv").columns
 
-        t = MagicMock()
-        t.transformation = "Categorical to Numerical"
-        t.feature = "species"
+    def test_categorical_to_numerical(self, db_session, iris_file):
+        t = TransformationItem(transformation="Categorical to Numerical", feature="species")
 
-        body, status = preprocess_data(mock_db, file_id, [t])
+        body, status = preprocess_data(db_session, iris_file.id, [t])
 
         assert status == 200
-        df = pd.read_csv(classification_csv / "iris.csv")
-        assert pd.api.types.is_integer_dtype(df["species"])
-
-    @patch("app.services.data_process.get_settings")
-    def test_one_hot_encoding(self, mock_settings, mock_db, file_id, sample_file, classification_csv):
-        mock_settings.return_value.upload_folder = str(classification_csv)
-        mock_db.exec.return_value.first.return_value = sample_file
+        assert pd.api.types.is_integer_dtype(self._head(db_session, iris_file)["species"])
 
-        t = MagicMock()
-        t.transformation = "One Hot Encoding"
-        t.feature = "species"
+    def test_one_hot_encoding(self, db_session, iris_file):
+        t = TransformationItem(transformation="One Hot Encoding", feature="species")
 
-        body, status = preprocess_data(mock_db, file_id, [t])
+        body, status = preprocess_data(db_session, iris_file.id, [t])
 
         assert status == 200
-        df = pd.read_csv(classification_csv / "iris.csv")
+        df = self._head(db_session, iris_file)
         assert "species" not in df.columns
         assert any("species" in col for col in df.columns)
+        assert body["data"]["columns"] == list(df.columns)
 
     def test_file_not_in_db(self, mock_db, file_id):
         mock_db.exec.return_value.first.return_value = None
@@ -511,17 +518,12 @@ class TestPreprocessData:
         assert status == 400
         assert body["success"] is False
 
-    @patch("app.services.data_process.get_settings")
-    def test_missing_column(self, mock_settings, mock_db, file_id, sample_file, classification_csv):
+    def test_missing_column(self, db_session, iris_file):
         """Dropping a column that doesn't exist returns a 422 error."""
-        mock_settings.return_value.upload_folder = str(classification_csv)
-        mock_db.exec.return_value.first.return_value = sample_file
-
-        t = MagicMock()
-        t.transformation = "Drop Column"
-        t.feature = "nonexistent_column"
+        t = TransformationItem(transformation="Drop Column", feature="nonexistent_column")
 
-        body, status = preprocess_data(mock_db, file_id, [t])
+        body, status = preprocess_data(db_session, iris_file.id, [t])
 
         assert status == 422
         assert body["success"] is False
+        assert iris_file.current_version_id is None
@@ -1,11 +1,14 @@
+import hashlib
+import io
+import os
 import uuid
+import zipfile
 from unittest.mock import MagicMock, patch
 
-import pandas as pd
 import pytest
 from sqlalchemy.exc import SQLAlchemyError
 
-from app.models.data import DataFile
+from app.models.data import DataFile, ProfileStatus
 from app.services.data_upload import (
     add_file_service,
     delete_one_file_by_id_service,
@@ -28,10 +31,19 @@ def sample_file(file_id):
     f = MagicMock(spec=DataFile)
     f.id = file_id
     f.disk_name = "some_file.csv"
+    f.current_version_id = None
     f.file_type = "csv"
     return f
 
 
+def _zip_bytes(members):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return buf.getvalue()
+
+
 class TestDeleteOneFileById:
     def test_returns_400_when_file_not_found(self, mock_db, file_id):
         mock_db.exec.return_value.first.return_value = None
@@ -40,10 +52,11 @@ class TestDeleteOneFileById:
         assert body["success"] is False
 
     def test_happy_path_deletes_db_and_disk(self, mock_db, file_id, sample_file):
-        r1, r2 = MagicMock(), MagicMock()
+        r1, r2, r3 = MagicMock(), MagicMock(), MagicMock()
         r1.first.return_value = sample_file
         r2.all.return_value = []
-        mock_db.exec.side_effect = [r1, r2]
+        r3.all.return_value = []
+        mock_db.exec.side_effect = [r1, r2, r3]
 
         with (
             patch("app.services.data_upload.os.remove") as mock_remove,
@@ -59,10 +72,11 @@ class TestDeleteOneFileById:
         mock_remove.assert_called_once()
 
     def test_disk_removed_after_db_commit(self, mock_db, file_id, sample_file):
-        r1, r2 = MagicMock(), MagicMock()
+        r1, r2, r3 = MagicMock(), MagicMock(), MagicMock()
         r1.first.return_value = sample_file
         r2.all.return_value = []
-        mock_db.exec.side_effect = [r1, r2]
+        r3.all.return_value = []
+        mock_db.exec.side_effect = [r1, r2, r3]
 
         call_order = []
         mock_db.commit.side_effect = lambda: call_order.append("commit")
@@ -78,10 +92,11 @@ class TestDeleteOneFileById:
 
     def test_db_delete_failure_does_not_remove_disk(self, mock_db, file_id, sample_file):
         """If db.commit() raises, the disk file must NOT be removed."""
-        r1, r2 = MagicMock(), MagicMock()
+        r1, r2, r3 = MagicMock(), MagicMock(), MagicMock()
         r1.first.return_value = sample_file
         r2.all.return_value = []
-        mock_db.exec.side_effect = [r1, r2]
+        r3.all.return_value = []
+        mock_db.exec.side_effect = [r1, r2, r3]
         mock_db.commit.side_effect = SQLAlchemyError("DB commit failed")
 
         removed = []
@@ -96,14 +111,33 @@ class TestDeleteOneFileById:
         assert status == 500
         assert len(removed) == 0, f"os.remove was called despite commit failure: {removed}"
 
+    def test_shared_blob_kept_while_referenced(self, mock_db, file_id, sample_file):
+        r1, r2, r3 = MagicMock(), MagicMock(), MagicMock()
+        r1.first.return_value = sample_file
+        r2.all.return_value = []
+        r3.all.return_value = [sample_file.disk_name]  # another DataFile has the same content
+        mock_db.exec.side_effect = [r1, r2, r3]
+
+        with (
+            patch("app.services.data_upload.os.remove") as mock_remove,
+            patch("app.services.data_upload.get_settings") as mock_settings,
+        ):
+            mock_settings.return_value.upload_folder = "/tmp"
+            body, status = delete_one_file_by_id_service(mock_db, file_id)
+
+        assert status == 200
+        mock_db.delete.assert_called_once_with(sample_file)
+        mock_remove.assert_not_called()
+
     def test_nulls_all_model_basic_file_ids(self, mock_db, file_id, sample_file):
         mb1, mb2 = MagicMock(), MagicMock()
         mb1.file_id = file_id
         mb2.file_id = file_id
-        r1, r2 = MagicMock(), MagicMock()
+        r1, r2, r3 = MagicMock(), MagicMock(), MagicMock()
         r1.first.return_value = sample_file
         r2.all.return_value = [mb1, mb2]
-        mock_db.exec.side_effect = [r1, r2]
+        r3.all.return_value = []
+        mock_db.exec.side_effect = [r1, r2, r3]
 
         with (
             patch("app.services.data_upload.os.remove"),
@@ -118,52 +152,45 @@ class TestDeleteOneFileById:
 
 
 class TestAddFileService:
-    def _make_fw(self, filename: str, size: int = 100) -> MagicMock:
+    def _make_fw(self, filename: str, content: bytes = b"a,b\n1,3\n2,4\n") -> MagicMock:
         fw = MagicMock()
         fw.filename = filename
-        fw.file.seek = MagicMock()
-        fw.file.tell = MagicMock(return_value=size)
+        fw.file = io.BytesIO(content)
         return fw
 
-    def test_rejects_oversized_file(self):
+    def test_rejects_oversized_file(self, tmp_path):
         db = MagicMock()
-        fw = self._make_fw("data.csv", size=300 * 1024 * 1024)
+        fw = self._make_fw("data.csv", content=b"x" * 4096)
         with patch("app.services.data_upload.get_settings") as ms:
-            ms.return_value.max_content_length = 200 * 1024 * 1024
-            ms.return_value.upload_folder = "/tmp/tm_test"
+            ms.return_value.max_content_length = 1024
+            ms.return_value.upload_folder = str(tmp_path)
             body, status = add_file_service(db, fw)
         assert status == 413
         assert body["success"] is False
+        assert os.listdir(tmp_path) == []
+        db.add.assert_not_called()
 
-    def test_rejects_when_file_size_unreadable(self):
+    def test_rejects_when_upload_unreadable(self, tmp_path):
         db = MagicMock()
         fw = self._make_fw("data.csv")
-        fw.file.seek.side_effect = OSError("seek failed")
+        fw.file = MagicMock()
+        fw.file.read.side_effect = OSError("read failed")
         with patch("app.services.data_upload.get_settings") as ms:
             ms.return_value.max_content_length = 200 * 1024 * 1024
-            ms.return_value.upload_folder = "/tmp/tm_test"
+            ms.return_value.upload_folder = str(tmp_path)
             body, status = add_file_service(db, fw)
-        assert status == 413
+        assert status == 500
         assert body["success"] is False
+        assert os.listdir(tmp_path) == []
 
     def test_csv_happy_path_creates_db_record(self, tmp_path):
         db = MagicMock()
-        fw = MagicMock()
-        fw.filename = "iris.csv"
-        fw.file.seek = MagicMock()
-        fw.file.tell = MagicMock(return_value=100)
-        fw.save = MagicMock(side_effect=lambda p: None)
+        content = b"a,b\n1,3\n2,4\n"
+        fw = self._make_fw("iris.csv", content)
 
         with (
             patch("app.services.data_upload.get_settings") as ms,
-            patch("app.services.data_upload.os.makedirs"),
-            patch(
-                "app.services.data_upload.pd.read_csv",
-                side_effect=[
-                    pd.DataFrame(columns=["a", "b"]),
-                    iter([pd.DataFrame({"a": [1, 2], "b": [3, 4]})]),
-                ],
-            ),
+            patch("app.services.data_upload.schedule_profile") as mock_schedule,
         ):
             ms.return_value.max_content_length = 200 * 1024 * 1024
             ms.return_value.upload_folder = str(tmp_path)
@@ -171,34 +198,58 @@ class TestAddFileService:
 
         assert status == 201
         assert body["success"] is True
+        assert body["data"]["profile_status"] == "pending"
         db.add.assert_called_once()
         db.commit.assert_called_once()
-
-    def test_zip_happy_path_creates_db_record_and_image_properties(self, tmp_path):
+        record = db.add.call_args[0][0]
+        # Profiling happens in the background, after the record is committed.
+        assert record.columns is None and record.row_count is None
+        assert record.profile_status == ProfileStatus.PENDING
+        mock_schedule.assert_called_once_with(record.id)
+        assert record.content_hash == hashlib.sha256(content).hexdigest()
+        assert record.disk_name == f"blobs/{record.content_hash[:2]}/{record.content_hash}.csv"
+        assert (tmp_path / record.disk_name).read_bytes() == content
+        assert not (tmp_path / (record.disk_name + ".cache")).exists()
+
+    def test_identical_upload_reuses_profile(self, tmp_path):
         db = MagicMock()
-        fw = MagicMock()
-        fw.filename = "dataset.zip"
-        fw.file.seek = MagicMock()
-        fw.file.tell = MagicMock(return_value=500)
-        fw.save = MagicMock(side_effect=lambda p: None)
-
+        profiled = DataFile(
+            file_name="iris",
+            file_type="csv",
+            disk_name="x",
+            columns=["a", "b"],
+            row_count=2,
+            dtypes={"a": "int64", "b": "int64"},
+            null_counts={"a": 0, "b": 0},
+            profile_status=ProfileStatus.READY,
+        )
+        db.exec.return_value.first.return_value = profiled
         with (
             patch("app.services.data_upload.get_settings") as ms,
-            patch("app.services.data_upload.os.makedirs"),
-            patch("app.services.data_upload.zipfile.ZipFile") as mzf,
+            patch("app.services.data_upload.schedule_profile") as mock_schedule,
         ):
             ms.return_value.max_content_length = 200 * 1024 * 1024
             ms.return_value.upload_folder = str(tmp_path)
+            add_file_service(db, self._make_fw("iris.csv"))
+            body, _ = add_file_service(db, self._make_fw("copy.csv"))
+
+        first, second = (c[0][0] for c in db.add.call_args_list)
+        assert first.id != second.id
+        assert first.disk_name == second.disk_name
+        assert (second.columns, second.row_count, second.dtypes) == (["a", "b"], 2, {"a": "int64", "b": "int64"})
+        assert body["data"]["profile_status"] == "ready"
+        # Only the first upload is profiled.
+        mock_schedule.assert_called_once_with(first.id)
+        assert os.listdir(tmp_path) == ["blobs"]
+        assert [p.name for p in (tmp_path / first.disk_name).parent.glob("*.csv")] == [first.disk_name.split("/")[-1]]
 
-            mock_zf = MagicMock()
-            mock_zf.__enter__ = MagicMock(return_value=mock_zf)
-            mock_zf.__exit__ = MagicMock(return_value=False)
-            mock_zf.namelist.return_value = ["img/cat.png"]
-            mock_info = MagicMock()
-            mock_info.file_size = 500
-            mock_zf.getinfo.return_value = mock_info
-            mzf.return_value = mock_zf
+    def test_zip_happy_path_creates_db_record_and_image_properties(self, tmp_path):
+        db = MagicMock()
+        fw = self._make_fw("dataset.zip", _zip_bytes({"img/cat.png": b"\x89PNG"}))
 
+        with patch("app.services.data_upload.get_settings") as ms:
+            ms.return_value.max_content_length = 200 * 1024 * 1024
+            ms.return_value.upload_folder = str(tmp_path)
             body, status = add_file_service(db, fw)
 
         assert status == 201
@@ -206,39 +257,26 @@ class TestAddFileService:
         assert db.add.call_count == 2
         db.flush.assert_called_once()
         db.commit.assert_called_once()
+        record = db.add.call_args_list[0][0][0]
+        assert record.profile_status == ProfileStatus.READY
+        extracted = tmp_path / record.disk_name.removesuffix(".zip")
+        assert (extracted / "img" / "cat.png").read_bytes() == b"\x89PNG"
 
     def test_zip_path_traversal_rejected(self, tmp_path):
         db = MagicMock()
-        fw = MagicMock()
-        fw.filename = "evil.zip"
-        fw.file.seek = MagicMock()
-        fw.file.tell = MagicMock(return_value=100)
-        fw.save = MagicMock()
+        fw = self._make_fw("evil.zip", _zip_bytes({"img/cat.png": b"x", "../../../etc/passwd": b"x"}))
 
-        with (
-            patch("app.services.data_upload.get_settings") as ms,
-            patch("app.services.data_upload.os.makedirs"),
-            patch("app.services.data_upload.zipfile.ZipFile") as mzf,
-            patch("app.services.data_upload.os.remove"),
-            patch("app.services.data_upload.shutil.rmtree"),
-        ):
+        with patch("app.services.data_upload.get_settings") as ms:
             ms.return_value.max_content_length = 200 * 1024 * 1024
             ms.return_value.upload_folder = str(tmp_path)
-
-            mock_zf = MagicMock()
-            mock_zf.__enter__ = MagicMock(return_value=mock_zf)
-            mock_zf.__exit__ = MagicMock(return_value=False)
-            mock_zf.namelist.return_value = ["../../../etc/passwd"]
-            mock_info = MagicMock()
-            mock_info.file_size = 50
-            mock_zf.getinfo.return_value = mock_info
-            mzf.return_value = mock_zf
-
             body, status = add_file_service(db, fw)
 
         assert status == 400
         assert body["success"] is False
         assert "traversal" in body["message"].lower()
+        db.add.assert_not_called()
+        # Only the blob's lock file, which outlives the blob by design.
+        assert [p.suffix for p in (tmp_path / "blobs").rglob("*.*")] == [".lock"]
 
 
 class TestGetAllFilesService:
@@ -249,6 +287,7 @@ class TestGetAllFilesService:
         f.file_name = "train"
         f.file_type = "csv"
         f.disk_name = "train_abc.csv"
+        f.current_version_id = None
         f.columns = ["x", "y"]
         f.row_count = 10
 
@@ -268,33 +307,35 @@ class TestGetAllFilesService:
         assert body["data"][0]["row_count"] == 10
         assert "pagination" in body
 
-    def test_backfills_columns_for_csv_with_no_cache(self, tmp_path):
-        csv_path = tmp_path / "data.csv"
-        pd.DataFrame({"a": [1], "b": [2]}).to_csv(csv_path, index=False)
-
+    @pytest.mark.parametrize(
+        "profile_status, expected",
+        [
+            (None, "pending"),  # uploaded before background profiling, not yet backfilled
+            (ProfileStatus.RUNNING, "running"),
+        ],
+    )
+    def test_unprofiled_csv_is_flagged_not_read(self, profile_status, expected):
         db = MagicMock()
         f = MagicMock()
         f.id = uuid.uuid4()
-        f.file_name = "data"
         f.file_type = "csv"
-        f.disk_name = "data.csv"
         f.columns = None
         f.row_count = None
+        f.profile_status = profile_status
 
         db.exec.side_effect = [
             MagicMock(one=MagicMock(return_value=1)),
             MagicMock(all=MagicMock(return_value=[f])),
         ]
 
-        with patch("app.services.data_upload.get_settings") as ms:
-            ms.return_value.upload_folder = str(tmp_path)
+        with patch("pandas.read_csv") as mock_read:
             body, status = get_all_files_service(db)
 
         assert status == 200
-        assert body["data"][0]["fields"] == ["a", "b"]
-        assert body["data"][0]["row_count"] == 1
-        db.add.assert_called_once_with(f)
-        db.commit.assert_called_once()
+        item = body["data"][0]
+        assert (item["fields"], item["row_count"], item["profile_status"], item["error"]) == ([], 0, expected, False)
+        mock_read.assert_not_called()
+        db.commit.assert_not_called()
 
     def test_zip_file_has_no_fields(self):
         db = MagicMock()
@@ -303,6 +344,7 @@ class TestGetAllFilesService:
         f.file_name = "images"
         f.file_type = "zip"
         f.disk_name = "images.zip"
+        f.current_version_id = None
         f.columns = None
         f.row_count = None
 
@@ -0,0 +1,188 @@
+"""Tests for the columnar-sidecar dataset reader."""
+
+import os
+import uuid
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import pytest
+
+from app.models import DataFile
+from app.schemas.data_process import TransformationItem
+from app.services.data_process import (
+    get_column_stats_service,
+    get_correlation_matrix,
+    preprocess_data,
+)
+from app.services.dataset_reader import (
+    ChunkSchema,
+    DatasetReader,
+    DowncastSchemaBuilder,
+    artifact_dir,
+    build_sidecar,
+    remove_artifacts,
+    sidecar_path,
+)
+from app.services.dataset_versions import resolve_version_path
+
+
+@pytest.fixture()
+def mixed_csv(tmp_path):
+    """A CSV with int, float (with a gap), string and bool columns."""
+    path = tmp_path / "mixed.csv"
+    path.write_text("id,score,name,flag\n1,0.5,alice,True\n2,,bob,False\n3,2.5,carol,True\n")
+    return str(path)
+
+
+def _db_for(disk_name):
+    f = MagicMock()
+    f.file_name = "mixed"
+    f.file_type = "csv"
+    f.disk_name = disk_name
+    f.current_version_id = None
+    db = MagicMock()
+    db.exec.return_value.first.return_value = f
+    return db
+
+
+def test_build_sidecar_roundtrips_pandas_dtypes(mixed_csv):
+    assert build_sidecar(mixed_csv) is True
+    assert os.path.exists(sidecar_path(mixed_csv))
+
+    from_sidecar = DatasetReader(mixed_csv).read()
+    pd.testing.assert_frame_equal(from_sidecar, pd.read_csv(mixed_csv))
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "b,c\nTrue,1\n,2\nFalse,3\nTrue,4\n",  # bools with a gap stay Python bools
+        "a,b\n1,x\n2,y\n3,z\nfoo,w\n",  # numbers first, text later: all strings
+        "a,b\n1,1\n2,2\n3,\n4,\n",  # ints with trailing gaps widen to float
+        "a,b\n",
+    ],
+)
+def test_chunked_reads_match_full_read(tmp_path, content):
+    path = tmp_path / "chunky.csv"
+    path.write_text(content)
+    reader = DatasetReader(str(path))
+    expected = pd.read_csv(path)
+
+    chunks = list(reader.iter_chunks(2, schema=reader.schema(2)))
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), expected)
+
+    assert build_sidecar(str(path), chunksize=2)
+    pd.testing.assert_frame_equal(reader.read(), expected)
+
+
+def test_compact_schema_reads_narrow_dtypes_losslessly(tmp_path):
+    path = tmp_path / "wide.csv"
+    rows = [f"{i},{i / 10},{i / 7},{'ab'[i % 2]},name{i},{i * 100_000}" for i in range(6)]
+    path.write_text("small,tenths,sevenths,side,name,big\n" + "\n".join(rows) + "\n")
+    builder = DowncastSchemaBuilder()
+    for chunk in DatasetReader(str(path)).iter_chunks(4):
+        builder.update(chunk)
+    schema = ChunkSchema.from_json(builder.build_compact().to_json())
+
+    assert schema.dtypes == {
+        "small": "int8",
+        "tenths": "float32",
+        "sevenths": "float64",  # 1/7 needs more digits than float32 keeps
+        "side": "category",
+        "name": "object",  # every value distinct
+        "big": "int32",
+    }
+    assert schema.categories == {"side": ["a", "b"]}
+
+    expected = pd.read_csv(path)
+    compact = DatasetReader(str(path), schema=schema).read()
+    assert compact["tenths"].dtype == "float32" and list(compact["side"].cat.categories) == ["a", "b"]
+    assert compact.memory_usage(deep=True).sum() < expected.memory_usage(deep=True).sum()
+    assert compact.to_csv(index=False) == expected.to_csv(index=False)
+    pd.testing.assert_frame_equal(DatasetReader(str(path), schema=schema.widened()).read(), expected)
+
+    assert build_sidecar(str(path), chunksize=4)
+    pd.testing.assert_frame_equal(DatasetReader(str(path), schema=schema).read(), compact)
+    chunks = DatasetReader(str(path), schema=schema).iter_chunks(4)
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), compact)
+
+
+def test_reader_falls_back_to_csv_without_sidecar(mixed_csv):
+    reader = DatasetReader(mixed_csv)
+    assert reader.has_sidecar() is False
+    pd.testing.assert_frame_equal(reader.read(), pd.read_csv(mixed_csv))
+
+
+def test_reader_ignores_stale_sidecar(mixed_csv):
+    build_sidecar(mixed_csv)
+    with open(mixed_csv, "a") as f:
+        f.write("4,3.5,dave,False\n")
+    stamp = os.stat(sidecar_path(mixed_csv)).st_mtime_ns + 1_000_000_000
+    os.utime(mixed_csv, ns=(stamp, stamp))
+
+    reader = DatasetReader(mixed_csv)
+    assert reader.has_sidecar() is False
+    assert len(reader.read()) == 4
+
+
+def test_read_projects_requested_columns_in_order(mixed_csv):
+    expected = pd.read_csv(mixed_csv)[["name", "id"]]
+    pd.testing.assert_frame_equal(DatasetReader(mixed_csv).read(columns=["name", "id"]), expected)
+    build_sidecar(mixed_csv)
+    pd.testing.assert_frame_equal(DatasetReader(mixed_csv).read(columns=["name", "id"]), expected)
+
+
+def test_read_numeric_skips_non_numeric_columns(mixed_csv):
+    build_sidecar(mixed_csv)
+    numeric = DatasetReader(mixed_csv).read_numeric()
+    assert list(numeric.columns) == ["id", "score"]
+
+
+def test_build_sidecar_failure_returns_false(tmp_path):
+    assert build_sidecar(str(tmp_path / "missing.csv")) is False
+
+
+def test_remove_artifacts_deletes_cache_dir(mixed_csv):
+    build_sidecar(mixed_csv)
+    remove_artifacts(mixed_csv)
+    assert not os.path.exists(artifact_dir(mixed_csv))
+    assert os.path.exists(mixed_csv)
+
+
+def test_services_read_from_sidecar(tmp_path, mixed_csv):
+    build_sidecar(mixed_csv)
+    db = _db_for("mixed.csv")
+    with (
+        patch("app.services.data_process.get_settings") as ms,
+        patch("app.services.dataset_reader.pd.read_csv", side_effect=AssertionError("CSV re-parsed")),
+    ):
+        ms.return_value.upload_folder = str(tmp_path)
+        stats_body, stats_status = get_column_stats_service(db, uuid.uuid4())
+        corr_body, corr_status = get_correlation_matrix(db, uuid.uuid4())
+
+    assert stats_status == 200
+    assert stats_body["data"]["total_rows"] == 3
+    assert corr_status == 200
+    assert corr_body["data"]["columns"] == ["id", "score"]
+
+
+def test_materialized_version_gets_sidecar(tmp_path, mixed_csv, db_session):
+    build_sidecar(mixed_csv)
+    file = DataFile(file_name="mixed", file_type="csv", disk_name="mixed.csv")
+    db_session.add(file)
+    db_session.commit()
+    with (
+        patch("app.services.data_process.get_settings") as ms,
+        patch("app.services.dataset_versions.get_settings", ms),
+    ):
+        ms.return_value.upload_folder = str(tmp_path)
+        _, status = preprocess_data(
+            db_session, file.id, [TransformationItem(transformation="Drop Column", feature="name")]
+        )
+        head_path = resolve_version_path(db_session, file)
+
+    assert status == 200
+    reader = DatasetReader(head_path)
+    assert reader.has_sidecar() is True
+    assert "name" not in reader.read().columns
+    assert "name" in DatasetReader(mixed_csv).read().columns
@@ -0,0 +1,276 @@
+"""Tests for the single-pass streaming column statistics engine."""
+
+import math
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.dataset_reader import DatasetReader, build_sidecar
+from app.services.dataset_stats import (
+    DESCRIBE_PERCENTILES,
+    ColumnAccumulator,
+    CorrelationAccumulator,
+    DatasetStats,
+    approximate_column_stats_payload,
+    approximate_describe_payload,
+    column_stats_payload,
+    compute_correlation,
+    compute_dataset_stats,
+    compute_sketch_stats,
+    describe_payload,
+    exact_quantiles,
+    merge_dtypes,
+)
+from app.services.sketches import QuantileSketch
+
+
+@pytest.fixture()
+def mixed_csv(tmp_path):
+    """Numeric columns with gaps (one only in the last rows), text and bool."""
+    rng = np.random.default_rng(0)
+    n = 1000
+    late_gap = rng.integers(0, 100, n).astype(float)
+    late_gap[-3:] = np.nan
+    noisy = rng.normal(1e6, 3.0, n)
+    noisy[::7] = np.nan
+    df = pd.DataFrame(
+        {
+            "ints": rng.integers(-50, 50, n),
+            "late_gap": late_gap,
+            "noisy": noisy,
+            "name": [f"n{i % 13}" for i in range(n)],
+            "flag": rng.integers(0, 2, n).astype(bool),
+        }
+    )
+    path = tmp_path / "mixed.csv"
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+def _reference_column_stats(df: pd.DataFrame) -> dict:
+    numeric = df.select_dtypes(include="number").columns
+    columns = []
+    for col in df.columns:
+        is_numeric = col in numeric
+        columns.append(
+            {
+                "column": col,
+                "dtype": str(df[col].dtype),
+                "count": int(df[col].count()),
+                "null_count": int(df[col].isnull().sum()),
+                "mean": (float(df[col].mean()) if pd.notna(df[col].mean()) else None) if is_numeric else None,
+                "min": (float(df[col].min()) if pd.notna(df[col].min()) else None) if is_numeric else None,
+                "max": (float(df[col].max()) if pd.notna(df[col].max()) else None) if is_numeric else None,
+            }
+        )
+    return {"total_rows": len(df), "total_cols": len(df.columns), "columns": columns}
+
+
+@pytest.mark.parametrize("use_sidecar", [False, True])
+def test_single_chunk_matches_pandas_exactly(mixed_csv, use_sidecar):
+    if use_sidecar:
+        assert build_sidecar(mixed_csv)
+    reader = DatasetReader(mixed_csv)
+    stats = compute_dataset_stats(reader, chunksize=10_000)
+    df = pd.read_csv(mixed_csv)
+
+    assert column_stats_payload(stats) == _reference_column_stats(df)
+    assert describe_payload(stats, reader) == df.describe().map(str).to_dict()
+
+
+@pytest.mark.parametrize("chunksize", [1, 64, 333])
+def test_chunked_matches_pandas(mixed_csv, chunksize):
+    stats = compute_dataset_stats(DatasetReader(mixed_csv), chunksize=chunksize)
+    df = pd.read_csv(mixed_csv)
+    expected = _reference_column_stats(df)
+    got = column_stats_payload(stats)
+
+    assert got["total_rows"] == expected["total_rows"]
+    for g, e in zip(got["columns"], expected["columns"], strict=True):
+        assert {k: g[k] for k in ("column", "dtype", "count", "null_count", "min", "max")} == {
+            k: e[k] for k in ("column", "dtype", "count", "null_count", "min", "max")
+        }
+        assert g["mean"] == pytest.approx(e["mean"], rel=1e-12)
+    for col in df.select_dtypes(include="number").columns:
+        assert stats.columns[col].std == pytest.approx(df[col].std(), rel=1e-9)
+
+
+def test_merge_is_order_independent():
+    values = pd.Series([3.0, np.nan, 1.5, 8.0, -2.0, 4.25, np.nan, 7.0])
+    whole = ColumnAccumulator()
+    whole.update(values)
+
+    left, right = ColumnAccumulator(), ColumnAccumulator()
+    left.update(values[:5])
+    right.update(values[5:])
+    right.merge(left)
+
+    assert (right.count, right.null_count, right.min, right.max) == (6, 2, -2.0, 8.0)
+    assert right.mean == pytest.approx(whole.mean)
+    assert right.std == pytest.approx(values.std())
+
+
+def test_dataset_stats_merge_combines_partitions(mixed_csv):
+    df = pd.read_csv(mixed_csv)
+    a, b = DatasetStats(), DatasetStats()
+    a.update(df.iloc[:400])
+    b.update(df.iloc[400:])
+    a.merge(b)
+
+    assert a.total_rows == len(df)
+    assert a.columns["late_gap"].dtype == "float64"
+    assert a.columns["noisy"].mean == pytest.approx(df["noisy"].mean(), rel=1e-12)
+
+
+@pytest.mark.parametrize(
+    "current,new,expected",
+    [
+        (None, "int64", "int64"),
+        ("int64", "int64", "int64"),
+        ("int64", "float64", "float64"),
+        ("bool", "object", "object"),
+    ],
+)
+def test_merge_dtypes(current, new, expected):
+    assert merge_dtypes(current, new) == expected
+
+
+def test_header_only_csv(tmp_path):
+    path = tmp_path / "empty.csv"
+    path.write_text("a,b\n")
+    reader = DatasetReader(str(path))
+    stats = compute_dataset_stats(reader)
+
+    assert stats.total_rows == 0
+    assert list(stats.columns) == ["a", "b"]
+    assert describe_payload(stats, reader) == pd.read_csv(path).describe().map(str).to_dict()
+    assert math.isnan(stats.columns["a"].std)
+
+
+@pytest.fixture()
+def long_csv(tmp_path):
+    """Enough rows that the bracketing sketch compacts, with ties and gaps."""
+    rng = np.random.default_rng(5)
+    n = 30_000
+    normal = rng.normal(size=n)
+    normal[::11] = np.nan
+    path = tmp_path / "long.csv"
+    pd.DataFrame({"normal": normal, "ties": rng.integers(0, 7, n), "tag": rng.choice(["x", "y", "7"], n)}).to_csv(
+        path, index=False
+    )
+    return str(path)
+
+
+def test_describe_streams_exact_quartiles(long_csv):
+    reader = DatasetReader(long_csv)
+    stats = compute_dataset_stats(reader, chunksize=997)
+
+    # No column is loaded in full.
+    with patch.object(DatasetReader, "read", side_effect=AssertionError("full read")):
+        got = describe_payload(stats, reader, chunksize=997)
+
+    expected = pd.read_csv(long_csv).describe().map(str).to_dict()
+    assert got.keys() == expected.keys()
+    for name, values in expected.items():
+        # Moments of several chunks agree to rounding; order statistics exactly.
+        exact = ("count", "min", "25%", "50%", "75%", "max")
+        assert {k: got[name][k] for k in exact} == {k: values[k] for k in exact}
+        assert float(got[name]["std"]) == pytest.approx(float(values["std"]), rel=1e-12)
+
+
+def test_exact_quantiles_fall_back_when_a_bracket_misses(long_csv):
+    reader = DatasetReader(long_csv)
+    with patch.object(QuantileSketch, "quantiles", lambda self, qs: [0.0] * len(qs)):
+        got = exact_quantiles(reader, ["normal", "ties"], chunksize=997)
+
+    df = pd.read_csv(long_csv)
+    assert got == {name: df[name].quantile(DESCRIBE_PERCENTILES).tolist() for name in ("normal", "ties")}
+
+
+def test_describe_without_numeric_columns_counts_values_in_one_pass(long_csv):
+    reader = DatasetReader(long_csv)
+    text = pd.read_csv(long_csv, usecols=["tag"], dtype=str)
+    text.to_csv(long_csv, index=False)
+    stats = compute_dataset_stats(reader, chunksize=997)
+
+    with patch.object(DatasetReader, "read", side_effect=AssertionError("full read")):
+        got = describe_payload(stats, reader, chunksize=997)
+
+    assert got == pd.read_csv(long_csv).describe().map(str).to_dict()
+
+
+@pytest.mark.parametrize("chunksize,max_workers", [(10_000, 1), (97, 1), (97, 4)])
+def test_correlation_matches_pandas(mixed_csv, chunksize, max_workers):
+    columns, corr = compute_correlation(DatasetReader(mixed_csv), chunksize=chunksize, max_workers=max_workers)
+    expected = pd.read_csv(mixed_csv).select_dtypes(include="number").corr()
+
+    assert columns == list(expected.columns)
+    np.testing.assert_allclose(corr, expected.to_numpy(), rtol=1e-9, atol=1e-12)
+
+
+def test_correlation_include_bool_matches_numeric_only(mixed_csv):
+    columns, corr = compute_correlation(DatasetReader(mixed_csv), chunksize=128, include_bool=True)
+    expected = pd.read_csv(mixed_csv).corr(numeric_only=True)
+
+    assert columns == list(expected.columns)
+    np.testing.assert_allclose(corr, expected.to_numpy(), rtol=1e-9, atol=1e-12)
+
+
+def test_correlation_pairwise_nulls_and_constant_column():
+    df = pd.DataFrame(
+        {
+            "x": [1.0, 2.0, np.nan, 4.0, 5.0, 6.0],
+            "y": [2.0, np.nan, 1.0, 3.0, 7.0, 5.0],
+            "const": [3.0] * 6,
+        }
+    )
+    acc = CorrelationAccumulator.from_values(df.iloc[:2].to_numpy())
+    acc.merge(CorrelationAccumulator.from_values(df.iloc[2:].to_numpy()))
+    corr = acc.correlation()
+
+    np.testing.assert_allclose(corr[:2, :2], df[["x", "y"]].corr().to_numpy())
+    assert np.isnan(corr[2]).all()
+    assert np.isnan(corr[:, 2]).all()
+
+
+def test_correlation_drops_column_demoted_in_later_chunk(tmp_path):
+    path = tmp_path / "late_text.csv"
+    path.write_text("a,b,c\n1,2,3\n2,4,1\n3,x,2\n")
+
+    columns, _ = compute_correlation(DatasetReader(str(path)), chunksize=2)
+
+    assert columns == ["a", "c"]
+
+
+@pytest.mark.parametrize("chunksize, max_workers", [(10_000, 1), (64, 4)])
+def test_approximate_describe_is_close_to_exact(mixed_csv, chunksize, max_workers):
+    reader = DatasetReader(mixed_csv)
+    exact = describe_payload(compute_dataset_stats(reader), reader)
+    sketch = compute_sketch_stats(reader, error=0.01, chunksize=chunksize, max_workers=max_workers)
+    approx = approximate_describe_payload(sketch)
+
+    assert approx.keys() == exact.keys()
+    df = pd.read_csv(mixed_csv)
+    for name, row in approx.items():
+        for label in ("count", "mean", "std", "min", "max"):
+            assert float(row[label]) == pytest.approx(float(exact[name][label]), rel=1e-9, nan_ok=True)
+        for label, q in (("25%", 0.25), ("50%", 0.5), ("75%", 0.75)):
+            rank = (df[name].dropna() <= float(row[label])).mean()
+            assert rank == pytest.approx(q, abs=0.02)
+
+
+def test_approximate_describe_of_text_dataset(tmp_path):
+    path = tmp_path / "text.csv"
+    pd.DataFrame({"city": ["paris", "rome", "paris", None] * 50, "flag": [True, False, True, True] * 50}).to_csv(
+        path, index=False
+    )
+    reader = DatasetReader(str(path))
+    exact = describe_payload(compute_dataset_stats(reader), reader)
+    sketch = compute_sketch_stats(reader, chunksize=30)
+    assert approximate_describe_payload(sketch) == exact
+
+    stats = approximate_column_stats_payload(sketch)["columns"]
+    assert stats[0]["distinct_count"] == 2 and stats[0]["median"] is None
+    assert stats[0]["top_values"] == [{"value": "paris", "count": 100}, {"value": "rome", "count": 50}]
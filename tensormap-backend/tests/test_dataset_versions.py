@@ -0,0 +1,216 @@
+"""Tests for copy-on-write dataset versions."""
+
+import os
+import threading
+import time
+import uuid
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlmodel import Session, select
+
+from app.models import DataFile, DatasetVersion, TrainingJob, TrainingStatus
+from app.schemas.data_process import TransformationItem
+from app.services import dataset_versions
+from app.services.data_process import (
+    checkout_version_service,
+    get_column_stats_service,
+    list_versions_service,
+    preprocess_data,
+    undo_version_service,
+)
+from app.services.dataset_reader import DatasetReader
+from app.services.dataset_versions import (
+    materialize_version,
+    prune_materializations,
+    reading_version,
+    resolve_version_path,
+    version_file_paths,
+)
+from app.services.transform_engine import DropColumn, FillMissing, MinMaxNormalize, run_pipeline
+
+
+@pytest.fixture()
+def upload(tmp_path, db_session):
+    """An uploaded CSV with its DataFile record; settings point at tmp_path."""
+    rng = np.random.default_rng(3)
+    age = rng.integers(18, 90, 200).astype(float)
+    age[::9] = np.nan
+    pd.DataFrame({"age": age, "city": rng.choice(["oslo", "lima"], 200), "noise": rng.normal(size=200)}).to_csv(
+        tmp_path / "data.csv", index=False
+    )
+    file = DataFile(file_name="data", file_type="csv", disk_name="data.csv")
+    db_session.add(file)
+    db_session.commit()
+    with (
+        patch("app.services.data_process.get_settings") as ms,
+        patch("app.services.dataset_versions.get_settings", ms),
+    ):
+        ms.return_value.upload_folder = str(tmp_path)
+        yield file
+
+
+def _preprocess(db, file, *steps):
+    items = [TransformationItem(transformation=t, feature=f, params=p) for t, f, p in steps]
+    body, status = preprocess_data(db, file.id, items)
+    assert status == 200, body
+    return body["data"]
+
+
+def _versions(db, file):
+    return {v.number: v for v in db.exec(select(DatasetVersion).where(DatasetVersion.file_id == file.id))}
+
+
+def test_versions_materialize_lazily_from_upload(tmp_path, db_session, upload):
+    original = (tmp_path / "data.csv").read_bytes()
+    _preprocess(db_session, upload, ("Fill Missing Values", "age", {"strategy": "median"}))
+    _preprocess(db_session, upload, ("Min-Max Normalization", "age", None), ("Drop Column", "noise", None))
+
+    versions = _versions(db_session, upload)
+    assert [v.disk_name for v in versions.values()] == ["data.csv", None, None]
+    assert upload.columns == ["age", "city"]
+
+    head = pd.read_csv(resolve_version_path(db_session, upload))
+
+    # Version 2 was replayed straight from the upload; version 1 was never written.
+    assert versions[1].disk_name is None
+    assert (tmp_path / "data.csv").read_bytes() == original
+    expected_path = tmp_path / "expected.csv"
+    pipeline = [FillMissing("age", {"strategy": "median"}), MinMaxNormalize("age"), DropColumn("noise")]
+    run_pipeline(DatasetReader(str(tmp_path / "data.csv")), pipeline, str(expected_path), workers=1)
+    pd.testing.assert_frame_equal(head, pd.read_csv(expected_path))
+
+
+def test_undo_and_branch_are_metadata_only(db_session, upload):
+    first = _preprocess(db_session, upload, ("Drop Column", "noise", None))
+    _preprocess(db_session, upload, ("One Hot Encoding", "city", None))
+    assert upload.columns == ["age", "city_lima", "city_oslo"]
+
+    body, status = undo_version_service(db_session, upload.id)
+    assert status == 200
+    assert body["data"]["version_id"] == first["version_id"]
+    assert upload.columns == ["age", "city"]
+
+    branch = _preprocess(db_session, upload, ("Categorical to Numerical", "city", None))
+    assert branch["parent_id"] == first["version_id"]
+    head = pd.read_csv(resolve_version_path(db_session, upload))
+    assert list(head.columns) == ["age", "city"]
+    assert head["city"].isin([0, 1]).all()
+
+    body, _ = list_versions_service(db_session, upload.id)
+    assert [(v["number"], v["is_current"]) for v in body["data"]] == [(0, False), (1, False), (2, False), (3, True)]
+    assert all(v.disk_name is None for n, v in _versions(db_session, upload).items() if n in (1, 2))
+
+
+def test_undo_at_upload_and_foreign_version(db_session, upload):
+    _, status = undo_version_service(db_session, upload.id)
+    assert status == 400
+
+    _preprocess(db_session, upload, ("Drop Column", "noise", None))
+    _, status = undo_version_service(db_session, upload.id)
+    assert status == 200
+    _, status = undo_version_service(db_session, upload.id)
+    assert status == 400
+
+    other = DataFile(file_name="other", file_type="csv", disk_name="other.csv")
+    db_session.add(other)
+    db_session.commit()
+    _, status = checkout_version_service(db_session, other.id, upload.current_version_id)
+    assert status == 404
+
+
+def test_failed_fit_records_no_version(db_session, upload):
+    items = [TransformationItem(transformation="Fill Missing Values", feature="city", params={"strategy": "mean"})]
+    _, status = preprocess_data(db_session, upload.id, items)
+
+    assert status == 500
+    assert list(_versions(db_session, upload)) == [0]
+    assert upload.columns is None
+
+
+@pytest.mark.parametrize("transformation", ["Min-Max Normalization", "Z-score Standardization"])
+def test_scaling_text_is_rejected_before_a_version_is_recorded(db_session, upload, transformation):
+    items = [TransformationItem(transformation=transformation, feature="city")]
+    body, status = preprocess_data(db_session, upload.id, items)
+
+    assert status == 422 and "not numeric" in body["message"]
+    assert list(_versions(db_session, upload)) == [0]
+    assert get_column_stats_service(db_session, upload.id)[1] == 200
+
+
+def test_a_version_that_cannot_be_built_is_an_error_response(tmp_path, db_session, upload):
+    _preprocess(db_session, upload, ("Drop Column", "noise", None))
+    os.remove(tmp_path / "data.csv")
+
+    body, status = get_column_stats_service(db_session, upload.id)
+
+    assert status == 500
+    assert body["success"] is False and body["message"].startswith("Error preparing dataset version")
+
+
+@pytest.mark.parametrize("status", [TrainingStatus.QUEUED, TrainingStatus.RUNNING])
+def test_superseded_materializations_are_pruned_unless_pinned(tmp_path, db_session, upload, status):
+    v1 = _preprocess(db_session, upload, ("Drop Column", "noise", None))
+    _preprocess(db_session, upload, ("Min-Max Normalization", "age", None))
+    v2_path = resolve_version_path(db_session, upload)
+    job = TrainingJob(model_id=1, status=status, dataset_version_id=upload.current_version_id)
+    db_session.add(job)
+    db_session.commit()
+
+    checkout_version_service(db_session, upload.id, uuid.UUID(v1["version_id"]))
+    v1_path = resolve_version_path(db_session, upload)
+    assert os.path.exists(v2_path)
+
+    job.status = TrainingStatus.COMPLETED
+    db_session.add(job)
+    prune_materializations(db_session, upload)
+
+    assert not os.path.exists(v2_path)
+    assert _versions(db_session, upload)[2].disk_name is None
+    assert version_file_paths(db_session, upload) == [v1_path]
+    assert (tmp_path / "data.csv").exists()
+
+
+def test_a_csv_being_read_is_not_pruned(db_session, upload):
+    v1 = _preprocess(db_session, upload, ("Drop Column", "noise", None))
+    _preprocess(db_session, upload, ("Min-Max Normalization", "age", None))
+
+    with reading_version(db_session, upload) as v2_path:
+        checkout_version_service(db_session, upload.id, uuid.UUID(v1["version_id"]))
+        resolve_version_path(db_session, upload)  # materializes v1 and prunes
+        assert os.path.exists(v2_path)
+        assert len(pd.read_csv(v2_path)) == 200
+
+    prune_materializations(db_session, upload)
+    assert not os.path.exists(v2_path)
+
+
+def test_concurrent_materializations_build_once(db_session, upload):
+    _preprocess(db_session, upload, ("Drop Column", "noise", None))
+    version_id = upload.current_version_id
+    write_pipeline = dataset_versions.write_pipeline
+    builds = []
+
+    def slow_write(*args):
+        builds.append(args)
+        time.sleep(0.3)
+        write_pipeline(*args)
+
+    paths = []
+
+    def materialize():
+        with Session(db_session.get_bind()) as session:
+            paths.append(materialize_version(session, session.get(DatasetVersion, version_id)))
+
+    with patch("app.services.dataset_versions.write_pipeline", slow_write):
+        threads = [threading.Thread(target=materialize) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.1)
+        for thread in threads:
+            thread.join()
+
+    assert len(builds) == 1
+    assert len(paths) == 2 and paths[0] == paths[1]
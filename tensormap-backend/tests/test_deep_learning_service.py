@@ -16,11 +16,15 @@ _tf_stub = MagicMock()
 sys.modules.setdefault("tensorflow", _tf_stub)
 sys.modules.setdefault("flatten_json", MagicMock())
 
+from pydantic import ValidationError  # noqa: E402
+
 from app.models.ml import ModelBasic  # noqa: E402
+from app.schemas.deep_learning import TrainingConfigRequest  # noqa: E402
 from app.services.deep_learning import (  # noqa: E402
     check_model_name_service,
     delete_model_service,
     get_model_count_service,
+    update_training_config_service,
 )
 
 # ---------------------------------------------------------------------------
@@ -181,3 +185,41 @@ class TestGetModelCountService:
         get_model_count_service(mock_db, project_id="proj-1")
         call_stmt = mock_db.exec.call_args[0][0]
         assert "project_id" in str(call_stmt)
+
+
+# ---------------------------------------------------------------------------
+# update_training_config_service
+# ---------------------------------------------------------------------------
+
+
+class TestUpdateTrainingConfigService:
+    CONFIG = {
+        "model_name": "my_model",
+        "file_id": "0c4f7a9e-1f7b-4b8e-9f59-3c1c2f0d6a11",
+        "training_split": 80,
+        "problem_type_id": 3,
+        "optimizer": "adam",
+        "metric": "accuracy",
+        "epochs": 5,
+    }
+
+    def test_saves_augmentation_with_defaults(self, mock_db):
+        model = ModelBasic(model_name="my_model")
+        mock_db.exec.return_value.first.return_value = model
+        request = TrainingConfigRequest(**self.CONFIG, augmentation={"flip": "horizontal", "rotation": 0.1})
+
+        body, status = update_training_config_service(mock_db, "my_model", request.model_dump())
+
+        assert status == 200
+        assert model.augmentation == {
+            "flip": "horizontal",
+            "rotation": 0.1,
+            "crop": 0.0,
+            "brightness": 0.0,
+            "contrast": 0.0,
+        }
+
+    @pytest.mark.parametrize("augmentation", [{"flip": "diagonal"}, {"rotation": 2}, {"crop": 1.0}])
+    def test_rejects_invalid_augmentation(self, augmentation):
+        with pytest.raises(ValidationError):
+            TrainingConfigRequest(**self.CONFIG, augmentation=augmentation)
@@ -0,0 +1,139 @@
+"""Tests for background profiling of uploaded CSVs."""
+
+import os
+from unittest.mock import patch
+
+import pytest
+
+from app.models import DataFile, ProfileStatus
+from app.services.dataset_reader import sidecar_path
+from app.services.file_profiling import (
+    backfill_profiles,
+    profile_csv,
+    profile_file,
+    resume_pending_profiles,
+    stored_schema,
+)
+from app.services.row_index import row_index_path
+
+
+@pytest.fixture()
+def upload_dir(tmp_path):
+    with (
+        patch("app.services.file_profiling.get_settings") as ms,
+        patch("app.services.file_profiling._notify") as notify,
+    ):
+        ms.return_value.upload_folder = str(tmp_path)
+        yield tmp_path, notify
+
+
+def _add_file(db_session, upload_dir, content: bytes, status=ProfileStatus.PENDING) -> DataFile:
+    (upload_dir / "data.csv").write_bytes(content)
+    file = DataFile(file_name="data", file_type="csv", disk_name="data.csv", profile_status=status)
+    db_session.add(file)
+    db_session.commit()
+    return file
+
+
+def test_profile_csv_reconciles_chunks(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_bytes(b"a,b,c\n1,x,\n2,,1.5\n,y,2\n4,z,\n")
+
+    profile = profile_csv(str(path), chunksize=2)
+
+    assert profile.row_count == 4
+    assert profile.columns == ["a", "b", "c"]
+    assert profile.schema.dtypes == {"a": "float64", "b": "object", "c": "float64"}
+    assert profile.null_counts == {"a": 1, "b": 1, "c": 2}
+
+
+def test_profile_file_stores_results_and_artifacts(db_session, upload_dir):
+    tmp_path, notify = upload_dir
+    file = _add_file(db_session, tmp_path, b"a,b\n1,x\n2,\n3,z\n")
+
+    assert profile_file(db_session, file.id) == ProfileStatus.READY
+
+    db_session.refresh(file)
+    assert (file.columns, file.row_count) == (["a", "b"], 3)
+    assert file.dtypes == {"a": "int64", "b": "object"}
+    assert file.null_counts == {"a": 0, "b": 1}
+    assert file.read_schema["dtypes"] == {"a": "int8", "b": "object"}
+    csv_path = str(tmp_path / "data.csv")
+    assert os.path.exists(sidecar_path(csv_path))
+    assert os.path.exists(row_index_path(csv_path))
+    notified = notify.call_args[0][0]
+    assert (notified.id, notified.profile_status) == (file.id, ProfileStatus.READY)
+
+
+def test_stored_schema_applies_to_the_upload_only(db_session, upload_dir):
+    tmp_path, _ = upload_dir
+    file = _add_file(db_session, tmp_path, b"n,label\n1,cat\n2,dog\n3,cat\n4,cat\n")
+    profile_file(db_session, file.id)
+
+    schema = stored_schema(file, str(tmp_path / "data.csv"))
+    assert schema.dtypes == {"n": "int8", "label": "category"}
+    assert stored_schema(file, str(tmp_path / "data.csv"), widen=True).dtypes == {"n": "int64", "label": "object"}
+    assert stored_schema(file, str(tmp_path / "versions" / "data.v1.csv")) is None
+    file.read_schema = None
+    assert stored_schema(file, str(tmp_path / "data.csv")) is None
+
+
+def test_unparsable_csv_fails_with_error(db_session, upload_dir):
+    tmp_path, notify = upload_dir
+    file = _add_file(db_session, tmp_path, b'a,b\n1,"unterminated\n')
+
+    assert profile_file(db_session, file.id) == ProfileStatus.FAILED
+
+    db_session.refresh(file)
+    assert file.columns is None and file.row_count is None
+    assert file.profile_error
+    notify.assert_called_once()
+
+
+def test_resume_requeues_unfinished_profiles(db_session, upload_dir):
+    tmp_path, _ = upload_dir
+    files = [_add_file(db_session, tmp_path, b"a\n1\n", status=s) for s in ProfileStatus]
+
+    with patch("app.services.file_profiling.schedule_profile") as schedule:
+        assert resume_pending_profiles(db_session) == 2
+
+    assert {c[0][0] for c in schedule.call_args_list} == {files[0].id, files[1].id}
+    db_session.refresh(files[1])
+    assert files[1].profile_status == ProfileStatus.PENDING
+
+
+def test_backfill_profiles_legacy_files_in_batches(db_session, upload_dir):
+    tmp_path, notify = upload_dir
+    legacy = []
+    for i in range(5):
+        (tmp_path / f"{i}.csv").write_bytes(b"a,b\n" + b"1,2\n" * (i + 1))
+        legacy.append(DataFile(file_name=str(i), file_type="csv", disk_name=f"{i}.csv"))
+    legacy.append(DataFile(file_name="gone", file_type="csv", disk_name="missing.csv"))
+    done = DataFile(file_name="done", file_type="csv", disk_name="0.csv", profile_status=ProfileStatus.READY)
+    images = DataFile(file_name="pets", file_type="zip", disk_name="pets.zip")
+    db_session.add_all([*legacy, done, images])
+    db_session.commit()
+
+    assert backfill_profiles(db_session, dry_run=True)["pending"] == 6
+    with patch.object(db_session, "commit", wraps=db_session.commit) as commit:
+        first = backfill_profiles(db_session, workers=3, batch_size=2, limit=4)
+    assert (first["ready"] + first["failed"], commit.call_count) == (4, 2)
+
+    # Resumes with the files the limited run did not reach.
+    second = backfill_profiles(db_session, batch_size=2)
+    assert second["ready"] + second["failed"] == 2
+    assert (first["ready"] + second["ready"], first["failed"] + second["failed"]) == (5, 1)
+    assert [f["name"] for f in first["failed_files"] + second["failed_files"]] == ["gone"]
+    assert backfill_profiles(db_session, dry_run=True)["pending"] == 0
+    assert backfill_profiles(db_session, dry_run=True, retry_failed=True)["pending"] == 1
+
+    for file in legacy[:5]:
+        db_session.refresh(file)
+        assert (file.profile_status, file.columns, file.row_count) == (
+            ProfileStatus.READY,
+            ["a", "b"],
+            int(file.file_name) + 1,
+        )
+    db_session.refresh(images)
+    assert images.profile_status is None
+    assert notify.call_count == 6
@@ -0,0 +1,113 @@
+"""Tests for image dataset browsing and the thumbnail cache."""
+
+import os
+import time
+import zipfile
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+import tensorflow as tf
+
+from app.services.image_browse import (
+    THUMBNAIL_SIZE,
+    ThumbnailCache,
+    _jpeg_ratio,
+    browse_images_service,
+    get_thumbnail_service,
+    make_thumbnail,
+)
+from app.services.image_manifest import extract_archive
+
+
+def _image(width, height, encode=tf.io.encode_png):
+    pixels = np.random.default_rng(width * height).integers(0, 255, (height, width, 3), dtype=np.uint8)
+    return encode(pixels).numpy()
+
+
+@pytest.fixture()
+def upload_dir(tmp_path):
+    with (
+        patch("app.services.image_browse.get_settings") as ms,
+        patch("app.services.image_manifest.get_settings", ms),
+    ):
+        ms.return_value.upload_folder = str(tmp_path)
+        ms.return_value.api_base = "/api/v1"
+        ms.return_value.thumbnail_cache_size = 1024 * 1024
+        yield tmp_path
+
+
+@pytest.fixture()
+def zip_db(upload_dir):
+    zip_path = upload_dir / "pets.zip"
+    with zipfile.ZipFile(zip_path, "w") as zf:
+        for i in range(5):
+            zf.writestr(f"cats/{i}.png", _image(40 + i, 30))
+        for i in range(3):
+            zf.writestr(f"dogs/{i}.jpg", _image(600, 300 + i, tf.io.encode_jpeg))
+    extract_archive(str(zip_path), str(upload_dir / "pets"))
+    db = MagicMock()
+    db.exec.return_value.first.return_value = MagicMock(file_type="zip", disk_name="pets.zip")
+    return db
+
+
+def test_thumbnail_cache_evicts_least_recently_used(tmp_path):
+    cache = ThumbnailCache(str(tmp_path), max_bytes=30)
+    for key in ("aa1", "bb2", "cc3"):
+        cache.put(key, b"x" * 10)
+        time.sleep(0.01)
+    assert cache.get("aa1") == b"x" * 10  # now the most recent
+    time.sleep(0.01)
+
+    cache.put("dd4", b"y" * 10)
+    assert cache.get("bb2") is None
+    assert cache.total_bytes == 30
+    time.sleep(0.01)
+    assert cache.get("cc3") is not None
+
+    # A fresh process picks up the recency order (aa1, dd4, cc3) from the files on disk.
+    reopened = ThumbnailCache(str(tmp_path), max_bytes=30)
+    reopened.put("ee5", b"z" * 10)
+    assert reopened.get("aa1") is None
+    assert [reopened.get(k) is not None for k in ("cc3", "dd4", "ee5")] == [True, True, True]
+
+
+def test_jpeg_thumbnails_use_reduced_decoding(tmp_path):
+    assert _jpeg_ratio(1200, 600) == 4
+    assert _jpeg_ratio(200, 100) == 1
+    assert _jpeg_ratio(None, None) == 1
+
+    path = tmp_path / "big.jpg"
+    path.write_bytes(_image(1200, 600, tf.io.encode_jpeg))
+    with patch("app.services.image_browse.tf.io.decode_jpeg", wraps=tf.io.decode_jpeg) as decode:
+        thumb = make_thumbnail(str(path), 1200, 600)
+    assert decode.call_args.kwargs["ratio"] == 4
+    assert tf.io.decode_jpeg(thumb).shape == (THUMBNAIL_SIZE // 2, THUMBNAIL_SIZE, 3)
+
+
+def test_browse_pages_by_class_with_thumbnails(zip_db, upload_dir):
+    file_id = "0c4f7a9e-1f7b-4b8e-9f59-3c1c2f0d6a11"
+    body, status = browse_images_service(zip_db, file_id, page=2, page_size=2, label="cats")
+
+    assert status == 200
+    assert body["pagination"] == {"page": 2, "page_size": 2, "total_rows": 5, "total_pages": 3}
+    # Every class is listed even when filtering, so the client can switch filters.
+    assert body["data"]["classes"] == [{"label": "cats", "count": 5}, {"label": "dogs", "count": 3}]
+    assert [(i["index"], i["path"]) for i in body["data"]["images"]] == [(2, "cats/2.png"), (3, "cats/3.png")]
+    assert body["data"]["images"][0]["thumbnail_url"] == f"/api/v1/data/process/images/{file_id}/thumbnails/2"
+
+    small, status = get_thumbnail_service(zip_db, file_id, 0)
+    assert status == 200 and tf.io.decode_jpeg(small).shape == (30, 40, 3)
+    thumb, status = get_thumbnail_service(zip_db, file_id, 6)
+    assert status == 200
+    assert tf.io.decode_jpeg(thumb).shape == (THUMBNAIL_SIZE // 2, THUMBNAIL_SIZE, 3)
+    assert len(list((upload_dir / ".thumbnails").rglob("*.jpg"))) >= 3
+
+    with patch("app.services.image_browse.make_thumbnail") as make:
+        assert get_thumbnail_service(zip_db, file_id, 6) == (thumb, 200)
+        make.assert_not_called()
+
+    assert get_thumbnail_service(zip_db, file_id, 8)[1] == 404
+    zip_db.exec.return_value.first.return_value.file_type = "csv"
+    assert browse_images_service(zip_db, file_id)[1] == 400
+    assert os.path.isdir(upload_dir / "pets")
@@ -0,0 +1,118 @@
+"""Tests for the persistent decoded-image cache and the input-pipeline options."""
+
+import os
+import zipfile
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+import tensorflow as tf
+
+from app.services.image_cache import cache_path, load_image_cache
+from app.services.image_manifest import extract_archive
+from app.services.image_pipeline import AugmentationOptions, InputPipelineOptions, image_datasets
+
+
+@pytest.fixture()
+def dataset(tmp_path):
+    rng = np.random.default_rng(0)
+    zip_path = str(tmp_path / "pets.zip")
+    with zipfile.ZipFile(zip_path, "w") as zf:
+        for label in ("cats", "dogs"):
+            for i in range(9):
+                pixels = rng.integers(0, 255, (10 + i, 7, 3), dtype=np.uint8)
+                zf.writestr(f"{label}/{i}.png", tf.io.encode_png(pixels).numpy())
+    root = str(tmp_path / "pets")
+    return zip_path, root, extract_archive(zip_path, root)
+
+
+def test_cache_is_built_once_per_setting(dataset):
+    zip_path, root, manifest = dataset
+    images = load_image_cache(zip_path, root, manifest, (5, 4), "rgb")
+    assert images.shape == (18, 5, 4, 3) and images.dtype == np.uint8
+    assert isinstance(images, np.memmap)
+
+    with patch("app.services.image_cache.build_image_cache") as build:
+        again = load_image_cache(zip_path, root, manifest, (5, 4), "rgb")
+        build.assert_not_called()
+    np.testing.assert_array_equal(again, images)
+
+    gray = load_image_cache(zip_path, root, manifest, (5, 4), "grayscale")
+    assert gray.shape == (18, 5, 4, 1)
+    assert os.path.exists(cache_path(zip_path, (5, 4), "grayscale"))
+    assert [n for n in os.listdir(os.path.dirname(cache_path(zip_path, (5, 4), "rgb"))) if n.endswith(".tmp")] == []
+
+
+def test_stale_cache_is_rebuilt(dataset):
+    zip_path, root, manifest = dataset
+    path = cache_path(zip_path, (5, 4), "rgb")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.save(path, np.zeros((3, 5, 4, 3), dtype=np.uint8))
+
+    assert load_image_cache(zip_path, root, manifest, (5, 4), "rgb").shape == (18, 5, 4, 3)
+
+
+@pytest.mark.parametrize("label_mode", ["int", "binary"])
+def test_cached_pipeline_matches_decoding(dataset, label_mode):
+    zip_path, root, manifest = dataset
+    kwargs = {"validation_split": 0.25, "image_size": (5, 4), "batch_size": 4, "color_mode": "rgb"}
+    images = load_image_cache(zip_path, root, manifest, (5, 4), "rgb")
+
+    decoded = image_datasets(root, manifest, label_mode=label_mode, **kwargs)
+    cached = image_datasets(root, manifest, label_mode=label_mode, images=images, **kwargs)
+    for ours, expected in zip(cached, decoded, strict=True):
+        for (x, y), (ex, ey) in zip(ours, expected, strict=True):
+            assert x.dtype == ex.dtype and x.shape == ex.shape
+            # The cache stores the resized pixels rounded to uint8.
+            np.testing.assert_allclose(x.numpy(), ex.numpy(), atol=0.5)
+            np.testing.assert_array_equal(y.numpy(), ey.numpy())
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        InputPipelineOptions(cache="memory"),
+        InputPipelineOptions(cache="none", parallel_calls=2, prefetch=0, deterministic=False),
+    ],
+)
+def test_pipeline_options_keep_the_data(dataset, options):
+    zip_path, root, manifest = dataset
+    kwargs = {"validation_split": 0.25, "image_size": (5, 4), "batch_size": 4, "color_mode": "rgb", "label_mode": "int"}
+
+    def epoch(ds):
+        pairs = [(x.tobytes(), int(y)) for xb, yb in ds for x, y in zip(xb.numpy(), yb.numpy(), strict=True)]
+        return sorted(pairs)
+
+    baseline = image_datasets(root, manifest, **kwargs)
+    tuned = image_datasets(root, manifest, options=options, **kwargs)
+    for ours, expected in zip(tuned, baseline, strict=True):
+        assert epoch(ours) == epoch(expected)
+        assert epoch(ours) == epoch(ours)  # a cached dataset replays every epoch
+
+
+def test_options_read_from_job_hyperparams():
+    assert InputPipelineOptions.from_hyperparams(None) == InputPipelineOptions()
+    stored = {"epochs": 3, "input_pipeline": {"cache": "none", "prefetch": 2, "retired_setting": 1}}
+    assert InputPipelineOptions.from_hyperparams(stored) == InputPipelineOptions(cache="none", prefetch=2)
+
+
+def test_augmentation_varies_training_batches_only(dataset):
+    zip_path, root, manifest = dataset
+    kwargs = {"validation_split": 0.25, "image_size": (5, 4), "batch_size": 4, "color_mode": "rgb", "label_mode": "int"}
+    augmentation = AugmentationOptions(flip="horizontal_and_vertical", rotation=0.2, brightness=0.3, contrast=0.3)
+    images = load_image_cache(zip_path, root, manifest, (5, 4), "rgb")
+
+    (train, val), (plain_train, plain_val) = (
+        image_datasets(root, manifest, images=images, augmentation=augmentation, **kwargs),
+        image_datasets(root, manifest, images=images, **kwargs),
+    )
+    batches = list(zip(train, plain_train, strict=True))
+    assert any(not np.array_equal(x.numpy(), px.numpy()) for (x, _), (px, _) in batches)
+    for (x, y), (px, py) in batches:
+        assert x.shape == px.shape and x.dtype == px.dtype
+        np.testing.assert_array_equal(y.numpy(), py.numpy())
+        assert float(tf.reduce_min(x)) >= 0 and float(tf.reduce_max(x)) <= 255
+    for (x, _), (px, _) in zip(val, plain_val, strict=True):
+        np.testing.assert_array_equal(x.numpy(), px.numpy())
+
+    assert AugmentationOptions.from_config(None).layer(seed=1) is None
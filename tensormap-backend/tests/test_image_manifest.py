@@ -0,0 +1,145 @@
+"""Tests for parallel ZIP extraction, the image manifest and manifest-driven image pipelines."""
+
+import os
+import zipfile
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+import pytest
+import tensorflow as tf
+
+from app.services.data_process import get_file_data
+from app.services.image_manifest import (
+    ZipPathTraversalError,
+    ZipTooLargeError,
+    extract_archive,
+    image_dimensions,
+    load_manifest,
+    manifest_path,
+    write_manifest,
+)
+from app.services.image_pipeline import image_datasets
+
+
+def _png(width, height, seed=0):
+    pixels = np.random.default_rng(seed).integers(0, 255, (height, width, 3), dtype=np.uint8)
+    return tf.io.encode_png(pixels).numpy()
+
+
+def _jpeg(width, height, seed=0):
+    pixels = np.random.default_rng(seed).integers(0, 255, (height, width, 3), dtype=np.uint8)
+    return tf.io.encode_jpeg(pixels).numpy()
+
+
+def _write_zip(path, members):
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return str(path)
+
+
+@pytest.fixture()
+def archive(tmp_path):
+    members = {f"cats/{i:02d}.png": _png(8 + i, 6, i) for i in range(7)}
+    members |= {f"dogs/sub/{i:02d}.JPG": _jpeg(5, 9 + i, i) for i in range(6)}
+    members |= {"dogs/readme.txt": b"not an image", "cover.png": _png(3, 3)}
+    return _write_zip(tmp_path / "pets.zip", members), members
+
+
+def test_extract_builds_manifest(tmp_path, archive):
+    zip_path, members = archive
+    dest = tmp_path / "pets"
+    manifest = extract_archive(zip_path, str(dest), workers=3)
+
+    for name, data in members.items():
+        assert (dest / name).read_bytes() == data
+    assert list(manifest["path"][:3]) == ["cover.png", "cats/00.png", "cats/01.png"]
+    assert manifest["label"].isna().sum() == 1
+    assert manifest["label"].value_counts().to_dict() == {"cats": 7, "dogs": 6}
+    row = manifest.set_index("path").loc["dogs/sub/03.JPG"]
+    assert (row["size"], row["width"], row["height"]) == (len(members["dogs/sub/03.JPG"]), 5, 12)
+    assert "dogs/readme.txt" not in set(manifest["path"])
+
+    # Persisted next to the archive and reused; legacy uploads get an identical rebuild.
+    pd.testing.assert_frame_equal(load_manifest(zip_path, str(dest)), manifest)
+    os.remove(manifest_path(zip_path))
+    pd.testing.assert_frame_equal(load_manifest(zip_path, str(dest)), manifest)
+
+
+def test_loaded_manifest_is_reused_until_rewritten(tmp_path, archive):
+    zip_path, _ = archive
+    dest = str(tmp_path / "pets")
+    manifest = extract_archive(zip_path, dest)
+
+    with patch("app.services.image_manifest.pd.read_parquet", wraps=pd.read_parquet) as read:
+        first = load_manifest(zip_path, dest)
+        assert load_manifest(zip_path, dest) is first
+        assert read.call_count == 1
+
+        write_manifest(zip_path, manifest.iloc[:3].copy())
+        assert len(load_manifest(zip_path, dest)) == 3
+        assert read.call_count == 2
+
+
+@pytest.mark.parametrize(
+    "members, error",
+    [
+        ({"ok.png": b"x", "../escape.png": b"x"}, ZipPathTraversalError),
+        ({"a.bin": b"\0" * 600, "b.bin": b"\0" * 600}, ZipTooLargeError),
+    ],
+)
+def test_unsafe_archives_leave_nothing_behind(tmp_path, members, error):
+    zip_path = _write_zip(tmp_path / "bad.zip", members)
+    with pytest.raises(error):
+        extract_archive(zip_path, str(tmp_path / "bad"), max_bytes=1000)
+    assert not (tmp_path / "bad").exists()
+    assert not (tmp_path / "escape.png").exists()
+
+
+def test_image_dimensions_reads_headers(tmp_path):
+    gif = tmp_path / "a.gif"
+    gif.write_bytes(b"GIF89a" + (300).to_bytes(2, "little") + (200).to_bytes(2, "little") + b"\0" * 20)
+    bmp = tmp_path / "a.bmp"
+    bmp.write_bytes(b"BM" + b"\0" * 16 + (40).to_bytes(4, "little") + (-30).to_bytes(4, "little", signed=True))
+    junk = tmp_path / "a.png"
+    junk.write_bytes(b"\xff\xd8\xff\xe0\x00\x00garbage")
+
+    assert image_dimensions(str(gif)) == (300, 200)
+    assert image_dimensions(str(bmp)) == (40, 30)
+    assert image_dimensions(str(junk)) is None
+
+
+@pytest.mark.parametrize("label_mode", ["int", "categorical"])
+def test_pipeline_matches_image_dataset_from_directory(tmp_path, archive, label_mode):
+    zip_path, _ = archive
+    dest = str(tmp_path / "pets")
+    manifest = extract_archive(zip_path, dest)
+    kwargs = {"image_size": (4, 4), "batch_size": 4, "color_mode": "rgb", "label_mode": label_mode}
+
+    ours = image_datasets(dest, manifest, validation_split=0.3, **kwargs)
+    for subset, dataset in zip(["training", "validation"], ours, strict=True):
+        expected = tf.keras.utils.image_dataset_from_directory(
+            dest, validation_split=0.3, subset=subset, seed=123, verbose=False, **kwargs
+        )
+        for (x, y), (ex, ey) in zip(dataset, expected, strict=True):
+            np.testing.assert_array_equal(x.numpy(), ex.numpy())
+            np.testing.assert_array_equal(y.numpy(), ey.numpy())
+
+
+def test_zip_preview_pages_the_manifest(tmp_path, archive):
+    zip_path, _ = archive
+    extract_archive(zip_path, str(tmp_path / "pets"))
+    file = MagicMock(file_type="zip", disk_name="pets.zip")
+    db = MagicMock()
+    db.exec.return_value.first.return_value = file
+
+    with patch("app.services.image_manifest.get_settings") as ms:
+        ms.return_value.upload_folder = str(tmp_path)
+        body, status = get_file_data(db, file.id, page=2, page_size=5)
+
+    assert status == 200
+    assert body["pagination"] == {"page": 2, "page_size": 5, "total_rows": 14, "total_pages": 3}
+    paths = ["cats/04.png", "cats/05.png", "cats/06.png", "dogs/sub/00.JPG", "dogs/sub/01.JPG"]
+    assert [r["path"] for r in body["data"]] == paths
+    assert set(body["data"][0]) == {"path", "label", "size", "width", "height"}
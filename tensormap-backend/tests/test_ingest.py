@@ -0,0 +1,34 @@
+"""Tests for the single-pass upload ingest."""
+
+import hashlib
+import io
+
+import pytest
+
+from app.services.ingest import UploadTooLargeError, ingest_upload
+
+CSV = b"id,score,name,flag\n1,0.5,alice,True\n2,,bob,False\n3,2.5,7,True\n4,1.0,dave,\n"
+
+
+def test_copies_and_hashes_in_one_pass(tmp_path):
+    path = tmp_path / "up.csv"
+    result = ingest_upload(io.BytesIO(CSV), str(path), max_bytes=1024)
+
+    assert path.read_bytes() == CSV
+    assert result.size == len(CSV)
+    assert result.sha256 == hashlib.sha256(CSV).hexdigest()
+
+
+def test_oversized_upload_leaves_nothing_behind(tmp_path):
+    with pytest.raises(UploadTooLargeError):
+        ingest_upload(io.BytesIO(CSV * 100), str(tmp_path / "big.csv"), max_bytes=len(CSV))
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_large_binary_upload_is_hashed(tmp_path):
+    data = bytes(range(256)) * 10_000
+    result = ingest_upload(io.BytesIO(data), str(tmp_path / "a.zip"), max_bytes=len(data))
+
+    assert result.size == len(data)
+    assert result.sha256 == hashlib.sha256(data).hexdigest()
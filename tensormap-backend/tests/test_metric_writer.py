@@ -0,0 +1,134 @@
+"""Tests for the buffered training-metric writer."""
+
+import time
+from datetime import UTC, datetime
+from unittest.mock import MagicMock
+
+from sqlmodel import Session, create_engine, select
+from sqlmodel.pool import StaticPool
+
+from app.callbacks.metrics_callback import MetricsCallback
+from app.models.training_job import TrainingJob, TrainingStatus
+from app.models.training_metric import TrainingMetric
+from app.services.metric_writer import MetricWriter
+
+
+def _rows(job_id: str, epoch: int) -> list[dict]:
+    now = datetime.now(UTC)
+    return [
+        {"job_id": job_id, "epoch": epoch, "metric_name": name, "metric_value": 1.0, "recorded_at": now}
+        for name in ("loss", "accuracy")
+    ]
+
+
+def _seed_job(factory) -> str:
+    with factory() as session:
+        job = TrainingJob(model_id=1, status=TrainingStatus.PENDING)
+        session.add(job)
+        session.commit()
+        return job.id
+
+
+class _CountingFactory:
+    """Session factory that counts the sessions (i.e. transactions) opened."""
+
+    def __init__(self, factory, fail: int = 0) -> None:
+        self.factory = factory
+        self.sessions = 0
+        self.fail = fail
+
+    def __call__(self):
+        self.sessions += 1
+        if self.fail:
+            self.fail -= 1
+            raise RuntimeError("database unavailable")
+        return self.factory()
+
+
+def _stored(factory) -> int:
+    with factory() as session:
+        return len(session.exec(select(TrainingMetric)).all())
+
+
+def test_rows_of_many_epochs_and_jobs_are_written_in_one_transaction(training_session_factory):
+    factory = _CountingFactory(training_session_factory)
+    jobs = [_seed_job(training_session_factory) for _ in range(3)]
+    writer = MetricWriter(flush_interval=60, flush_rows=1000)
+
+    for epoch in range(1, 6):
+        for job_id in jobs:
+            writer.add(factory, _rows(job_id, epoch))
+    assert factory.sessions == 0
+    assert writer.flush()
+
+    assert factory.sessions == 1
+    assert _stored(training_session_factory) == 3 * 5 * 2
+    writer.close()
+
+
+def test_writes_when_enough_rows_wait_or_the_interval_passes(training_session_factory):
+    job_id = _seed_job(training_session_factory)
+    factory = _CountingFactory(training_session_factory)
+    by_size = MetricWriter(flush_interval=60, flush_rows=4)
+    by_size.add(factory, _rows(job_id, 1))
+    by_size.add(factory, _rows(job_id, 2))
+    deadline = time.monotonic() + 5
+    while factory.sessions == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert factory.sessions == 1
+
+    by_time = MetricWriter(flush_interval=0.05, flush_rows=1000)
+    by_time.add(factory, _rows(job_id, 3))
+    deadline = time.monotonic() + 5
+    while _stored(training_session_factory) < 6 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert _stored(training_session_factory) == 6
+    by_size.close()
+    by_time.close()
+
+
+def test_failed_write_is_retried(training_session_factory):
+    job_id = _seed_job(training_session_factory)
+    factory = _CountingFactory(training_session_factory, fail=1)
+    writer = MetricWriter(flush_interval=0.05, flush_rows=1000)
+
+    writer.add(factory, _rows(job_id, 1))
+    writer.flush()
+    assert _stored(training_session_factory) == 0
+    writer.add(factory, _rows(job_id, 2))
+    writer.flush()
+
+    assert _stored(training_session_factory) == 4
+    writer.close()
+
+
+def test_callback_queues_metrics_and_flushes_before_completing(training_session_factory):
+    job_id = _seed_job(training_session_factory)
+    factory = _CountingFactory(training_session_factory)
+    writer = MetricWriter(flush_interval=60, flush_rows=1000)
+    cb = MetricsCallback(job_id, factory, MagicMock(), loop=None, writer=writer)
+
+    cb.on_train_begin()
+    opened = factory.sessions
+    for epoch in range(3):
+        cb.on_epoch_end(epoch, {"loss": 0.5, "accuracy": 0.8})
+    assert factory.sessions == opened  # no DB work on the training thread
+    cb.on_train_end()
+
+    with training_session_factory() as session:
+        assert session.get(TrainingJob, job_id).status == TrainingStatus.COMPLETED
+        assert len(session.exec(select(TrainingMetric).where(TrainingMetric.job_id == job_id)).all()) == 6
+    writer.close()
+
+
+def test_close_drops_rows_whose_database_is_gone(training_session_factory, caplog):
+    job_id = _seed_job(training_session_factory)
+    gone = create_engine("sqlite://", poolclass=StaticPool)  # no tables, like a torn-down test DB
+    writer = MetricWriter(flush_interval=60, flush_rows=1000)
+
+    writer.add(lambda: Session(gone), _rows(job_id, 1))
+    writer.add(training_session_factory, _rows(job_id, 2))
+    writer.close()
+
+    assert _stored(training_session_factory) == 2
+    assert "their database is gone" in caplog.text
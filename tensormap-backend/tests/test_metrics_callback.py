@@ -5,6 +5,7 @@ in-memory DB, which is reliable and fast. A genuine end-to-end Keras run lives
 in test_training_e2e.py behind the ``slow`` marker.
 """
 
+import threading
 from unittest.mock import MagicMock, patch
 
 from sqlmodel import select
@@ -13,7 +14,7 @@ from app.callbacks.cancellation_callback import CancellationCheckCallback
 from app.callbacks.metrics_callback import MetricsCallback
 from app.models.training_job import TrainingJob, TrainingStatus
 from app.models.training_metric import TrainingMetric
-from app.services.training_service import _train_in_thread
+from app.services.training_service import run_training_job, update_job_status
 
 
 def _seed_job(factory, status=TrainingStatus.PENDING) -> str:
@@ -47,6 +48,7 @@ def test_metrics_omit_missing_validation_metrics(training_session_factory):
     cb = MetricsCallback(job_id, training_session_factory, MagicMock(), loop=None)
     # No val_* metrics in logs -> only loss + accuracy persisted.
     cb.on_epoch_end(0, {"loss": 0.5, "accuracy": 0.8})
+    cb.writer.flush()
 
     with training_session_factory() as session:
         rows = session.exec(select(TrainingMetric).where(TrainingMetric.job_id == job_id)).all()
@@ -129,11 +131,58 @@ def test_cancellation_no_stop_when_running(training_session_factory):
     assert cb.cancelled is False
 
 
+def test_cancellation_event_stops_training_mid_epoch(training_session_factory):
+    job_id = _seed_job(training_session_factory, status=TrainingStatus.RUNNING)
+    event = threading.Event()
+    cb = CancellationCheckCallback(job_id, training_session_factory, event, check_every=5)
+    model = MagicMock()
+    model.stop_training = False
+    cb.set_model(model)
+
+    event.set()
+    cb.on_train_batch_end(2)
+    assert model.stop_training is False  # not a check batch
+    cb.on_train_batch_end(4)
+
+    assert model.stop_training is True
+    assert cb.cancelled is True
+    cb.on_test_batch_end(0)
+    assert model.stop_evaluating is True
+
+
+def test_cancellation_db_poll_is_throttled(training_session_factory):
+    job_id = _seed_job(training_session_factory, status=TrainingStatus.RUNNING)
+    cb = CancellationCheckCallback(job_id, training_session_factory, check_every=1, poll_interval=60)
+    model = MagicMock()
+    model.stop_training = False
+    cb.set_model(model)
+
+    cb.on_train_batch_end(0)
+    with training_session_factory() as session:
+        update_job_status(job_id, TrainingStatus.CANCELLED, session)
+    cb.on_train_batch_end(1)
+    assert cb.cancelled is False  # polled less than poll_interval ago
+
+    cb.poll_interval = 0
+    cb.on_train_batch_end(2)
+    assert cb.cancelled is True
+
+
+def test_train_begin_keeps_a_cancelled_status(training_session_factory):
+    job_id = _seed_job(training_session_factory, status=TrainingStatus.CANCELLED)
+    cb = MetricsCallback(job_id, training_session_factory, MagicMock(), loop=None)
+
+    cb.on_train_begin()
+
+    with training_session_factory() as session:
+        assert session.get(TrainingJob, job_id).status == TrainingStatus.CANCELLED
+
+
 def test_job_stores_error_on_exception(training_session_factory):
     job_id = _seed_job(training_session_factory)
 
     with patch("app.services.model_run.model_run", side_effect=RuntimeError("boom")):
-        _train_in_thread("m1", job_id, loop=None)
+        run_training_job("m1", job_id)
 
     with training_session_factory() as session:
         job = session.get(TrainingJob, job_id)
@@ -37,8 +37,9 @@ class TestModelRunEmitsErrorOnFailure:
                 "app.services.model_run._helper_generate_file_location",
                 return_value="/fake/path",
             ),
+            patch("app.services.model_run._stream_tabular", return_value=False),
             patch(
-                "app.services.model_run.pd.read_csv",
+                "app.services.model_run.load_training_arrays",
                 side_effect=FileNotFoundError("data file missing"),
             ),
             pytest.raises(FileNotFoundError),
@@ -56,8 +57,9 @@ class TestModelRunEmitsErrorOnFailure:
                 "app.services.model_run._helper_generate_file_location",
                 return_value="/fake/path",
             ),
+            patch("app.services.model_run._stream_tabular", return_value=False),
             patch(
-                "app.services.model_run.pd.read_csv",
+                "app.services.model_run.load_training_arrays",
                 side_effect=ValueError("shape mismatch"),
             ),
             pytest.raises(ValueError),
@@ -75,7 +77,8 @@ class TestModelRunEmitsErrorOnFailure:
                 "app.services.model_run._helper_generate_file_location",
                 return_value="/fake/path",
             ),
-            patch("app.services.model_run.pd.read_csv", side_effect=RuntimeError("OOM")),
+            patch("app.services.model_run._stream_tabular", return_value=False),
+            patch("app.services.model_run.load_training_arrays", side_effect=RuntimeError("OOM")),
             pytest.raises(RuntimeError, match="OOM"),
         ):
             model_run("my_model", db)
@@ -1,59 +1,47 @@
-import uuid
-from unittest.mock import MagicMock, patch
+import os
+import tempfile
+from unittest.mock import patch
 
 import numpy as np
 import pandas as pd
 import pytest
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.pool import StaticPool
 
+from app.models import DataFile
 from app.schemas.data_process import TransformationItem
 from app.services.data_process import _TRANSFORMATION_REGISTRY, preprocess_data
+from app.services.dataset_versions import resolve_version_path
 
 
-def _make_db() -> MagicMock:
-    file = MagicMock()
-    file.file_name = "test"
-    file.file_type = "csv"
-    db = MagicMock()
-    db.exec.return_value.first.return_value = file
-    return db
+def _preprocess(df: pd.DataFrame, transformation: str, feature: str, params: dict | None, read_head: bool):
+    """Run preprocess_data on ``df`` saved as an uploaded CSV; return (body, status, head DataFrame)."""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    items = [TransformationItem(transformation=transformation, feature=feature, params=params)]
+    with tempfile.TemporaryDirectory() as folder, Session(engine) as db:
+        df.to_csv(os.path.join(folder, "data.csv"), index=False)
+        file = DataFile(file_name="test", file_type="csv", disk_name="data.csv")
+        db.add(file)
+        db.commit()
+        with (
+            patch("app.services.data_process.get_settings") as mock_settings,
+            patch("app.services.dataset_versions.get_settings", mock_settings),
+        ):
+            mock_settings.return_value.upload_folder = folder
+            result, status_code = preprocess_data(db, file.id, items)
+            head = pd.read_csv(resolve_version_path(db, file)) if read_head else None
+    return result, status_code, head
 
 
 def _run(df: pd.DataFrame, transformation: str, feature: str, params: dict = None):
-    db = _make_db()
-    items = [TransformationItem(transformation=transformation, feature=feature, params=params)]
-    with (
-        patch("app.services.data_process.select"),
-        patch("app.services.data_process.pd.read_csv", return_value=df.copy()),
-        patch("app.services.data_process.get_settings") as mock_settings,
-        patch("app.services.data_process.shutil.copy2"),
-        patch("app.services.data_process.os.replace"),
-        patch("pandas.DataFrame.to_csv"),
-    ):
-        mock_settings.return_value.upload_folder = "/tmp"
-        result, status_code = preprocess_data(db, uuid.uuid4(), items)
+    result, status_code, _ = _preprocess(df, transformation, feature, params, read_head=False)
     return result, status_code
 
 
 def _run_df(df: pd.DataFrame, transformation: str, feature: str, params: dict = None) -> pd.DataFrame:
-    """Like _run but captures and returns the processed DataFrame."""
-    db = _make_db()
-    items = [TransformationItem(transformation=transformation, feature=feature, params=params)]
-    saved = {}
-
-    def capture(self_df, path, index=False):
-        saved["df"] = self_df.copy()
-
-    with (
-        patch("app.services.data_process.select"),
-        patch("app.services.data_process.pd.read_csv", return_value=df.copy()),
-        patch("app.services.data_process.get_settings") as mock_settings,
-        patch("app.services.data_process.shutil.copy2"),
-        patch("app.services.data_process.os.replace"),
-        patch.object(pd.DataFrame, "to_csv", capture),
-    ):
-        mock_settings.return_value.upload_folder = "/tmp"
-        preprocess_data(db, uuid.uuid4(), items)
-    return saved["df"]
+    """Like _run but returns the processed DataFrame (the materialized new version)."""
+    return _preprocess(df, transformation, feature, params, read_head=True)[2]
 
 
 class TestMinMaxNormalization:
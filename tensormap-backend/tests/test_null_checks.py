@@ -60,6 +60,7 @@ class TestHelperGenerateFileLocation:
         mock_file.file_type = "csv"
         mock_file.file_name = "test_data"
         mock_file.disk_name = "test_data.csv"
+        mock_file.current_version_id = None
         mock_db.exec.return_value.first.return_value = mock_file
 
         with patch("app.services.model_run.get_settings") as mock_settings:
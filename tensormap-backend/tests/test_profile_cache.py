@@ -0,0 +1,154 @@
+"""Tests for the content-keyed dataset profile cache."""
+
+import json
+import os
+import threading
+import time
+import uuid
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.models import DataFile
+from app.schemas.data_process import TransformationItem
+from app.services import profile_cache
+from app.services.data_process import (
+    get_column_stats_service,
+    get_correlation_matrix,
+    get_data_metrics,
+    preprocess_data,
+)
+from app.services.dataset_reader import remove_artifacts
+from app.services.profile_cache import file_fingerprint, load_profile, store_profile
+
+CSV = "a,b,name\n1,4.0,x\n2,5.5,y\n3,7.0,z\n"
+
+
+@pytest.fixture()
+def csv_path(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text(CSV)
+    return str(path)
+
+
+def _db():
+    f = MagicMock()
+    f.file_name = "data"
+    f.file_type = "csv"
+    f.disk_name = "data.csv"
+    f.current_version_id = None
+    db = MagicMock()
+    db.exec.return_value.first.return_value = f
+    return db
+
+
+def _call(service, tmp_path, file_id):
+    with patch("app.services.data_process.get_settings") as ms:
+        ms.return_value.upload_folder = str(tmp_path)
+        return service(_db(), file_id)
+
+
+def test_store_then_load_roundtrip(csv_path):
+    store_profile(csv_path, "column_stats", "ok", {"total_rows": 3})
+    assert load_profile(csv_path, "column_stats") == {"message": "ok", "data": {"total_rows": 3}}
+    assert load_profile(csv_path, "correlation") is None
+
+
+def test_concurrent_stores_keep_every_entry(csv_path):
+    dump = json.dump
+
+    def slow_dump(obj, f):
+        time.sleep(0.05)  # widen the read-modify-write window
+        dump(obj, f)
+
+    kinds = [f"kind{i}" for i in range(4)]
+    with patch("app.services.profile_cache.json.dump", slow_dump):
+        threads = [threading.Thread(target=store_profile, args=(csv_path, kind, "ok", {})) for kind in kinds]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert all(load_profile(csv_path, kind) is not None for kind in kinds)
+    assert sorted(os.listdir(os.path.dirname(profile_cache._cache_path(csv_path)))) == [
+        "profile.json",
+        "profile.json.lock",
+    ]
+
+
+@pytest.mark.parametrize("service", [get_data_metrics, get_column_stats_service, get_correlation_matrix])
+def test_files_sharing_content_share_profiles(service, tmp_path, csv_path):
+    first_body, _ = _call(service, tmp_path, uuid.uuid4())
+
+    with patch("app.services.data_process.DatasetReader", side_effect=AssertionError("recomputed")):
+        second_body, second_status = _call(service, tmp_path, uuid.uuid4())
+
+    assert second_status == 200
+    assert second_body == first_body
+
+
+def test_miss_after_content_change(csv_path):
+    store_profile(csv_path, "metrics", "ok", {})
+    with open(csv_path, "a") as f:
+        f.write("4,8.0,w\n")
+    assert load_profile(csv_path, "metrics") is None
+
+
+def test_miss_after_version_bump(csv_path, monkeypatch):
+    store_profile(csv_path, "metrics", "ok", {})
+    monkeypatch.setattr(profile_cache, "PROFILE_CACHE_VERSION", profile_cache.PROFILE_CACHE_VERSION + 1)
+    assert load_profile(csv_path, "metrics") is None
+
+
+def test_fingerprint_tracks_tail_bytes(tmp_path):
+    path = tmp_path / "big.csv"
+    path.write_bytes(b"x" * 200_000)
+    before = file_fingerprint(str(path))
+    with open(path, "r+b") as f:
+        f.seek(199_999)
+        f.write(b"y")
+    stamp = before["mtime_ns"]
+    os.utime(path, ns=(stamp, stamp))
+    assert file_fingerprint(str(path)) != before
+
+
+@pytest.mark.parametrize("service", [get_data_metrics, get_column_stats_service, get_correlation_matrix])
+def test_repeat_calls_are_served_from_cache(service, tmp_path, csv_path):
+    fid = uuid.uuid4()
+    first_body, first_status = _call(service, tmp_path, fid)
+    assert first_status == 200
+
+    with patch("app.services.data_process.DatasetReader", side_effect=AssertionError("recomputed")):
+        second_body, second_status = _call(service, tmp_path, fid)
+
+    assert second_status == 200
+    assert second_body == first_body
+
+
+def test_new_version_is_profiled_separately(tmp_path, csv_path, db_session):
+    file = DataFile(file_name="data", file_type="csv", disk_name="data.csv")
+    db_session.add(file)
+    db_session.commit()
+    with (
+        patch("app.services.data_process.get_settings") as ms,
+        patch("app.services.dataset_versions.get_settings", ms),
+    ):
+        ms.return_value.upload_folder = str(tmp_path)
+        get_column_stats_service(db_session, file.id)
+        assert load_profile(csv_path, "column_stats") is not None
+
+        _, status = preprocess_data(
+            db_session, file.id, [TransformationItem(transformation="Drop Column", feature="a")]
+        )
+        assert status == 200
+        body, _ = get_column_stats_service(db_session, file.id)
+
+    assert [c["column"] for c in body["data"]["columns"]] == ["b", "name"]
+    # The upload is unchanged, so its cached profile stays valid for undo.
+    assert load_profile(csv_path, "column_stats") is not None
+
+
+def test_remove_artifacts_drops_cache(csv_path):
+    store_profile(csv_path, "metrics", "ok", {})
+    remove_artifacts(csv_path)
+    assert load_profile(csv_path, "metrics") is None
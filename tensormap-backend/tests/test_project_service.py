@@ -40,6 +40,7 @@ def sample_project(project_id):
 def sample_csv_file():
     f = MagicMock(spec=DataFile)
     f.disk_name = "data.csv"
+    f.current_version_id = None
     f.file_type = "csv"
     return f
 
@@ -48,6 +49,7 @@ def sample_csv_file():
 def sample_zip_file():
     f = MagicMock(spec=DataFile)
     f.disk_name = "images.zip"
+    f.current_version_id = None
     f.file_type = "zip"
     return f
 
@@ -73,6 +75,7 @@ class TestDeleteProjectService:
         mock_db.exec.return_value.all.side_effect = [
             [sample_csv_file],
             [sample_model],
+            [],
         ]
 
         csv_path = tmp_path / "data.csv"
@@ -99,6 +102,7 @@ class TestDeleteProjectService:
     def test_path_traversal_blocked_on_disk_name(self, mock_db, project_id, sample_project, tmp_path):
         malicious = MagicMock(spec=DataFile)
         malicious.disk_name = "../../etc/passwd"
+        malicious.current_version_id = None
         malicious.file_type = "csv"
 
         mock_db.get.return_value = sample_project
@@ -150,6 +154,7 @@ class TestDeleteProjectService:
         mock_db.exec.return_value.all.side_effect = [
             [sample_csv_file],
             [],
+            [],
         ]
 
         with (
@@ -166,6 +171,7 @@ class TestDeleteProjectService:
         mock_db.exec.return_value.all.side_effect = [
             [sample_zip_file],
             [],
+            [],
         ]
 
         zip_path = tmp_path / "images.zip"
@@ -183,6 +189,25 @@ class TestDeleteProjectService:
         assert status == 200
         assert not extract_dir.exists()
 
+    def test_blob_shared_with_another_file_is_kept(
+        self, mock_db, project_id, sample_project, sample_csv_file, tmp_path
+    ):
+        mock_db.get.return_value = sample_project
+        mock_db.exec.return_value.all.side_effect = [
+            [sample_csv_file],
+            [],
+            ["data.csv"],  # still referenced by a DataFile outside the project
+        ]
+        csv_path = tmp_path / "data.csv"
+        csv_path.write_text("col1,col2\n1,2")
+
+        with patch("app.services.project.get_settings") as mock_settings:
+            mock_settings.return_value.upload_folder = str(tmp_path)
+            body, status = delete_project_service(mock_db, project_id)
+
+        assert status == 200
+        assert csv_path.exists()
+
 
 class TestCreateProjectService:
     def _make_project(self, name="Test", description="Desc"):
@@ -0,0 +1,90 @@
+"""Tests for the CSV byte-offset row index used by paginated previews."""
+
+import os
+import uuid
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import pytest
+
+from app.services.data_process import get_file_data
+from app.services.row_index import build_row_index, load_row_index, read_rows, row_index_path
+
+
+@pytest.fixture()
+def numbered_csv(tmp_path):
+    """A 2,500-row CSV whose ``n`` column equals the data-row number."""
+    path = tmp_path / "numbered.csv"
+    pd.DataFrame({"n": range(2500), "label": [f"r{i}" for i in range(2500)]}).to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.mark.parametrize("content,expected", [("", 0), ("a,b\n", 0), ("a,b", 0), ("a\n1\n2\n", 2), ("a\n1\n2", 2)])
+def test_total_rows_matches_line_count(tmp_path, content, expected):
+    path = tmp_path / "f.csv"
+    path.write_text(content)
+    assert build_row_index(str(path), persist=False).total_rows == expected
+
+
+@pytest.mark.parametrize("stride", [1, 7, 1024])
+def test_offsets_point_at_sampled_rows(numbered_csv, stride):
+    index = build_row_index(numbered_csv, stride=stride, persist=False)
+    assert len(index.offsets) == (2500 + stride - 1) // stride
+    with open(numbered_csv, "rb") as f:
+        for k in (0, len(index.offsets) // 2, len(index.offsets) - 1):
+            f.seek(int(index.offsets[k]))
+            assert f.readline().split(b",")[0] == str(k * stride).encode()
+
+
+@pytest.mark.parametrize("start,count", [(0, 5), (1023, 3), (1024, 1), (2497, 10)])
+def test_read_rows_returns_requested_slice(numbered_csv, start, count):
+    index = build_row_index(numbered_csv, persist=False)
+    page = read_rows(numbered_csv, index, start, count)
+    assert page["n"].tolist() == list(range(start, min(start + count, 2500)))
+    assert list(page.columns) == ["n", "label"]
+
+
+def test_index_is_persisted_and_reused(numbered_csv):
+    build_row_index(numbered_csv, stride=10)
+    assert os.path.exists(row_index_path(numbered_csv))
+    with patch("app.services.row_index.build_row_index", side_effect=AssertionError("rebuilt")):
+        index = load_row_index(numbered_csv)
+    assert index.stride == 10
+    assert index.total_rows == 2500
+
+
+def test_stale_index_is_rebuilt(numbered_csv):
+    build_row_index(numbered_csv)
+    with open(numbered_csv, "a") as f:
+        f.write("2500,r2500\n")
+    stamp = os.stat(row_index_path(numbered_csv)).st_mtime_ns + 1_000_000_000
+    os.utime(numbered_csv, ns=(stamp, stamp))
+    assert load_row_index(numbered_csv).total_rows == 2501
+
+
+def test_corrupt_index_is_rebuilt(numbered_csv):
+    build_row_index(numbered_csv)
+    path = row_index_path(numbered_csv)
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) // 2)
+
+    assert load_row_index(numbered_csv).total_rows == 2500
+    assert os.listdir(os.path.dirname(path)) == [os.path.basename(path)]
+
+
+def test_get_file_data_deep_page_uses_index(tmp_path, numbered_csv):
+    f = MagicMock()
+    f.file_name = "numbered"
+    f.file_type = "csv"
+    f.disk_name = "numbered.csv"
+    f.current_version_id = None
+    db = MagicMock()
+    db.exec.return_value.first.return_value = f
+
+    with patch("app.services.data_process.get_settings") as ms:
+        ms.return_value.upload_folder = str(tmp_path)
+        body, status = get_file_data(db, uuid.uuid4(), page=25, page_size=100)
+
+    assert status == 200
+    assert body["pagination"] == {"page": 25, "page_size": 100, "total_rows": 2500, "total_pages": 25}
+    assert [row["n"] for row in body["data"]] == list(range(2400, 2500))
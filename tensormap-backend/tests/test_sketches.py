@@ -0,0 +1,76 @@
+"""Tests for the mergeable sketches behind approximate profiling."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.sketches import FrequentItems, HyperLogLog, QuantileSketch, hash_values
+
+
+def _merged(sketches):
+    total = sketches[0]
+    for sketch in sketches[1:]:
+        total.merge(sketch)
+    return total
+
+
+@pytest.mark.parametrize("n", [50, 20_000, 400_000])
+def test_hyperloglog_estimates_distinct_counts(n):
+    values = pd.Series(np.random.default_rng(n).integers(0, n, 2 * n))
+    parts = []
+    for chunk in np.array_split(values.to_numpy(), 5):
+        sketch = HyperLogLog.for_error(0.01)
+        sketch.update_hashes(hash_values(pd.Series(chunk)))
+        parts.append(sketch)
+
+    assert _merged(parts).estimate() == pytest.approx(values.nunique(), rel=0.03)
+
+
+def test_hyperloglog_hashes_ints_and_floats_alike():
+    ints, floats = HyperLogLog(), HyperLogLog()
+    ints.update_hashes(hash_values(pd.Series([1, 2, 3])))
+    floats.update_hashes(hash_values(pd.Series([1.0, 2.0, np.nan, 3.0])))
+    np.testing.assert_array_equal(ints.registers, floats.registers)
+
+
+@pytest.mark.parametrize("error", [0.01, 0.05])
+def test_quantile_sketch_rank_error_is_bounded(error):
+    values = np.random.default_rng(0).lognormal(size=300_000)
+    parts = []
+    for seed, chunk in enumerate(np.array_split(values, 12)):
+        sketch = QuantileSketch.for_error(error, seed=seed)
+        sketch.update(chunk)
+        parts.append(sketch)
+    sketch = _merged(parts)
+
+    qs = [0.01, 0.25, 0.5, 0.75, 0.99]
+    ranks = np.searchsorted(np.sort(values), sketch.quantiles(qs)) / len(values)
+    assert np.max(np.abs(ranks - qs)) <= error
+    assert sum(len(level) for level in sketch.levels) < len(values) / 50
+
+
+def test_small_quantile_sketch_is_exact():
+    values = np.arange(100.0)
+    sketch = QuantileSketch(k=200)
+    sketch.update(values[:40])
+    sketch.update(values[40:])
+    assert sketch.is_exact
+    assert sketch.quantiles([0.25, 0.5]) == pd.Series(values).quantile([0.25, 0.5]).tolist()
+    assert np.isnan(QuantileSketch().quantiles([0.5])[0])
+
+
+def test_frequent_items_undercount_is_bounded():
+    values = pd.Series(np.random.default_rng(1).zipf(1.6, 100_000)).astype(str)
+    parts = []
+    for chunk in np.array_split(values.to_numpy(), 8):
+        sketch = FrequentItems.for_error(0.01)
+        sketch.update(pd.Series(chunk))
+        parts.append(sketch)
+    sketch = _merged(parts)
+
+    exact = values.value_counts()
+    top = sketch.top(3)
+    assert [v for v, _ in top] == list(exact.index[:3])
+    for value, count in top:
+        assert exact[value] - sketch.max_undercount <= count <= exact[value]
+    assert len(sketch.counts) <= sketch.capacity
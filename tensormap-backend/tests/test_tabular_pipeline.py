@@ -0,0 +1,81 @@
+"""Tests for the streaming tabular input pipeline."""
+
+import math
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+import tensorflow as tf
+
+from app.services.dataset_reader import DatasetReader, build_sidecar
+from app.services.image_pipeline import InputPipelineOptions
+from app.services.tabular_pipeline import in_training_split, scan_tabular, tabular_datasets
+
+
+@pytest.fixture()
+def labelled_csv(tmp_path):
+    path = tmp_path / "pets.csv"
+    rows = [f"{i},{i * 0.5},{['dog', 'cat', 'bird'][i % 3]}" for i in range(200)]
+    rows[7] = "7,,dog"  # dropped: missing feature
+    rows[8] = "8,4.0,"  # dropped: missing label
+    path.write_text("age,weight,label\n" + "\n".join(rows) + "\n")
+    return str(path)
+
+
+def _rows(ds: tf.data.Dataset) -> set[tuple]:
+    return {(*x, y) for xb, yb in ds for x, y in zip(xb.numpy().tolist(), yb.numpy().tolist(), strict=True)}
+
+
+def test_hash_split_is_deterministic_and_proportional():
+    rows = np.arange(100_000)
+    train = in_training_split(rows, 80)
+    assert abs(train.mean() - 0.8) < 0.01
+    np.testing.assert_array_equal(train, in_training_split(rows, 80))
+    np.testing.assert_array_equal(in_training_split(rows[50_000:], 80), train[50_000:])
+    assert not in_training_split(rows, 0).any() and in_training_split(rows, 100).all()
+
+
+def test_scan_counts_subsets_and_sorts_labels(labelled_csv):
+    scan = scan_tabular(DatasetReader(labelled_csv), "label", 80, chunksize=64)
+
+    assert scan.feature_columns == ["age", "weight"]
+    assert (scan.source_rows, scan.dropped_rows) == (200, 2)
+    train = in_training_split(np.arange(200), 80)
+    train[[7, 8]] = False
+    assert (scan.train_rows, scan.val_rows) == (train.sum(), 198 - train.sum())
+    assert scan.classes == ["bird", "cat", "dog"]
+
+
+def test_datasets_stream_every_complete_row_once(labelled_csv):
+    build_sidecar(labelled_csv)
+    with patch("app.services.dataset_reader.pd.read_csv", side_effect=AssertionError("CSV re-parsed")):
+        train, val, scan = tabular_datasets(
+            DatasetReader(labelled_csv), "label", 80, batch_size=16, options=InputPipelineOptions(shuffle_buffer=50)
+        )
+        train_rows, val_rows = _rows(train), _rows(val)
+
+    expected = pd.read_csv(labelled_csv).dropna()
+    codes = pd.Categorical(expected["label"]).codes
+    assert train_rows | val_rows == set(zip(expected["age"], expected["weight"], codes.astype(float), strict=True))
+    assert not train_rows & val_rows
+    assert (len(train_rows), len(val_rows)) == (scan.train_rows, scan.val_rows)
+    assert train.cardinality().numpy() == math.ceil(scan.train_rows / 16)
+    assert [b[0].shape[0] for b in val][:-1] == [16] * (math.ceil(scan.val_rows / 16) - 1)
+
+    model = tf.keras.Sequential([tf.keras.Input((2,)), tf.keras.layers.Dense(3)])
+    model.compile(optimizer="adam", loss=tf.keras.losses.SparseCategoricalCrossentropy(from_logits=True))
+    model.fit(train, epochs=1, verbose=0)
+    assert np.isfinite(model.evaluate(val, verbose=0))
+
+
+def test_numeric_target_is_kept_and_text_features_rejected(labelled_csv, tmp_path):
+    numeric = tmp_path / "numeric.csv"
+    pd.read_csv(labelled_csv).drop(columns="label").to_csv(numeric, index=False)
+    _, val, scan = tabular_datasets(DatasetReader(str(numeric)), "weight", 80, batch_size=8)
+    assert scan.classes is None
+    assert all(weight == age * 0.5 for age, weight in _rows(val))
+    with pytest.raises(ValueError, match="Feature column 'label'"):
+        scan_tabular(DatasetReader(labelled_csv), "age", 80)
+    with pytest.raises(ValueError, match="both the training and validation"):
+        scan_tabular(DatasetReader(labelled_csv), "label", 100)
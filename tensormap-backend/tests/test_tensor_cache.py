@@ -0,0 +1,97 @@
+"""Tests for the cache of prepared tabular training arrays."""
+
+import os
+import threading
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.model_run import _prepare_training_data
+from app.services.tensor_cache import cache_path, load_training_arrays
+from app.shared.file_lock import file_lock
+from app.shared.memory import PeakRssMonitor, current_rss
+
+
+@pytest.fixture()
+def labelled_csv(tmp_path):
+    path = tmp_path / "pets.csv"
+    rows = [f"{i},{i * 0.5},{'cat' if i % 3 else 'dog'}" for i in range(20)]
+    rows[4] = "4,,cat"  # dropped: missing feature
+    path.write_text("age,weight,label\n" + "\n".join(rows) + "\n")
+    return str(path)
+
+
+def test_arrays_match_the_dataframe_preparation(labelled_csv):
+    arrays = load_training_arrays(labelled_csv, "label")
+
+    expected = pd.read_csv(labelled_csv).dropna().sample(frac=1, random_state=42)
+    assert (arrays.source_rows, arrays.rows, arrays.dropped_rows) == (20, 19, 1)
+    assert arrays.feature_columns == ["age", "weight"]
+    assert arrays.x.dtype == np.float32 and arrays.y.dtype == np.float32
+    np.testing.assert_array_equal(arrays.x, expected[["age", "weight"]].to_numpy(dtype=np.float32))
+    np.testing.assert_array_equal(arrays.y, pd.Categorical(expected["label"]).codes)
+    assert arrays.cache_hit is False
+
+
+def test_cached_arrays_are_memory_mapped_and_split_without_copies(labelled_csv):
+    load_training_arrays(labelled_csv, "label")
+    with patch("app.services.tensor_cache.DatasetReader") as reader:
+        arrays = load_training_arrays(labelled_csv, "label")
+    reader.assert_not_called()
+    assert arrays.cache_hit is True
+    assert isinstance(arrays.x, np.memmap)
+
+    x_train, y_train, x_test, y_test = arrays.split(80)
+    assert (len(x_train), len(x_test)) == (15, 4)
+    assert np.shares_memory(x_train, arrays.x) and np.shares_memory(y_test, arrays.y)
+
+
+def test_cache_is_rebuilt_when_the_csv_changes(labelled_csv):
+    load_training_arrays(labelled_csv, "label")
+    with open(labelled_csv, "a") as f:
+        f.write("20,10.0,dog\n")
+
+    arrays = load_training_arrays(labelled_csv, "label")
+    assert (arrays.cache_hit, arrays.rows) == (False, 20)
+
+
+def test_build_waits_for_a_lock_held_by_another_process(labelled_csv):
+    # flock locks belong to the open file, so a second open in this process
+    # contends exactly like a job in another worker process.
+    results = []
+    with file_lock(cache_path(labelled_csv, "label")):
+        loader = threading.Thread(target=lambda: results.append(load_training_arrays(labelled_csv, "label")))
+        loader.start()
+        loader.join(0.5)
+        assert loader.is_alive()
+        assert not os.path.exists(cache_path(labelled_csv, "label"))
+    loader.join(30)
+    assert results[0].rows == 19
+
+
+def test_keyed_by_target_field(labelled_csv):
+    assert cache_path(labelled_csv, "label") != cache_path(labelled_csv, "age")
+    with pytest.raises(ValueError, match="Feature column 'label'"):
+        load_training_arrays(labelled_csv, "age")
+    with pytest.raises(ValueError, match="Target field 'price'"):
+        load_training_arrays(labelled_csv, "price")
+    assert not os.path.exists(cache_path(labelled_csv, "age"))
+
+
+def test_prepare_training_data_warns_about_dropped_rows(labelled_csv):
+    arrays = load_training_arrays(labelled_csv, "label")
+    with patch("app.services.model_run._model_result") as emit:
+        x_train, _, x_test, _ = _prepare_training_data(arrays, 50)
+
+    assert "Removed 1 rows (5.0%)" in emit.call_args[0][0]
+    assert (len(x_train), len(x_test)) == (9, 10)
+
+
+@pytest.mark.skipif(current_rss() is None, reason="RSS is only read from /proc")
+def test_peak_rss_monitor_sees_allocations():
+    with PeakRssMonitor() as rss:
+        block = np.ones(64 * 1024 * 1024, dtype=np.uint8)
+    assert rss.peak_bytes - rss.baseline_bytes >= 48 * 1024 * 1024
+    del block
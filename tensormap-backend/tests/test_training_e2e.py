@@ -15,7 +15,8 @@ import tensorflow as tf
 from app.callbacks.cancellation_callback import CancellationCheckCallback
 from app.callbacks.metrics_callback import MetricsCallback
 from app.models.training_job import TrainingJob, TrainingStatus
-from app.services.training_service import get_job_metrics_grouped, update_job_status
+from app.services.cancellation import registry as cancellation
+from app.services.training_service import get_job_metrics_grouped, signal_cancellation, update_job_status
 
 pytestmark = pytest.mark.slow
 
@@ -69,21 +70,25 @@ def test_e2e_training_completes_and_persists_metrics(training_session_factory):
 def test_e2e_cancellation_stops_training(training_session_factory):
     job_id = _seed_job(training_session_factory, status=TrainingStatus.RUNNING)
     metrics_cb = MetricsCallback(job_id, training_session_factory, MagicMock(), loop=None)
-    cancel_cb = CancellationCheckCallback(job_id, training_session_factory)
+    cancel_cb = CancellationCheckCallback(job_id, training_session_factory, cancellation.register(job_id))
 
     factory = training_session_factory
 
     class CancelAfterFirstEpoch(tf.keras.callbacks.Callback):
-        """Simulate a user pressing Stop after the first epoch completes."""
+        """Simulate a user pressing Stop after the first epoch completes (what DELETE does)."""
 
         def on_epoch_end(self, epoch, logs=None):
             if epoch == 0:
                 with factory() as session:
                     update_job_status(job_id, TrainingStatus.CANCELLED, session)
+                signal_cancellation(job_id)
 
     x, y = _binary_dataset()
     model = _tiny_model()
-    model.fit(x, y, epochs=10, batch_size=16, verbose=0, callbacks=[metrics_cb, cancel_cb, CancelAfterFirstEpoch()])
+    try:
+        model.fit(x, y, epochs=10, batch_size=16, verbose=0, callbacks=[metrics_cb, cancel_cb, CancelAfterFirstEpoch()])
+    finally:
+        cancellation.unregister(job_id)
 
     assert cancel_cb.cancelled is True
     assert model.stop_training is True
@@ -94,3 +99,26 @@ def test_e2e_cancellation_stops_training(training_session_factory):
         grouped = get_job_metrics_grouped(job_id, session)
     # Training stopped early rather than running all 10 epochs.
     assert len(grouped) < 10
+
+
+def test_e2e_cancellation_stops_within_the_epoch(training_session_factory):
+    job_id = _seed_job(training_session_factory, status=TrainingStatus.RUNNING)
+    event = cancellation.register(job_id)
+    cancel_cb = CancellationCheckCallback(job_id, training_session_factory, event, check_every=2)
+    batches = []
+
+    class CancelAtBatchThree(tf.keras.callbacks.Callback):
+        def on_train_batch_begin(self, batch, logs=None):
+            batches.append(batch)
+            if batch == 3:
+                signal_cancellation(job_id)
+
+    x, y = _binary_dataset(n=640)
+    try:
+        _tiny_model().fit(x, y, epochs=1, batch_size=16, verbose=0, callbacks=[CancelAtBatchThree(), cancel_cb])
+    finally:
+        cancellation.unregister(job_id)
+
+    assert cancel_cb.cancelled is True
+    # Checked after batch 3 (every 2nd batch) — not after all 40 batches of the epoch.
+    assert batches == [0, 1, 2, 3]
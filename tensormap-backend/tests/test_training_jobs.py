@@ -5,6 +5,7 @@ the request/persistence behaviour without spinning up a real Keras run.
 """
 
 from datetime import UTC, datetime, timedelta
+from unittest.mock import patch
 
 import pytest
 from sqlmodel import Session, select
@@ -14,7 +15,14 @@ from app.models.ml import ModelBasic
 from app.models.project import Project
 from app.models.training_job import TrainingJob, TrainingStatus
 from app.models.training_metric import TrainingMetric
-from app.services.training_service import orphan_recovery
+from app.services import training_service
+from app.services.training_service import (
+    _job_ended,
+    create_training_job,
+    dispatch_queued_jobs,
+    orphan_recovery,
+    queue_positions,
+)
 
 BASE = "/api/v1/model"
 
@@ -51,9 +59,16 @@ def _seed_model(session: Session, name: str = "m1") -> ModelBasic:
 
 
 def _seed_job(
-    session: Session, model_id: int, status: TrainingStatus, started_at: datetime | None = None
+    session: Session,
+    model_id: int,
+    status: TrainingStatus,
+    started_at: datetime | None = None,
+    project_id=None,
+    completed_at: datetime | None = None,
 ) -> TrainingJob:
-    job = TrainingJob(model_id=model_id, status=status, started_at=started_at)
+    job = TrainingJob(
+        model_id=model_id, status=status, started_at=started_at, project_id=project_id, completed_at=completed_at
+    )
     session.add(job)
     session.commit()
     session.refresh(job)
@@ -62,8 +77,8 @@ def _seed_job(
 
 @pytest.fixture(autouse=True)
 def _no_background_training(mocker):
-    """Stop the run endpoint from launching real training in every HTTP test."""
-    return mocker.patch("app.routers.training.launch_training_job")
+    """Stop the scheduler from launching real training in every test."""
+    return mocker.patch("app.services.training_service.launch_training_job")
 
 
 def test_start_training_returns_202(client, db_session):
@@ -85,6 +100,32 @@ def test_job_created_with_pending_status(client, db_session):
     assert job.status == TrainingStatus.PENDING
     assert job.hyperparams["optimizer"] == "adam"
     assert job.hyperparams["epochs"] == 1
+    assert job.hyperparams["input_pipeline"] == {
+        "parallel_calls": None,
+        "cache": "disk",
+        "prefetch": None,
+        "deterministic": True,
+        "streaming": None,
+        "shuffle_buffer": None,
+    }
+
+
+def test_input_pipeline_settings_recorded_on_job(client, db_session):
+    _seed_model(db_session, "m1")
+    settings = {
+        "parallel_calls": 4,
+        "cache": "memory",
+        "prefetch": 2,
+        "deterministic": False,
+        "streaming": True,
+        "shuffle_buffer": 512,
+    }
+    resp = client.post(f"{BASE}/run", json={"model_name": "m1", "input_pipeline": settings})
+    job = db_session.get(TrainingJob, resp.json()["data"]["job_id"])
+    assert job.hyperparams["input_pipeline"] == settings
+
+    bad = client.post(f"{BASE}/run", json={"model_name": "m1", "input_pipeline": {"cache": "gpu"}})
+    assert bad.status_code == 422
 
 
 def test_start_training_launches_background(client, db_session, _no_background_training):
@@ -173,14 +214,99 @@ def test_metrics_endpoint_after_insert(client, db_session):
     assert [row["epoch"] for row in data] == [1, 2, 3]
 
 
-def test_concurrency_limit(client, db_session, monkeypatch):
+def test_jobs_queue_when_every_slot_is_busy(client, db_session, _no_background_training):
     model = _seed_model(db_session, "m1")
-    # Saturate with 3 active jobs (the default MAX_CONCURRENT_TRAINING_JOBS).
+    # Saturate the 3 slots (the default MAX_CONCURRENT_TRAINING_JOBS).
     for _ in range(3):
         _seed_job(db_session, model.id, TrainingStatus.RUNNING)
     resp = client.post(f"{BASE}/run", json={"model_name": "m1"})
-    assert resp.status_code == 429
-    assert resp.json()["success"] is False
+    assert resp.status_code == 202
+    data = resp.json()["data"]
+    assert (data["status"], data["queue_position"], data["estimated_start_at"]) == ("queued", 1, None)
+    _no_background_training.assert_not_called()
+
+    resp = client.get(f"{BASE}/training-job/{data['job_id']}")
+    assert resp.json()["data"]["queue_position"] == 1
+
+    assert client.delete(f"{BASE}/training-job/{data['job_id']}").status_code == 204
+    assert db_session.get(TrainingJob, data["job_id"]).status == TrainingStatus.CANCELLED
+    _no_background_training.assert_not_called()
+
+
+def test_queue_orders_by_priority_then_project_share(training_session_factory, _no_background_training):
+    with training_session_factory() as session:
+        model = _seed_model(session, "m1")
+        busy = model.project_id
+        idle = Project(name="other")
+        session.add(idle)
+        session.commit()
+        for _ in range(2):
+            _seed_job(session, model.id, TrainingStatus.RUNNING, project_id=busy)
+        first = create_training_job(model.id, busy, None, session).id
+        second = create_training_job(model.id, busy, None, session).id
+        other = create_training_job(model.id, idle.id, None, session).id
+        urgent = create_training_job(model.id, busy, None, session, priority=5).id
+
+        assert {job_id: pos for job_id, (pos, _) in queue_positions(session).items()} == {
+            urgent: 1,
+            other: 2,
+            first: 3,
+            second: 4,
+        }
+        assert dispatch_queued_jobs(session) == [urgent]
+        _no_background_training.assert_called_once_with("m1", urgent)
+        assert session.get(TrainingJob, urgent).status == TrainingStatus.PENDING
+
+        # The next slot to free up goes to the other project's job.
+        running = session.exec(select(TrainingJob).where(TrainingJob.status == TrainingStatus.RUNNING)).first()
+        running.status = TrainingStatus.COMPLETED
+        session.add(running)
+        session.commit()
+        finished = running.id
+    _job_ended(finished)
+    with training_session_factory() as session:
+        assert session.get(TrainingJob, other).status == TrainingStatus.PENDING
+        assert session.get(TrainingJob, first).status == TrainingStatus.QUEUED
+
+
+def test_dispatch_recounts_slots_taken_by_other_processes(training_session_factory, _no_background_training):
+    with training_session_factory() as session:
+        model = _seed_model(session, "m1")
+        queued = create_training_job(model.id, model.project_id, None, session).id
+        # Another API process fills every slot after this one read the queue.
+        stale = training_service._queue_state(session)
+        for _ in range(training_service.MAX_CONCURRENT_TRAINING_JOBS):
+            _seed_job(session, model.id, TrainingStatus.PENDING)
+
+        with patch("app.services.training_service._queue_state", return_value=stale):
+            assert dispatch_queued_jobs(session) == []
+        _no_background_training.assert_not_called()
+        assert session.get(TrainingJob, queued).status == TrainingStatus.QUEUED
+
+
+def test_queue_estimates_start_from_completed_run_times(training_session_factory):
+    now = datetime.now(UTC)
+    with training_session_factory() as session:
+        model = _seed_model(session, "m1")
+        _seed_job(session, model.id, TrainingStatus.COMPLETED, now - timedelta(minutes=30), completed_at=now)
+        for started in (0, 5, 10):
+            _seed_job(session, model.id, TrainingStatus.RUNNING, now - timedelta(minutes=started))
+        queued = [create_training_job(model.id, model.project_id, None, session).id for _ in range(4)]
+
+        starts = {job_id: start for job_id, (_, start) in queue_positions(session).items()}
+
+    # Slots free after the 30-minute average run: in 20, 25 and 30 minutes, then 50.
+    expected = [20, 25, 30, 50]
+    for job_id, minutes in zip(queued, expected, strict=True):
+        assert abs(starts[job_id] - (now + timedelta(minutes=minutes))) < timedelta(seconds=30)
+
+
+def test_orphan_recovery_keeps_queued_jobs(db_session):
+    model = _seed_model(db_session, "m1")
+    job = _seed_job(db_session, model.id, TrainingStatus.QUEUED)
+    assert orphan_recovery(db_session) == 0
+    db_session.refresh(job)
+    assert job.status == TrainingStatus.QUEUED
 
 
 def test_list_jobs_for_model(client, db_session):
@@ -0,0 +1,135 @@
+"""Tests for the pool of training worker processes.
+
+The pools here run small stand-in jobs (``_job``) in real spawned processes,
+without preloading TensorFlow, to exercise dispatch, the IPC event relay,
+cancellation and crash recovery.
+"""
+
+import os
+import signal
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from app.models.training_job import TrainingJob, TrainingStatus
+from app.services.training_service import _fail_crashed_job
+from app.services.training_workers import TrainingWorkerPool
+from app.socketio_instance import emit_relay
+
+
+def _job(model_name: str, job_id: str, cancel_event: threading.Event) -> None:
+    """Stand-in for ``run_training_job``; what it does depends on ``model_name``."""
+    if model_name == "crash":
+        os.kill(os.getpid(), signal.SIGKILL)
+    if model_name == "wait":
+        cancel_event.wait(30)
+    emit_relay()(job_id, {"model": model_name, "pid": os.getpid(), "cancelled": cancel_event.is_set()})
+
+
+class _Recorder:
+    def __init__(self) -> None:
+        self.events: dict[str, dict] = {}
+        self.crashes: dict[str, int | None] = {}
+
+    def on_event(self, room, data) -> None:
+        self.events[room] = data
+
+    def on_crash(self, job_id, exitcode) -> None:
+        self.crashes[job_id] = exitcode
+
+
+def _until(condition, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.05)
+
+
+@pytest.fixture()
+def pool():
+    recorder = _Recorder()
+    pool = TrainingWorkerPool(1, _job, recorder.on_event, recorder.on_crash, preload=())
+    pool.recorder = recorder
+    yield pool
+    pool.shutdown(timeout=5)
+
+
+def test_jobs_run_in_a_worker_process_and_relay_events(pool):
+    pool.submit("echo", "a")
+    pool.submit("echo", "b")
+
+    _until(lambda: {"a", "b"} <= pool.recorder.events.keys())
+    assert pool.recorder.events["a"]["pid"] not in (None, os.getpid())
+    assert pool.recorder.events["a"]["pid"] == pool.recorder.events["b"]["pid"]
+    _until(lambda: pool.running_jobs() == {})
+
+
+def test_a_killed_worker_fails_only_its_job_and_is_replaced(pool):
+    pool.submit("echo", "before")
+    pool.submit("crash", "oom")
+    pool.submit("echo", "after")
+
+    _until(lambda: "after" in pool.recorder.events)
+    assert pool.recorder.crashes == {"oom": -signal.SIGKILL}
+    assert "oom" not in pool.recorder.events
+    assert pool.recorder.events["after"]["pid"] != pool.recorder.events["before"]["pid"]
+
+
+def test_other_workers_are_served_while_a_crashed_one_backs_off():
+    recorder = _Recorder()
+    pool = TrainingWorkerPool(2, _job, recorder.on_event, recorder.on_crash, preload=())
+    try:
+        pool.start()
+        pool._restart_delay = 30.0  # as after a run of quick crashes: the replacement waits 60s
+        pool.submit("crash", "oom")
+        _until(lambda: "oom" in recorder.crashes)
+
+        started = time.monotonic()
+        pool.submit("echo", "next")
+        _until(lambda: "next" in recorder.events, timeout=10)
+        assert time.monotonic() - started < 10
+        assert pool.running_jobs() == {}
+    finally:
+        pool.shutdown(timeout=5)
+
+
+def test_cancel_signals_the_running_job_and_drops_waiting_ones(pool):
+    pool.submit("wait", "running")
+    pool.submit("echo", "waiting")
+    _until(lambda: "running" in pool.running_jobs())
+
+    assert pool.cancel("waiting") is True
+    assert pool.cancel("running") is True
+    assert pool.cancel("unknown") is False
+    _until(lambda: "running" in pool.recorder.events)
+    assert pool.recorder.events["running"]["cancelled"] is True
+    time.sleep(0.5)
+    assert "waiting" not in pool.recorder.events
+
+
+def _seed_job(factory, status) -> str:
+    with factory() as session:
+        job = TrainingJob(model_id=1, status=status)
+        session.add(job)
+        session.commit()
+        return job.id
+
+
+def test_crashed_job_is_marked_failed_unless_already_finished(training_session_factory):
+    running = _seed_job(training_session_factory, TrainingStatus.RUNNING)
+    cancelled = _seed_job(training_session_factory, TrainingStatus.CANCELLED)
+
+    with patch("app.callbacks.metrics_callback.schedule_room_emit") as emit:
+        _fail_crashed_job(running, -9)
+        _fail_crashed_job(cancelled, -9)
+
+    with training_session_factory() as session:
+        job = session.get(TrainingJob, running)
+        error = job.error_message
+        assert job.status == TrainingStatus.FAILED
+        assert "exit code -9" in error and "out of memory" in error
+        assert session.get(TrainingJob, cancelled).status == TrainingStatus.CANCELLED
+    emit.assert_called_once()
+    assert emit.call_args.args[2:] == (running, {"type": "status", "status": "failed", "error": error})
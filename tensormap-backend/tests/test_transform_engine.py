@@ -0,0 +1,188 @@
+"""Tests for the streaming fit/apply preprocessing engine."""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services import transform_engine
+from app.services.dataset_reader import DatasetReader
+from app.services.transform_engine import (
+    CategoricalToNumerical,
+    DropColumn,
+    FillMissing,
+    LogTransform,
+    MinMaxNormalize,
+    OneHotEncode,
+    Transform,
+    ZscoreStandardize,
+    _plan_pass,
+    fit_pipeline,
+    run_pipeline,
+)
+
+
+@pytest.fixture()
+def dataset_csv(tmp_path):
+    rng = np.random.default_rng(7)
+    n = 500
+    age = rng.integers(18, 90, n).astype(float)
+    age[rng.random(n) < 0.1] = np.nan
+    df = pd.DataFrame(
+        {
+            "age": age,
+            "income": rng.lognormal(10, 1, n),
+            "city": rng.choice(["paris", "oslo", "lima", "cairo"], n),
+            "grade": rng.choice(["a", "b", "c"], n),
+            "noise": rng.normal(size=n),
+        }
+    )
+    path = tmp_path / "data.csv"
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+def _reference(df: pd.DataFrame) -> pd.DataFrame:
+    """The same pipeline applied step by step to the whole frame."""
+    df["age"] = df["age"].fillna(df["age"].median())
+    df["age"] = (df["age"] - df["age"].mean()) / df["age"].std()
+    df["income"] = np.log1p(df["income"])
+    df["income"] = (df["income"] - df["income"].min()) / (df["income"].max() - df["income"].min())
+    df["grade"] = pd.Categorical(df["grade"]).codes
+    df = pd.get_dummies(df, columns=["city"], dtype=int)
+    return df.drop(columns=["noise"])
+
+
+def _pipeline():
+    return [
+        FillMissing("age", {"strategy": "median"}),
+        ZscoreStandardize("age"),
+        LogTransform("income"),
+        MinMaxNormalize("income"),
+        CategoricalToNumerical("grade"),
+        OneHotEncode("city"),
+        DropColumn("noise"),
+    ]
+
+
+@pytest.mark.parametrize("chunksize,workers", [(10_000, 1), (64, 1), (64, 2)])
+def test_pipeline_matches_whole_frame(tmp_path, dataset_csv, chunksize, workers):
+    out = tmp_path / "out.csv"
+    run_pipeline(DatasetReader(dataset_csv), _pipeline(), str(out), chunksize=chunksize, workers=workers)
+
+    expected = _reference(pd.read_csv(dataset_csv))
+    pd.testing.assert_frame_equal(pd.read_csv(out), pd.read_csv(pd.io.common.StringIO(expected.to_csv(index=False))))
+
+
+def test_apply_pool_is_shared_across_calls(tmp_path, dataset_csv):
+    outputs = []
+    for name in ("first.csv", "second.csv"):
+        out = tmp_path / name
+        run_pipeline(DatasetReader(dataset_csv), _pipeline(), str(out), chunksize=64, workers=2)
+        outputs.append(out.read_text())
+        pool = transform_engine._pools[2]
+        if name == "first.csv":
+            first_pool = pool
+
+    assert pool is first_pool
+    assert outputs[0] == outputs[1]
+
+
+def test_transform_requires_apply():
+    with pytest.raises(TypeError):
+        Transform("v")
+
+
+def test_dependent_transforms_are_fitted_in_later_pass():
+    transforms = _pipeline()
+    assert _plan_pass(transforms, [not t.needs_fit for t in transforms]) == [
+        "fit",
+        "skip",
+        "fit",
+        "skip",
+        "fit",
+        "fit",
+        "apply",
+    ]
+    fitted = [True, False, True, False, True, True, True]
+    assert _plan_pass(transforms, fitted) == ["apply", "fit", "apply", "fit", "apply", "apply", "apply"]
+
+
+def test_log_transform_counts_invalid_values_across_chunks(tmp_path):
+    path = tmp_path / "neg.csv"
+    path.write_text("v\n-5\n1\n-2\n3\n-9\n")
+    with pytest.raises(ValueError, match="3 value"):
+        run_pipeline(DatasetReader(str(path)), [LogTransform("v")], str(tmp_path / "out.csv"), chunksize=2)
+
+
+def test_categories_cover_every_chunk(tmp_path):
+    # A value first seen in the last chunk still gets its own dummy column in every block.
+    path = tmp_path / "late.csv"
+    path.write_text("c,x\nb,1\nb,2\na,3\nz,4\n")
+    out = tmp_path / "out.csv"
+    run_pipeline(DatasetReader(str(path)), [OneHotEncode("c")], str(out), chunksize=2, workers=1)
+
+    assert pd.read_csv(out).to_dict("list") == {
+        "x": [1, 2, 3, 4],
+        "c_a": [0, 0, 1, 0],
+        "c_b": [1, 1, 0, 0],
+        "c_z": [0, 0, 0, 1],
+    }
+
+
+def test_mode_fill_uses_global_counts(tmp_path):
+    path = tmp_path / "mode.csv"
+    path.write_text("v,k\n1,a\n1,b\n,c\n2,d\n2,e\n2,f\n")
+    out = tmp_path / "out.csv"
+    run_pipeline(DatasetReader(str(path)), [FillMissing("v", {"strategy": "mode"})], str(out), chunksize=2)
+
+    assert pd.read_csv(out)["v"].tolist() == [1.0, 1.0, 2.0, 2.0, 2.0, 2.0]
+
+
+def test_median_fill_streams_exact_median(tmp_path):
+    rng = np.random.default_rng(3)
+    values = rng.normal(size=20_000)
+    values[rng.random(values.size) < 0.2] = np.nan
+    path = tmp_path / "median.csv"
+    pd.DataFrame({"v": values}).to_csv(path, index=False)
+    fill = FillMissing("v", {"strategy": "median"})
+
+    fit_pipeline(lambda: DatasetReader(str(path)).iter_chunks(500), [fill])
+
+    assert fill.fill_value == pd.read_csv(path)["v"].median()
+
+
+def test_median_fill_rejects_text(tmp_path):
+    path = tmp_path / "text.csv"
+    path.write_text("v\na\n\nb\n")
+    with pytest.raises(TypeError, match="median"):
+        run_pipeline(DatasetReader(str(path)), [FillMissing("v", {"strategy": "median"})], str(tmp_path / "out.csv"))
+
+
+def test_unknown_fill_strategy_rejected_up_front():
+    with pytest.raises(ValueError, match="Unknown fill strategy"):
+        FillMissing("v", {"strategy": "interpolate"})
+
+
+def test_fitted_state_round_trips_through_json(dataset_csv):
+    reader = DatasetReader(dataset_csv)
+    schema = reader.schema()
+    fitted = _pipeline()
+    fit_pipeline(lambda: reader.iter_chunks(schema=schema), fitted)
+
+    restored = []
+    for t in fitted:
+        clone = type(t)(t.column, t.params)
+        clone.set_state(json.loads(json.dumps(t.get_state(), allow_nan=False)))
+        restored.append(clone)
+
+    df = next(reader.iter_chunks(schema=schema))
+    expected, got = df.copy(), df.copy()
+    for a, b in zip(fitted, restored, strict=True):
+        expected, got = a.apply(expected), b.apply(got)
+    pd.testing.assert_frame_equal(got, expected)
+    columns = list(df.columns)
+    for t in restored:
+        columns = t.output_columns(columns)
+    assert columns == list(got.columns)
@@ -0,0 +1,126 @@
+"""Tests for resumable chunked uploads."""
+
+import hashlib
+import io
+import os
+import uuid
+from unittest.mock import patch
+
+import pytest
+from sqlmodel import select
+
+from app.models import DataFile, UploadSession
+from app.services.file_profiling import profile_file
+from app.services.upload_session import merge_range, missing_ranges
+
+CSV = b"a,b,c\n" + b"".join(b"%d,%d.5,name%d\n" % (i, i, i) for i in range(2000))
+SHA = hashlib.sha256(CSV).hexdigest()
+URL = "/api/v1/data/upload/sessions"
+
+
+@pytest.fixture()
+def upload_dir(tmp_path):
+    with (
+        patch("app.services.upload_session.get_settings") as ms,
+        patch("app.services.data_upload.get_settings", ms),
+        patch("app.services.file_profiling.get_settings", ms),
+        patch("app.services.data_upload.schedule_profile"),
+    ):
+        ms.return_value.upload_folder = str(tmp_path)
+        ms.return_value.max_content_length = 1024 * 1024
+        yield tmp_path
+
+
+def _create(client, **extra):
+    resp = client.post(URL, json={"file_name": "big.csv", "total_size": len(CSV), **extra})
+    assert resp.status_code == 201, resp.text
+    return resp.json()["data"]["session_id"]
+
+
+def _put(client, session_id, index, offset, data):
+    return client.put(
+        f"{URL}/{session_id}/chunks/{index}",
+        data={"offset": str(offset)},
+        files={"chunk": ("blob", io.BytesIO(data), "application/octet-stream")},
+    )
+
+
+def test_range_bookkeeping():
+    ranges = merge_range([], 10, 20)
+    ranges = merge_range(ranges, 30, 40)
+    assert missing_ranges(ranges, 50) == [[0, 10], [20, 30], [40, 50]]
+    ranges = merge_range(ranges, 15, 30)  # overlap + adjacency coalesce
+    assert ranges == [[10, 40]]
+    assert missing_ranges(merge_range(ranges, 0, 50), 50) == []
+
+
+def test_out_of_order_chunks_resume_and_finalize(client, db_session, upload_dir):
+    session_id = _create(client, sha256=SHA)
+    size = 4096
+    chunks = [(i, off, CSV[off : off + size]) for i, off in enumerate(range(0, len(CSV), size))]
+
+    # Send every other chunk, then "reconnect" and ask what is missing.
+    for index, offset, data in chunks[::-2]:
+        assert _put(client, session_id, index, offset, data).status_code == 200
+    status = client.get(f"{URL}/{session_id}").json()["data"]
+    assert status["missing"] and status["bytes_received"] < len(CSV)
+
+    resp = client.post(f"{URL}/{session_id}/finalize")
+    assert resp.status_code == 409
+    assert resp.json()["data"]["missing"] == status["missing"]
+
+    for index, offset, data in chunks:
+        if any(lo <= offset < hi for lo, hi in status["missing"]):
+            assert _put(client, session_id, index, offset, data).status_code == 200
+
+    resp = client.post(f"{URL}/{session_id}/finalize")
+    assert resp.status_code == 201, resp.text
+    file_id = uuid.UUID(resp.json()["data"]["file_id"])
+    with patch("app.services.file_profiling._notify"):
+        profile_file(db_session, file_id)
+    file = db_session.get(DataFile, file_id)
+    assert (file.content_hash, file.row_count, file.columns) == (SHA, 2000, ["a", "b", "c"])
+    assert (upload_dir / file.disk_name).read_bytes() == CSV
+    assert db_session.exec(select(UploadSession)).all() == []
+    assert os.listdir(upload_dir / ".sessions") == []
+
+
+def test_checksum_mismatch_resets_session(client, db_session, upload_dir):
+    session_id = _create(client)
+    assert _put(client, session_id, 0, 0, CSV[:-1] + b"X").status_code == 200
+
+    assert client.post(f"{URL}/{session_id}/finalize").status_code == 400  # no checksum anywhere
+    resp = client.post(f"{URL}/{session_id}/finalize", json={"sha256": SHA})
+    assert resp.status_code == 422
+    assert client.get(f"{URL}/{session_id}").json()["data"]["received"] == []
+    assert db_session.exec(select(DataFile)).all() == []
+    assert not (upload_dir / "blobs").exists()
+
+    assert _put(client, session_id, 0, 0, CSV).status_code == 200
+    assert client.post(f"{URL}/{session_id}/finalize", json={"sha256": SHA}).status_code == 201
+
+
+def test_rejects_bad_sessions_and_chunks(client, upload_dir):
+    resp = client.post(URL, json={"file_name": "big.csv", "total_size": 2 * 1024 * 1024})
+    assert resp.status_code == 413
+    assert client.post(URL, json={"file_name": "notes.txt", "total_size": 10}).status_code == 400
+    assert _put(client, uuid.uuid4(), 0, 0, b"abc").status_code == 404
+
+    session_id = _create(client)
+    assert _put(client, session_id, 0, len(CSV) - 2, b"abc").status_code == 400
+    assert _put(client, session_id, 0, len(CSV), b"a").status_code == 400
+
+    assert client.delete(f"{URL}/{session_id}").status_code == 200
+    assert client.get(f"{URL}/{session_id}").status_code == 404
+    assert os.listdir(upload_dir / ".sessions") == []
+
+
+def test_overrunning_chunk_writes_nothing(client, upload_dir):
+    session_id = _create(client)
+
+    # Several blocks, the last of which would run past the end of the file.
+    with patch("app.services.upload_session.BLOCK_SIZE", 4):
+        assert _put(client, session_id, 0, len(CSV) - 10, b"x" * 12).status_code == 400
+
+    assert (upload_dir / ".sessions" / f"{uuid.UUID(session_id).hex}.part").read_bytes() == bytes(len(CSV))
+    assert client.get(f"{URL}/{session_id}").json()["data"]["received"] == []
@@ -80,6 +80,15 @@ const statusLine = (status, error) => {
   return `Status: ${status}`;
 };
 
+// A job waiting for a free training slot: its place in the queue and, once the
+// server has run times to go by, when it is expected to start.
+const queueLine = (job) => {
+  const eta = job.estimated_start_at
+    ? `, expected to start at ${new Date(job.estimated_start_at).toLocaleTimeString()}`
+    : "";
+  return `Queued: position ${job.queue_position}${eta}.`;
+};
+
 const TERMINAL_STATUSES = ["completed", "failed", "cancelled"];
 
 export default function Training() {
@@ -503,7 +512,8 @@ export default function Training() {
     (data) => {
       clearTimeout(timeoutRef.current);
       if (data.type === "catchup") {
-        setResultValues((data.metrics || []).map(formatMetricLine));
+        // Nothing persisted yet (e.g. still queued): keep what is shown.
+        if (data.metrics?.length) setResultValues(data.metrics.map(formatMetricLine));
         if (TERMINAL_STATUSES.includes(data.status)) {
           setResultValues((prev) => [...prev, statusLine(data.status)]);
           finishTraining();
@@ -543,6 +553,9 @@ export default function Training() {
     runModel(selectedModel, projectId)
       .then((job) => {
         currentJobIdRef.current = job.job_id;
+        if (job.status === "queued") {
+          setResultValues([queueLine(job)]);
+        }
         if (jobCleanupRef.current) {
           jobCleanupRef.current();
         }
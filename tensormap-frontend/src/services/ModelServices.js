@@ -186,7 +186,7 @@ export const runModel = async (modelName, projectId) => {
     .post(urls.BACKEND_RUN_MODEL, data)
     .then((resp) => {
       if (resp.data.success === true && resp.data.data?.job_id) {
-        return resp.data.data; // { job_id, status }
+        return resp.data.data; // { job_id, status, priority, queue_position, estimated_start_at }
       }
       throw new Error(resp.data?.message ?? JSON.stringify(resp.data));
     })